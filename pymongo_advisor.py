@@ -0,0 +1,342 @@
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+
+from pymongo_indexes import IndexSpec, index_keys
+from pymongo_optimizer import PipelineOptimizer
+from pymongo_pipelines import Pipelines
+
+_EQUALITY_OPERATORS: frozenset[str] = frozenset({"$eq", "$in"})
+_RANGE_OPERATORS: frozenset[str] = frozenset({"$gt", "$gte", "$lt", "$lte"})
+# Stages that write their input elsewhere; explain with executionStats refuses them, so they are cut off
+_OUTPUT_STAGES: frozenset[str] = frozenset({"$out", "$merge"})
+_SOURCES: dict[str, str] = {"find": "fetch_document", "update": "update_document", "delete": "delete_document"}
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """One query to explain: a find/update/delete filter (with optional sort) or an aggregation pipeline."""
+
+    source: str
+    kind: str
+    database_name: str
+    collection_name: str
+    filter: dict[str, Any] = field(default_factory=dict)
+    sort: Optional[tuple[tuple[str, Any], ...]] = None
+    pipeline: Optional[list[dict[str, Any]]] = None
+    many: bool = True
+
+    @property
+    def namespace(self) -> str:
+        return f"{self.database_name}.{self.collection_name}"
+
+
+@dataclass(frozen=True)
+class ExplainStats:
+    """The parts of an ``executionStats`` explain the advisor looks at."""
+
+    stages: tuple[str, ...]
+    indexes: tuple[str, ...]
+    docs_examined: int
+    keys_examined: int
+    returned: int
+    millis: int
+    # (foreign collection, collection scans, indexes used) per $lookup, from aggregation explains
+    lookups: tuple[tuple[str, int, tuple[str, ...]], ...] = ()
+
+    @property
+    def collection_scan(self) -> bool:
+        return "COLLSCAN" in self.stages
+
+    @property
+    def in_memory_sort(self) -> bool:
+        return "SORT" in self.stages
+
+    @property
+    def examined_ratio(self) -> float:
+        return max(self.docs_examined, self.keys_examined) / max(self.returned, 1)
+
+
+@dataclass
+class Finding:
+    shape: QueryShape
+    stats: Optional[ExplainStats]
+    issues: list[str] = field(default_factory=list)
+    recommendations: list[tuple[str, IndexSpec]] = field(default_factory=list)
+    error: Optional[str] = None
+    remeasured: Optional[ExplainStats] = None
+
+
+class QueryLog:
+    """Distinct filter shapes seen by ``fetch_document``/``update_document``/``delete_document`` (off by default).
+
+    Shapes group queries that differ only in their values, keeping the latest concrete filter as
+    the example to explain. At most ``max_shapes`` are kept, least recently seen dropped first.
+    """
+
+    enabled: bool = False
+    max_shapes: int = 1000
+
+    _lock: threading.Lock = threading.Lock()
+    _shapes: "OrderedDict[tuple[Any, ...], tuple[QueryShape, int]]" = OrderedDict()
+
+    @classmethod
+    def configure(cls, enabled: bool | None = None, max_shapes: int | None = None) -> None:
+        if max_shapes is not None:
+            if max_shapes <= 0:
+                raise ValueError("max_shapes must be a positive integer.")
+            cls.max_shapes = max_shapes
+        if enabled is not None:
+            cls.enabled = enabled
+
+    @classmethod
+    def record(cls, kind: str, database_name: str, collection_name: str, filter_: Mapping[str, Any] | None,
+               sort: Iterable[tuple[str, Any]] | None = None, many: bool = True) -> None:
+        if not cls.enabled:
+            return
+        sort_keys: Optional[tuple[tuple[str, Any], ...]] = tuple(sort) if sort else None
+        key = (kind, database_name, collection_name, repr(QueryLog.__shape(filter_ or {})), sort_keys, many)
+        shape = QueryShape(_SOURCES.get(kind, kind), kind, database_name, collection_name, copy.deepcopy(dict(filter_ or {})), sort_keys, many=many)
+        with cls._lock:
+            previous: Optional[tuple[QueryShape, int]] = cls._shapes.pop(key, None)
+            cls._shapes[key] = (shape, (previous[1] if previous else 0) + 1)
+            while len(cls._shapes) > cls.max_shapes:
+                cls._shapes.popitem(last=False)
+
+    @classmethod
+    def shapes(cls) -> list[tuple[QueryShape, int]]:
+        """``(example, times seen)`` per distinct shape, most frequent first."""
+        with cls._lock:
+            recorded = list(cls._shapes.values())
+        return sorted(recorded, key=lambda item: item[1], reverse=True)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._shapes.clear()
+
+    @staticmethod
+    def __shape(value: Any) -> Any:
+        if isinstance(value, Mapping):
+            return {key: QueryLog.__shape(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [QueryLog.__shape(item) for item in value]
+        return type(value).__name__
+
+
+class IndexAdvisor:
+    """Explain queries with ``executionStats`` and recommend indexes for the ones that scan too much.
+
+    A query is flagged for a collection scan under a filter, an in-memory sort, a
+    docs-examined-to-returned ratio above ``max_ratio``, or a ``$lookup`` that scans the foreign
+    collection. Recommendations follow the equality, sort, range order; a ``$lookup`` gets an
+    index on its ``foreignField``. Indexes whose keys already start with a recommendation are
+    counted as present.
+    """
+
+    max_ratio: float = 10.0
+
+    @staticmethod
+    def library_shapes(cars: tuple[str, str] = ("Test", "cars"), users: tuple[str, str] = ("store_db", "users")) -> list[QueryShape]:
+        """Every ``Pipelines.pipeline_*`` on the cars namespace and ``join_pipeline`` on the users namespace, as MongoDbOperation runs them."""
+        names: list[str] = sorted((name for name in vars(Pipelines) if name.startswith("pipeline_")), key=lambda name: int(name.rsplit("_", 1)[1]))
+        shapes: list[QueryShape] = [QueryShape(f"Pipelines.{name}", "aggregate", *cars, pipeline=getattr(Pipelines, name)()) for name in names]
+        shapes.append(QueryShape("Pipelines.join_pipeline", "aggregate", *users, pipeline=Pipelines.join_pipeline()))
+        return shapes
+
+    @staticmethod
+    def analyze(client: MongoClient, shapes: Iterable[QueryShape]) -> list[Finding]:
+        findings: list[Finding] = []
+        indexes: dict[str, list[tuple[tuple[str, Any], ...]]] = {}
+        for shape in shapes:
+            try:
+                stats: ExplainStats = IndexAdvisor.explain(client, shape)
+            except OperationFailure as ex:
+                logging.warning(f"Could not explain {shape.source} on '{shape.namespace}': {ex}")
+                findings.append(Finding(shape, None, error=str(ex)))
+                continue
+            finding = Finding(shape, stats)
+            IndexAdvisor.__diagnose(finding)
+            for namespace, spec, needed in IndexAdvisor.__candidates(shape, finding):
+                if not needed:
+                    continue
+                if namespace not in indexes:
+                    database_name, collection_name = namespace.split(".", 1)
+                    indexes[namespace] = [index_keys(index) for index in client[database_name][collection_name].list_indexes()]
+                if not any(existing[:len(spec.keys)] == spec.keys for existing in indexes[namespace]):
+                    finding.recommendations.append((namespace, spec))
+            findings.append(finding)
+        return findings
+
+    @staticmethod
+    def explain(client: MongoClient, shape: QueryShape) -> ExplainStats:
+        database = client[shape.database_name]
+        if shape.kind == "aggregate":
+            pipeline = [stage for stage in shape.pipeline or [] if not _OUTPUT_STAGES & stage.keys()]
+            command: dict[str, Any] = {"aggregate": shape.collection_name, "pipeline": pipeline, "cursor": {}}
+        elif shape.kind == "update":
+            command = {"update": shape.collection_name, "updates": [{"q": shape.filter, "u": {"$set": {"_advisor": 1}}, "multi": shape.many}]}
+        elif shape.kind == "delete":
+            command = {"delete": shape.collection_name, "deletes": [{"q": shape.filter, "limit": 0 if shape.many else 1}]}
+        else:
+            command = {"find": shape.collection_name, "filter": shape.filter}
+            if shape.sort:
+                command["sort"] = dict(shape.sort)
+        # Explaining a write never applies it
+        return IndexAdvisor.parse(database.command({"explain": command, "verbosity": "executionStats"}))
+
+    @staticmethod
+    def parse(explain: Mapping[str, Any]) -> ExplainStats:
+        """Reduce a find, write or aggregate explain (classic or slot-based engine) to ``ExplainStats``."""
+        planned: Optional[Mapping[str, Any]] = next(IndexAdvisor.__find(explain, "queryPlanner"), None)
+        winning: Mapping[str, Any] = (planned or {}).get("queryPlanner", {}).get("winningPlan", {})
+        execution: Mapping[str, Any] = (planned or {}).get("executionStats", {})
+        stages: list[str] = []
+        indexes: list[str] = []
+        for node in IndexAdvisor.__plan_nodes(winning.get("queryPlan", winning)):
+            stages.append(node.get("stage", ""))
+            if node.get("indexName"):
+                indexes.append(node["indexName"])
+
+        lookups: list[tuple[str, int, tuple[str, ...]]] = []
+        returned: int = execution.get("nReturned", 0)
+        for stage in explain.get("stages", []):
+            if "$lookup" in stage:
+                lookups.append((stage["$lookup"].get("from", ""), stage.get("collectionScans", 0), tuple(stage.get("indexesUsed", []))))
+            if "nReturned" in stage:
+                returned = stage["nReturned"]
+        return ExplainStats(tuple(stages), tuple(indexes), execution.get("totalDocsExamined", 0), execution.get("totalKeysExamined", 0),
+                            returned, execution.get("executionTimeMillis", explain.get("executionTimeMillis", 0)), tuple(lookups))
+
+    @staticmethod
+    def recommendations(findings: Iterable[Finding]) -> dict[str, list[IndexSpec]]:
+        """Distinct recommended indexes per namespace; one that is a key prefix of another is dropped."""
+        by_namespace: dict[str, list[IndexSpec]] = {}
+        for finding in findings:
+            for namespace, spec in finding.recommendations:
+                specs = by_namespace.setdefault(namespace, [])
+                if spec not in specs:
+                    specs.append(spec)
+        return {namespace: [spec for spec in specs if not any(other.keys[:len(spec.keys)] == spec.keys and other != spec for other in specs)]
+                for namespace, specs in by_namespace.items()}
+
+    @staticmethod
+    def report(findings: Iterable[Finding]) -> str:
+        lines: list[str] = []
+        for finding in findings:
+            lines.append(f"{finding.shape.source} on '{finding.shape.namespace}':")
+            if finding.stats is None:
+                lines.append(f"  ❌ explain failed: {finding.error}")
+                continue
+            lines.append(f"  {IndexAdvisor.__describe(finding.stats)}")
+            lines += [f"  ❌ {issue}" for issue in finding.issues] or ["  ✅ no issues"]
+            for namespace, spec in finding.recommendations:
+                lines.append(f"  recommend on '{namespace}': {dict(spec.keys)}")
+            if finding.remeasured is not None:
+                lines.append(f"  after: {IndexAdvisor.__describe(finding.remeasured)}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def __diagnose(finding: Finding) -> None:
+        stats: ExplainStats = finding.stats
+        shape: QueryShape = finding.shape
+        filtered: bool = bool(IndexAdvisor.__leading_query(shape)[0])
+        if stats.collection_scan and filtered:
+            finding.issues.append(f"COLLSCAN: {stats.docs_examined} document(s) examined for {stats.returned} returned")
+        if stats.in_memory_sort:
+            finding.issues.append("in-memory SORT")
+        if filtered and stats.examined_ratio > IndexAdvisor.max_ratio:
+            finding.issues.append(f"examined/returned ratio {stats.examined_ratio:.1f} exceeds {IndexAdvisor.max_ratio:g}")
+        for foreign, scans, used in stats.lookups:
+            if scans and not used:
+                finding.issues.append(f"$lookup into '{foreign}' ran {scans} collection scan(s)")
+
+    @staticmethod
+    def __candidates(shape: QueryShape, finding: Finding) -> Iterator[tuple[str, IndexSpec, bool]]:
+        """``(namespace, index, needed)``: the ESR index for the query and one per ``$lookup`` foreignField."""
+        query, sort = IndexAdvisor.__leading_query(shape)
+        equality: list[tuple[str, Any]] = []
+        ranges: list[tuple[str, Any]] = []
+        for name, condition in IndexAdvisor.__conditions(query):
+            if isinstance(condition, Mapping) and any(operator.startswith("$") for operator in condition):
+                operators: set[str] = set(condition)
+                if operators <= _EQUALITY_OPERATORS:
+                    equality.append((name, 1))
+                elif operators <= _RANGE_OPERATORS | {"$options", "$regex"} and ("$regex" not in operators or str(condition["$regex"]).startswith("^")):
+                    ranges.append((name, 1))
+            else:
+                equality.append((name, 1))
+
+        keys: list[tuple[str, Any]] = []
+        for key in [*equality, *(sort or ()), *ranges[:1]]:
+            if key[0] not in {name for name, _ in keys}:
+                keys.append(key)
+        if keys:
+            yield shape.namespace, IndexSpec.of(keys), any(not issue.startswith("$lookup") for issue in finding.issues)
+
+        scanned: dict[str, bool] = {foreign: bool(scans) and not used for foreign, scans, used in finding.stats.lookups}
+        for stage in shape.pipeline or []:
+            lookup: Any = stage.get("$lookup")
+            if isinstance(lookup, Mapping) and isinstance(lookup.get("from"), str) and lookup.get("foreignField") and lookup["foreignField"] != "_id":
+                # Servers before 5.0 report no $lookup statistics; the existing-index check alone decides there
+                yield f"{shape.database_name}.{lookup['from']}", IndexSpec.of(lookup["foreignField"]), scanned.get(lookup["from"], True)
+
+    @staticmethod
+    def __leading_query(shape: QueryShape) -> tuple[dict[str, Any], Optional[tuple[tuple[str, Any], ...]]]:
+        """The filter and sort the server can answer from an index, for aggregations the leading $match/$sort."""
+        if shape.kind != "aggregate":
+            return shape.filter, shape.sort
+        query: dict[str, Any] = {}
+        sort: Optional[tuple[tuple[str, Any], ...]] = None
+        for stage in PipelineOptimizer.optimize(shape.pipeline or []).pipeline:
+            if "$match" in stage and sort is None:
+                query = {"$and": [query, stage["$match"]]} if query else dict(stage["$match"])
+            elif "$sort" in stage and sort is None:
+                sort = tuple(stage["$sort"].items())
+            else:
+                break
+        return query, sort
+
+    @staticmethod
+    def __conditions(query: Mapping[str, Any]) -> Iterator[tuple[str, Any]]:
+        for name, condition in query.items():
+            if name == "$and":
+                for clause in condition:
+                    yield from IndexAdvisor.__conditions(clause)
+            elif not name.startswith("$"):
+                yield name, condition
+
+    @staticmethod
+    def __find(value: Any, key: str) -> Iterator[Mapping[str, Any]]:
+        if isinstance(value, Mapping):
+            if key in value:
+                yield value
+            for item in value.values():
+                yield from IndexAdvisor.__find(item, key)
+        elif isinstance(value, list):
+            for item in value:
+                yield from IndexAdvisor.__find(item, key)
+
+    @staticmethod
+    def __plan_nodes(node: Mapping[str, Any]) -> Iterator[Mapping[str, Any]]:
+        if not node:
+            return
+        yield node
+        for child in ("inputStage", "outerStage", "innerStage", "thenStage", "elseStage"):
+            if child in node:
+                yield from IndexAdvisor.__plan_nodes(node[child])
+        for child in node.get("inputStages", []):
+            yield from IndexAdvisor.__plan_nodes(child)
+
+    @staticmethod
+    def __describe(stats: ExplainStats) -> str:
+        plan: str = " <- ".join(stats.stages) or "no plan"
+        used: str = f" using {', '.join(stats.indexes)}" if stats.indexes else ""
+        return (f"{plan}{used}: {stats.docs_examined} docs / {stats.keys_examined} keys examined, {stats.returned} returned, "
+                f"{stats.millis} ms")
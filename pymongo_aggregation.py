@@ -0,0 +1,1407 @@
+import copy
+import datetime
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Iterator, Mapping, MutableMapping, Optional
+
+import bson
+from bson import ObjectId
+from bson.errors import InvalidDocument
+from bson.regex import Regex
+
+
+class _Missing:
+    """Marker for a field path that resolves to nothing (distinct from an explicit null)."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __bool__(self) -> bool:
+        return False
+
+
+MISSING: Any = _Missing()
+
+
+class AggregationError(ValueError):
+    """Raised where the server would fail the aggregation, or for stages/operators the local engine does not support."""
+
+
+# BSON comparison order: https://www.mongodb.com/docs/manual/reference/bson-type-comparison-order/
+def _type_rank(value: Any) -> int:
+    if value is MISSING:
+        return 0
+    if value is None:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, Mapping):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 5
+    if isinstance(value, bytes):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime.datetime):
+        return 9
+    if isinstance(value, (re.Pattern, Regex)):
+        return 11
+    return 12
+
+
+def compare_values(left: Any, right: Any) -> int:
+    """Three-way comparison following BSON type order, as $sort and the comparison operators do."""
+    left_rank, right_rank = _type_rank(left), _type_rank(right)
+    if left_rank != right_rank:
+        return -1 if left_rank < right_rank else 1
+    if left_rank <= 1:
+        return 0
+    if left_rank == 4:
+        for (left_key, left_value), (right_key, right_value) in zip(left.items(), right.items()):
+            result = compare_values(left_key, right_key) or compare_values(left_value, right_value)
+            if result:
+                return result
+        return (len(left) > len(right)) - (len(left) < len(right))
+    if left_rank == 5:
+        for left_item, right_item in zip(left, right):
+            result = compare_values(left_item, right_item)
+            if result:
+                return result
+        return (len(left) > len(right)) - (len(left) < len(right))
+    if left_rank == 11:
+        left, right = str(left), str(right)
+    if left_rank == 2 and (math.isnan(left) or math.isnan(right)):
+        # NaN sorts below every other number
+        return (not math.isnan(left)) - (not math.isnan(right))
+    return (left > right) - (left < right)
+
+
+def is_truthy(value: Any) -> bool:
+    """Aggregation truthiness: only false, null, missing and numeric zero are false."""
+    if value is MISSING or value is None or value is False:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0
+    return True
+
+
+def get_path(document: Any, path: str) -> Any:
+    """Resolve a dotted field path the way "$a.b" does: arrays along the way map over their elements."""
+    value: Any = document
+    for part in path.split("."):
+        if isinstance(value, Mapping):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list):
+            value = [item.get(part, MISSING) if isinstance(item, Mapping) else MISSING for item in value]
+            value = [item for item in value if item is not MISSING]
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+
+def set_path(document: MutableMapping[str, Any], path: str, value: Any) -> None:
+    parts = path.split(".")
+    target: MutableMapping[str, Any] = document
+    for part in parts[:-1]:
+        child = target.get(part)
+        # Copy embedded documents on the way down: they may be shared with the input document
+        child = dict(child) if isinstance(child, Mapping) else {}
+        target[part] = child
+        target = child
+    target[parts[-1]] = value
+
+
+def freeze(value: Any) -> Any:
+    """Hashable form of a BSON value, used for $group keys and $lookup joins (1 and 1.0 group together)."""
+    if isinstance(value, Mapping):
+        return ("__doc__", tuple((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return ("__array__", tuple(freeze(item) for item in value))
+    if value is MISSING:
+        return None
+    if isinstance(value, bool):
+        return ("__bool__", value)
+    return value
+
+
+def to_string(value: Any) -> Any:
+    if value is MISSING or value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+    if isinstance(value, (str, int, ObjectId)):
+        return str(value)
+    raise AggregationError(f"$toString: unsupported conversion from {type(value).__name__}")
+
+
+def _canonical(value: Any) -> Any:
+    # Field-order-insensitive form for comparing result documents
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _canonical(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _null_if_missing(value: Any) -> Any:
+    # $sort and the accumulators treat missing fields as null
+    return None if value is MISSING else value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _arguments(operand: Any) -> list[Any]:
+    return operand if isinstance(operand, list) else [operand]
+
+
+class LocalAggregation:
+    """Evaluate aggregation pipelines in-process over lists or iterators of dicts.
+
+    Supports the stages and expression operators used by ``Pipelines``, which is enough to run
+    them in tests and offline jobs without a server. Semantics follow the server for missing
+    fields, BSON comparison order and truthiness.
+    """
+
+    EXPRESSION_OPERATORS: dict[str, Callable[..., Any]] = {}
+    STAGES: dict[str, Callable[..., Iterator[dict[str, Any]]]] = {}
+    # Compiled counterparts; operators and stages without an entry fall back to the handlers above
+    EXPRESSION_COMPILERS: dict[str, Callable[[Any], Callable[..., Any]]] = {}
+    STAGE_COMPILERS: dict[str, Callable[[Any], Callable[..., Iterator[dict[str, Any]]]]] = {}
+
+    compiled_cache_size: int = 256
+    _compiled: "OrderedDict[str, CompiledPipeline]" = OrderedDict()
+    _compiled_lock: threading.Lock = threading.Lock()
+    _compile_stats: dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def aggregate(documents: Iterable[Mapping[str, Any]], pipeline: list[dict[str, Any]],
+                  collections: Optional[MutableMapping[str, list[dict[str, Any]]]] = None, compiled: bool = True) -> Iterator[dict[str, Any]]:
+        """Run ``pipeline`` over ``documents``.
+
+        ``collections`` supplies the ``from`` side of ``$lookup`` and receives ``$out`` results,
+        keyed by collection name. By default the pipeline is compiled once (and cached); pass
+        ``compiled=False`` to walk the expression trees for every document instead.
+        """
+        if compiled:
+            return LocalAggregation.compile(pipeline).run(documents, collections)
+
+        stream: Iterator[dict[str, Any]] = (dict(document) for document in documents)
+        context: MutableMapping[str, list[dict[str, Any]]] = collections if collections is not None else {}
+        for name, spec in LocalAggregation.stages_of(pipeline):
+            stream = LocalAggregation.STAGES[name](stream, spec, context)
+        return stream
+
+    @staticmethod
+    def stages_of(pipeline: list[dict[str, Any]]) -> Iterator[tuple[str, Any]]:
+        """Validate ``pipeline`` and yield each stage as ``(name, spec)``."""
+        if not isinstance(pipeline, list):
+            raise AggregationError("Aggregation pipeline must be a list of stages.")
+        for position, stage in enumerate(pipeline):
+            if not isinstance(stage, Mapping) or len(stage) != 1:
+                raise AggregationError(f"Stage {position} must be a document with exactly one field.")
+            name, spec = next(iter(stage.items()))
+            if name not in LocalAggregation.STAGES:
+                raise AggregationError(f"Unsupported pipeline stage: {name}")
+            if name == "$out" and position != len(pipeline) - 1:
+                raise AggregationError("$out can only be the final stage in the pipeline.")
+            yield name, spec
+
+    @staticmethod
+    def compile(pipeline: list[dict[str, Any]]) -> "CompiledPipeline":
+        """Return the compiled form of ``pipeline``, reusing a cached one for structurally identical pipelines."""
+        key: str = LocalAggregation.pipeline_key(pipeline)
+        with LocalAggregation._compiled_lock:
+            compiled = LocalAggregation._compiled.get(key)
+            if compiled is not None:
+                LocalAggregation._compiled.move_to_end(key)
+                LocalAggregation._compile_stats["hits"] += 1
+                return compiled
+            LocalAggregation._compile_stats["misses"] += 1
+
+        compiled = CompiledPipeline(copy.deepcopy(pipeline), key)
+        with LocalAggregation._compiled_lock:
+            LocalAggregation._compiled[key] = compiled
+            while len(LocalAggregation._compiled) > LocalAggregation.compiled_cache_size:
+                LocalAggregation._compiled.popitem(last=False)
+        return compiled
+
+    @staticmethod
+    def pipeline_key(pipeline: list[dict[str, Any]]) -> str:
+        """Structural hash of a pipeline: equal for pipelines with the same stages, fields, field order and values."""
+        if not isinstance(pipeline, list):
+            raise AggregationError("Aggregation pipeline must be a list of stages.")
+        try:
+            encoded: bytes = bson.encode({"pipeline": pipeline})
+        except (InvalidDocument, TypeError):
+            encoded = repr(pipeline).encode()
+        return hashlib.sha1(encoded).hexdigest()
+
+    @staticmethod
+    def compile_stats() -> dict[str, int]:
+        with LocalAggregation._compiled_lock:
+            return {**LocalAggregation._compile_stats, "cached": len(LocalAggregation._compiled)}
+
+    @staticmethod
+    def clear_compiled() -> None:
+        with LocalAggregation._compiled_lock:
+            LocalAggregation._compiled.clear()
+            for key in LocalAggregation._compile_stats:
+                LocalAggregation._compile_stats[key] = 0
+
+    @staticmethod
+    def evaluate(expression: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]] = None) -> Any:
+        """Evaluate one aggregation expression against ``document``. Returns MISSING for absent fields."""
+        if isinstance(expression, str):
+            if expression.startswith("$$"):
+                name, _, path = expression[2:].partition(".")
+                if name in ("ROOT", "CURRENT"):
+                    base: Any = document
+                elif variables is not None and name in variables:
+                    base = variables[name]
+                else:
+                    raise AggregationError(f"Use of undefined variable: {name}")
+                return get_path(base, path) if path else base
+            if expression.startswith("$"):
+                return get_path(document, expression[1:])
+            return expression
+
+        if isinstance(expression, Mapping):
+            if len(expression) == 1:
+                operator, operand = next(iter(expression.items()))
+                if operator.startswith("$"):
+                    handler = LocalAggregation.EXPRESSION_OPERATORS.get(operator)
+                    if handler is None:
+                        raise AggregationError(f"Unsupported expression operator: {operator}")
+                    return handler(operand, document, variables)
+            result: dict[str, Any] = {}
+            for key, item in expression.items():
+                value = LocalAggregation.evaluate(item, document, variables)
+                if value is not MISSING:
+                    result[key] = value
+            return result
+
+        if isinstance(expression, list):
+            return [None if value is MISSING else value for value in (LocalAggregation.evaluate(item, document, variables) for item in expression)]
+
+        return expression
+
+    @staticmethod
+    def matches(query: Mapping[str, Any], document: Mapping[str, Any]) -> bool:
+        """Evaluate a ``$match`` / find filter against one document."""
+        for key, condition in query.items():
+            if key == "$and":
+                if not all(LocalAggregation.matches(sub, document) for sub in condition):
+                    return False
+            elif key == "$or":
+                if not any(LocalAggregation.matches(sub, document) for sub in condition):
+                    return False
+            elif key == "$nor":
+                if any(LocalAggregation.matches(sub, document) for sub in condition):
+                    return False
+            elif key == "$expr":
+                if not is_truthy(LocalAggregation.evaluate(condition, document)):
+                    return False
+            elif key.startswith("$"):
+                raise AggregationError(f"Unsupported query operator: {key}")
+            elif not LocalAggregation.__field_matches(get_path(document, key), condition):
+                return False
+        return True
+
+    @classmethod
+    def __field_matches(cls, value: Any, condition: Any) -> bool:
+        if isinstance(condition, Mapping) and condition and all(key.startswith("$") for key in condition):
+            return all(cls.__operator_matches(value, operator, operand, condition) for operator, operand in condition.items())
+        if isinstance(condition, (re.Pattern, Regex)):
+            return cls.__operator_matches(value, "$regex", condition, {})
+        return cls.__equals(value, condition)
+
+    @classmethod
+    def __candidates(cls, value: Any) -> list[Any]:
+        # A query against an array field matches the array itself or any of its elements
+        return [value, *value] if isinstance(value, list) else [value]
+
+    @classmethod
+    def __equals(cls, value: Any, target: Any) -> bool:
+        if target is None:
+            return value is MISSING or value is None or (isinstance(value, list) and None in value)
+        return any(_type_rank(candidate) == _type_rank(target) and compare_values(candidate, target) == 0 for candidate in cls.__candidates(value))
+
+    @classmethod
+    def __operator_matches(cls, value: Any, operator: str, operand: Any, condition: Mapping[str, Any]) -> bool:
+        if operator == "$eq":
+            return cls.__equals(value, operand)
+        if operator == "$ne":
+            return not cls.__equals(value, operand)
+        if operator in ("$gt", "$gte", "$lt", "$lte"):
+            checks: dict[str, Callable[[int], bool]] = {
+                "$gt": lambda c: c > 0, "$gte": lambda c: c >= 0, "$lt": lambda c: c < 0, "$lte": lambda c: c <= 0,
+            }
+            return any(_type_rank(candidate) == _type_rank(operand) and checks[operator](compare_values(candidate, operand))
+                       for candidate in cls.__candidates(value))
+        if operator == "$in":
+            return any(cls.__field_matches(value, item) if isinstance(item, (re.Pattern, Regex)) else cls.__equals(value, item) for item in operand)
+        if operator == "$nin":
+            return not cls.__operator_matches(value, "$in", operand, condition)
+        if operator == "$exists":
+            return (value is not MISSING) == bool(operand)
+        if operator == "$size":
+            return isinstance(value, list) and len(value) == operand
+        if operator == "$not":
+            return not cls.__field_matches(value, operand)
+        if operator == "$elemMatch":
+            return isinstance(value, list) and any(
+                cls.matches(operand, item) if isinstance(item, Mapping) else cls.__field_matches(item, operand) for item in value)
+        if operator == "$regex":
+            pattern = cls.__compile_regex(operand, condition.get("$options", ""))
+            return any(isinstance(candidate, str) and pattern.search(candidate) is not None for candidate in cls.__candidates(value))
+        if operator == "$options":
+            return True
+        raise AggregationError(f"Unsupported query operator: {operator}")
+
+    @staticmethod
+    def __compile_regex(pattern: Any, options: str = "") -> re.Pattern:
+        if isinstance(pattern, re.Pattern):
+            return pattern
+        if isinstance(pattern, Regex):
+            return pattern.try_compile()
+        flags = 0
+        for option in options or "":
+            flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(option, 0)
+        return re.compile(pattern, flags)
+
+    @staticmethod
+    def regex(pattern: Any, options: str = "") -> re.Pattern:
+        return LocalAggregation.__compile_regex(pattern, options)
+
+    @staticmethod
+    def differential_check(collection: Any, pipeline: list[dict[str, Any]], collections: Optional[Mapping[str, list[dict[str, Any]]]] = None) -> list[str]:
+        """Run ``pipeline`` on the server and locally over the same collection contents; return the differences.
+
+        ``collection`` is a pymongo Collection. ``$lookup`` sources are read from the same database unless
+        supplied in ``collections``. Pipelines ending in ``$out`` are compared without writing: the stage is
+        dropped on both sides. Result order is only compared when the pipeline sorts.
+        """
+        stages = [stage for stage in pipeline if "$out" not in stage]
+        local_collections: dict[str, list[dict[str, Any]]] = dict(collections or {})
+        for stage in stages:
+            source = stage.get("$lookup", {}).get("from")
+            if source and source not in local_collections:
+                local_collections[source] = list(collection.database[source].find())
+
+        expected = [_canonical(document) for document in collection.aggregate(stages)]
+        actual = [_canonical(document) for document in LocalAggregation.aggregate(collection.find(), stages, local_collections)]
+        if not any("$sort" in stage for stage in stages):
+            expected.sort(key=repr)
+            actual.sort(key=repr)
+
+        differences: list[str] = []
+        if len(expected) != len(actual):
+            differences.append(f"server returned {len(expected)} document(s), local engine returned {len(actual)}")
+        for position, (server_document, local_document) in enumerate(zip(expected, actual)):
+            if server_document != local_document:
+                differences.append(f"document {position}: server {server_document!r} != local {local_document!r}")
+        return differences
+
+
+# ---------------------------------------------------------------------------
+# Expression operators
+#
+# "Eager" operators evaluate every argument and then combine the values; they are written once as
+# value functions and shared by the interpreter and the compiler. Operators that must control
+# evaluation themselves ($cond, $switch, $let, $and, $or, ...) have separate interpreter and
+# compiler implementations.
+# ---------------------------------------------------------------------------
+
+
+def _evaluate_all(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> list[Any]:
+    return [LocalAggregation.evaluate(item, document, variables) for item in _arguments(operand)]
+
+
+def _comparison(check: Callable[[int], Any]) -> Callable[[list[Any], bool], Any]:
+    def operator(values: list[Any], array_operand: bool) -> Any:
+        if len(values) != 2:
+            raise AggregationError("comparison operators take exactly two arguments")
+        return check(compare_values(values[0], values[1]))
+    return operator
+
+
+def _value_not(values: list[Any], array_operand: bool) -> bool:
+    return not is_truthy(values[0])
+
+
+def _value_to_upper(values: list[Any], array_operand: bool) -> str:
+    value = values[0]
+    if value is MISSING or value is None:
+        return ""
+    return value.upper() if isinstance(value, str) else to_string(value).upper()
+
+
+def _value_to_lower(values: list[Any], array_operand: bool) -> str:
+    value = values[0]
+    if value is MISSING or value is None:
+        return ""
+    return value.lower() if isinstance(value, str) else to_string(value).lower()
+
+
+def _value_concat(values: list[Any], array_operand: bool) -> Optional[str]:
+    if any(part is MISSING or part is None for part in values):
+        return None
+    for part in values:
+        if not isinstance(part, str):
+            raise AggregationError(f"$concat only supports strings, not {type(part).__name__}")
+    return "".join(values)
+
+
+def _value_to_string(values: list[Any], array_operand: bool) -> Optional[str]:
+    return to_string(values[0])
+
+
+def _numeric_inputs(values: list[Any], array_operand: bool) -> list[Any]:
+    # With a single array-valued argument, $sum/$avg/$min/$max work over the array's elements
+    if not array_operand and len(values) == 1 and isinstance(values[0], list):
+        return values[0]
+    return values
+
+
+def _value_sum(values: list[Any], array_operand: bool) -> Any:
+    return sum((value for value in _numeric_inputs(values, array_operand) if _is_number(value)), 0)
+
+
+def _value_avg(values: list[Any], array_operand: bool) -> Optional[float]:
+    numbers = [value for value in _numeric_inputs(values, array_operand) if _is_number(value)]
+    return sum(numbers) / len(numbers) if numbers else None
+
+
+def _value_min(values: list[Any], array_operand: bool) -> Any:
+    present = [value for value in _numeric_inputs(values, array_operand) if value is not MISSING and value is not None]
+    return min(present, key=_SortKey) if present else None
+
+
+def _value_max(values: list[Any], array_operand: bool) -> Any:
+    present = [value for value in _numeric_inputs(values, array_operand) if value is not MISSING and value is not None]
+    return max(present, key=_SortKey) if present else None
+
+
+def _value_add(values: list[Any], array_operand: bool) -> Any:
+    if any(value is MISSING or value is None for value in values):
+        return None
+    dates = [value for value in values if isinstance(value, datetime.datetime)]
+    numbers = [value for value in values if _is_number(value)]
+    if len(dates) + len(numbers) != len(values) or len(dates) > 1:
+        raise AggregationError("$add only supports numeric or date types")
+    if dates:
+        return dates[0] + datetime.timedelta(milliseconds=sum(numbers))
+    return sum(numbers)
+
+
+def _value_subtract(values: list[Any], array_operand: bool) -> Any:
+    left, right = values
+    if left is MISSING or left is None or right is MISSING or right is None:
+        return None
+    if isinstance(left, datetime.datetime) and isinstance(right, datetime.datetime):
+        return int((left - right).total_seconds() * 1000)
+    if isinstance(left, datetime.datetime) and _is_number(right):
+        return left - datetime.timedelta(milliseconds=right)
+    if not (_is_number(left) and _is_number(right)):
+        raise AggregationError("$subtract only supports numeric or date types")
+    return left - right
+
+
+def _value_multiply(values: list[Any], array_operand: bool) -> Any:
+    if any(value is MISSING or value is None for value in values):
+        return None
+    if not all(_is_number(value) for value in values):
+        raise AggregationError("$multiply only supports numeric types")
+    return math.prod(values)
+
+
+def _value_divide(values: list[Any], array_operand: bool) -> Optional[float]:
+    dividend, divisor = values
+    if dividend is MISSING or dividend is None or divisor is MISSING or divisor is None:
+        return None
+    if not (_is_number(dividend) and _is_number(divisor)):
+        raise AggregationError("$divide only supports numeric types")
+    if divisor == 0:
+        raise AggregationError("can't $divide by zero")
+    return dividend / divisor
+
+
+def _value_if_null(values: list[Any], array_operand: bool) -> Any:
+    for value in values:
+        if value is not MISSING and value is not None:
+            return value
+    return None
+
+
+def _value_size(values: list[Any], array_operand: bool) -> int:
+    if not isinstance(values[0], list):
+        raise AggregationError("The argument to $size must be an array")
+    return len(values[0])
+
+
+VALUE_OPERATORS: dict[str, Callable[[list[Any], bool], Any]] = {
+    "$eq": _comparison(lambda c: c == 0),
+    "$ne": _comparison(lambda c: c != 0),
+    "$gt": _comparison(lambda c: c > 0),
+    "$gte": _comparison(lambda c: c >= 0),
+    "$lt": _comparison(lambda c: c < 0),
+    "$lte": _comparison(lambda c: c <= 0),
+    "$cmp": _comparison(lambda c: c),
+    "$not": _value_not,
+    "$toUpper": _value_to_upper,
+    "$toLower": _value_to_lower,
+    "$concat": _value_concat,
+    "$toString": _value_to_string,
+    "$sum": _value_sum,
+    "$avg": _value_avg,
+    "$min": _value_min,
+    "$max": _value_max,
+    "$add": _value_add,
+    "$subtract": _value_subtract,
+    "$multiply": _value_multiply,
+    "$divide": _value_divide,
+    "$ifNull": _value_if_null,
+    "$size": _value_size,
+}
+
+
+def _eager(value_operator: Callable[[list[Any], bool], Any]) -> Callable[..., Any]:
+    def operator(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+        return value_operator(_evaluate_all(operand, document, variables), isinstance(operand, list))
+    # Lets the compiler call the value function directly, bypassing the interpreter
+    operator.value_operator = value_operator  # type: ignore[attr-defined]
+    return operator
+
+
+def _op_and(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> bool:
+    return all(is_truthy(LocalAggregation.evaluate(item, document, variables)) for item in _arguments(operand))
+
+
+def _op_or(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> bool:
+    return any(is_truthy(LocalAggregation.evaluate(item, document, variables)) for item in _arguments(operand))
+
+
+def _cond_parts(operand: Any) -> tuple[Any, Any, Any]:
+    if isinstance(operand, list):
+        if len(operand) != 3:
+            raise AggregationError("$cond requires exactly three arguments.")
+        return operand[0], operand[1], operand[2]
+    try:
+        return operand["if"], operand["then"], operand["else"]
+    except KeyError as ke:
+        raise AggregationError(f"Missing '{ke.args[0]}' parameter to $cond") from None
+
+
+def _op_cond(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+    condition, then, otherwise = _cond_parts(operand)
+    branch = then if is_truthy(LocalAggregation.evaluate(condition, document, variables)) else otherwise
+    return LocalAggregation.evaluate(branch, document, variables)
+
+
+def _switch_no_match() -> Any:
+    raise AggregationError("$switch could not find a matching branch for an input, and no default was specified.")
+
+
+def _op_switch(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+    for branch in operand.get("branches", []):
+        if is_truthy(LocalAggregation.evaluate(branch["case"], document, variables)):
+            return LocalAggregation.evaluate(branch["then"], document, variables)
+    if "default" not in operand:
+        return _switch_no_match()
+    return LocalAggregation.evaluate(operand["default"], document, variables)
+
+
+def _op_let(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+    scope: dict[str, Any] = dict(variables or {})
+    for name, expression in operand.get("vars", {}).items():
+        scope[name] = LocalAggregation.evaluate(expression, document, variables)
+    return LocalAggregation.evaluate(operand["in"], document, scope)
+
+
+def _regex_match(value: Any, pattern: Any, options: Any) -> bool:
+    if value is MISSING or value is None:
+        return False
+    if not isinstance(value, str):
+        raise AggregationError("$regexMatch needs 'input' to be of type string")
+    return LocalAggregation.regex(pattern, options or "").search(value) is not None
+
+
+def _op_regex_match(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> bool:
+    return _regex_match(LocalAggregation.evaluate(operand.get("input"), document, variables),
+                        LocalAggregation.evaluate(operand.get("regex"), document, variables),
+                        LocalAggregation.evaluate(operand.get("options", ""), document, variables))
+
+
+def _op_literal(operand: Any, document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+    return operand
+
+
+class _SortKey:
+    """Adapts compare_values to Python's sort/min/max."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        return compare_values(self.value, other.value) < 0
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _SortKey) and compare_values(self.value, other.value) == 0
+
+
+LocalAggregation.EXPRESSION_OPERATORS.update({name: _eager(value_operator) for name, value_operator in VALUE_OPERATORS.items()})
+LocalAggregation.EXPRESSION_OPERATORS.update({
+    "$and": _op_and,
+    "$or": _op_or,
+    "$cond": _op_cond,
+    "$switch": _op_switch,
+    "$let": _op_let,
+    "$regexMatch": _op_regex_match,
+    "$literal": _op_literal,
+})
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+
+def _stage_match(stream: Iterator[dict[str, Any]], spec: Mapping[str, Any], context: Any) -> Iterator[dict[str, Any]]:
+    if not isinstance(spec, Mapping):
+        raise AggregationError("the match filter must be an expression in an object")
+    return (document for document in stream if LocalAggregation.matches(spec, document))
+
+
+class _Accumulator:
+    __slots__ = ("operator", "total", "count", "value", "values", "seen")
+
+    def __init__(self, operator: str) -> None:
+        self.operator = operator
+        self.total: Any = 0
+        self.count: int = 0
+        self.value: Any = MISSING
+        self.values: list[Any] = []
+        self.seen: set[Any] = set()
+
+    def add(self, value: Any) -> None:
+        operator = self.operator
+        if operator in ("$sum", "$avg"):
+            if _is_number(value):
+                self.total += value
+                self.count += 1
+        elif operator in ("$min", "$max"):
+            if value is MISSING or value is None:
+                return
+            if self.value is MISSING:
+                self.value = value
+            else:
+                order = compare_values(value, self.value)
+                if (order < 0) if operator == "$min" else (order > 0):
+                    self.value = value
+        elif operator == "$first":
+            if self.count == 0:
+                self.value = None if value is MISSING else value
+            self.count += 1
+        elif operator == "$last":
+            self.value = None if value is MISSING else value
+        elif operator == "$push":
+            if value is not MISSING:
+                self.values.append(value)
+        elif operator == "$addToSet":
+            key = freeze(value)
+            if value is not MISSING and key not in self.seen:
+                self.seen.add(key)
+                self.values.append(value)
+        elif operator == "$count":
+            self.count += 1
+
+    def result(self) -> Any:
+        operator = self.operator
+        if operator == "$sum":
+            return self.total
+        if operator == "$avg":
+            return self.total / self.count if self.count else None
+        if operator == "$count":
+            return self.count
+        if operator in ("$push", "$addToSet"):
+            return self.values
+        return None if self.value is MISSING else self.value
+
+
+ACCUMULATORS: frozenset[str] = frozenset({"$sum", "$avg", "$min", "$max", "$first", "$last", "$push", "$addToSet", "$count"})
+
+
+def _parse_group(spec: Mapping[str, Any]) -> list[tuple[str, str, Any]]:
+    if "_id" not in spec:
+        raise AggregationError("a group specification must include an _id")
+    fields: list[tuple[str, str, Any]] = []
+    for name, accumulator in spec.items():
+        if name == "_id":
+            continue
+        if not isinstance(accumulator, Mapping) or len(accumulator) != 1:
+            raise AggregationError(f"The field '{name}' must be an accumulator object")
+        operator, expression = next(iter(accumulator.items()))
+        if operator not in ACCUMULATORS:
+            raise AggregationError(f"Unknown group operator '{operator}'")
+        fields.append((name, operator, expression))
+    return fields
+
+
+def _stage_group(stream: Iterator[dict[str, Any]], spec: Mapping[str, Any], context: Any) -> Iterator[dict[str, Any]]:
+    fields = _parse_group(spec)
+    groups: dict[Any, tuple[Any, list[_Accumulator]]] = {}
+    for document in stream:
+        key_value = LocalAggregation.evaluate(spec["_id"], document)
+        key_value = None if key_value is MISSING else key_value
+        frozen = freeze(key_value)
+        group = groups.get(frozen)
+        if group is None:
+            group = (key_value, [_Accumulator(operator) for _, operator, _ in fields])
+            groups[frozen] = group
+        for accumulator, (_, operator, expression) in zip(group[1], fields):
+            accumulator.add(None if operator == "$count" else LocalAggregation.evaluate(expression, document))
+
+    for key_value, accumulators in groups.values():
+        output: dict[str, Any] = {"_id": key_value}
+        for accumulator, (name, _, _) in zip(accumulators, fields):
+            output[name] = accumulator.result()
+        yield output
+
+
+def _stage_sort(stream: Iterator[dict[str, Any]], spec: Mapping[str, Any], context: Any) -> Iterator[dict[str, Any]]:
+    if not spec:
+        raise AggregationError("$sort stage must have at least one sort key")
+    documents = list(stream)
+    # Stable sorts applied from the least significant key give a multi-key ordering
+    for field_name, direction in reversed(list(spec.items())):
+        if direction not in (1, -1):
+            raise AggregationError("$sort key ordering must be 1 (for ascending) or -1 (for descending)")
+        documents.sort(key=lambda document: _SortKey(_null_if_missing(get_path(document, field_name))), reverse=direction == -1)
+    return iter(documents)
+
+
+def _project_spec(spec: Mapping[str, Any]) -> tuple[bool, list[str], list[str], list[tuple[str, Any]]]:
+    """Split a $project spec into (exclusion_mode, included paths, excluded paths, computed fields).
+
+    Nested specs are flattened to dotted paths, so ``{"engine": {"cc": 1}}`` includes ``engine.cc``.
+    """
+    included: list[str] = []
+    excluded: list[str] = []
+    computed: list[tuple[str, Any]] = []
+
+    def split(prefix: str, fields: Mapping[str, Any]) -> None:
+        for name, value in fields.items():
+            path = prefix + name
+            if isinstance(value, bool) or (_is_number(value)):
+                (included if value else excluded).append(path)
+            elif isinstance(value, Mapping) and not any(str(key).startswith("$") for key in value):
+                if not value:
+                    raise AggregationError(f"An empty sub-projection is not a valid value. Found empty object at path {path}")
+                split(path + ".", value)
+            else:
+                computed.append((path, value))
+
+    split("", spec)
+
+    non_id_excluded = [name for name in excluded if name != "_id"]
+    if non_id_excluded and (included or computed):
+        raise AggregationError("Cannot do exclusion on field in inclusion projection")
+    exclusion_mode = not included and not computed
+    return exclusion_mode, included, excluded, computed
+
+
+def _copy_included(document: Mapping[str, Any], paths: list[str]) -> dict[str, Any]:
+    output: dict[str, Any] = {}
+    top_level: dict[str, list[str]] = {}
+    for path in paths:
+        head, _, rest = path.partition(".")
+        top_level.setdefault(head, []).append(rest)
+    # Included fields keep the input document's field order
+    for key, value in document.items():
+        if key not in top_level:
+            continue
+        rests = top_level[key]
+        if "" in rests:
+            output[key] = value
+        elif isinstance(value, Mapping):
+            output[key] = _copy_included(value, rests)
+        elif isinstance(value, list):
+            output[key] = [_copy_included(item, rests) for item in value if isinstance(item, Mapping)]
+    return output
+
+
+def _remove_path(document: MutableMapping[str, Any], path: str) -> None:
+    head, _, rest = path.partition(".")
+    if head not in document:
+        return
+    if not rest:
+        del document[head]
+    elif isinstance(document[head], Mapping):
+        # As in set_path, never modify embedded documents shared with the input
+        document[head] = dict(document[head])
+        _remove_path(document[head], rest)
+    elif isinstance(document[head], list):
+        document[head] = [dict(item) if isinstance(item, Mapping) else item for item in document[head]]
+        for item in document[head]:
+            if isinstance(item, MutableMapping):
+                _remove_path(item, rest)
+
+
+def _stage_project(stream: Iterator[dict[str, Any]], spec: Mapping[str, Any], context: Any) -> Iterator[dict[str, Any]]:
+    if not spec:
+        raise AggregationError("$project requires at least one output field")
+    exclusion_mode, included, excluded, computed = _project_spec(spec)
+
+    if exclusion_mode:
+        for document in stream:
+            output = dict(document)
+            for path in excluded:
+                _remove_path(output, path)
+            yield output
+        return
+
+    include_id = "_id" not in excluded and "_id" not in dict(computed)
+    paths = (["_id"] if include_id and "_id" not in included else []) + included
+    for document in stream:
+        output = _copy_included(document, paths)
+        for name, expression in computed:
+            value = LocalAggregation.evaluate(expression, document)
+            if value is not MISSING:
+                set_path(output, name, value)
+        yield output
+
+
+def _stage_add_fields(stream: Iterator[dict[str, Any]], spec: Mapping[str, Any], context: Any) -> Iterator[dict[str, Any]]:
+    for document in stream:
+        output = dict(document)
+        for name, expression in spec.items():
+            value = LocalAggregation.evaluate(expression, document)
+            if value is MISSING:
+                # Like $$REMOVE, a missing value removes the field instead of leaving the old one
+                _remove_path(output, name)
+            else:
+                set_path(output, name, value)
+        yield output
+
+
+def _stage_lookup(stream: Iterator[dict[str, Any]], spec: Mapping[str, Any], context: MutableMapping[str, list[dict[str, Any]]]) -> Iterator[dict[str, Any]]:
+    if "pipeline" in spec:
+        raise AggregationError("$lookup with a sub-pipeline is not supported by the local engine")
+    try:
+        source, local_field, foreign_field, target = spec["from"], spec["localField"], spec["foreignField"], spec["as"]
+    except KeyError as ke:
+        raise AggregationError(f"$lookup requires '{ke.args[0]}'") from None
+
+    index: dict[Any, list[dict[str, Any]]] = {}
+    for foreign in context.get(source, []):
+        value = get_path(foreign, foreign_field)
+        keys = {freeze(item) for item in value} if isinstance(value, list) else {freeze(value)}
+        for key in keys:
+            index.setdefault(key, []).append(foreign)
+
+    for document in stream:
+        value = get_path(document, local_field)
+        keys = [freeze(item) for item in value] if isinstance(value, list) else [freeze(value)]
+        matched: list[dict[str, Any]] = []
+        seen: set[int] = set()
+        for key in keys:
+            for foreign in index.get(key, []):
+                if id(foreign) not in seen:
+                    seen.add(id(foreign))
+                    matched.append(dict(foreign))
+        output = dict(document)
+        set_path(output, target, matched)
+        yield output
+
+
+def _stage_out(stream: Iterator[dict[str, Any]], spec: Any, context: MutableMapping[str, list[dict[str, Any]]]) -> Iterator[dict[str, Any]]:
+    target = spec if isinstance(spec, str) else spec.get("coll")
+    if not target:
+        raise AggregationError("$out requires a target collection name")
+    # Like the server, $out replaces the target collection and the aggregation returns no documents
+    context[target] = list(stream)
+    return iter(())
+
+
+def _stage_limit(stream: Iterator[dict[str, Any]], spec: Any, context: Any) -> Iterator[dict[str, Any]]:
+    if not _is_number(spec) or spec <= 0:
+        raise AggregationError("the limit must be positive")
+    return (document for _, document in zip(range(int(spec)), stream))
+
+
+def _stage_skip(stream: Iterator[dict[str, Any]], spec: Any, context: Any) -> Iterator[dict[str, Any]]:
+    if not _is_number(spec) or spec < 0:
+        raise AggregationError("invalid argument to $skip stage: the number to skip cannot be negative")
+    return (document for position, document in enumerate(stream) if position >= spec)
+
+
+def _stage_unset(stream: Iterator[dict[str, Any]], spec: Any, context: Any) -> Iterator[dict[str, Any]]:
+    return _stage_project(stream, {name: 0 for name in _arguments(spec)}, context)
+
+
+LocalAggregation.STAGES.update({
+    "$match": _stage_match,
+    "$group": _stage_group,
+    "$sort": _stage_sort,
+    "$project": _stage_project,
+    "$set": _stage_add_fields,
+    "$addFields": _stage_add_fields,
+    "$unset": _stage_unset,
+    "$lookup": _stage_lookup,
+    "$out": _stage_out,
+    "$limit": _stage_limit,
+    "$skip": _stage_skip,
+})
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+#
+# compile_expression turns an expression tree into a closure ``fn(document, variables)`` once, so
+# per-document work no longer re-dispatches on the dict structure or re-splits field paths.
+# Operators without a dedicated compiler fall back to their interpreter handler.
+# ---------------------------------------------------------------------------
+
+CompiledExpression = Callable[[Mapping[str, Any], Optional[Mapping[str, Any]]], Any]
+
+
+def path_getter(path: str) -> Callable[[Any], Any]:
+    """Precomputed accessor for a dotted field path; plain dicts take a fast path, anything else goes through get_path."""
+    parts = path.split(".")
+    if len(parts) == 1:
+        def get_field(value: Any) -> Any:
+            if type(value) is dict:
+                return value.get(path, MISSING)
+            return get_path(value, path)
+        return get_field
+
+    if len(parts) == 2:
+        first, second = parts
+
+        def get_nested(value: Any) -> Any:
+            if type(value) is dict:
+                child = value.get(first, MISSING)
+                if type(child) is dict:
+                    return child.get(second, MISSING)
+            return get_path(value, path)
+        return get_nested
+
+    return lambda value: get_path(value, path)
+
+
+def _constant(value: Any) -> CompiledExpression:
+    if isinstance(value, (Mapping, list)):
+        # Never hand out the pipeline's own objects: compiled pipelines are cached and reused
+        return lambda document, variables: copy.deepcopy(value)
+    return lambda document, variables: value
+
+
+def _compile_variable(expression: str) -> CompiledExpression:
+    name, _, path = expression[2:].partition(".")
+    getter = path_getter(path) if path else None
+    if name in ("ROOT", "CURRENT"):
+        if getter is None:
+            return lambda document, variables: document
+        return lambda document, variables: getter(document)
+
+    def variable(document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+        if variables is None or name not in variables:
+            raise AggregationError(f"Use of undefined variable: {name}")
+        base = variables[name]
+        return getter(base) if getter is not None else base
+    return variable
+
+
+def compile_expression(expression: Any) -> CompiledExpression:
+    """Compile an aggregation expression; the result behaves like ``LocalAggregation.evaluate``."""
+    if isinstance(expression, str):
+        if expression.startswith("$$"):
+            return _compile_variable(expression)
+        if expression.startswith("$"):
+            getter = path_getter(expression[1:])
+            return lambda document, variables: getter(document)
+        return _constant(expression)
+
+    if isinstance(expression, Mapping):
+        if len(expression) == 1:
+            operator, operand = next(iter(expression.items()))
+            if operator.startswith("$"):
+                return _compile_operator(operator, operand)
+        fields = [(key, compile_expression(item)) for key, item in expression.items()]
+
+        def build_object(document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> dict[str, Any]:
+            result: dict[str, Any] = {}
+            for key, item in fields:
+                value = item(document, variables)
+                if value is not MISSING:
+                    result[key] = value
+            return result
+        return build_object
+
+    if isinstance(expression, list):
+        items = [compile_expression(item) for item in expression]
+        return lambda document, variables: [None if value is MISSING else value for value in (item(document, variables) for item in items)]
+
+    return _constant(expression)
+
+
+def _compile_operator(operator: str, operand: Any) -> CompiledExpression:
+    compiler = LocalAggregation.EXPRESSION_COMPILERS.get(operator)
+    if compiler is not None:
+        return compiler(operand)
+
+    handler = LocalAggregation.EXPRESSION_OPERATORS.get(operator)
+    if handler is None:
+        raise AggregationError(f"Unsupported expression operator: {operator}")
+    value_operator = getattr(handler, "value_operator", None)
+    if value_operator is not None:
+        return _compile_eager(value_operator, operand)
+    return lambda document, variables: handler(operand, document, variables)
+
+
+def _compile_eager(value_operator: Callable[[list[Any], bool], Any], operand: Any) -> CompiledExpression:
+    array_operand = isinstance(operand, list)
+    arguments = [compile_expression(item) for item in _arguments(operand)]
+    # Unrolled for the common one- and two-argument shapes
+    if len(arguments) == 1:
+        only = arguments[0]
+        return lambda document, variables: value_operator([only(document, variables)], array_operand)
+    if len(arguments) == 2:
+        left, right = arguments
+        return lambda document, variables: value_operator([left(document, variables), right(document, variables)], array_operand)
+    return lambda document, variables: value_operator([argument(document, variables) for argument in arguments], array_operand)
+
+
+def _compile_and(operand: Any) -> CompiledExpression:
+    arguments = [compile_expression(item) for item in _arguments(operand)]
+    return lambda document, variables: all(is_truthy(argument(document, variables)) for argument in arguments)
+
+
+def _compile_or(operand: Any) -> CompiledExpression:
+    arguments = [compile_expression(item) for item in _arguments(operand)]
+    return lambda document, variables: any(is_truthy(argument(document, variables)) for argument in arguments)
+
+
+def _compile_cond(operand: Any) -> CompiledExpression:
+    condition, then, otherwise = (compile_expression(part) for part in _cond_parts(operand))
+
+    def cond(document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+        if is_truthy(condition(document, variables)):
+            return then(document, variables)
+        return otherwise(document, variables)
+    return cond
+
+
+def _compile_switch(operand: Any) -> CompiledExpression:
+    branches = [(compile_expression(branch["case"]), compile_expression(branch["then"])) for branch in operand.get("branches", [])]
+    default = compile_expression(operand["default"]) if "default" in operand else None
+
+    def switch(document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+        for case, then in branches:
+            if is_truthy(case(document, variables)):
+                return then(document, variables)
+        if default is None:
+            return _switch_no_match()
+        return default(document, variables)
+    return switch
+
+
+def _compile_let(operand: Any) -> CompiledExpression:
+    bindings = [(name, compile_expression(expression)) for name, expression in operand.get("vars", {}).items()]
+    body = compile_expression(operand["in"])
+
+    def let(document: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Any:
+        scope: dict[str, Any] = dict(variables or {})
+        for name, binding in bindings:
+            scope[name] = binding(document, variables)
+        return body(document, scope)
+    return let
+
+
+def _compile_regex_match(operand: Any) -> CompiledExpression:
+    value = compile_expression(operand.get("input"))
+    pattern, options = operand.get("regex"), operand.get("options", "")
+    constant_pattern = isinstance(pattern, (re.Pattern, Regex)) or (isinstance(pattern, str) and not pattern.startswith("$"))
+    constant_options = options is None or (isinstance(options, str) and not options.startswith("$"))
+    if constant_pattern and constant_options:
+        # Compile the regex once instead of per document
+        compiled = LocalAggregation.regex(pattern, options or "")
+        return lambda document, variables: _regex_match(value(document, variables), compiled, "")
+
+    pattern_of, options_of = compile_expression(pattern), compile_expression(options)
+    return lambda document, variables: _regex_match(value(document, variables), pattern_of(document, variables), options_of(document, variables))
+
+
+def _compile_literal(operand: Any) -> CompiledExpression:
+    return _constant(operand)
+
+
+LocalAggregation.EXPRESSION_COMPILERS.update({
+    "$and": _compile_and,
+    "$or": _compile_or,
+    "$cond": _compile_cond,
+    "$switch": _compile_switch,
+    "$let": _compile_let,
+    "$regexMatch": _compile_regex_match,
+    "$literal": _compile_literal,
+})
+
+
+_RANGE_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "$gt": lambda left, right: left > right,
+    "$gte": lambda left, right: left >= right,
+    "$lt": lambda left, right: left < right,
+    "$lte": lambda left, right: left <= right,
+}
+
+
+def _scalar_target(value: Any) -> bool:
+    # Targets whose query semantics reduce to a plain Python comparison against same-typed candidates
+    return isinstance(value, str) or (_is_number(value) and not math.isnan(value))
+
+
+def _compile_field_condition(path: str, condition: Any) -> Callable[[Mapping[str, Any]], bool]:
+    getter = path_getter(path)
+    if _scalar_target(condition):
+        kind = str if isinstance(condition, str) else _is_number
+
+        def equals(document: Mapping[str, Any]) -> bool:
+            value = getter(document)
+            if isinstance(value, list):
+                return any(_same_kind(kind, item) and item == condition for item in value)
+            return _same_kind(kind, value) and value == condition
+        return equals
+
+    if isinstance(condition, Mapping) and len(condition) == 1:
+        name, operand = next(iter(condition.items()))
+        if name in _RANGE_OPERATORS and _scalar_target(operand):
+            kind = str if isinstance(operand, str) else _is_number
+            check = _RANGE_OPERATORS[name]
+            # compare_values sorts NaN below every number, so NaN candidates satisfy only $lt/$lte
+            nan_result = name in ("$lt", "$lte")
+
+            def in_range(candidate: Any) -> bool:
+                if not _same_kind(kind, candidate):
+                    return False
+                if candidate != candidate:
+                    return nan_result
+                return check(candidate, operand)
+
+            def compare(document: Mapping[str, Any]) -> bool:
+                value = getter(document)
+                if isinstance(value, list):
+                    return any(in_range(item) for item in value)
+                return in_range(value)
+            return compare
+
+        if name == "$in" and isinstance(operand, list) and operand and all(isinstance(item, str) for item in operand):
+            targets = frozenset(operand)
+
+            def contained(document: Mapping[str, Any]) -> bool:
+                value = getter(document)
+                if isinstance(value, list):
+                    return any(isinstance(item, str) and item in targets for item in value)
+                return isinstance(value, str) and value in targets
+            return contained
+
+    single: dict[str, Any] = {path: condition}
+    return lambda document: LocalAggregation.matches(single, document)
+
+
+def _same_kind(kind: Any, value: Any) -> bool:
+    return isinstance(value, str) if kind is str else _is_number(value)
+
+
+def compile_query(query: Mapping[str, Any]) -> Callable[[Mapping[str, Any]], bool]:
+    """Compile a ``$match`` / find filter; the result behaves like ``LocalAggregation.matches``."""
+    predicates: list[Callable[[Mapping[str, Any]], bool]] = []
+    for key, condition in query.items():
+        if key in ("$and", "$or", "$nor"):
+            branches = [compile_query(sub) for sub in condition]
+            if key == "$and":
+                predicates.append(lambda document, branches=branches: all(branch(document) for branch in branches))
+            elif key == "$or":
+                predicates.append(lambda document, branches=branches: any(branch(document) for branch in branches))
+            else:
+                predicates.append(lambda document, branches=branches: not any(branch(document) for branch in branches))
+        elif key == "$expr":
+            expression = compile_expression(condition)
+            predicates.append(lambda document, expression=expression: is_truthy(expression(document, None)))
+        elif key.startswith("$"):
+            raise AggregationError(f"Unsupported query operator: {key}")
+        else:
+            predicates.append(_compile_field_condition(key, condition))
+
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda document: all(predicate(document) for predicate in predicates)
+
+
+CompiledStage = Callable[[Iterator[dict[str, Any]], MutableMapping[str, list[dict[str, Any]]]], Iterator[dict[str, Any]]]
+
+
+def _compile_match(spec: Any) -> CompiledStage:
+    if not isinstance(spec, Mapping):
+        raise AggregationError("the match filter must be an expression in an object")
+    predicate = compile_query(spec)
+    return lambda stream, context: (document for document in stream if predicate(document))
+
+
+def _compile_group(spec: Any) -> CompiledStage:
+    fields = _parse_group(spec)
+    key_of = compile_expression(spec["_id"])
+    values = [(operator, None if operator == "$count" else compile_expression(expression)) for _, operator, expression in fields]
+    names = [name for name, _, _ in fields]
+
+    def group(stream: Iterator[dict[str, Any]], context: Any) -> Iterator[dict[str, Any]]:
+        groups: dict[Any, tuple[Any, list[_Accumulator]]] = {}
+        for document in stream:
+            key_value = key_of(document, None)
+            key_value = None if key_value is MISSING else key_value
+            frozen = freeze(key_value)
+            entry = groups.get(frozen)
+            if entry is None:
+                entry = (key_value, [_Accumulator(operator) for operator, _ in values])
+                groups[frozen] = entry
+            for accumulator, (_, value_of) in zip(entry[1], values):
+                accumulator.add(None if value_of is None else value_of(document, None))
+
+        for key_value, accumulators in groups.values():
+            output: dict[str, Any] = {"_id": key_value}
+            for name, accumulator in zip(names, accumulators):
+                output[name] = accumulator.result()
+            yield output
+    return group
+
+
+def _compile_sort(spec: Any) -> CompiledStage:
+    if not spec:
+        raise AggregationError("$sort stage must have at least one sort key")
+    keys: list[tuple[Callable[[Any], Any], bool]] = []
+    for field_name, direction in reversed(list(spec.items())):
+        if direction not in (1, -1):
+            raise AggregationError("$sort key ordering must be 1 (for ascending) or -1 (for descending)")
+        keys.append((path_getter(field_name), direction == -1))
+
+    def sort(stream: Iterator[dict[str, Any]], context: Any) -> Iterator[dict[str, Any]]:
+        documents = list(stream)
+        for getter, descending in keys:
+            documents.sort(key=lambda document: _SortKey(_null_if_missing(getter(document))), reverse=descending)
+        return iter(documents)
+    return sort
+
+
+def _compile_set_fields(computed: list[tuple[str, Any]]) -> list[tuple[str, bool, CompiledExpression]]:
+    # Top-level names are assigned directly; dotted names go through set_path
+    return [(name, "." in name, compile_expression(expression)) for name, expression in computed]
+
+
+def _apply_fields(output: dict[str, Any], fields: list[tuple[str, bool, CompiledExpression]], document: Mapping[str, Any]) -> dict[str, Any]:
+    for name, dotted, value_of in fields:
+        value = value_of(document, None)
+        if value is MISSING:
+            _remove_path(output, name)
+        elif dotted:
+            set_path(output, name, value)
+        else:
+            output[name] = value
+    return output
+
+
+def _compile_project(spec: Any) -> CompiledStage:
+    if not spec:
+        raise AggregationError("$project requires at least one output field")
+    exclusion_mode, included, excluded, computed = _project_spec(spec)
+    if exclusion_mode:
+        return lambda stream, context: _stage_project(stream, spec, context)
+
+    include_id = "_id" not in excluded and "_id" not in dict(computed)
+    paths = (["_id"] if include_id and "_id" not in included else []) + included
+    fields = _compile_set_fields(computed)
+    if all("." not in path for path in paths):
+        wanted = frozenset(paths)
+        # Flat inclusions only need a filtered copy that keeps the input field order
+        return lambda stream, context: (_apply_fields({key: value for key, value in document.items() if key in wanted}, fields, document)
+                                        for document in stream)
+    return lambda stream, context: (_apply_fields(_copy_included(document, paths), fields, document) for document in stream)
+
+
+def _compile_add_fields(spec: Any) -> CompiledStage:
+    fields = _compile_set_fields(list(spec.items()))
+    return lambda stream, context: (_apply_fields(dict(document), fields, document) for document in stream)
+
+
+LocalAggregation.STAGE_COMPILERS.update({
+    "$match": _compile_match,
+    "$group": _compile_group,
+    "$sort": _compile_sort,
+    "$project": _compile_project,
+    "$set": _compile_add_fields,
+    "$addFields": _compile_add_fields,
+})
+
+
+class CompiledPipeline:
+    """A pipeline whose stages have been compiled once; ``run`` can be called any number of times."""
+
+    __slots__ = ("pipeline", "key", "stages")
+
+    def __init__(self, pipeline: list[dict[str, Any]], key: str) -> None:
+        self.pipeline = pipeline
+        self.key = key
+        self.stages: list[CompiledStage] = []
+        for name, spec in LocalAggregation.stages_of(pipeline):
+            compiler = LocalAggregation.STAGE_COMPILERS.get(name)
+            if compiler is not None:
+                self.stages.append(compiler(spec))
+            else:
+                handler = LocalAggregation.STAGES[name]
+                self.stages.append(lambda stream, context, handler=handler, spec=spec: handler(stream, spec, context))
+
+    def run(self, documents: Iterable[Mapping[str, Any]],
+            collections: Optional[MutableMapping[str, list[dict[str, Any]]]] = None) -> Iterator[dict[str, Any]]:
+        stream: Iterator[dict[str, Any]] = (dict(document) for document in documents)
+        context: MutableMapping[str, list[dict[str, Any]]] = collections if collections is not None else {}
+        for stage in self.stages:
+            stream = stage(stream, context)
+        return stream
+
+
+if __name__ == "__main__":
+    import json
+
+    from bson import json_util
+
+    from pymongo_pipelines import Pipelines
+
+    store: dict[str, list[dict[str, Any]]] = {"orders": Pipelines.get_orders_data()}
+    for pipeline_name in [f"pipeline_{number}" for number in range(1, 11)]:
+        print(f"{pipeline_name}:")
+        results = list(LocalAggregation.aggregate(Pipelines.get_cars_data(), getattr(Pipelines, pipeline_name)(), store))
+        print(json.dumps(results, indent=4, default=json_util.default))
+    print("join_pipeline:")
+    print(json.dumps(list(LocalAggregation.aggregate(Pipelines.get_users_data(), Pipelines.join_pipeline(), store)), indent=4,
+                     default=json_util.default))
+    print(f"hyundai_cars ($out): {store.get('hyundai_cars')}")
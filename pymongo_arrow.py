@@ -0,0 +1,293 @@
+import datetime
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Mapping, Optional
+
+from bson import Binary, Decimal128, Int64, ObjectId, json_util
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it the Arrow/Parquet export and import are unavailable
+    pa = None
+    pq = None
+
+FORMATS: tuple[str, ...] = ("parquet", "arrow")
+# Field metadata recording BSON types Arrow has no native type for, so imports can restore them
+BSON_TYPE_KEY: bytes = b"bson_type"
+_OBJECT_ID, _DECIMAL, _JSON = b"objectId", b"decimal128", b"json"
+
+
+@dataclass
+class ArrowExportStats:
+    documents: int = 0
+    batches: int = 0
+    # Field values seen after the schema was fixed (not in an explicit schema or the inferred sample), at any
+    # depth of embedded documents; they are not exported
+    dropped_fields: int = 0
+
+
+# Inferred types before they become Arrow types: ("null",), ("scalar", name), ("json",),
+# ("list", element) and ("struct", {field: type}) merge cheaply while sampling documents
+_Inferred = tuple[Any, ...]
+_NULL: _Inferred = ("null",)
+_SCALARS: dict[type, str] = {bool: "bool", int: "int", Int64: "int", float: "float", str: "string", datetime.datetime: "timestamp",
+                             bytes: "binary", ObjectId: "objectId", Decimal128: "decimal128"}
+
+
+def _infer(value: Any) -> _Inferred:
+    if value is None:
+        return _NULL
+    scalar: Optional[str] = _SCALARS.get(type(value))
+    if scalar is not None:
+        return "scalar", scalar
+    if type(value) is Binary and value.subtype == 0:
+        return "scalar", "binary"
+    if isinstance(value, Mapping):
+        return "struct", {str(key): _infer(item) for key, item in value.items()}
+    if isinstance(value, list):
+        element: _Inferred = _NULL
+        for item in value:
+            element = _merge(element, _infer(item))
+        return "list", element
+    return ("json",)
+
+
+def _merge(left: _Inferred, right: _Inferred) -> _Inferred:
+    if left == _NULL or left == right:
+        return right
+    if right == _NULL:
+        return left
+    if left[0] == right[0] == "struct":
+        fields: dict[str, _Inferred] = dict(left[1])
+        for name, inferred in right[1].items():
+            fields[name] = _merge(fields[name], inferred) if name in fields else inferred
+        return "struct", fields
+    if left[0] == right[0] == "list":
+        return "list", _merge(left[1], right[1])
+    if left[0] == right[0] == "scalar" and {left[1], right[1]} == {"int", "float"}:
+        return "scalar", "float"
+    # Anything else (e.g. a string in one document and a number in another) is kept losslessly as Extended JSON
+    return ("json",)
+
+
+def _arrow_field(name: str, inferred: _Inferred) -> Any:
+    kind: str = inferred[0]
+    # Parquet cannot store a struct without children, so documents that were only ever empty become Extended JSON
+    if kind == "struct" and inferred[1]:
+        return pa.field(name, pa.struct([_arrow_field(child, item) for child, item in inferred[1].items()]))
+    if kind == "list":
+        # An element type never seen (only empty lists) is stored as Extended JSON strings
+        return pa.field(name, pa.list_(_arrow_field("item", inferred[1] if inferred[1] != _NULL else ("json",))))
+    if kind == "scalar":
+        scalar: str = inferred[1]
+        if scalar == "objectId":
+            return pa.field(name, pa.binary(12), metadata={BSON_TYPE_KEY: _OBJECT_ID})
+        if scalar == "decimal128":
+            return pa.field(name, pa.string(), metadata={BSON_TYPE_KEY: _DECIMAL})
+        types: dict[str, Any] = {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(), "string": pa.string(),
+                                 "timestamp": pa.timestamp("ms"), "binary": pa.binary()}
+        return pa.field(name, types[scalar])
+    # Fields that were null in every sampled document, empty documents, or of mixed or unsupported types
+    return pa.field(name, pa.string(), metadata={BSON_TYPE_KEY: _JSON})
+
+
+def _bson_type(field: Any) -> Optional[bytes]:
+    return (field.metadata or {}).get(BSON_TYPE_KEY)
+
+
+def _to_arrow(field: Any, stats: ArrowExportStats) -> Callable[[Any], Any]:
+    """A converter from BSON values to what ``pyarrow`` accepts for ``field``; keys of embedded documents outside
+    the field's struct type are counted in ``stats.dropped_fields``."""
+    bson_type: Optional[bytes] = _bson_type(field)
+    if bson_type == _OBJECT_ID:
+        return lambda value: value.binary if isinstance(value, ObjectId) else value
+    if bson_type == _DECIMAL:
+        return lambda value: str(value) if value is not None else None
+    if bson_type == _JSON:
+        return lambda value: json_util.dumps(value) if value is not None else None
+    if pa.types.is_struct(field.type):
+        children: list[tuple[str, Callable[[Any], Any]]] = [(child.name, _to_arrow(child, stats)) for child in field.type]
+        names: frozenset[str] = frozenset(name for name, _ in children)
+
+        def struct(value: Any) -> Any:
+            if not isinstance(value, Mapping):
+                return value
+            if not names.issuperset(value):
+                stats.dropped_fields += len(set(value) - names)
+            return {name: convert(value.get(name)) for name, convert in children}
+        return struct
+    if pa.types.is_list(field.type):
+        element: Callable[[Any], Any] = _to_arrow(field.type.value_field, stats)
+        return lambda value: [element(item) for item in value] if isinstance(value, list) else value
+    return lambda value: value
+
+
+def _from_arrow(field: Any, drop_nulls: bool) -> Optional[Callable[[Any], Any]]:
+    """The inverse of ``_to_arrow``, or None when the column's values come back from Arrow as they went in."""
+    bson_type: Optional[bytes] = _bson_type(field)
+    if bson_type == _OBJECT_ID:
+        return lambda value: ObjectId(value) if value is not None else None
+    if bson_type == _DECIMAL:
+        return lambda value: Decimal128(value) if value is not None else None
+    if bson_type == _JSON:
+        return lambda value: json_util.loads(value) if value is not None else None
+    if pa.types.is_struct(field.type):
+        children: list[tuple[str, Optional[Callable[[Any], Any]]]] = [(child.name, _from_arrow(child, drop_nulls)) for child in field.type]
+        if not drop_nulls and all(convert is None for _, convert in children):
+            return None
+
+        def struct(value: Any) -> Any:
+            if value is None:
+                return None
+            document: dict[str, Any] = {}
+            for name, convert in children:
+                item: Any = value.get(name)
+                if convert is not None:
+                    item = convert(item)
+                if item is not None or not drop_nulls:
+                    document[name] = item
+            return document
+        return struct
+    if pa.types.is_list(field.type):
+        element: Optional[Callable[[Any], Any]] = _from_arrow(field.type.value_field, drop_nulls)
+        if element is None:
+            return None
+        return lambda value: [element(item) for item in value] if value is not None else None
+    return None
+
+
+class ArrowExport:
+    """Convert find/aggregate results to Arrow record batches and stream them to Parquet or Arrow IPC files, and back.
+
+    Without an explicit schema one is inferred from the first ``infer_rows`` documents: nested
+    documents become structs, arrays become lists, ints mixed with floats become float64, and values
+    of mixed or unsupported types are stored as Extended JSON strings. ObjectId, Decimal128 and
+    Extended JSON columns are tagged in the field metadata so ``read`` can restore the BSON values.
+    """
+
+    @staticmethod
+    def available() -> bool:
+        return pa is not None
+
+    @staticmethod
+    def infer_schema(documents: Iterable[Mapping[str, Any]]) -> Any:
+        ArrowExport.__require()
+        inferred: _Inferred = _NULL
+        for document in documents:
+            inferred = _merge(inferred, _infer(document))
+        if inferred == _NULL:
+            raise ValueError("Cannot infer a schema from no documents.")
+        return pa.schema(list(_arrow_field("", inferred).type))
+
+    @staticmethod
+    def record_batches(documents: Iterable[Mapping[str, Any]], schema: Any = None, batch_size: int = 10_000, infer_rows: int = 1000,
+                       stats: Optional[ArrowExportStats] = None) -> Iterator[Any]:
+        """Yield ``pyarrow.RecordBatch`` objects of up to ``batch_size`` rows; the first carries the (inferred) schema."""
+        ArrowExport.__require()
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        if infer_rows <= 0:
+            raise ValueError("infer_rows must be a positive integer.")
+        totals: ArrowExportStats = stats if stats is not None else ArrowExportStats()
+        iterator: Iterator[Mapping[str, Any]] = iter(documents)
+        buffered: list[Mapping[str, Any]] = []
+        if schema is None:
+            for document in iterator:
+                buffered.append(document)
+                if len(buffered) >= infer_rows:
+                    break
+            if not buffered:
+                return
+            schema = ArrowExport.infer_schema(buffered)
+
+        converters: list[tuple[str, Callable[[Any], Any]]] = [(field.name, _to_arrow(field, totals)) for field in schema]
+        names: frozenset[str] = frozenset(schema.names)
+        rows: list[dict[str, Any]] = []
+
+        def convert(document: Mapping[str, Any]) -> dict[str, Any]:
+            if not names.issuperset(document):
+                totals.dropped_fields += len(set(document) - names)
+            return {name: converter(document.get(name)) for name, converter in converters}
+
+        for document in itertools.chain(buffered, iterator):
+            rows.append(convert(document))
+            if len(rows) >= batch_size:
+                yield ArrowExport.__batch(rows, schema, totals)
+                rows = []
+        if rows:
+            yield ArrowExport.__batch(rows, schema, totals)
+
+    @staticmethod
+    def write(documents: Iterable[Mapping[str, Any]], sink: str | BinaryIO, file_format: str = "parquet", schema: Any = None,
+              batch_size: int = 10_000, infer_rows: int = 1000, compression: str | None = "zstd") -> ArrowExportStats:
+        """Stream ``documents`` to a Parquet or Arrow IPC file one record batch at a time; memory stays at one batch."""
+        ArrowExport.__require()
+        if file_format not in FORMATS:
+            raise ValueError(f"Format must be one of {', '.join(FORMATS)}.")
+        stats = ArrowExportStats()
+        writer: Any = None
+        try:
+            for batch in ArrowExport.record_batches(documents, schema, batch_size, infer_rows, stats):
+                if writer is None:
+                    if file_format == "parquet":
+                        writer = pq.ParquetWriter(sink, batch.schema, compression=compression or "none")
+                    else:
+                        options = pa.ipc.IpcWriteOptions(compression=compression) if compression else None
+                        writer = pa.ipc.new_file(sink, batch.schema, options=options)
+                writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        if stats.dropped_fields:
+            logging.warning(f"{stats.dropped_fields} field value(s) outside the schema were not exported; pass a schema or raise infer_rows.")
+        return stats
+
+    @staticmethod
+    def read(source: str | BinaryIO, file_format: str = "parquet", batch_size: int = 10_000, drop_nulls: bool = True) -> Iterator[dict[str, Any]]:
+        """Yield the rows of a Parquet or Arrow IPC file as documents, one record batch in memory at a time.
+
+        ObjectId, Decimal128 and Extended JSON columns written by ``write`` are restored; with
+        ``drop_nulls`` null fields are left out, as they were most likely absent from the original documents.
+        """
+        ArrowExport.__require()
+        if file_format not in FORMATS:
+            raise ValueError(f"Format must be one of {', '.join(FORMATS)}.")
+        if file_format == "parquet":
+            parquet = pq.ParquetFile(source)
+            schema: Any = parquet.schema_arrow
+            batches: Iterable[Any] = parquet.iter_batches(batch_size=batch_size)
+        else:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema
+            batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+
+        converters: list[tuple[str, Optional[Callable[[Any], Any]]]] = [(field.name, _from_arrow(field, drop_nulls)) for field in schema]
+        for batch in batches:
+            for row in batch.to_pylist():
+                document: dict[str, Any] = {}
+                for name, convert in converters:
+                    value: Any = row[name]
+                    if convert is not None:
+                        value = convert(value)
+                    if value is not None or not drop_nulls:
+                        document[name] = value
+                yield document
+
+    @staticmethod
+    def __batch(rows: list[dict[str, Any]], schema: Any, totals: ArrowExportStats) -> Any:
+        try:
+            batch = pa.RecordBatch.from_pylist(rows, schema=schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as ex:
+            raise ValueError(f"Documents do not fit the Arrow schema ({ex}); pass an explicit schema or raise infer_rows.") from ex
+        totals.documents += len(rows)
+        totals.batches += 1
+        return batch
+
+    @staticmethod
+    def __require() -> None:
+        if pa is None:
+            raise ImportError("pyarrow is required for Arrow/Parquet export and import; install it with 'pip install pyarrow'.")
+
@@ -0,0 +1,708 @@
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, TextIO
+
+from pymongo import AsyncMongoClient, IndexModel
+from pymongo.asynchronous.cursor import AsyncCursor
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError, WriteError
+from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
+
+from pymongo_advisor import QueryLog
+from pymongo_bulk import BulkInsertResult, BulkLoader, ChunkInsert, MAX_BATCH_BYTES
+from pymongo_cache import AggregationCache, NamespaceCache
+from pymongo_client import AsyncMongoClientRegistry
+from pymongo_indexes import IndexBuildResult, IndexKeys, IndexManager, IndexSpec
+from pymongo_metrics import Metrics
+from pymongo_optimizer import PipelineOptimizer
+from pymongo_pagination import KeysetPaginator, Page
+from pymongo_records import RECORD_CODEC_OPTIONS, Record
+from pymongo_streaming import DocumentStream
+from pymongo_validation import CompiledValidator, DocumentValidator, RejectSink, SchemaCompiler, ValidationReport
+from pymongo_tutorial import MongoDbOperation
+
+
+@Metrics.instrument
+class AsyncMongoDbOperation:
+    """asyncio counterpart of MongoDbOperation built on PyMongo's native AsyncMongoClient.
+
+    Methods mirror the synchronous class; many calls can be in flight at once on one event
+    loop, all sharing the loop's pooled client.
+    """
+
+    @classmethod
+    async def __connect(cls) -> Optional[AsyncMongoClient]:
+        return await AsyncMongoClientRegistry.get_client(MongoDbOperation.connection_uri())
+
+    @classmethod
+    async def __client(cls) -> AsyncMongoClient:
+        client: Optional[AsyncMongoClient] = await AsyncMongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+        return client
+
+    @staticmethod
+    async def close_connections() -> None:
+        await AsyncMongoClientRegistry.shutdown()
+        logging.info("MongoDB connection closed.")
+
+    @classmethod
+    async def __namespace_exists(cls, client: AsyncMongoClient, database_name: str, collection_name: str) -> bool:
+        if NamespaceCache.optimistic:
+            NamespaceCache.record("skipped")
+            return True
+
+        databases: Optional[frozenset[str]] = NamespaceCache.cached_database_names(client)
+        if databases is None:
+            NamespaceCache.record("list_database_names")
+            databases = NamespaceCache.store_database_names(client, await client.list_database_names())
+        if database_name not in databases:
+            print(f"The database '{database_name}' does not exist.")
+            return False
+
+        collections: Optional[frozenset[str]] = NamespaceCache.cached_collection_names(client, database_name)
+        if collections is None:
+            NamespaceCache.record("list_collection_names")
+            collections = NamespaceCache.store_collection_names(client, database_name, await client[database_name].list_collection_names())
+        if collection_name not in collections:
+            print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
+            return False
+
+        return True
+
+    @classmethod
+    def __report_missing_namespace(cls, error: OperationFailure, database_name: str, collection_name: str) -> bool:
+        if not NamespaceCache.is_namespace_not_found(error):
+            return False
+        print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
+        return True
+
+    @staticmethod
+    async def execute_aggregate_pipeline(pipeline_: list[dict[str, Any]], batch_size: int = 1000, sink: TextIO | None = None,
+                                         optimize: bool = True, use_cache: bool = True) -> None:
+        """Run aggregation pipeline on the 'cars' collection in 'Test' DB."""
+        await AsyncMongoDbOperation.__aggregate_to_sink('Test', 'cars', pipeline_, batch_size, sink, "Executing aggregation pipeline...", optimize,
+                                                        use_cache)
+
+    @staticmethod
+    async def aggregate_join_collection(pipeline_: list[dict[str, Any]], batch_size: int = 1000, sink: TextIO | None = None,
+                                        optimize: bool = True, use_cache: bool = True) -> None:
+        """Run aggregation join pipeline on the 'users' collection in 'store_db'."""
+        await AsyncMongoDbOperation.__aggregate_to_sink('store_db', 'users', pipeline_, batch_size, sink, "Executing aggregation join pipeline...", optimize,
+                                                        use_cache)
+
+    @classmethod
+    async def __aggregate_to_sink(cls, database_name: str, collection_name: str, pipeline_: list[dict[str, Any]], batch_size: int,
+                                  sink: TextIO | None, message: str, optimize: bool, use_cache: bool) -> None:
+        try:
+            documents = await AsyncMongoDbOperation.stream_aggregate(database_name, collection_name, pipeline_, batch_size, use_cache=use_cache,
+                                                                     optimize=optimize)
+            logging.info(message)
+            await AsyncMongoDbOperation.__write_json_array(documents, sink or sys.stdout)
+        except PyMongoError as ex:
+            logging.exception(f"Aggregation failed: {ex}")
+
+    @staticmethod
+    async def get_database_names() -> None:
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            databases: list[str] = await client.list_database_names()
+
+            if not databases:
+                print("No databases found.")
+            else:
+                print("List of databases:")
+                for db in databases:
+                    print(f" - {db}")
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while fetching database names: {ex}")
+
+    @staticmethod
+    async def get_collection_names(database_name: str) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if database_name not in await client.list_database_names():
+                print(f"The database '{database_name}' does not exist.")
+                return
+
+            collections: list[str] = await client[database_name].list_collection_names()
+
+            if not collections:
+                print(f"No collections found in '{database_name}'.")
+            else:
+                print(f"Collections in '{database_name}':")
+                for name in collections:
+                    print(f" - {name}")
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while listing collections in '{database_name}': {ex}")
+
+    @staticmethod
+    async def create_collection(database_name: str, collection_name: str, validator: dict[str, Any] | None = None) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if database_name not in await client.list_database_names():
+                print(f"The database '{database_name}' does not exist.")
+                return
+
+            db = client[database_name]
+
+            if validator:
+                await db.create_collection(collection_name, validator=validator)
+            else:
+                await db.create_collection(collection_name)
+
+            NamespaceCache.invalidate(client, database_name)
+            print(f"The collection '{collection_name}' was created successfully.")
+
+        except CollectionInvalid:
+            logging.warning(f"The collection '{collection_name}' already exists")
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while creating the collection '{collection_name}': {ex}")
+
+    @staticmethod
+    async def drop_collection(database_name: str, collection_name: str) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if database_name not in await client.list_database_names():
+                print(f"The database '{database_name}' does not exist.")
+                return
+
+            db = client[database_name]
+
+            if collection_name not in await db.list_collection_names():
+                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
+                return
+
+            await db.drop_collection(collection_name)
+            NamespaceCache.invalidate(client, database_name)
+            AggregationCache.invalidate(client, database_name, collection_name)
+            print(f"The collection '{collection_name}' was dropped successfully.")
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while dropping the collection '{collection_name}': {ex}")
+
+    @staticmethod
+    async def fetch_document(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                             sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 1000, sink: TextIO | None = None) -> None:
+        try:
+            documents = await AsyncMongoDbOperation.stream_documents(database_name, collection_name, filter_, projection, sort, limit, batch_size)
+            if documents is None:
+                return
+            QueryLog.record("find", database_name, collection_name, filter_, sort)
+
+            count: int = await AsyncMongoDbOperation.__write_json_array(documents, sink or sys.stdout)
+
+            if not count:
+                print(f"No documents found in collection '{collection_name}'.")
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while fetching documents from '{collection_name}': {ex}")
+
+    @staticmethod
+    async def stream_documents(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                               sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 1000,
+                               as_json: bool = False, record_type: type[Record] | None = None) -> Optional[AsyncIterator[Any]]:
+        """Return an async iterator over matching documents (JSON lines, or ``record_type`` records); None if the namespace does not exist."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if record_type is not None and as_json:
+            raise ValueError("record_type cannot be combined with as_json.")
+        if limit < 0:
+            raise ValueError("Limit must not be negative.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+
+        client = await AsyncMongoDbOperation.__client()
+        if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+            return None
+
+        collection = client[database_name][collection_name]
+        if record_type is not None:
+            collection = collection.with_options(codec_options=RECORD_CODEC_OPTIONS)
+        cursor: AsyncCursor = collection.find(filter_ or {}, projection, limit=limit, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if record_type is not None:
+            return AsyncMongoDbOperation.__as_records(cursor, record_type)
+        return AsyncMongoDbOperation.__as_json_lines(cursor) if as_json else cursor
+
+    @staticmethod
+    async def fetch_page(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                         sort: list[tuple[str, int]] | None = None, page_size: int = 50, token: str | None = None,
+                         from_end: bool = False) -> Optional[Page]:
+        """Async counterpart of ``MongoDbOperation.fetch_page``; None if the namespace does not exist."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
+
+            QueryLog.record("find", database_name, collection_name, filter_, KeysetPaginator.sort_keys(sort))
+            return await KeysetPaginator.page_async(client[database_name][collection_name], page_size, token, filter_, sort, projection, from_end)
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while fetching a page from '{collection_name}': {ex}")
+            return None
+
+    @staticmethod
+    async def stream_aggregate(database_name: str, collection_name: str, pipeline_: list[dict[str, Any]], batch_size: int = 1000,
+                               as_json: bool = False, use_cache: bool = True, optimize: bool = False) -> AsyncIterator[Any]:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not pipeline_:
+            raise ValueError("Aggregation pipeline must not be empty.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+
+        client = await AsyncMongoDbOperation.__client()
+        cached, recorder = AggregationCache.lookup(client, database_name, collection_name, pipeline_) if use_cache else (None, None)
+        if cached is not None:
+            documents: AsyncIterator[Any] = AsyncMongoDbOperation.__iterate(cached)
+        else:
+            output: Optional[tuple[str, str]] = AggregationCache.output_namespace(database_name, pipeline_)
+            try:
+                cursor = await client[database_name][collection_name].aggregate(PipelineOptimizer.apply(pipeline_) if optimize else pipeline_,
+                                                                                batchSize=batch_size)
+            finally:
+                if output is not None:
+                    AggregationCache.invalidate(client, *output)
+            documents = cursor if recorder is None else recorder.wrap_async(cursor)
+        return AsyncMongoDbOperation.__as_json_lines(documents) if as_json else documents
+
+    @staticmethod
+    async def __iterate(documents: Iterable[Any]) -> AsyncIterator[Any]:
+        for document in documents:
+            yield document
+
+    @staticmethod
+    async def __as_json_lines(documents: AsyncIterable[Any]) -> AsyncIterator[str]:
+        async for document in documents:
+            yield DocumentStream.to_json_line(document)
+
+    @staticmethod
+    async def __as_records(documents: AsyncIterable[Any], record_type: type[Record]) -> AsyncIterator[Any]:
+        async for document in documents:
+            yield record_type.from_bson(document.raw)
+
+    @staticmethod
+    async def __write_json_array(documents: AsyncIterable[Any], sink: TextIO) -> int:
+        # Same output as DocumentStream.write_json_array, fed from an async cursor
+        count: int = 0
+        async for document in documents:
+            sink.write(DocumentStream.array_element(document, count))
+            count += 1
+        sink.write(DocumentStream.array_end(count))
+        return count
+
+    @staticmethod
+    async def create_database(database_name: str) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if database_name in await client.list_database_names():
+                print(f"The database '{database_name}' already exists.")
+                return
+
+            # Trigger actual creation by inserting a dummy doc
+            await client[database_name]['__temp_collection__'].insert_one({'created': True})
+            NamespaceCache.invalidate(client, database_name)
+
+            if database_name in await client.list_database_names():
+                print(f"The database '{database_name}' was created successfully.")
+            else:
+                print(f"Failed to verify creation of the database '{database_name}'.")
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while creating the database: {ex}")
+
+    @staticmethod
+    async def drop_database(database_name: str) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if database_name not in await client.list_database_names():
+                logging.info(f"The database '{database_name}' does not exist.")
+                return
+
+            logging.info(f"Trying to drop the database: {database_name}")
+            await client.drop_database(database_name)
+            NamespaceCache.invalidate(client, database_name)
+            AggregationCache.invalidate(client, database_name)
+            print(f"The database '{database_name}' was dropped successfully.")
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while dropping the database '{database_name}': {ex}")
+
+    @staticmethod
+    async def insert_document(database_name: str, collection_name: str, document: dict[str, Any] | Iterable[dict[str, Any]], ordered: bool = False,
+                              chunk_size: int = 1000, max_concurrency: int = 4, validate: bool | dict[str, Any] = False,
+                              rejects: RejectSink | None = None, validation_processes: int = 0) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not document:
+            raise ValueError("Document must be a dictionary or a list of dictionaries and must not be empty.")
+
+        if not isinstance(document, dict):
+            if isinstance(document, (str, bytes)) or not isinstance(document, Iterable):
+                raise ValueError("Document must be a dictionary or a list of dictionaries.")
+            result = await AsyncMongoDbOperation.bulk_insert_documents(database_name, collection_name, document, ordered=ordered,
+                                                                         chunk_size=chunk_size, max_concurrency=max_concurrency, validate=validate,
+                                                                         rejects=rejects, validation_processes=validation_processes)
+            if result is not None:
+                print(f"✅ Inserted {result.inserted_count} document(s) in {result.chunks} chunk(s) ({result.documents_per_second:.0f} docs/s).")
+                if result.rejected_count:
+                    print(f"❌ {result.rejected_count} document(s) failed client-side validation and were not sent.")
+                for error in result.write_errors:
+                    print(f"  - Index: {error['index']}")
+                    print(f"  - Code: {error['code']}")
+                    print(f"  - Message: {error['errmsg']}")
+            return
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return
+
+            collection = client[database_name][collection_name]
+            validator: Optional[CompiledValidator] = await AsyncMongoDbOperation.__validator(collection, validate)
+            error: Optional[dict[str, Any]] = validator.write_error(document) if validator is not None else None
+            if error is not None:
+                if rejects is not None:
+                    DocumentValidator.reporter(rejects)(error)
+                else:
+                    del error["op"]
+                    MongoDbOperation.handle_write_error_details(WriteError(error["errmsg"], error["code"], error))
+                return
+
+            result_1: InsertOneResult = await collection.insert_one(document)
+            print(f"✅ Document inserted with _id: {result_1.inserted_id}")
+
+        except DuplicateKeyError as dke:
+            logging.error(f"Duplicate key error: {dke}")
+            print("❌ Duplicate key error! A document with the same _id already exists.")
+            print(f"Details: {dke.details}")
+
+        except WriteError as we:
+            MongoDbOperation.handle_write_error_details(we)
+
+        except PyMongoError as ex:
+            logging.exception(f"General PyMongo error: {ex}")
+            print(f"❌ Failed to insert document(s): {ex}")
+        finally:
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+    @staticmethod
+    async def bulk_insert_documents(database_name: str, collection_name: str, documents: Iterable[dict[str, Any]], ordered: bool = False,
+                                    chunk_size: int = 1000, max_chunk_bytes: int = MAX_BATCH_BYTES, max_concurrency: int = 4,
+                                    max_retries: int = 3, retry_backoff: float = 0.5, validate: bool | dict[str, Any] = False,
+                                    rejects: RejectSink | None = None, validation_processes: int = 0) -> Optional[BulkInsertResult]:
+        """Insert an iterable in size-bounded chunks with up to ``max_concurrency`` chunks in flight.
+
+        ``validate`` holds back documents failing the collection's validator, as ``MongoDbOperation.bulk_insert_documents`` does.
+        ``documents`` is read, validated and encoded in worker threads, so ``rejects`` is called from one too.
+        Returns None if the namespace does not exist or cannot be reached.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
+
+            collection = client[database_name][collection_name]
+            validator: Optional[CompiledValidator] = await AsyncMongoDbOperation.__validator(collection, validate)
+        except PyMongoError as ex:
+            # Failed chunks are recorded in the result; only reaching the collection can fail the whole load
+            logging.exception(f"General PyMongo error: {ex}")
+            print(f"❌ Failed to insert document(s): {ex}")
+            return None
+        report: Optional[ValidationReport] = None
+        if validator is not None:
+            report = ValidationReport()
+            documents = DocumentValidator.filter(documents, validator, rejects if rejects is not None else report.keep, chunk_size=chunk_size,
+                                                 processes=validation_processes, report=report)
+        limit: int = 1 if ordered else max_concurrency
+        result = BulkInsertResult()
+        start = time.perf_counter()
+        in_flight: set[asyncio.Task[BulkInsertResult]] = set()
+        offset: int = 0
+
+        async def insert_chunk(chunk: list[Any], chunk_offset: int) -> BulkInsertResult:
+            attempts = ChunkInsert(chunk, chunk_offset, ordered, max_retries, retry_backoff)
+            while attempts.pending:
+                try:
+                    await collection.insert_many(attempts.pending, ordered=ordered)
+                    attempts.succeeded()
+                except PyMongoError as ex:
+                    delay: float | None = attempts.failed(ex)
+                    if delay is None:
+                        break
+                    if delay:
+                        await asyncio.sleep(delay)
+            return attempts.result
+
+        # Reading, validating and encoding the documents is synchronous work, so each chunk is built in a worker thread
+        chunks: Iterator[list[Any]] = BulkLoader.chunk_documents(documents, chunk_size, max_chunk_bytes)
+        try:
+            while True:
+                chunk: Optional[list[Any]] = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                in_flight.add(asyncio.create_task(insert_chunk(chunk, offset)))
+                offset += len(chunk)
+                if len(in_flight) >= limit:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result.merge(task.result())
+                    if ordered and not result.succeeded:
+                        break
+        except BaseException:
+            # Chunking or validation failed, or the load was cancelled: stop the chunks still writing before propagating
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise
+        # An ordered load can stop early; shutting down a validation process pool blocks, so close off the loop too
+        await asyncio.to_thread(chunks.close)
+
+        if in_flight:
+            # Wait for every chunk before looking at any result, so one failure cannot abandon chunks still writing
+            await asyncio.wait(in_flight)
+        for task in in_flight:
+            result.merge(task.result())
+        AggregationCache.invalidate(client, database_name, collection_name)
+
+        result.elapsed_seconds = time.perf_counter() - start
+        return report.apply(result) if report is not None else result
+
+    @classmethod
+    async def __validator(cls, collection: Any, validate: bool | dict[str, Any]) -> Optional[CompiledValidator]:
+        if isinstance(validate, dict):
+            return SchemaCompiler.validator(validate)
+        return await DocumentValidator.for_collection_async(collection) if validate else None
+
+    @staticmethod
+    async def update_document(database_name: str, collection_name: str, filter_condition: dict[str, Any], update_values: dict[str, Any],
+                              update_type: str = "one") -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not filter_condition or not isinstance(filter_condition, dict):
+            raise ValueError("Filter condition must be a non-empty dictionary.")
+        if not update_values or not isinstance(update_values, dict):
+            raise ValueError("Update values must be a non-empty dictionary.")
+        if update_type.strip().lower() not in ("one", "many"):
+            raise ValueError("Invalid input. Please enter 'one' or 'many' for update_type.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return
+
+            collection = client[database_name][collection_name]
+            update_operation = {"$set": update_values}
+            QueryLog.record("update", database_name, collection_name, filter_condition, many=update_type.strip().lower() == "many")
+
+            if update_type.strip().lower() == "one":
+                result_1: UpdateResult = await collection.update_one(filter_condition, update_operation)
+                print(f"Acknowledged {result_1.acknowledged}, Matched {result_1.matched_count}, Modified {result_1.modified_count} (single document).")
+            else:
+                result_2: UpdateResult = await collection.update_many(filter_condition, update_operation)
+                print(f"Acknowledged {result_2.acknowledged}, Matched {result_2.matched_count}, Modified {result_2.modified_count} (multiple documents).")
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while updating documents in collection '{collection_name}': {ex}")
+        finally:
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+    @staticmethod
+    async def delete_document(database_name: str, collection_name: str, filter_query: dict[str, Any], delete_type: str = "one") -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not filter_query or not isinstance(filter_query, dict):
+            raise ValueError("Filter query must be a non-empty dictionary.")
+        if delete_type.strip().lower() not in ("one", "many"):
+            raise ValueError("Invalid input. Please enter 'one' or 'many' for update_type.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return
+
+            collection = client[database_name][collection_name]
+            QueryLog.record("delete", database_name, collection_name, filter_query, many=delete_type.strip().lower() == "many")
+
+            if delete_type.strip().lower() == "one":
+                result_1: DeleteResult = await collection.delete_one(filter_query)
+                print(f"Acknowledged {result_1.acknowledged}, Deleted {result_1.deleted_count} document.")
+            else:
+                result_2: DeleteResult = await collection.delete_many(filter_query)
+                print(f"Acknowledged {result_2.acknowledged}, Deleted {result_2.deleted_count} documents.")
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred during deletion from '{collection_name}': {ex}")
+        finally:
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+    @staticmethod
+    async def modify_existing_collection_schema(database_name: str, collection_name: str, validator: dict[str, Any]) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not validator or not isinstance(validator, dict):
+            raise ValueError("Validator must be a non-empty dictionary.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return
+
+            await client[database_name].command({
+                "collMod": collection_name,
+                "validator": validator,
+                "validationLevel": "moderate",
+                "validationAction": "warn"
+            })
+            print(f"Schema modified successfully for collection '{collection_name}'.")
+
+        except OperationFailure as of:
+            if not AsyncMongoDbOperation.__report_missing_namespace(of, database_name, collection_name):
+                logging.exception(f"An error occurred during schema modification in collection '{collection_name}': {of}")
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred during schema modification in collection '{collection_name}': {ex}")
+
+    @staticmethod
+    async def create_index(database_name: str, collection_name: str, index_name: str | None = None, keys: IndexKeys | None = None,
+                           unique: bool | None = None, sparse: bool = False, partial_filter: dict[str, Any] | None = None,
+                           expire_after_seconds: int | None = None, collation: dict[str, Any] | None = None, hidden: bool = False,
+                           name: str | None = None, progress_interval: float | None = 2.0) -> Optional[str]:
+        if not index_name and keys is None:
+            raise ValueError("Index name must not be empty.")
+
+        spec: IndexSpec = IndexSpec.of(keys if keys is not None else index_name, name, keys is None if unique is None else unique, sparse,
+                                       partial_filter, expire_after_seconds, collation, hidden)
+        result: Optional[IndexBuildResult] = await AsyncMongoDbOperation.create_indexes(database_name, collection_name, [spec], progress_interval)
+        if result is None or result.conflicts:
+            return None
+        return (result.created or result.modified or result.unchanged or [None])[0]
+
+    @staticmethod
+    async def create_indexes(database_name: str, collection_name: str, indexes: Iterable[IndexSpec | IndexModel | dict[str, Any]],
+                             progress_interval: float | None = 2.0) -> Optional[IndexBuildResult]:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        specs: list[IndexSpec] = [IndexSpec.coerce(index) for index in indexes]
+        if not specs:
+            raise ValueError("Indexes must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
+
+            result: IndexBuildResult = await IndexManager.ensure_async(client[database_name][collection_name], specs, progress_interval)
+            for created in result.created:
+                print(f"The index '{created}' was created successfully in collection '{collection_name}'.")
+            for modified in result.modified:
+                print(f"The index '{modified}' was modified in collection '{collection_name}'.")
+            for unchanged in result.unchanged:
+                print(f"The index '{unchanged}' already exists in collection '{collection_name}'.")
+            for conflict in result.conflicts:
+                print(f"❌ {conflict}")
+            return result
+
+        except OperationFailure as ex:
+            if not AsyncMongoDbOperation.__report_missing_namespace(ex, database_name, collection_name):
+                logging.exception(f"Index creation failed for collection '{collection_name}': {ex}")
+            return None
+
+    @staticmethod
+    async def show_indexes(database_name: str, collection_name: str) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return
+
+            index_cursor = await client[database_name][collection_name].list_indexes()
+
+            print(f"The list of indexes for collection `{collection_name}`:")
+            async for index in index_cursor:
+                print("\nIndex:")
+                for key, value in index.items():
+                    print(f"  {key}: {value}")
+
+        except OperationFailure as of:
+            if not AsyncMongoDbOperation.__report_missing_namespace(of, database_name, collection_name):
+                logging.exception(f"Failed to retrieve the indexes from the collection `{collection_name}`: {of}")
+
+    @staticmethod
+    async def drop_index(database_name: str, collection_name: str, index_name: str) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not index_name:
+            raise ValueError("Index name must not be empty.")
+
+        client = await AsyncMongoDbOperation.__client()
+        try:
+            if not await AsyncMongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return
+
+            my_collection = client[database_name][collection_name]
+
+            existing_indexes = [index['name'] async for index in await my_collection.list_indexes()]
+            if index_name not in existing_indexes:
+                print(f"Index '{index_name}' does not exist in collection '{collection_name}'.")
+                return
+
+            await my_collection.drop_index(index_name)
+            print(f"The index '{index_name}' was dropped successfully from collection '{collection_name}'.")
+
+        except OperationFailure as ex:
+            if not AsyncMongoDbOperation.__report_missing_namespace(ex, database_name, collection_name):
+                logging.exception(f"Failed to delete index '{index_name}' from the collection '{collection_name}': {ex}")
@@ -0,0 +1,441 @@
+import asyncio
+import datetime
+import io
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import bson
+from bson import ObjectId, json_util
+from pymongo import MongoClient
+
+from pymongo_aggregation import LocalAggregation
+from pymongo_arrow import ArrowExport
+from pymongo_bulk import BulkLoader
+from pymongo_client import AsyncMongoClientRegistry, MongoClientRegistry
+from pymongo_columnar import ColumnarAggregation
+from pymongo_datasets import DATASETS, Datasets
+from pymongo_encoders import OutputEncoders
+from pymongo_pipelines import Pipelines
+from pymongo_raw import RAW_CODEC_OPTIONS, RawDocuments
+from pymongo_records import RECORD_TYPES, Records
+from pymongo_scan import ParallelScan
+from pymongo_streaming import DocumentStream
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class Benchmarks:
+    @staticmethod
+    def summarize(samples_ms: list[float]) -> dict[str, float]:
+        """Reduce a list of per-operation latencies (milliseconds) to summary statistics."""
+        if not samples_ms:
+            raise ValueError("At least one latency sample is required.")
+
+        ordered = sorted(samples_ms)
+
+        def percentile(p: float) -> float:
+            index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+            return ordered[index]
+
+        return {
+            "operations": len(ordered),
+            "mean_ms": statistics.fmean(ordered),
+            "p50_ms": percentile(50),
+            "p99_ms": percentile(99),
+            "max_ms": ordered[-1],
+        }
+
+    @staticmethod
+    def time_operation(operation: Callable[[], Any], iterations: int) -> list[float]:
+        samples: list[float] = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            operation()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    @staticmethod
+    def connection_reuse(uri: str, iterations: int = 50) -> dict[str, dict[str, float]]:
+        """Compare connect-per-call (old MongoDbOperation behaviour) against the shared client registry."""
+        if iterations <= 0:
+            raise ValueError("iterations must be positive.")
+
+        def connect_per_call() -> None:
+            client: MongoClient = MongoClient(uri, serverSelectionTimeoutMS=5000)
+            try:
+                # One ping for the old __connect() check, one standing in for the real operation
+                client.admin.command('ping')
+                client.admin.command('ping')
+            finally:
+                client.close()
+
+        def pooled() -> None:
+            client = MongoClientRegistry.get_client(uri)
+            if client is None:
+                raise ConnectionError("MongoDB client is None. Could not establish connection.")
+            client.admin.command('ping')
+
+        before = Benchmarks.summarize(Benchmarks.time_operation(connect_per_call, iterations))
+        # First call pays for the warm-up; measure steady state like a long-running service would
+        pooled()
+        after = Benchmarks.summarize(Benchmarks.time_operation(pooled, iterations))
+        MongoClientRegistry.shutdown()
+        return {"connect_per_call": before, "shared_pool": after}
+
+    @staticmethod
+    def async_vs_threaded(uri: str, operations: int = 2000, concurrency: int = 64, database_name: str = 'Test',
+                          collection_name: str = 'cars') -> dict[str, dict[str, float]]:
+        """Issue the same number of find_one calls with ``concurrency`` in flight: thread pool + sync client vs one event loop."""
+        if operations <= 0 or concurrency <= 0:
+            raise ValueError("operations and concurrency must be positive.")
+
+        client = MongoClientRegistry.get_client(uri, maxPoolSize=concurrency)
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+        collection = client[database_name][collection_name]
+
+        def sync_call() -> float:
+            start = time.perf_counter()
+            collection.find_one({})
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            threaded_samples = list(executor.map(lambda _: sync_call(), range(operations)))
+        threaded = Benchmarks.summarize(threaded_samples)
+        threaded["ops_per_second"] = operations / (time.perf_counter() - start)
+
+        async def run_async() -> dict[str, float]:
+            async_client = await AsyncMongoClientRegistry.get_client(uri, maxPoolSize=concurrency)
+            if async_client is None:
+                raise ConnectionError("MongoDB client is None. Could not establish connection.")
+            async_collection = async_client[database_name][collection_name]
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def async_call() -> float:
+                async with semaphore:
+                    call_start = time.perf_counter()
+                    await async_collection.find_one({})
+                    return (time.perf_counter() - call_start) * 1000
+
+            run_start = time.perf_counter()
+            samples = await asyncio.gather(*(async_call() for _ in range(operations)))
+            stats = Benchmarks.summarize(list(samples))
+            stats["ops_per_second"] = operations / (time.perf_counter() - run_start)
+            await AsyncMongoClientRegistry.shutdown()
+            return stats
+
+        native_async = asyncio.run(run_async())
+        MongoClientRegistry.shutdown()
+        return {"threaded_sync": threaded, "native_async": native_async}
+
+    @staticmethod
+    def local_aggregation(scale: int = 200, repeat: int = 5,
+                          pipeline_names: tuple[str, ...] = ("pipeline_1", "pipeline_9", "pipeline_10")) -> dict[str, dict[str, float]]:
+        """Per-document cost of LocalAggregation over ``get_cars_data()`` repeated ``scale`` times: tree-walking interpreter vs compiled closures."""
+        if scale <= 0 or repeat <= 0:
+            raise ValueError("scale and repeat must be positive.")
+
+        corpus: list[dict[str, Any]] = Pipelines.get_cars_data() * scale
+        results: dict[str, dict[str, float]] = {}
+        for pipeline_name in pipeline_names:
+            pipeline = getattr(Pipelines, pipeline_name)()
+            per_mode: dict[str, dict[str, float]] = {}
+            for mode, compiled in (("interpreted", False), ("compiled", True)):
+                samples = Benchmarks.time_operation(
+                    lambda: sum(1 for _ in LocalAggregation.aggregate(corpus, pipeline, {}, compiled=compiled)), repeat)
+                stats = Benchmarks.summarize(samples)
+                stats["documents"] = len(corpus)
+                stats["us_per_document"] = stats["mean_ms"] * 1000 / len(corpus)
+                per_mode[mode] = stats
+            per_mode["compiled"]["speedup"] = per_mode["interpreted"]["mean_ms"] / per_mode["compiled"]["mean_ms"]
+            for mode, stats in per_mode.items():
+                results[f"{pipeline_name}_{mode}"] = stats
+        return results
+
+    @staticmethod
+    def columnar_aggregation(scale: int = 2000, repeat: int = 3,
+                             pipeline_names: tuple[str, ...] = ("pipeline_1", "pipeline_3", "pipeline_7")) -> dict[str, dict[str, float]]:
+        """Row-at-a-time (compiled) LocalAggregation vs the NumPy columnar path over ``get_cars_data()`` repeated ``scale`` times."""
+        if scale <= 0 or repeat <= 0:
+            raise ValueError("scale and repeat must be positive.")
+        if not ColumnarAggregation.available():
+            raise RuntimeError("numpy is required for the columnar benchmark.")
+
+        corpus: list[dict[str, Any]] = Pipelines.get_cars_data() * scale
+        results: dict[str, dict[str, float]] = {}
+        for pipeline_name in pipeline_names:
+            pipeline = getattr(Pipelines, pipeline_name)()
+            runners: dict[str, Callable[[], Any]] = {
+                "rows": lambda: list(LocalAggregation.aggregate(corpus, pipeline, {})),
+                "columnar": lambda: list(ColumnarAggregation.aggregate(corpus, pipeline, {})),
+            }
+            per_mode: dict[str, dict[str, float]] = {}
+            for mode, runner in runners.items():
+                stats = Benchmarks.summarize(Benchmarks.time_operation(runner, repeat))
+                stats["documents"] = len(corpus)
+                stats["documents_per_second"] = len(corpus) / (stats["mean_ms"] / 1000)
+                per_mode[mode] = stats
+            per_mode["columnar"]["speedup"] = per_mode["rows"]["mean_ms"] / per_mode["columnar"]["mean_ms"]
+            for mode, stats in per_mode.items():
+                results[f"{pipeline_name}_{mode}"] = stats
+        return results
+
+    @staticmethod
+    def output_encoders(scale: int = 500, repeat: int = 3) -> dict[str, dict[str, float]]:
+        """Serialize ``get_cars_data()`` repeated ``scale`` times (each copy given an ObjectId and a datetime) with every encoder.
+
+        ``json_util_indent_4`` is the historical read-path output; the others are written one document per line.
+        """
+        if scale <= 0 or repeat <= 0:
+            raise ValueError("scale and repeat must be positive.")
+
+        updated = datetime.datetime(2024, 1, 1, 12, 30)
+        corpus: list[dict[str, Any]] = [{"_id": ObjectId(), **car, "updated": updated} for car in Pipelines.get_cars_data() * scale]
+        runners: dict[str, Callable[[io.StringIO], Any]] = {"json_util_indent_4": lambda sink: DocumentStream.write_json_array(corpus, sink, 4, "json_util")}
+        for name in OutputEncoders.names():
+            runners[f"{name}_array"] = lambda sink, name=name: DocumentStream.write_json_array(corpus, sink, 0, name)
+            runners[f"{name}_ndjson"] = lambda sink, name=name: DocumentStream.write_json_lines(corpus, sink, name)
+
+        results: dict[str, dict[str, float]] = {}
+        written: dict[str, int] = {}
+        for mode, runner in runners.items():
+            def run(mode: str = mode, runner: Callable[[io.StringIO], Any] = runner) -> None:
+                sink = io.StringIO()
+                runner(sink)
+                written[mode] = sink.tell()
+
+            stats = Benchmarks.summarize(Benchmarks.time_operation(run, repeat))
+            stats["documents"] = len(corpus)
+            stats["documents_per_second"] = len(corpus) / (stats["mean_ms"] / 1000)
+            stats["megabytes_per_second"] = written[mode] / 1e6 / (stats["mean_ms"] / 1000)
+            results[mode] = stats
+        baseline: float = results["json_util_indent_4"]["mean_ms"]
+        for stats in results.values():
+            stats["speedup"] = baseline / stats["mean_ms"]
+        return results
+
+    @staticmethod
+    def allocations(operation: Callable[[], Any]) -> tuple[int, int]:
+        """Memory blocks still allocated by ``operation``'s result, and peak traced bytes while it ran."""
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            result = operation()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        return sum(stat.count_diff for stat in after.compare_to(before, "filename")), peak
+
+    @staticmethod
+    def raw_bson(scale: int = 500, repeat: int = 3, batch_size: int = 1000) -> dict[str, dict[str, float]]:
+        """Client-side cost of consuming wire batches: decoding to dicts (what ``list(collection.find())`` does) vs raw BSON.
+
+        Runs offline over ``get_cars_data()`` repeated ``scale`` times, pre-encoded into ``batch_size`` document batches.
+        """
+        if scale <= 0 or repeat <= 0 or batch_size <= 0:
+            raise ValueError("scale, repeat and batch_size must be positive.")
+
+        encoded: list[bytes] = [bson.encode({"_id": ObjectId(), **car}) for car in Pipelines.get_cars_data() * scale]
+        batches: list[bytes] = [b"".join(encoded[start:start + batch_size]) for start in range(0, len(encoded), batch_size)]
+        runners: dict[str, Callable[[], Any]] = {
+            "decoded_dicts": lambda: [document for batch in batches for document in bson.decode_all(batch)],
+            "raw_documents": lambda: list(RawDocuments.documents(batches)),
+            "raw_views": lambda: [view for batch in batches for view in RawDocuments.split(batch)],
+            "bson_export": lambda: RawDocuments.write_bson(batches, io.BytesIO()),
+        }
+        return Benchmarks.__per_document(runners, len(encoded), repeat, "decoded_dicts")
+
+    @staticmethod
+    def record_memory(documents: int = 100_000, seed: int = 0, batch_size: int = 1000) -> dict[str, dict[str, float]]:
+        """Memory held by ``documents`` decoded cars/users/orders as dicts vs ``pymongo_records`` records, scaled to a million.
+
+        Runs offline over ``Datasets.generate`` output pre-encoded into ``batch_size`` document batches; memory
+        is what tracemalloc still counts while the decoded list is alive, so it excludes the BSON input.
+        """
+        if documents <= 0 or batch_size <= 0:
+            raise ValueError("documents and batch_size must be positive.")
+
+        results: dict[str, dict[str, float]] = {}
+        for name in DATASETS:
+            encoded: list[bytes] = [bson.encode({"_id": ObjectId(), **document} if "_id" not in document else document)
+                                    for document in Datasets.generate(name, documents, seed)]
+            batches: list[bytes] = [b"".join(encoded[start:start + batch_size]) for start in range(0, len(encoded), batch_size)]
+            del encoded
+            record_type = RECORD_TYPES[name]
+            runners: dict[str, Callable[[], list[Any]]] = {
+                "dicts": lambda: [document for batch in batches for document in bson.decode_all(batch)],
+                "records": lambda record_type=record_type: [record for batch in batches for record in Records.decode_all(batch, record_type)],
+            }
+            for mode, runner in runners.items():
+                stats = Benchmarks.summarize(Benchmarks.time_operation(runner, 1))
+                held: int = Benchmarks.__retained_bytes(runner)
+                stats["documents"] = documents
+                stats["documents_per_second"] = documents / (stats["mean_ms"] / 1000)
+                stats["bytes_per_document"] = held / documents
+                stats["megabytes_per_million"] = held / documents * 1_000_000 / 2 ** 20
+                results[f"{name}_{mode}"] = stats
+            results[f"{name}_records"]["memory_saving"] = 1 - results[f"{name}_records"]["bytes_per_document"] / results[f"{name}_dicts"]["bytes_per_document"]
+        return results
+
+    @staticmethod
+    def arrow_export(documents: int = 100_000, seed: int = 0, repeat: int = 3, batch_size: int = 10_000) -> dict[str, dict[str, float]]:
+        """Export ``documents`` synthetic cars as JSON (the read-path output and NDJSON), Parquet and Arrow IPC, then read each back.
+
+        Runs offline over ``Datasets.generate`` output; ``read_ms`` is the time to turn the file back into documents.
+        """
+        if documents <= 0 or repeat <= 0 or batch_size <= 0:
+            raise ValueError("documents, repeat and batch_size must be positive.")
+
+        corpus: list[dict[str, Any]] = [{"_id": ObjectId(), **car} for car in Datasets.generate("cars", documents, seed)]
+        writers: dict[str, tuple[Callable[[], Any], Callable[[Any], Any]]] = {
+            "json_util_indent_4": (io.StringIO, lambda sink: DocumentStream.write_json_array(corpus, sink, 4, "json_util")),
+            "ndjson": (io.StringIO, lambda sink: DocumentStream.write_json_lines(corpus, sink, "json_util")),
+            "parquet": (io.BytesIO, lambda sink: ArrowExport.write(corpus, sink, "parquet", batch_size=batch_size)),
+            "arrow": (io.BytesIO, lambda sink: ArrowExport.write(corpus, sink, "arrow", batch_size=batch_size)),
+        }
+        readers: dict[str, Callable[[Any], Any]] = {
+            "json_util_indent_4": lambda sink: json_util.loads(sink.getvalue()),
+            "ndjson": lambda sink: [json_util.loads(line) for line in sink.getvalue().splitlines()],
+            "parquet": lambda sink: list(ArrowExport.read(io.BytesIO(sink.getvalue()), "parquet", batch_size)),
+            "arrow": lambda sink: list(ArrowExport.read(io.BytesIO(sink.getvalue()), "arrow", batch_size)),
+        }
+
+        results: dict[str, dict[str, float]] = {}
+        for mode, (new_sink, write) in writers.items():
+            sinks: list[Any] = []
+
+            def run(new_sink: Callable[[], Any] = new_sink, write: Callable[[Any], Any] = write) -> None:
+                sink = new_sink()
+                write(sink)
+                sinks.append(sink)
+
+            stats = Benchmarks.summarize(Benchmarks.time_operation(run, repeat))
+            output = sinks[-1]
+            size: int = len(output.getvalue().encode() if isinstance(output, io.StringIO) else output.getvalue())
+            stats["documents"] = documents
+            stats["documents_per_second"] = documents / (stats["mean_ms"] / 1000)
+            stats["bytes_per_document"] = size / documents
+            stats["read_ms"] = Benchmarks.summarize(Benchmarks.time_operation(lambda: readers[mode](output), repeat))["mean_ms"]
+            results[mode] = stats
+        baseline: dict[str, float] = results["json_util_indent_4"]
+        for stats in results.values():
+            stats["speedup"] = baseline["mean_ms"] / stats["mean_ms"]
+            stats["size_ratio"] = stats["bytes_per_document"] / baseline["bytes_per_document"]
+        return results
+
+    @staticmethod
+    def raw_reads(uri: str, database_name: str = 'Test', collection_name: str = 'cars', repeat: int = 5) -> dict[str, dict[str, float]]:
+        """``list(collection.find())`` against raw cursors and a raw-batch ``.bson`` export of the same collection."""
+        client = MongoClientRegistry.get_client(uri)
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        collection = client[database_name][collection_name]
+        documents: int = collection.count_documents({})
+        if not documents:
+            raise ValueError(f"Collection '{database_name}.{collection_name}' is empty.")
+        runners: dict[str, Callable[[], Any]] = {
+            "find_decoded": lambda: list(collection.find()),
+            "find_raw": lambda: list(collection.with_options(codec_options=RAW_CODEC_OPTIONS).find()),
+            "bson_export": lambda: RawDocuments.write_bson(collection.find_raw_batches(), io.BytesIO()),
+        }
+        results = Benchmarks.__per_document(runners, documents, repeat, "find_decoded")
+        MongoClientRegistry.shutdown()
+        return results
+
+    @staticmethod
+    def parallel_scan(uri: str, scale: int = 20000, worker_counts: tuple[int, ...] = (1, 2, 4, 8), repeat: int = 3,
+                      database_name: str = 'benchmark', collection_name: str = 'parallel_scan') -> dict[str, dict[str, float]]:
+        """Full-collection read throughput of one ``find()`` cursor vs ``ParallelScan`` with 1..N workers.
+
+        Seeds ``database_name.collection_name`` with ``get_cars_data()`` repeated ``scale`` times (if it does not hold that many documents).
+        """
+        if scale <= 0 or repeat <= 0 or not worker_counts:
+            raise ValueError("scale and repeat must be positive and worker_counts must not be empty.")
+
+        client = MongoClientRegistry.get_client(uri)
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        collection = client[database_name][collection_name]
+        documents: int = len(Datasets.sample("cars")) * scale
+        if collection.estimated_document_count() != documents:
+            collection.drop()
+            BulkLoader.load(collection, (car for _ in range(scale) for car in Datasets.documents("cars")))
+
+        runners: dict[str, Callable[[], Any]] = {"single_cursor": lambda: sum(1 for _ in collection.find(batch_size=1000))}
+        for workers in worker_counts:
+            runners[f"workers_{workers}"] = lambda workers=workers: sum(1 for _ in ParallelScan.scan(collection, max_workers=workers, ordered=False))
+
+        results: dict[str, dict[str, float]] = {}
+        for mode, runner in runners.items():
+            stats = Benchmarks.summarize(Benchmarks.time_operation(runner, repeat))
+            stats["documents"] = documents
+            stats["documents_per_second"] = documents / (stats["mean_ms"] / 1000)
+            stats["speedup"] = results["single_cursor"]["mean_ms"] / stats["mean_ms"] if results else 1.0
+            results[mode] = stats
+        MongoClientRegistry.shutdown()
+        return results
+
+    @staticmethod
+    def __per_document(runners: dict[str, Callable[[], Any]], documents: int, repeat: int, baseline: str) -> dict[str, dict[str, float]]:
+        results: dict[str, dict[str, float]] = {}
+        for mode, runner in runners.items():
+            stats = Benchmarks.summarize(Benchmarks.time_operation(runner, repeat))
+            blocks, peak = Benchmarks.allocations(runner)
+            stats["documents"] = documents
+            stats["documents_per_second"] = documents / (stats["mean_ms"] / 1000)
+            stats["blocks_per_document"] = blocks / documents
+            stats["peak_bytes_per_document"] = peak / documents
+            results[mode] = stats
+        for stats in results.values():
+            stats["speedup"] = results[baseline]["mean_ms"] / stats["mean_ms"]
+        return results
+
+    @staticmethod
+    def __retained_bytes(operation: Callable[[], Any]) -> int:
+        """Bytes allocated by ``operation`` that its result still holds."""
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            result = operation()
+            after, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        return after - before
+
+    @staticmethod
+    def print_report(results: dict[str, dict[str, float]]) -> None:
+        for name, stats in results.items():
+            print(f"{name}:")
+            for key, value in stats.items():
+                print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    benchmark_uri: str = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
+    Benchmarks.print_report(Benchmarks.output_encoders())
+    Benchmarks.print_report(Benchmarks.raw_bson())
+    Benchmarks.print_report(Benchmarks.record_memory())
+    if ArrowExport.available():
+        Benchmarks.print_report(Benchmarks.arrow_export())
+    Benchmarks.print_report(Benchmarks.local_aggregation())
+    if ColumnarAggregation.available():
+        Benchmarks.print_report(Benchmarks.columnar_aggregation())
+    Benchmarks.print_report(Benchmarks.connection_reuse(benchmark_uri))
+    Benchmarks.print_report(Benchmarks.raw_reads(benchmark_uri))
+    Benchmarks.print_report(Benchmarks.parallel_scan(benchmark_uri))
+    Benchmarks.print_report(Benchmarks.async_vs_threaded(benchmark_uri))
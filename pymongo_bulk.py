@@ -0,0 +1,311 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+import bson
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+from pymongo.results import BulkWriteResult
+
+WriteOperation = InsertOne | UpdateOne | UpdateMany | ReplaceOne | DeleteOne | DeleteMany
+
+# Server limits for a single write batch
+MAX_BATCH_COUNT: int = 100_000
+MAX_BATCH_BYTES: int = 16 * 1024 * 1024
+
+# Write error codes worth retrying: elections, shutdowns, network trouble, write conflicts
+TRANSIENT_ERROR_CODES: frozenset[int] = frozenset({6, 7, 89, 91, 112, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436})
+DUPLICATE_KEY_CODE: int = 11000
+
+
+@dataclass
+class BulkInsertResult:
+    inserted_count: int = 0
+    chunks: int = 0
+    retried_chunks: int = 0
+    failed_chunks: int = 0
+    write_errors: list[dict[str, Any]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    # Documents turned away by client-side validation before they were sent
+    rejected_count: int = 0
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.inserted_count / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.write_errors and not self.failed_chunks and not self.rejected_count
+
+    def merge(self, other: "BulkInsertResult") -> None:
+        self.inserted_count += other.inserted_count
+        self.rejected_count += other.rejected_count
+        self.chunks += other.chunks
+        self.retried_chunks += other.retried_chunks
+        self.failed_chunks += other.failed_chunks
+        self.write_errors.extend(other.write_errors)
+
+
+class BulkLoader:
+    @staticmethod
+    def chunk_documents(documents: Iterable[Mapping[str, Any]], max_count: int = 1000, max_bytes: int = MAX_BATCH_BYTES) -> Iterator[list[RawBSONDocument]]:
+        """Encode documents once and group them into chunks bounded by count and BSON size.
+
+        Documents without an ``_id`` get one assigned client-side (as ``insert_many`` would), which
+        also makes retried chunks idempotent: a re-sent document collides on ``_id`` instead of duplicating.
+        """
+        if not 0 < max_count <= MAX_BATCH_COUNT:
+            raise ValueError(f"max_count must be between 1 and {MAX_BATCH_COUNT}.")
+        if not 0 < max_bytes <= MAX_BATCH_BYTES:
+            raise ValueError(f"max_bytes must be between 1 and {MAX_BATCH_BYTES}.")
+
+        chunk: list[RawBSONDocument] = []
+        chunk_bytes: int = 0
+        for document in documents:
+            if isinstance(document, RawBSONDocument):
+                raw = document
+            else:
+                if not isinstance(document, Mapping):
+                    raise ValueError("Every document must be a dictionary.")
+                if "_id" not in document:
+                    document = {"_id": ObjectId(), **document}
+                raw = RawBSONDocument(bson.encode(document))
+
+            size = len(raw.raw)
+            if size > max_bytes:
+                raise ValueError(f"Document of {size} bytes exceeds the {max_bytes} byte batch limit.")
+            if chunk and (len(chunk) >= max_count or chunk_bytes + size > max_bytes):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk.append(raw)
+            chunk_bytes += size
+
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def load(collection: Collection, documents: Iterable[Mapping[str, Any]], chunk_size: int = 1000, max_chunk_bytes: int = MAX_BATCH_BYTES,
+             ordered: bool = False, max_workers: int = 4, max_retries: int = 3, retry_backoff: float = 0.5,
+             progress: Callable[[BulkInsertResult], None] | None = None) -> BulkInsertResult:
+        """Insert an iterable of documents in concurrent, bounded chunks and return the aggregate result.
+
+        At most ``2 * max_workers`` chunks are encoded ahead of the writers, so generators of any length
+        are loaded in constant memory. ``ordered=True`` writes chunks one at a time and stops at the first
+        permanent error, matching ``insert_many(ordered=True)`` semantics. ``progress`` is called with the
+        running result (``elapsed_seconds`` up to date) each time chunks complete.
+        """
+        if max_workers <= 0:
+            raise ValueError("max_workers must be a positive integer.")
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative.")
+
+        workers: int = 1 if ordered else max_workers
+        lookahead: int = 1 if ordered else 2 * workers
+        result = BulkInsertResult()
+        start = time.perf_counter()
+        chunks = BulkLoader.chunk_documents(documents, chunk_size, max_chunk_bytes)
+        offset: int = 0
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-loader") as executor:
+            in_flight: set[Future[BulkInsertResult]] = set()
+            for chunk in chunks:
+                in_flight.add(executor.submit(BulkLoader.__insert_chunk, collection, chunk, offset, ordered, max_retries, retry_backoff))
+                offset += len(chunk)
+                if len(in_flight) >= lookahead:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result.merge(future.result())
+                    if progress is not None:
+                        result.elapsed_seconds = time.perf_counter() - start
+                        progress(result)
+                    if ordered and not result.succeeded:
+                        break
+
+            for future in in_flight:
+                result.merge(future.result())
+
+        result.elapsed_seconds = time.perf_counter() - start
+        logging.info(f"Bulk load finished: {result.inserted_count} document(s) in {result.chunks} chunk(s), "
+                     f"{result.documents_per_second:.0f} docs/s, {len(result.write_errors)} write error(s).")
+        return result
+
+    @staticmethod
+    def __insert_chunk(collection: Collection, chunk: list[RawBSONDocument], offset: int, ordered: bool, max_retries: int, retry_backoff: float) -> BulkInsertResult:
+        attempts = ChunkInsert(chunk, offset, ordered, max_retries, retry_backoff)
+        while attempts.pending:
+            try:
+                collection.insert_many(attempts.pending, ordered=ordered)
+                attempts.succeeded()
+            except PyMongoError as ex:
+                delay: float | None = attempts.failed(ex)
+                if delay is None:
+                    break
+                if delay:
+                    time.sleep(delay)
+        return attempts.result
+
+
+class ChunkInsert:
+    """Retry and error classification for inserting one chunk, shared by the sync and async loaders.
+
+    The caller sends ``pending`` with ``insert_many`` and reports the outcome: ``succeeded()``, or
+    ``failed(ex)``, which returns the back-off before ``pending`` is sent again, or None when the chunk
+    is finished. Transient write errors and connection failures are retried up to ``max_retries``
+    times; any other error is recorded as a failed chunk instead of being raised.
+    """
+
+    def __init__(self, chunk: list[Any], offset: int, ordered: bool, max_retries: int, retry_backoff: float) -> None:
+        self.result = BulkInsertResult(chunks=1)
+        self.pending: list[Any] = chunk
+        self.__positions: list[int] = list(range(len(chunk)))
+        self.__offset = offset
+        self.__ordered = ordered
+        self.__max_retries = max_retries
+        self.__retry_backoff = retry_backoff
+        self.__attempt: int = 0
+
+    def succeeded(self) -> None:
+        self.result.inserted_count += len(self.pending)
+        self.pending = []
+
+    def failed(self, ex: PyMongoError) -> float | None:
+        if isinstance(ex, BulkWriteError):
+            return self.__write_errors(ex)
+        if isinstance(ex, ConnectionFailure) and self.__attempt < self.__max_retries:
+            return self.__retry()
+        if isinstance(ex, ConnectionFailure):
+            logging.error(f"Chunk at offset {self.__offset} failed after {self.__attempt + 1} attempt(s): {ex}")
+        else:
+            logging.error(f"Chunk at offset {self.__offset} failed: {ex}")
+        self.result.failed_chunks += 1
+        self.result.write_errors.append({"index": self.__offset + self.__positions[0], "code": getattr(ex, "code", None), "errmsg": str(ex),
+                                         "count": len(self.pending)})
+        return self.__finish()
+
+    def __write_errors(self, bwe: BulkWriteError) -> float | None:
+        self.result.inserted_count += bwe.details.get("nInserted", 0)
+        retry_docs: list[Any] = []
+        retry_positions: list[int] = []
+        resume_at: int = len(self.pending)
+        transient: bool = False
+        for error in bwe.details.get("writeErrors", []):
+            local_index: int = error["index"]
+            code = error.get("code")
+            if self.__attempt and code == DUPLICATE_KEY_CODE and error.get("keyPattern") == {"_id": 1}:
+                # Written by an earlier attempt whose acknowledgement was lost
+                self.result.inserted_count += 1
+                resume_at = local_index + 1
+            elif code in TRANSIENT_ERROR_CODES and self.__attempt < self.__max_retries:
+                retry_docs.append(self.pending[local_index])
+                retry_positions.append(self.__positions[local_index])
+                resume_at = local_index + 1
+                transient = True
+            else:
+                self.result.write_errors.append({**error, "index": self.__offset + self.__positions[local_index]})
+                if self.__ordered:
+                    self.result.failed_chunks += 1
+                    return self.__finish()
+
+        if self.__ordered:
+            # An ordered batch stops at its single error; resend everything after it
+            retry_docs.extend(self.pending[resume_at:])
+            retry_positions.extend(self.__positions[resume_at:])
+        if not retry_docs:
+            return self.__finish()
+        self.pending, self.__positions = retry_docs, retry_positions
+        # Only already-written documents were rejected: send the rest without backing off
+        return self.__retry() if transient else 0.0
+
+    def __retry(self) -> float:
+        self.__attempt += 1
+        if self.__attempt == 1:
+            self.result.retried_chunks += 1
+        return self.__retry_backoff * 2 ** (self.__attempt - 1)
+
+    def __finish(self) -> None:
+        self.pending = []
+        return None
+
+
+@dataclass
+class BulkWriteSummary:
+    inserted_count: int = 0
+    matched_count: int = 0
+    modified_count: int = 0
+    deleted_count: int = 0
+    upserted_count: int = 0
+    upserted_ids: dict[int, Any] = field(default_factory=dict)
+    errors: dict[int, dict[str, Any]] = field(default_factory=dict)
+    write_concern_errors: list[dict[str, Any]] = field(default_factory=list)
+    batches: int = 0
+    operations: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.errors and not self.write_concern_errors
+
+    def add_result(self, result: BulkWriteResult | dict[str, Any], offset: int) -> None:
+        """Fold one batch's BulkWriteResult (or BulkWriteError details) into the totals."""
+        details: dict[str, Any] = result.bulk_api_result if isinstance(result, BulkWriteResult) else result
+        self.inserted_count += details.get("nInserted", 0)
+        self.matched_count += details.get("nMatched", 0)
+        self.modified_count += details.get("nModified", 0)
+        self.deleted_count += details.get("nRemoved", 0)
+        self.upserted_count += details.get("nUpserted", 0)
+        for upsert in details.get("upserted", []):
+            self.upserted_ids[offset + upsert["index"]] = upsert["_id"]
+
+
+class BulkWriter:
+    @staticmethod
+    def batch_operations(operations: Iterable[WriteOperation], batch_size: int = 1000) -> Iterator[list[WriteOperation]]:
+        if not 0 < batch_size <= MAX_BATCH_COUNT:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_COUNT}.")
+
+        batch: list[WriteOperation] = []
+        for operation in operations:
+            if not isinstance(operation, (InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany)):
+                raise ValueError(f"Unsupported bulk write operation: {operation!r}")
+            batch.append(operation)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def write(collection: Collection, operations: Iterable[WriteOperation], ordered: bool = True, batch_size: int = 1000) -> BulkWriteSummary:
+        """Apply mixed insert/update/replace/delete operations in ``bulk_write`` batches.
+
+        Errors are keyed by the operation's position in the input iterable, so callers can map
+        each failure back to the change that caused it. With ``ordered=True`` processing stops
+        at the first failing operation, as a single ordered ``bulk_write`` would.
+        """
+        summary = BulkWriteSummary()
+        start = time.perf_counter()
+        offset: int = 0
+
+        for batch in BulkWriter.batch_operations(operations, batch_size):
+            summary.batches += 1
+            summary.operations += len(batch)
+            try:
+                summary.add_result(collection.bulk_write(batch, ordered=ordered), offset)
+            except BulkWriteError as bwe:
+                summary.add_result(bwe.details, offset)
+                for error in bwe.details.get("writeErrors", []):
+                    position: int = offset + error["index"]
+                    summary.errors[position] = {**error, "index": position, "operation": batch[error["index"]]}
+                summary.write_concern_errors.extend(bwe.details.get("writeConcernErrors", []))
+                if ordered and summary.errors:
+                    break
+            offset += len(batch)
+
+        summary.elapsed_seconds = time.perf_counter() - start
+        logging.info(f"Bulk write finished: {summary.operations} operation(s) in {summary.batches} batch(es), {len(summary.errors)} error(s).")
+        return summary
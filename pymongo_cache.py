@@ -0,0 +1,597 @@
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Optional
+
+import bson
+from bson.codec_options import DEFAULT_CODEC_OPTIONS, CodecOptions
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure, PyMongoError
+
+from pymongo_aggregation import LocalAggregation
+
+# Server error code for operations against a database or collection that does not exist
+NAMESPACE_NOT_FOUND: int = 26
+
+Namespace = tuple[str, str]
+
+# Stages whose output depends on more than the collection contents, or that write
+_UNCACHEABLE_STAGES: frozenset[str] = frozenset({
+    "$out", "$merge", "$sample", "$currentOp", "$listSessions", "$listLocalSessions", "$collStats", "$indexStats",
+    "$planCacheStats", "$changeStream", "$search", "$searchMeta", "$vectorSearch",
+})
+_VOLATILE_VALUES: frozenset[str] = frozenset({"$$NOW", "$$CLUSTER_TIME", "$$USER_ROLES"})
+
+
+class _NamespaceEntry:
+    __slots__ = ("databases", "databases_expiry", "collections")
+
+    def __init__(self) -> None:
+        self.databases: frozenset[str] = frozenset()
+        self.databases_expiry: float = 0.0
+        self.collections: dict[str, tuple[float, frozenset[str]]] = {}
+
+
+class NamespaceCache:
+    """TTL cache of database and collection names, shared by all MongoDbOperation calls.
+
+    In optimistic mode no existence check is made at all; callers rely on the server
+    reporting NamespaceNotFound (see ``is_namespace_not_found``). Note that the server
+    implicitly creates missing namespaces on insert/update, so optimistic mode trades
+    the "does not exist" message for zero extra round trips on writes.
+    """
+
+    ttl_seconds: float = 30.0
+    optimistic: bool = False
+
+    _entries: "weakref.WeakKeyDictionary[Any, _NamespaceEntry]" = weakref.WeakKeyDictionary()
+    _lock: threading.Lock = threading.Lock()
+    _stats: dict[str, int] = {
+        "list_database_names": 0,
+        "list_collection_names": 0,
+        "hits": 0,
+        "misses": 0,
+        "skipped": 0,
+    }
+
+    @classmethod
+    def configure(cls, ttl_seconds: float | None = None, optimistic: bool | None = None) -> None:
+        if ttl_seconds is not None:
+            if ttl_seconds < 0:
+                raise ValueError("ttl_seconds must not be negative.")
+            cls.ttl_seconds = ttl_seconds
+        if optimistic is not None:
+            cls.optimistic = optimistic
+
+    @classmethod
+    def database_exists(cls, client: MongoClient, database_name: str) -> bool:
+        if cls.optimistic:
+            cls.record("skipped")
+            return True
+
+        names: Optional[frozenset[str]] = cls.cached_database_names(client)
+        if names is None:
+            cls.record("list_database_names")
+            names = cls.store_database_names(client, client.list_database_names())
+        return database_name in names
+
+    @classmethod
+    def collection_exists(cls, client: MongoClient, database_name: str, collection_name: str) -> bool:
+        if cls.optimistic:
+            cls.record("skipped")
+            return True
+
+        names: Optional[frozenset[str]] = cls.cached_collection_names(client, database_name)
+        if names is None:
+            cls.record("list_collection_names")
+            names = cls.store_collection_names(client, database_name, client[database_name].list_collection_names())
+        return collection_name in names
+
+    @classmethod
+    def cached_database_names(cls, client: Any) -> Optional[frozenset[str]]:
+        """Return the cached database names for ``client``, or None when a server round trip is needed."""
+        entry = cls.__entry(client)
+        with cls._lock:
+            if entry.databases_expiry > time.monotonic():
+                cls._stats["hits"] += 1
+                return entry.databases
+            cls._stats["misses"] += 1
+            return None
+
+    @classmethod
+    def store_database_names(cls, client: Any, names: Iterable[str]) -> frozenset[str]:
+        entry = cls.__entry(client)
+        frozen = frozenset(names)
+        with cls._lock:
+            entry.databases = frozen
+            entry.databases_expiry = time.monotonic() + cls.ttl_seconds
+        return frozen
+
+    @classmethod
+    def cached_collection_names(cls, client: Any, database_name: str) -> Optional[frozenset[str]]:
+        entry = cls.__entry(client)
+        with cls._lock:
+            cached: Optional[tuple[float, frozenset[str]]] = entry.collections.get(database_name)
+            if cached is not None and cached[0] > time.monotonic():
+                cls._stats["hits"] += 1
+                return cached[1]
+            cls._stats["misses"] += 1
+            return None
+
+    @classmethod
+    def store_collection_names(cls, client: Any, database_name: str, names: Iterable[str]) -> frozenset[str]:
+        entry = cls.__entry(client)
+        frozen = frozenset(names)
+        with cls._lock:
+            entry.collections[database_name] = (time.monotonic() + cls.ttl_seconds, frozen)
+        return frozen
+
+    @classmethod
+    def record(cls, name: str) -> None:
+        with cls._lock:
+            cls._stats[name] += 1
+
+    @classmethod
+    def invalidate(cls, client: Any = None, database_name: str | None = None) -> None:
+        """Drop cached names. Without arguments the whole cache is cleared.
+
+        Passing ``database_name`` forgets that database's collection list as well as the
+        database list, since creating or dropping a collection can create or remove the database.
+        """
+        with cls._lock:
+            if client is None:
+                cls._entries.clear()
+                return
+            entry = cls._entries.get(client)
+            if entry is None:
+                return
+            entry.databases_expiry = 0.0
+            if database_name is None:
+                entry.collections.clear()
+            else:
+                entry.collections.pop(database_name, None)
+
+    @staticmethod
+    def is_namespace_not_found(error: OperationFailure) -> bool:
+        return error.code == NAMESPACE_NOT_FOUND
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Counters for verifying round-trip savings: server listing calls, cache hits/misses and skipped checks."""
+        with cls._lock:
+            snapshot: dict[str, Any] = dict(cls._stats)
+        snapshot["round_trips"] = snapshot["list_database_names"] + snapshot["list_collection_names"]
+        return snapshot
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._lock:
+            for key in cls._stats:
+                cls._stats[key] = 0
+
+    @classmethod
+    def __entry(cls, client: Any) -> _NamespaceEntry:
+        with cls._lock:
+            entry = cls._entries.get(client)
+            if entry is None:
+                entry = _NamespaceEntry()
+                cls._entries[client] = entry
+            return entry
+
+
+class _CachedResult:
+    __slots__ = ("payload", "size", "expires", "namespaces")
+
+    def __init__(self, payload: bytes, expires: float, namespaces: frozenset[Namespace]) -> None:
+        self.payload: bytes = payload
+        self.size: int = len(payload)
+        self.expires: float = expires
+        self.namespaces: frozenset[Namespace] = namespaces
+
+
+class _ResultStore:
+    __slots__ = ("entries", "size", "generations", "__weakref__")
+
+    def __init__(self) -> None:
+        self.entries: OrderedDict[tuple[str, str, str], _CachedResult] = OrderedDict()
+        self.size: int = 0
+        # Bumped on every invalidation; keyed by (database, collection), (database, None) and (None, None)
+        self.generations: dict[tuple[Optional[str], Optional[str]], int] = {}
+
+    def generation(self, namespaces: frozenset[Namespace]) -> tuple[int, ...]:
+        databases = {database for database, _ in namespaces}
+        return (self.generations.get((None, None), 0),
+                *(self.generations.get((database, None), 0) for database in sorted(databases)),
+                *(self.generations.get(namespace, 0) for namespace in sorted(namespaces)))
+
+    def discard(self, key: tuple[str, str, str]) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+
+class ResultRecorder:
+    """Copies documents into the cache as they stream to the caller; stored only once the cursor is exhausted.
+
+    Results that grow past ``AggregationCache.max_entry_bytes`` are dropped on the fly, so large
+    results keep streaming without being buffered. Nothing is stored if a write to one of the
+    pipeline's namespaces was made while the results were being read.
+    """
+
+    __slots__ = ("client", "key", "namespaces", "generation", "ttl_seconds", "chunks", "size", "overflow")
+
+    def __init__(self, client: Any, key: tuple[str, str, str], namespaces: frozenset[Namespace], generation: tuple[int, ...],
+                 ttl_seconds: float) -> None:
+        self.client: Any = client
+        self.key: tuple[str, str, str] = key
+        self.namespaces: frozenset[Namespace] = namespaces
+        self.generation: tuple[int, ...] = generation
+        self.ttl_seconds: float = ttl_seconds
+        self.chunks: list[bytes] = []
+        self.size: int = 0
+        self.overflow: bool = False
+
+    def add(self, document: Any) -> None:
+        if self.overflow:
+            return
+        # Wrapped because bson.encode moves a top-level _id to the front, and results must keep the server's field order
+        encoded: bytes = bson.encode({"d": document})
+        self.size += len(encoded)
+        if self.size > AggregationCache.max_entry_bytes:
+            self.overflow = True
+            self.chunks = []
+            AggregationCache.record("too_large")
+            return
+        self.chunks.append(encoded)
+
+    def commit(self) -> None:
+        if not self.overflow:
+            AggregationCache.store(self)
+
+    def wrap(self, documents: Iterable[Any]) -> Iterator[Any]:
+        for document in documents:
+            self.add(document)
+            yield document
+        self.commit()
+
+    async def wrap_async(self, documents: AsyncIterable[Any]) -> AsyncIterator[Any]:
+        async for document in documents:
+            self.add(document)
+            yield document
+        self.commit()
+
+
+class AggregationCache:
+    """LRU cache of aggregation results keyed by namespace and a structural hash of the pipeline.
+
+    Disabled by default, since results cached in this process do not see writes made by other
+    clients until the entry's TTL runs out (or a ``ChangeStreamInvalidator`` reports them). Writes
+    made through MongoDbOperation invalidate every entry that reads the written collection,
+    including pipelines that only reach it through ``$lookup``, ``$graphLookup`` or ``$unionWith``.
+    Results are kept BSON-encoded, which bounds memory exactly and hands each caller fresh documents.
+    """
+
+    enabled: bool = False
+    ttl_seconds: float = 60.0
+    max_entries: int = 1024
+    max_bytes: int = 64 * 1024 * 1024
+    max_entry_bytes: int = 4 * 1024 * 1024
+
+    _stores: "weakref.WeakKeyDictionary[Any, _ResultStore]" = weakref.WeakKeyDictionary()
+    _lock: threading.Lock = threading.Lock()
+    _stats: dict[str, int] = {
+        "hits": 0,
+        "misses": 0,
+        "expired": 0,
+        "stores": 0,
+        "evictions": 0,
+        "invalidations": 0,
+        "uncacheable": 0,
+        "too_large": 0,
+        "stale": 0,
+    }
+
+    @classmethod
+    def configure(cls, enabled: bool | None = None, ttl_seconds: float | None = None, max_entries: int | None = None,
+                  max_bytes: int | None = None, max_entry_bytes: int | None = None) -> None:
+        if ttl_seconds is not None:
+            if ttl_seconds < 0:
+                raise ValueError("ttl_seconds must not be negative.")
+            cls.ttl_seconds = ttl_seconds
+        if max_entries is not None:
+            if max_entries <= 0:
+                raise ValueError("max_entries must be a positive integer.")
+            cls.max_entries = max_entries
+        if max_bytes is not None:
+            if max_bytes <= 0:
+                raise ValueError("max_bytes must be a positive integer.")
+            cls.max_bytes = max_bytes
+        if max_entry_bytes is not None:
+            if max_entry_bytes <= 0:
+                raise ValueError("max_entry_bytes must be a positive integer.")
+            cls.max_entry_bytes = max_entry_bytes
+        if cls.max_entry_bytes > cls.max_bytes:
+            raise ValueError("max_entry_bytes must not be greater than max_bytes.")
+        if enabled is not None:
+            cls.enabled = enabled
+            if not enabled:
+                cls.invalidate()
+
+    @classmethod
+    def lookup(cls, client: Any, database_name: str, collection_name: str, pipeline: list[dict[str, Any]],
+               ttl_seconds: float | None = None) -> tuple[Optional[list[Any]], Optional[ResultRecorder]]:
+        """Return ``(documents, None)`` on a hit, ``(None, recorder)`` on a miss and ``(None, None)`` when not caching.
+
+        Hits are decoded with the client's codec options, so they match what the cursor would have returned.
+        """
+        if not cls.enabled:
+            return None, None
+
+        namespaces: Optional[frozenset[Namespace]] = cls.dependencies(database_name, collection_name, pipeline)
+        if namespaces is None:
+            cls.record("uncacheable")
+            return None, None
+
+        key: tuple[str, str, str] = (database_name, collection_name, LocalAggregation.pipeline_key(pipeline))
+        store = cls.__store(client)
+        with cls._lock:
+            entry: Optional[_CachedResult] = store.entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                store.discard(key)
+                cls._stats["expired"] += 1
+                entry = None
+            if entry is not None:
+                store.entries.move_to_end(key)
+                cls._stats["hits"] += 1
+                payload: bytes = entry.payload
+            else:
+                cls._stats["misses"] += 1
+                generation: tuple[int, ...] = store.generation(namespaces)
+
+        if entry is not None:
+            codec_options: Any = getattr(client, "codec_options", None)
+            wrappers: list[Any] = bson.decode_all(payload, codec_options if isinstance(codec_options, CodecOptions) else DEFAULT_CODEC_OPTIONS)
+            return [wrapper["d"] for wrapper in wrappers], None
+        ttl: float = cls.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return None, ResultRecorder(client, key, namespaces, generation, ttl)
+
+    @classmethod
+    def fetch(cls, client: Any, database_name: str, collection_name: str, pipeline: list[dict[str, Any]],
+              run: Callable[[], Iterable[Any]], ttl_seconds: float | None = None) -> Iterator[Any]:
+        """Serve ``pipeline`` from the cache, or call ``run()`` and cache what it yields."""
+        documents, recorder = cls.lookup(client, database_name, collection_name, pipeline, ttl_seconds)
+        if documents is not None:
+            return iter(documents)
+        results: Iterable[Any] = run()
+        return recorder.wrap(results) if recorder is not None else iter(results)
+
+    @classmethod
+    def store(cls, recorder: ResultRecorder) -> None:
+        if recorder.ttl_seconds <= 0:
+            return
+        store = cls.__store(recorder.client)
+        with cls._lock:
+            if store.generation(recorder.namespaces) != recorder.generation:
+                # A write landed while the results were being read
+                cls._stats["stale"] += 1
+                return
+            store.discard(recorder.key)
+            store.entries[recorder.key] = _CachedResult(b"".join(recorder.chunks), time.monotonic() + recorder.ttl_seconds,
+                                                        recorder.namespaces)
+            store.size += store.entries[recorder.key].size
+            cls._stats["stores"] += 1
+            while store.entries and (len(store.entries) > cls.max_entries or store.size > cls.max_bytes):
+                _, evicted = store.entries.popitem(last=False)
+                store.size -= evicted.size
+                cls._stats["evictions"] += 1
+
+    @classmethod
+    def invalidate(cls, client: Any = None, database_name: str | None = None, collection_name: str | None = None) -> None:
+        """Drop cached results that read the given collection (or any collection of the database).
+
+        Without a client every cached result is dropped.
+        """
+        with cls._lock:
+            stores: list[_ResultStore] = list(cls._stores.values()) if client is None else [cls._stores.get(client)]
+            scope: tuple[Optional[str], Optional[str]] = (database_name, collection_name) if database_name else (None, None)
+            for store in stores:
+                if store is None:
+                    continue
+                store.generations[scope] = store.generations.get(scope, 0) + 1
+                for key in [key for key, entry in store.entries.items() if cls.__reads(entry, database_name, collection_name)]:
+                    store.discard(key)
+                    cls._stats["invalidations"] += 1
+
+    @staticmethod
+    def dependencies(database_name: str, collection_name: str, pipeline: list[dict[str, Any]]) -> Optional[frozenset[Namespace]]:
+        """Namespaces whose contents determine the pipeline's result, or None if the result must not be cached."""
+        namespaces: set[Namespace] = {(database_name, collection_name)}
+        if not AggregationCache.__collect(database_name, pipeline, namespaces):
+            return None
+        return frozenset(namespaces)
+
+    @staticmethod
+    def output_namespace(database_name: str, pipeline: list[dict[str, Any]]) -> Optional[Namespace]:
+        """The collection written by a trailing ``$out`` or ``$merge`` stage, if any."""
+        if not pipeline or not isinstance(pipeline[-1], dict):
+            return None
+        stage: dict[str, Any] = pipeline[-1]
+        target: Any = stage.get("$out", stage.get("$merge"))
+        if isinstance(target, dict) and "into" in target:
+            target = target["into"]
+        if isinstance(target, str):
+            return database_name, target
+        if isinstance(target, dict) and isinstance(target.get("coll"), str):
+            return target.get("db", database_name), target["coll"]
+        return None
+
+    @classmethod
+    def record(cls, name: str) -> None:
+        with cls._lock:
+            cls._stats[name] += 1
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Hit/miss/eviction counters plus the current number of entries and bytes held."""
+        with cls._lock:
+            snapshot: dict[str, Any] = dict(cls._stats)
+            stores: list[_ResultStore] = list(cls._stores.values())
+            snapshot["entries"] = sum(len(store.entries) for store in stores)
+            snapshot["bytes"] = sum(store.size for store in stores)
+        lookups: int = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._lock:
+            for key in cls._stats:
+                cls._stats[key] = 0
+
+    @classmethod
+    def __store(cls, client: Any) -> _ResultStore:
+        with cls._lock:
+            store = cls._stores.get(client)
+            if store is None:
+                store = _ResultStore()
+                cls._stores[client] = store
+            return store
+
+    @staticmethod
+    def __reads(entry: _CachedResult, database_name: str | None, collection_name: str | None) -> bool:
+        if database_name is None:
+            return True
+        if collection_name is None:
+            return any(database == database_name for database, _ in entry.namespaces)
+        return (database_name, collection_name) in entry.namespaces
+
+    @staticmethod
+    def __collect(database_name: str, pipeline: Any, namespaces: set[Namespace]) -> bool:
+        if not isinstance(pipeline, list):
+            return False
+        for stage in pipeline:
+            if not isinstance(stage, dict) or len(stage) != 1:
+                return False
+            name, spec = next(iter(stage.items()))
+            if name in _UNCACHEABLE_STAGES or AggregationCache.__volatile(spec):
+                return False
+            sub_pipelines: list[Any] = []
+            if name in ("$lookup", "$graphLookup", "$unionWith"):
+                if isinstance(spec, str):
+                    spec = {"coll": spec}
+                if not isinstance(spec, dict):
+                    return False
+                source: Any = spec.get("coll" if name == "$unionWith" else "from")
+                if isinstance(source, dict):
+                    if not isinstance(source.get("coll"), str):
+                        return False
+                    namespaces.add((source.get("db", database_name), source["coll"]))
+                elif isinstance(source, str):
+                    namespaces.add((database_name, source))
+                if "pipeline" in spec:
+                    sub_pipelines.append(spec["pipeline"])
+            elif name == "$facet" and isinstance(spec, dict):
+                sub_pipelines.extend(spec.values())
+            if not all(AggregationCache.__collect(database_name, sub, namespaces) for sub in sub_pipelines):
+                return False
+        return True
+
+    @staticmethod
+    def __volatile(value: Any) -> bool:
+        if isinstance(value, str):
+            return value in _VOLATILE_VALUES or value.startswith(("$$NOW.", "$$CLUSTER_TIME."))
+        if isinstance(value, dict):
+            return "$rand" in value or any(AggregationCache.__volatile(item) for item in value.values())
+        if isinstance(value, list):
+            return any(AggregationCache.__volatile(item) for item in value)
+        return False
+
+
+class ChangeStreamInvalidator:
+    """Background change-stream listener that invalidates ``AggregationCache`` entries on any client's writes.
+
+    Change streams need a replica set or sharded cluster. Watches the whole deployment, or one
+    database when ``database_name`` is given. If the stream breaks, the watched scope is
+    invalidated (events may have been missed) and the stream is reopened after ``retry_seconds``.
+    """
+
+    _running: "weakref.WeakSet[ChangeStreamInvalidator]" = weakref.WeakSet()
+
+    def __init__(self, client: MongoClient, database_name: str | None = None, retry_seconds: float = 5.0,
+                 max_await_time_ms: int = 1000) -> None:
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+        self.client: MongoClient = client
+        self.database_name: Optional[str] = database_name
+        self.retry_seconds: float = retry_seconds
+        self.max_await_time_ms: int = max_await_time_ms
+        self.events: int = 0
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "ChangeStreamInvalidator":
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.__run, name="aggregation-cache-invalidator", daemon=True)
+        self._thread.start()
+        ChangeStreamInvalidator._running.add(self)
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout if timeout is not None else self.max_await_time_ms / 1000 + 1)
+        ChangeStreamInvalidator._running.discard(self)
+
+    @classmethod
+    def stop_all(cls) -> None:
+        for invalidator in list(cls._running):
+            invalidator.stop()
+
+    def __run(self) -> None:
+        # Only the fields needed to route the invalidation travel over the wire
+        pipeline: list[dict[str, Any]] = [{"$project": {"operationType": 1, "ns": 1, "to": 1}}]
+        resume_token: Optional[dict[str, Any]] = None
+        target: Any = self.client if self.database_name is None else self.client[self.database_name]
+
+        while not self._stop.is_set():
+            try:
+                with target.watch(pipeline, resume_after=resume_token, max_await_time_ms=self.max_await_time_ms) as stream:
+                    logging.info(f"Watching {self.database_name or 'all databases'} for aggregation cache invalidation.")
+                    while not self._stop.is_set() and stream.alive:
+                        change: Optional[dict[str, Any]] = stream.try_next()
+                        resume_token = stream.resume_token
+                        if change is None:
+                            continue
+                        self.events += 1
+                        if self.__apply(change):
+                            resume_token = None
+                            break
+            except PyMongoError as ex:
+                logging.warning(f"Aggregation cache change stream failed: {ex}")
+                AggregationCache.invalidate(self.client, self.database_name)
+                resume_token = None
+                self._stop.wait(self.retry_seconds)
+
+    def __apply(self, change: dict[str, Any]) -> bool:
+        """Invalidate what ``change`` touched; True when the stream was invalidated and must be reopened."""
+        operation: Optional[str] = change.get("operationType")
+        namespace: dict[str, Any] = change.get("ns") or {}
+        if operation == "invalidate":
+            AggregationCache.invalidate(self.client, self.database_name)
+            return True
+        if operation == "dropDatabase" or "coll" not in namespace:
+            AggregationCache.invalidate(self.client, namespace.get("db", self.database_name))
+            return False
+        AggregationCache.invalidate(self.client, namespace["db"], namespace["coll"])
+        renamed: dict[str, Any] = change.get("to") or {}
+        if "coll" in renamed:
+            AggregationCache.invalidate(self.client, renamed["db"], renamed["coll"])
+        return False
@@ -0,0 +1,218 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Mapping, Optional
+
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.errors import ConnectionFailure
+
+
+ClientKey = tuple[str, tuple[tuple[str, Any], ...]]
+
+
+class MongoClientRegistry:
+    """Process-wide registry of long-lived MongoClient instances keyed by URI and options."""
+
+    _clients: dict[ClientKey, MongoClient] = {}
+    _warmed: set[ClientKey] = set()
+    _lock: threading.Lock = threading.Lock()
+    _pid: int = os.getpid()
+
+    pool_options: dict[str, Any] = {
+        "maxPoolSize": 100,
+        "minPoolSize": 0,
+        "maxIdleTimeMS": 300000,
+        "serverSelectionTimeoutMS": 5000,
+    }
+
+    @classmethod
+    def configure(cls, max_pool_size: int | None = None, min_pool_size: int | None = None, max_idle_time_ms: int | None = None) -> None:
+        """Change the pool sizing used for clients created after this call."""
+        if max_pool_size is not None:
+            if max_pool_size < 0:
+                raise ValueError("max_pool_size must not be negative.")
+            cls.pool_options["maxPoolSize"] = max_pool_size
+        if min_pool_size is not None:
+            if min_pool_size < 0:
+                raise ValueError("min_pool_size must not be negative.")
+            cls.pool_options["minPoolSize"] = min_pool_size
+        if max_idle_time_ms is not None:
+            if max_idle_time_ms < 0:
+                raise ValueError("max_idle_time_ms must not be negative.")
+            cls.pool_options["maxIdleTimeMS"] = max_idle_time_ms
+
+        max_size = cls.pool_options["maxPoolSize"]
+        if max_size and cls.pool_options["minPoolSize"] > max_size:
+            raise ValueError("min_pool_size must not be greater than max_pool_size.")
+
+    @classmethod
+    def get_client(cls, uri: str, **options: Any) -> Optional[MongoClient]:
+        """Return the shared client for ``uri``, creating and warming it up on first use."""
+        if not uri:
+            raise ValueError("MongoDB URI must not be empty.")
+
+        cls.__check_fork()
+        merged: dict[str, Any] = {**cls.pool_options, **options}
+        key: ClientKey = cls._make_key(uri, merged)
+
+        with cls._lock:
+            client: Optional[MongoClient] = cls._clients.get(key)
+            if client is None:
+                # connect=False defers server discovery until the warm-up ping below
+                client = MongoClient(uri, connect=False, **merged)
+                cls._clients[key] = client
+            if key in cls._warmed:
+                return client
+
+        try:
+            client.admin.command('ping')
+        except ConnectionFailure as cf:
+            logging.exception(f"Could not connect to MongoDB: {cf}")
+            cls.__discard(key, client)
+            return None
+
+        with cls._lock:
+            cls._warmed.add(key)
+        logging.info("Connected to MongoDB successfully!")
+        return client
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Close every registered client. Safe to call more than once."""
+        with cls._lock:
+            clients = list(cls._clients.values())
+            cls._clients.clear()
+            cls._warmed.clear()
+
+        for client in clients:
+            try:
+                client.close()
+            except Exception as ex:
+                logging.warning(f"Failed to close MongoDB client cleanly: {ex}")
+        if clients:
+            logging.info(f"MongoDB client registry shut down ({len(clients)} client(s) closed).")
+
+    @classmethod
+    def active_clients(cls) -> int:
+        with cls._lock:
+            return len(cls._clients)
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        # Clients inherited from the parent must not be used or closed in the child;
+        # drop the references and let the child build its own pools.
+        cls._lock = threading.Lock()
+        cls._clients = {}
+        cls._warmed = set()
+        cls._pid = os.getpid()
+
+    @classmethod
+    def __check_fork(cls) -> None:
+        if cls._pid != os.getpid():
+            cls._reset_after_fork()
+
+    @classmethod
+    def __discard(cls, key: ClientKey, client: MongoClient) -> None:
+        with cls._lock:
+            if cls._clients.get(key) is client:
+                del cls._clients[key]
+        client.close()
+
+    @staticmethod
+    def _make_key(uri: str, options: Mapping[str, Any]) -> ClientKey:
+        def freeze(value: Any) -> Any:
+            if isinstance(value, Mapping):
+                return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+            if isinstance(value, (list, tuple, set)):
+                return tuple(freeze(v) for v in value)
+            return value
+
+        return uri, tuple(sorted((name, freeze(value)) for name, value in options.items()))
+
+
+class AsyncMongoClientRegistry:
+    """Async counterpart of MongoClientRegistry. AsyncMongoClient is bound to the event loop it
+    first runs on, so clients are additionally keyed by the running loop.
+
+    Loops are held weakly, and the clients of loops that were closed without ``shutdown`` are
+    dropped on the next ``get_client``, so a new loop never receives a client bound to a dead one.
+    """
+
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[ClientKey, AsyncMongoClient]]" = weakref.WeakKeyDictionary()
+    _warmed: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, set[ClientKey]]" = weakref.WeakKeyDictionary()
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    async def get_client(cls, uri: str, **options: Any) -> Optional[AsyncMongoClient]:
+        if not uri:
+            raise ValueError("MongoDB URI must not be empty.")
+
+        merged: dict[str, Any] = {**MongoClientRegistry.pool_options, **options}
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        key: ClientKey = MongoClientRegistry._make_key(uri, merged)
+
+        with cls._lock:
+            cls.__evict_closed_loops()
+            clients: dict[ClientKey, AsyncMongoClient] = cls._clients.setdefault(loop, {})
+            client: Optional[AsyncMongoClient] = clients.get(key)
+            if client is None:
+                client = AsyncMongoClient(uri, **merged)
+                clients[key] = client
+            if key in cls._warmed.get(loop, ()):
+                return client
+
+        try:
+            await client.admin.command('ping')
+        except ConnectionFailure as cf:
+            logging.exception(f"Could not connect to MongoDB: {cf}")
+            with cls._lock:
+                if cls._clients.get(loop, {}).get(key) is client:
+                    del cls._clients[loop][key]
+            await client.close()
+            return None
+
+        with cls._lock:
+            cls._warmed.setdefault(loop, set()).add(key)
+        logging.info("Connected to MongoDB successfully!")
+        return client
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Close the clients that belong to the running event loop."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        with cls._lock:
+            clients: list[AsyncMongoClient] = list(cls._clients.pop(loop, {}).values())
+            cls._warmed.pop(loop, None)
+
+        for client in clients:
+            await client.close()
+        if clients:
+            logging.info(f"Async MongoDB client registry shut down ({len(clients)} client(s) closed).")
+
+    @classmethod
+    def __evict_closed_loops(cls) -> None:
+        # A closed loop can no longer run its clients' close(); dropping them releases their sockets
+        for loop in [loop for loop in cls._clients if loop.is_closed()]:
+            stale: dict[ClientKey, AsyncMongoClient] = cls._clients.pop(loop)
+            cls._warmed.pop(loop, None)
+            logging.debug(f"Dropped {len(stale)} async client(s) of a closed event loop.")
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        cls._lock = threading.Lock()
+        cls._clients = weakref.WeakKeyDictionary()
+        cls._warmed = weakref.WeakKeyDictionary()
+
+
+def _reset_registries_after_fork() -> None:
+    MongoClientRegistry._reset_after_fork()
+    AsyncMongoClientRegistry._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_registries_after_fork)
+
+atexit.register(MongoClientRegistry.shutdown)
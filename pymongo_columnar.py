@@ -0,0 +1,475 @@
+import math
+from typing import Any, Callable, Iterable, Iterator, Mapping, MutableMapping, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it every pipeline takes the row-at-a-time path
+    np = None
+
+from pymongo_aggregation import MISSING, LocalAggregation, freeze, path_getter
+
+# Integers up to 2**53 are exact in float64, so sums and comparisons over them match Python's
+_EXACT_INTEGER: int = 2 ** 53
+
+# Value kinds recorded per row while building a column
+_OTHER, _INT, _FLOAT, _NULL, _ARRAY = 0, 1, 2, 3, 4
+_KINDS: dict[type, int] = {int: _INT, float: _FLOAT, type(None): _NULL, type(MISSING): _NULL, list: _ARRAY, bool: _OTHER, str: _OTHER}
+
+
+def _kind(value_type: type) -> int:
+    kind = _KINDS.get(value_type)
+    if kind is None:
+        # bson.Int64 and other int/float subclasses count as numbers, as they do for the row-at-a-time path
+        kind = _INT if issubclass(value_type, int) else _FLOAT if issubclass(value_type, float) else _ARRAY if issubclass(value_type, list) else _OTHER
+        _KINDS[value_type] = kind
+    return kind
+
+
+class _Column:
+    """One field (or computed expression) over a batch of rows, with NumPy views of its numeric values."""
+
+    __slots__ = ("objects", "numbers", "kinds")
+
+    def __init__(self, objects: Any, numbers: Any, kinds: Any) -> None:
+        self.objects = objects
+        self.numbers = numbers
+        self.kinds = kinds
+
+    @classmethod
+    def from_values(cls, values: list[Any]) -> "_Column":
+        count = len(values)
+        kinds = np.fromiter(map(_kind, map(type, values)), dtype=np.int8, count=count)
+        numbers = np.zeros(count)
+        numeric = np.flatnonzero((kinds == _INT) | (kinds == _FLOAT))
+        if len(numeric):
+            numbers[numeric] = [values[position] for position in numeric]
+        return cls(np.fromiter(values, dtype=object, count=count), numbers, kinds)
+
+    @classmethod
+    def constant(cls, value: Any, count: int) -> "_Column":
+        return cls.from_values([value] * count)
+
+    @classmethod
+    def concat(cls, columns: list["_Column"]) -> "_Column":
+        if not columns:
+            return cls.from_values([])
+        return cls(np.concatenate([column.objects for column in columns]),
+                   np.concatenate([column.numbers for column in columns]),
+                   np.concatenate([column.kinds for column in columns]))
+
+    @property
+    def is_number(self) -> Any:
+        return (self.kinds == _INT) | (self.kinds == _FLOAT)
+
+    @property
+    def exact(self) -> bool:
+        integers = self.numbers[self.kinds == _INT]
+        return not len(integers) or float(np.abs(integers).max()) <= _EXACT_INTEGER
+
+    def compare(self, constant: float) -> Any:
+        """Vectorized ``compare_values(value, constant)`` for a numeric, non-NaN constant: -1, 0 or 1 per row."""
+        numbers = self.numbers
+        ordered = (numbers > constant).astype(np.int8) - (numbers < constant).astype(np.int8)
+        # BSON order: missing/null sort below numbers, NaN below every other number, everything else above
+        ordered[np.isnan(numbers)] = -1
+        ordered[self.kinds == _NULL] = -1
+        ordered[(self.kinds == _OTHER) | (self.kinds == _ARRAY)] = 1
+        return ordered
+
+
+# A vectorized expression maps the batch's columns (by field path) and row count to a result column
+VectorExpression = Callable[[Mapping[str, _Column], int], _Column]
+
+_COMPARISONS: dict[str, Callable[[Any], Any]] = {
+    "$eq": lambda ordered: ordered == 0,
+    "$ne": lambda ordered: ordered != 0,
+    "$gt": lambda ordered: ordered > 0,
+    "$gte": lambda ordered: ordered >= 0,
+    "$lt": lambda ordered: ordered < 0,
+    "$lte": lambda ordered: ordered <= 0,
+}
+_MIRRORED: dict[str, str] = {"$eq": "$eq", "$ne": "$ne", "$gt": "$lt", "$gte": "$lte", "$lt": "$gt", "$lte": "$gte"}
+
+
+def _is_plain_number(value: Any) -> bool:
+    """A numeric constant the vectorized comparisons reproduce exactly: not NaN, and integers within float64 precision."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return not math.isnan(value) if isinstance(value, float) else abs(value) <= _EXACT_INTEGER
+
+
+def _field_path(expression: Any) -> Optional[str]:
+    if isinstance(expression, str) and expression.startswith("$") and not expression.startswith("$$"):
+        return expression[1:]
+    return None
+
+
+def _boolean_column(mask: Any) -> _Column:
+    return _Column(mask.astype(object), np.zeros(len(mask)), np.full(len(mask), _OTHER, dtype=np.int8))
+
+
+class ColumnarAggregation:
+    """Vectorized execution of ``$match`` + ``$group`` pipeline prefixes with NumPy.
+
+    Matching and group accumulation (``$sum``, ``$avg``, ``$min``, ``$max``, ``$count``) run as array
+    operations over the referenced fields only, gathered ``batch_size`` documents at a time; any stages
+    after the ``$group`` run on the (small) grouped output through ``LocalAggregation``. Pipelines or
+    values the columnar path cannot reproduce exactly fall back to the row-at-a-time engine, so
+    results are always identical to ``LocalAggregation.aggregate``.
+    """
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    @staticmethod
+    def plan(pipeline: list[dict[str, Any]]) -> Optional["_ColumnarPlan"]:
+        """Split ``pipeline`` into a vectorizable prefix and the remaining stages, or None if nothing can be vectorized."""
+        if np is None or not isinstance(pipeline, list):
+            return None
+
+        predicates: list[tuple[str, Any]] = []
+        position = 0
+        while position < len(pipeline) and ColumnarAggregation.__stage_name(pipeline[position]) == "$match":
+            conditions = ColumnarAggregation.__vector_query(pipeline[position]["$match"])
+            if conditions is None:
+                break
+            predicates.extend(conditions)
+            position += 1
+        # Stages after an unvectorizable $match must see its output, so the prefix ends there
+        if position < len(pipeline) and ColumnarAggregation.__stage_name(pipeline[position]) == "$match":
+            return _ColumnarPlan(predicates, None, pipeline[position:]) if predicates else None
+
+        group: Optional[_GroupSpec] = None
+        if position < len(pipeline) and ColumnarAggregation.__stage_name(pipeline[position]) == "$group":
+            group = ColumnarAggregation.__vector_group(pipeline[position]["$group"])
+            if group is not None:
+                position += 1
+
+        if not predicates and group is None:
+            return None
+        return _ColumnarPlan(predicates, group, pipeline[position:])
+
+    @staticmethod
+    def aggregate(documents: Iterable[Mapping[str, Any]], pipeline: list[dict[str, Any]],
+                  collections: Optional[MutableMapping[str, list[dict[str, Any]]]] = None, batch_size: int = 65536) -> Iterator[dict[str, Any]]:
+        """Drop-in replacement for ``LocalAggregation.aggregate`` that vectorizes what it can."""
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+
+        plan = ColumnarAggregation.plan(pipeline)
+        if plan is None:
+            return LocalAggregation.aggregate(documents, pipeline, collections)
+        # Compile the remaining stages now so an invalid pipeline fails before any input is read
+        remaining = LocalAggregation.compile(plan.remaining) if plan.remaining else None
+        stream = plan.run(documents, batch_size)
+        if remaining is None:
+            return stream
+        return remaining.run(stream, collections)
+
+    @staticmethod
+    def source_query(pipeline: list[dict[str, Any]]) -> tuple[dict[str, Any], Optional[dict[str, Any]], list[dict[str, Any]]]:
+        """Split ``pipeline`` into a server-side ``find`` filter, a projection and the stages to run locally.
+
+        Leading ``$match`` stages become the filter. When the rest starts with a vectorizable ``$group``
+        the projection fetches only the fields it references; otherwise documents are fetched whole.
+        """
+        filters: list[dict[str, Any]] = []
+        position = 0
+        while position < len(pipeline) and ColumnarAggregation.__stage_name(pipeline[position]) == "$match":
+            filters.append(pipeline[position]["$match"])
+            position += 1
+        filter_: dict[str, Any] = filters[0] if len(filters) == 1 else {"$and": filters} if filters else {}
+        remaining = pipeline[position:]
+
+        plan = ColumnarAggregation.plan(remaining)
+        projection: Optional[dict[str, Any]] = None
+        if plan is not None and plan.group is not None and not plan.predicates:
+            paths = sorted(plan.group.paths)
+            # A projection may not name both a field and one of its sub-fields
+            kept = [path for path in paths if not any(path.startswith(other + ".") for other in paths)]
+            projection = {path: 1 for path in kept}
+            if "_id" not in projection:
+                projection["_id"] = 0
+        return filter_, projection, remaining
+
+    @staticmethod
+    def __stage_name(stage: Any) -> Optional[str]:
+        if isinstance(stage, Mapping) and len(stage) == 1:
+            return next(iter(stage))
+        return None
+
+    @staticmethod
+    def __vector_query(query: Any) -> Optional[list[tuple[str, Any]]]:
+        """Flatten a filter into (path, condition) pairs the columnar matcher understands, or None."""
+        if not isinstance(query, Mapping):
+            return None
+        conditions: list[tuple[str, Any]] = []
+        for key, condition in query.items():
+            if key == "$and" and isinstance(condition, list):
+                for sub in condition:
+                    nested = ColumnarAggregation.__vector_query(sub)
+                    if nested is None:
+                        return None
+                    conditions.extend(nested)
+            elif key.startswith("$") or not _vector_condition(condition):
+                return None
+            else:
+                conditions.append((key, condition))
+        return conditions
+
+    @staticmethod
+    def __vector_group(spec: Any) -> Optional["_GroupSpec"]:
+        if not isinstance(spec, Mapping) or "_id" not in spec:
+            return None
+        key = spec["_id"]
+        key_path = _field_path(key)
+        if key_path is None and (isinstance(key, (Mapping, list)) or (isinstance(key, str) and key.startswith("$"))):
+            return None
+
+        paths: set[str] = {key_path} if key_path is not None else set()
+        fields: list[tuple[str, str, Optional[VectorExpression]]] = []
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            if not isinstance(accumulator, Mapping) or len(accumulator) != 1:
+                return None
+            operator, expression = next(iter(accumulator.items()))
+            if operator == "$count":
+                fields.append((name, operator, None))
+                continue
+            if operator not in ("$sum", "$avg", "$min", "$max"):
+                return None
+            vector = _vector_expression(expression, paths)
+            if vector is None:
+                return None
+            fields.append((name, operator, vector))
+        return _GroupSpec(key, key_path, fields, paths)
+
+
+def _vector_condition(condition: Any) -> bool:
+    if _is_plain_number(condition) or isinstance(condition, str):
+        return True
+    if not isinstance(condition, Mapping) or len(condition) != 1:
+        return False
+    operator, operand = next(iter(condition.items()))
+    if operator in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte"):
+        return _is_plain_number(operand) or (operator in ("$eq", "$ne") and isinstance(operand, str))
+    if operator in ("$in", "$nin"):
+        return isinstance(operand, list) and bool(operand) and (
+            all(isinstance(item, str) for item in operand) or all(_is_plain_number(item) for item in operand))
+    return False
+
+
+def _vector_expression(expression: Any, paths: set[str]) -> Optional[VectorExpression]:
+    """Vectorize an accumulator argument: field paths, numeric constants, comparisons and $cond over them."""
+    path = _field_path(expression)
+    if path is not None:
+        paths.add(path)
+        return lambda columns, count: columns[path]
+
+    if _is_plain_number(expression):
+        return lambda columns, count: _Column.constant(expression, count)
+
+    if not isinstance(expression, Mapping) or len(expression) != 1:
+        return None
+    operator, operand = next(iter(expression.items()))
+
+    if operator in _COMPARISONS and isinstance(operand, list) and len(operand) == 2:
+        left, right = operand
+        if _field_path(right) is not None and _is_plain_number(left):
+            # 1000 < "$x" is "$x" > 1000
+            operator, left, right = _MIRRORED[operator], right, left
+        left_path = _field_path(left)
+        if left_path is None or not _is_plain_number(right):
+            return None
+        paths.add(left_path)
+        check = _COMPARISONS[operator]
+        return lambda columns, count: _boolean_column(check(columns[left_path].compare(right)))
+
+    if operator == "$cond":
+        if isinstance(operand, list) and len(operand) == 3:
+            parts = operand
+        elif isinstance(operand, Mapping) and set(operand) == {"if", "then", "else"}:
+            parts = [operand["if"], operand["then"], operand["else"]]
+        else:
+            return None
+        condition, then, otherwise = (_vector_expression(part, paths) for part in parts)
+        if condition is None or then is None or otherwise is None or not (isinstance(parts[0], Mapping) and next(iter(parts[0])) in _COMPARISONS):
+            return None
+
+        def cond(columns: Mapping[str, _Column], count: int) -> _Column:
+            mask = condition(columns, count).objects.astype(bool)
+            chosen, other = then(columns, count), otherwise(columns, count)
+            return _Column(np.where(mask, chosen.objects, other.objects), np.where(mask, chosen.numbers, other.numbers),
+                           np.where(mask, chosen.kinds, other.kinds))
+        return cond
+
+    return None
+
+
+class _GroupSpec:
+    __slots__ = ("key", "key_path", "fields", "paths")
+
+    def __init__(self, key: Any, key_path: Optional[str], fields: list[tuple[str, str, Optional[VectorExpression]]], paths: set[str]) -> None:
+        self.key = key
+        self.key_path = key_path
+        self.fields = fields
+        self.paths = paths
+
+
+class _ColumnarPlan:
+    __slots__ = ("predicates", "group", "remaining", "match_paths")
+
+    def __init__(self, predicates: list[tuple[str, Any]], group: Optional[_GroupSpec], remaining: list[dict[str, Any]]) -> None:
+        self.predicates = predicates
+        self.group = group
+        self.remaining = remaining
+        self.match_paths: list[str] = list(dict.fromkeys(path for path, _ in predicates))
+
+    def run(self, documents: Iterable[Mapping[str, Any]], batch_size: int) -> Iterator[dict[str, Any]]:
+        if self.group is None:
+            return self.__filtered(documents, batch_size)
+        return self.__grouped(documents, batch_size)
+
+    def __batches(self, documents: Iterable[Mapping[str, Any]], batch_size: int) -> Iterator[list[Mapping[str, Any]]]:
+        batch: list[Mapping[str, Any]] = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def __mask(self, batch: list[Mapping[str, Any]]) -> Any:
+        getters = {path: path_getter(path) for path in self.match_paths}
+        values = {path: [getter(document) for document in batch] for path, getter in getters.items()}
+        mask = np.ones(len(batch), dtype=bool)
+        for path, condition in self.predicates:
+            mask &= _match_column(_Column.from_values(values[path]), condition)
+        return mask
+
+    def __filtered(self, documents: Iterable[Mapping[str, Any]], batch_size: int) -> Iterator[dict[str, Any]]:
+        for batch in self.__batches(documents, batch_size):
+            for position in np.flatnonzero(self.__mask(batch)):
+                yield dict(batch[position])
+
+    def __grouped(self, documents: Iterable[Mapping[str, Any]], batch_size: int) -> Iterator[dict[str, Any]]:
+        group = self.group
+        paths = sorted(group.paths)
+        getters = [(path, path_getter(path)) for path in paths]
+        key_of = path_getter(group.key_path) if group.key_path is not None else None
+        index: dict[Any, int] = {}
+        key_values: list[Any] = []
+        codes: list[Any] = []
+        gathered: dict[str, list[_Column]] = {path: [] for path in paths}
+
+        for batch in self.__batches(documents, batch_size):
+            if self.predicates:
+                batch = [batch[position] for position in np.flatnonzero(self.__mask(batch))]
+            if not batch:
+                continue
+            batch_codes: list[int] = []
+            for document in batch:
+                key_value = group.key if key_of is None else key_of(document)
+                if key_value is MISSING:
+                    key_value = None
+                frozen = key_value if type(key_value) is str else freeze(key_value)
+                code = index.get(frozen)
+                if code is None:
+                    code = index[frozen] = len(key_values)
+                    key_values.append(key_value)
+                batch_codes.append(code)
+            codes.append(np.array(batch_codes, dtype=np.intp))
+            for path, getter in getters:
+                gathered[path].append(_Column.from_values([getter(document) for document in batch]))
+
+        if not key_values:
+            return
+        all_codes = np.concatenate(codes)
+        columns = {path: _Column.concat(parts) for path, parts in gathered.items()}
+        groups = len(key_values)
+        results: list[list[Any]] = []
+        for _, operator, vector in group.fields:
+            if vector is None:
+                results.append(np.bincount(all_codes, minlength=groups).tolist())
+            else:
+                results.append(_accumulate(operator, vector(columns, len(all_codes)), all_codes, groups))
+
+        for code, key_value in enumerate(key_values):
+            output: dict[str, Any] = {"_id": key_value}
+            for (name, _, _), values in zip(group.fields, results):
+                output[name] = values[code]
+            yield output
+
+
+def _match_column(column: _Column, condition: Any) -> Any:
+    """Vectorized filter for one field; arrays (which match element-wise) are checked row by row."""
+    if isinstance(condition, Mapping):
+        operator, operand = next(iter(condition.items()))
+    else:
+        operator, operand = "$eq", condition
+
+    targets: list[Any] = operand if operator in ("$in", "$nin") else [operand]
+    if operator in ("$eq", "$ne", "$in", "$nin"):
+        mask = np.zeros(len(column.kinds), dtype=bool)
+        for target in targets:
+            if isinstance(target, str):
+                mask |= (column.objects == target) & (column.kinds == _OTHER)
+            else:
+                mask |= column.is_number & (column.compare(target) == 0)
+        if operator in ("$ne", "$nin"):
+            mask = ~mask
+    else:
+        # Only numbers match a numeric range query; NaN sorts below every number
+        mask = column.is_number & _COMPARISONS[operator](column.compare(operand))
+
+    inexact = column.kinds == _ARRAY
+    if not column.exact:
+        inexact |= column.kinds == _INT
+    for position in np.flatnonzero(inexact):
+        mask[position] = LocalAggregation.matches({"value": condition}, {"value": column.objects[position]})
+    return mask
+
+
+def _accumulate(operator: str, column: _Column, codes: Any, groups: int) -> list[Any]:
+    is_number = column.is_number
+    integers = column.kinds == _INT
+    if operator in ("$sum", "$avg") and float(np.abs(column.numbers[integers]).sum()) < _EXACT_INTEGER:
+        # bincount adds in input order, like the row-at-a-time accumulator, so float sums match exactly
+        totals = np.bincount(codes, weights=np.where(is_number, column.numbers, 0.0), minlength=groups)
+        if operator == "$avg":
+            counts = np.bincount(codes, weights=is_number, minlength=groups)
+            return [total / count if count else None for total, count in zip(totals.tolist(), counts.tolist())]
+        has_float = np.bincount(codes, weights=column.kinds == _FLOAT, minlength=groups) > 0
+        return [total if floating else int(total) for total, floating in zip(totals.tolist(), has_float.tolist())]
+
+    present = column.kinds != _NULL
+    if operator in ("$min", "$max") and column.exact and bool(np.all(is_number[present])):
+        return _numeric_extreme(operator, column, codes, groups)
+
+    # Anything else (huge integers, mixed BSON types) is accumulated by the row-at-a-time engine
+    rows = ({"group": code, "value": value} for code, value in zip(codes.tolist(), column.objects))
+    grouped = {document["_id"]: document["result"]
+               for document in LocalAggregation.aggregate(rows, [{"$group": {"_id": "$group", "result": {operator: "$value"}}}])}
+    return [grouped[code] for code in range(groups)]
+
+
+def _numeric_extreme(operator: str, column: _Column, codes: Any, groups: int) -> list[Any]:
+    rows = np.flatnonzero(column.is_number)
+    numbers = column.numbers[rows]
+    nan = np.isnan(numbers)
+    if operator == "$min":
+        # NaN sorts below every number; ties keep the first value seen
+        order = np.lexsort((rows, np.where(nan, 0.0, numbers), ~nan, codes[rows]))
+    else:
+        order = np.lexsort((rows, np.where(nan, 0.0, -numbers), nan, codes[rows]))
+    sorted_codes = codes[rows][order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_codes[1:] != sorted_codes[:-1]
+
+    results: list[Any] = [None] * groups
+    for code, row in zip(sorted_codes[first].tolist(), rows[order][first].tolist()):
+        results[code] = column.objects[row]
+    return results
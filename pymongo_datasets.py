@@ -0,0 +1,487 @@
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, Optional
+
+from pymongo.collection import Collection
+
+from pymongo_bulk import BulkInsertResult, BulkLoader, MAX_BATCH_BYTES
+from pymongo_synthetic import SyntheticData
+
+
+# The canonical samples. Building them from literals is the cheapest way to get a fresh mutable copy
+# (cheaper than unpickling or decoding BSON), so each call builds one; Datasets.sample freezes one build
+def _cars() -> list[dict[str, Any]]:
+    return [
+        {
+            "maker": "Hyundai",
+            "model": "Creta",
+            "fuel_type": "Diesel",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1493,
+                "torque": "250 Nm"
+            },
+            "features": ["Sunroof", "Leather Seats", "Wireless Charging", "Ventilated Seats", "Bluetooth"],
+            "sunroof": True,
+            "airbags": 6,
+            "price": 1500000,
+            "owners": [
+                {"name": "Raju", "purchase_date": "2021-03-15", "location": "Mumbai"},
+                {"name": "Shyam", "purchase_date": "2023-01-10", "location": "Delhi"}
+            ],
+            "service_history": [
+                {"date": "2022-04-10", "service_type": "Oil Change", "cost": 5000},
+                {"date": "2023-07-18", "service_type": "Brake Replacement", "cost": 12000}
+            ]
+        },
+        {
+            "maker": "Maruti Suzuki",
+            "model": "Baleno",
+            "fuel_type": "Petrol",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1197,
+                "torque": "113 Nm"
+            },
+            "features": ["Projector Headlamps", "Apple CarPlay", "ABS"],
+            "sunroof": False,
+            "airbags": 2,
+            "price": 800000,
+            "owners": [
+                {"name": "Baburao", "purchase_date": "2020-08-22", "location": "Pune"}
+            ],
+            "service_history": [
+                {"date": "2021-05-12", "service_type": "Tire Rotation", "cost": 2000},
+                {"date": "2022-11-05", "service_type": "Battery Replacement", "cost": 7000}
+            ]
+        },
+        {
+            "maker": "Mahindra",
+            "model": "XUV500",
+            "fuel_type": "Diesel",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Turbocharged",
+                "cc": 2179,
+                "torque": "360 Nm"
+            },
+            "features": ["All-Wheel Drive", "Navigation System", "Cruise Control"],
+            "sunroof": True,
+            "airbags": 6,
+            "price": 1800000,
+            "owners": [
+                {"name": "Raju", "purchase_date": "2019-11-30", "location": "Bangalore"},
+                {"name": "Shyam", "purchase_date": "2022-02-15", "location": "Hyderabad"}
+            ],
+            "service_history": [
+                {"date": "2021-02-25", "service_type": "Transmission Repair", "cost": 35000},
+                {"date": "2023-03-10", "service_type": "Tire Replacement", "cost": 15000}
+            ]
+        },
+        {
+            "maker": "Honda",
+            "model": "City",
+            "fuel_type": "Petrol",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1498,
+                "torque": "145 Nm"
+            },
+            "features": ["Keyless Entry", "Auto AC", "Multi-angle Rearview Camera"],
+            "sunroof": False,
+            "airbags": 4,
+            "price": 1200000,
+            "owners": [
+                {"name": "Baburao", "purchase_date": "2020-05-20", "location": "Chennai"}
+            ],
+            "service_history": [
+                {"date": "2021-08-10", "service_type": "Oil Change", "cost": 5000},
+                {"date": "2022-10-25", "service_type": "Brake Replacement", "cost": 10000}
+            ]
+        },
+        {
+            "maker": "Tata",
+            "model": "Nexon",
+            "fuel_type": "Petrol",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Turbocharged",
+                "cc": 1199,
+                "torque": "170 Nm"
+            },
+            "features": ["Touchscreen", "Reverse Camera", "Bluetooth Connectivity"],
+            "sunroof": False,
+            "airbags": 2,
+            "price": 1100000,
+            "owners": [
+                {"name": "Raju", "purchase_date": "2021-12-05", "location": "Kolkata"}
+            ],
+            "service_history": [
+                {"date": "2022-12-01", "service_type": "Oil Change", "cost": 6000},
+                {"date": "2023-06-15", "service_type": "Tire Rotation", "cost": 3000}
+            ]
+        },
+        {
+            "maker": "Hyundai",
+            "model": "Venue",
+            "fuel_type": "Petrol",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Turbocharged",
+                "cc": 998,
+                "torque": "172 Nm"
+            },
+            "features": ["Sunroof", "Touchscreen Infotainment", "Keyless Entry", "Rear Camera", "Cruise Control"],
+            "sunroof": True,
+            "airbags": 4,
+            "price": 1200000,
+            "owners": [
+                {"name": "Amit", "purchase_date": "2020-05-20", "location": "Bangalore"},
+                {"name": "Priya", "purchase_date": "2022-11-05", "location": "Chennai"}
+            ],
+            "service_history": [
+                {"date": "2021-07-15", "service_type": "Oil Change", "cost": 4000},
+                {"date": "2023-03-22", "service_type": "Tire Replacement", "cost": 8000}
+            ]
+        },
+        {
+            "maker": "Hyundai",
+            "model": "i20",
+            "fuel_type": "Petrol",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1197,
+                "torque": "114 Nm"
+            },
+            "features": ["Apple CarPlay", "ABS", "Projector Headlamps", "Wireless Charging"],
+            "sunroof": False,
+            "airbags": 2,
+            "price": 900000,
+            "owners": [
+                {"name": "Rohit", "purchase_date": "2021-06-15", "location": "Delhi"}
+            ],
+            "service_history": [
+                {"date": "2022-09-10", "service_type": "Battery Replacement", "cost": 7000},
+                {"date": "2023-05-25", "service_type": "Tire Rotation", "cost": 2500}
+            ]
+        },
+        {
+            "maker": "Maruti Suzuki",
+            "model": "Swift",
+            "fuel_type": "Petrol",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1198,
+                "torque": "113 Nm"
+            },
+            "features": ["Touchscreen Infotainment", "ABS", "Keyless Entry", "Rear Parking Sensors"],
+            "sunroof": False,
+            "airbags": 2,
+            "price": 750000,
+            "owners": [
+                {"name": "Vijay", "purchase_date": "2019-03-20", "location": "Hyderabad"}
+            ],
+            "service_history": [
+                {"date": "2020-05-18", "service_type": "Oil Change", "cost": 3000},
+                {"date": "2022-08-10", "service_type": "Brake Replacement", "cost": 5000}
+            ]
+        },
+        {
+            "maker": "Tata",
+            "model": "Harrier",
+            "fuel_type": "Diesel",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Turbocharged",
+                "cc": 1956,
+                "torque": "350 Nm"
+            },
+            "features": ["Panoramic Sunroof", "Leather Upholstery", "Terrain Response System", "Auto-Dimming IRVM"],
+            "sunroof": True,
+            "airbags": 6,
+            "price": 2000000,
+            "owners": [
+                {"name": "Deepak", "purchase_date": "2022-01-10", "location": "Mumbai"}
+            ],
+            "service_history": [
+                {"date": "2022-10-15", "service_type": "Transmission Repair", "cost": 45000},
+                {"date": "2023-04-20", "service_type": "Brake Replacement", "cost": 15000}
+            ]
+        },
+        {
+            "maker": "Honda",
+            "model": "Amaze",
+            "fuel_type": "Diesel",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1498,
+                "torque": "200 Nm"
+            },
+            "features": ["Keyless Entry", "Auto AC", "Rear Parking Camera", "Cruise Control"],
+            "sunroof": False,
+            "airbags": 4,
+            "price": 1000000,
+            "owners": [
+                {"name": "Anil", "purchase_date": "2020-11-25", "location": "Kolkata"}
+            ],
+            "service_history": [
+                {"date": "2021-12-10", "service_type": "Oil Change", "cost": 4500},
+                {"date": "2022-08-15", "service_type": "Tire Rotation", "cost": 2500}
+            ]
+        },
+        {
+            "maker": "Tata",
+            "model": "Nexon EV",
+            "fuel_type": "Electric",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Electric Motor",
+                "battery_capacity": "30.2 kWh",
+                "torque": "245 Nm"
+            },
+            "features": ["Touchscreen Infotainment", "Wireless Charging", "Connected Car Tech", "Sunroof"],
+            "sunroof": True,
+            "airbags": 6,
+            "price": 1400000,
+            "owners": [
+                {"name": "Vikas", "purchase_date": "2021-05-20", "location": "Bangalore"}
+            ],
+            "service_history": [
+                {"date": "2022-06-10", "service_type": "Battery Check", "cost": 0},
+                {"date": "2023-03-15", "service_type": "Tire Rotation", "cost": 3000}
+            ]
+        },
+        {
+            "maker": "Hyundai",
+            "model": "Kona Electric",
+            "fuel_type": "Electric",
+            "transmission": "Automatic",
+            "engine": {
+                "type": "Electric Motor",
+                "battery_capacity": "39.2 kWh",
+                "torque": "395 Nm"
+            },
+            "features": ["Wireless Charging", "Ventilated Seats", "Sunroof", "Auto AC"],
+            "sunroof": True,
+            "airbags": 6,
+            "price": 2300000,
+            "owners": [
+                {"name": "Sneha", "purchase_date": "2022-01-15", "location": "Mumbai"}
+            ],
+            "service_history": [
+                {"date": "2022-09-10", "service_type": "Battery Check", "cost": 0},
+                {"date": "2023-06-05", "service_type": "Brake Replacement", "cost": 8000}
+            ]
+        },
+        {
+            "maker": "Maruti Suzuki",
+            "model": "WagonR",
+            "fuel_type": "CNG",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 998,
+                "torque": "90 Nm"
+            },
+            "features": ["Manual AC", "ABS", "Power Windows"],
+            "sunroof": False,
+            "airbags": 2,
+            "price": 600000,
+            "owners": [
+                {"name": "Rahul", "purchase_date": "2019-07-22", "location": "Delhi"}
+            ],
+            "service_history": [
+                {"date": "2020-11-10", "service_type": "CNG Kit Checkup", "cost": 2000},
+                {"date": "2021-08-15", "service_type": "Tire Rotation", "cost": 1500}
+            ]
+        },
+        {
+            "maker": "Honda",
+            "model": "Amaze",
+            "fuel_type": "CNG",
+            "transmission": "Manual",
+            "engine": {
+                "type": "Naturally Aspirated",
+                "cc": 1199,
+                "torque": "110 Nm"
+            },
+            "features": ["Keyless Entry", "Auto AC", "Rear Parking Camera", "Cruise Control"],
+            "sunroof": False,
+            "airbags": 4,
+            "price": 800000,
+            "owners": [
+                {"name": "Sanjay", "purchase_date": "2021-03-18", "location": "Pune"}
+            ],
+            "service_history": [
+                {"date": "2021-09-10", "service_type": "CNG Kit Checkup", "cost": 2500},
+                {"date": "2022-05-15", "service_type": "Oil Change", "cost": 3500}
+            ]
+        }
+    ]
+
+
+def _users() -> list[dict[str, Any]]:
+    return [
+        {
+            "_id": "user1",
+            "name": "Amit Sharma",
+            "email": "amit.sharma@example.com",
+            "phone": "+91-987654210",
+            "address": "MG Road, Mumbai, Maharashtra"
+        },
+        {
+            "_id": "user2",
+            "name": "Priya Verma",
+            "email": "priya.verma@example.com",
+            "phone": "+91-987654211",
+            "address": "Nehru Place, New Delhi, Delhi"
+        },
+        {
+            "_id": "user3",
+            "name": "Rahul Singh",
+            "email": "rahul.singh@example.com",
+            "phone": "+91-987654212",
+            "address": "Sector 18, Noida, Uttar Pradesh"
+        },
+        {
+            "_id": "user4",
+            "name": "Anjali Nair",
+            "email": "anjali.nair@example.com",
+            "phone": "+91-987654213",
+            "address": "Marine Drive, Kochi, Kerala"
+        },
+        {
+            "_id": "user5",
+            "name": "Vikram Desai",
+            "email": "vikram.desai@example.com",
+            "phone": "+91-987654214",
+            "address": "Park Street, Kolkata, West Bengal"
+        }
+    ]
+
+
+def _orders() -> list[dict[str, Any]]:
+    return [
+        {
+            "_id": "order1",
+            "user_id": "user1",
+            "product": "Laptop",
+            "amount": 50000,
+            "order_date": "2024-08-01"
+        },
+        {
+            "_id": "order2",
+            "user_id": "user2",
+            "product": "Mobile Phone",
+            "amount": 15000,
+            "order_date": "2024-08-05"
+        },
+        {
+            "_id": "order3",
+            "user_id": "user1",
+            "product": "Headphones",
+            "amount": 2000,
+            "order_date": "2024-08-10"
+        },
+        {
+            "_id": "order4",
+            "user_id": "user3",
+            "product": "Tablet",
+            "amount": 25000,
+            "order_date": "2024-08-12"
+        },
+        {
+            "_id": "order5",
+            "user_id": "user4",
+            "product": "Smart Watch",
+            "amount": 8000,
+            "order_date": "2024-08-15"
+        }
+    ]
+
+
+DATASETS: tuple[str, ...] = ("cars", "users", "orders")
+_SAMPLES: dict[str, Callable[[], list[dict[str, Any]]]] = {"cars": _cars, "users": _users, "orders": _orders}
+
+
+def _immutable(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _immutable(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_immutable(item) for item in value)
+    return value
+
+
+class Datasets:
+    """The cars/users/orders samples, built once, and seeded synthetic datasets of the same shape at any size.
+
+    ``sample`` shares one deeply read-only copy of a canonical sample, built on first use; ``documents``
+    hands out fresh mutable copies for callers that modify them (inserting adds ``_id``).
+    ``generate`` streams ``SyntheticData`` records in constant memory and ``load`` sends either
+    through ``BulkLoader``, logging throughput as it goes.
+    """
+
+    _lock: threading.Lock = threading.Lock()
+    _frozen: dict[str, tuple[Mapping[str, Any], ...]] = {}
+
+    @staticmethod
+    def sample(name: str) -> tuple[Mapping[str, Any], ...]:
+        """The canonical sample as read-only mappings and tuples, shared by every caller."""
+        Datasets.__check(name)
+        frozen: Optional[tuple[Mapping[str, Any], ...]] = Datasets._frozen.get(name)
+        if frozen is None:
+            with Datasets._lock:
+                frozen = Datasets._frozen.setdefault(name, tuple(_immutable(document) for document in _SAMPLES[name]()))
+        return frozen
+
+    @staticmethod
+    def documents(name: str) -> list[dict[str, Any]]:
+        """A fresh, mutable copy of the canonical sample."""
+        Datasets.__check(name)
+        return _SAMPLES[name]()
+
+    @staticmethod
+    def generate(name: str, count: int, seed: int = 0, users: int | None = None) -> Iterator[dict[str, Any]]:
+        """``count`` synthetic records shaped like the sample; orders go to ``users`` buyers (default one per ten orders)."""
+        Datasets.__check(name)
+        if name == "cars":
+            return SyntheticData.cars(count, seed)
+        if name == "users":
+            return SyntheticData.users(count, seed)
+        return SyntheticData.orders(count, users or max(5, count // 10), seed)
+
+    @staticmethod
+    def load(collection: Collection, name: str, count: int | None = None, seed: int = 0, users: int | None = None, chunk_size: int = 1000,
+             max_chunk_bytes: int = MAX_BATCH_BYTES, max_workers: int = 4, report_every: int = 100_000) -> BulkInsertResult:
+        """Insert ``count`` generated records (the canonical sample if None) with ``BulkLoader``.
+
+        Progress and documents per second are logged every ``report_every`` inserted documents.
+        """
+        if report_every <= 0:
+            raise ValueError("report_every must be a positive integer.")
+        documents: Iterator[dict[str, Any]] | list[dict[str, Any]] = (
+            Datasets.documents(name) if count is None else Datasets.generate(name, count, seed, users))
+        total: int = len(documents) if isinstance(documents, list) else count or 0
+        next_report: int = report_every
+
+        def report(result: BulkInsertResult) -> None:
+            nonlocal next_report
+            if result.inserted_count >= next_report:
+                logging.info(f"Loaded {result.inserted_count:,} of {total:,} {name} into '{collection.full_name}' "
+                             f"({result.documents_per_second:,.0f} docs/s).")
+                next_report = (result.inserted_count // report_every + 1) * report_every
+
+        return BulkLoader.load(collection, documents, chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes, max_workers=max_workers,
+                               progress=report)
+
+    @staticmethod
+    def __check(name: str) -> None:
+        if name not in DATASETS:
+            raise ValueError(f"Dataset must be one of {', '.join(DATASETS)}.")
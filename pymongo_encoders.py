@@ -0,0 +1,154 @@
+import json
+import math
+from typing import Any, Callable, Mapping, Optional
+
+from bson import json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS, RELAXED_JSON_OPTIONS, JSONMode, JSONOptions
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; without it the compact encoders use the json module's C encoder
+    orjson = None
+
+_COMPACT_SEPARATORS: tuple[str, str] = (",", ":")
+
+
+class DocumentEncoder:
+    """Turns one document into JSON text. Subclasses are registered by name with ``OutputEncoders``."""
+
+    name: str = ""
+
+    def encode(self, document: Any, indent: int | None = None) -> str:
+        raise NotImplementedError
+
+
+class JsonUtilEncoder(DocumentEncoder):
+    """``json.dumps(..., default=json_util.default)``: the historical output of every read path."""
+
+    name = "json_util"
+
+    def encode(self, document: Any, indent: int | None = None) -> str:
+        return json.dumps(document, indent=indent, default=_default)
+
+
+class CompactEncoder(DocumentEncoder):
+    """Fastest output: compact JSON with BSON types in their relaxed extended-JSON form.
+
+    Uses orjson when it is installed. Values are not converted up front; only the BSON types
+    JSON has no equivalent for go through ``json_util.default``. Under orjson, NaN and
+    Infinity are written as null and UUIDs as plain strings; without it, ``bson.Code``
+    is written as a plain string.
+    """
+
+    name = "compact"
+
+    def encode(self, document: Any, indent: int | None = None) -> str:
+        if orjson is not None and indent in (None, 2):
+            option: int = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS
+            if indent == 2:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(document, default=_default, option=option).decode()
+        if indent is None:
+            return json.dumps(document, separators=_COMPACT_SEPARATORS, default=_default)
+        return json.dumps(document, indent=indent, default=_default)
+
+
+class ExtendedJsonEncoder(DocumentEncoder):
+    """Spec-compliant relaxed or canonical MongoDB Extended JSON (same values as ``json_util.dumps``).
+
+    A single type-dispatched pass replaces json_util's per-value isinstance chain; the converted
+    document then only holds plain JSON values and is written by orjson or the json C encoder.
+    """
+
+    def __init__(self, name: str, json_options: JSONOptions) -> None:
+        self.name = name
+        self.json_options: JSONOptions = json_options
+        self.convert: Callable[[Any], Any] = _converter(json_options)
+
+    def encode(self, document: Any, indent: int | None = None) -> str:
+        converted: Any = self.convert(document)
+        if orjson is not None and indent in (None, 2):
+            try:
+                return orjson.dumps(converted, option=orjson.OPT_INDENT_2 if indent == 2 else 0).decode()
+            except TypeError:
+                # Integers wider than 64 bits can only come from Python, not from BSON
+                pass
+        if indent is None:
+            return json.dumps(converted, separators=_COMPACT_SEPARATORS)
+        return json.dumps(converted, indent=indent)
+
+
+class OutputEncoders:
+    """Registry of named output encoders; ``DocumentStream`` writes with the configured default."""
+
+    default: str = JsonUtilEncoder.name
+
+    _encoders: dict[str, DocumentEncoder] = {}
+
+    @classmethod
+    def register(cls, encoder: DocumentEncoder) -> DocumentEncoder:
+        if not encoder.name:
+            raise ValueError("Encoder name must not be empty.")
+        cls._encoders[encoder.name] = encoder
+        return encoder
+
+    @classmethod
+    def get(cls, encoder: str | DocumentEncoder | None = None) -> DocumentEncoder:
+        if isinstance(encoder, DocumentEncoder):
+            return encoder
+        name: str = encoder or cls.default
+        found: Optional[DocumentEncoder] = cls._encoders.get(name)
+        if found is None:
+            raise ValueError(f"Unknown output encoder '{name}'. Available: {', '.join(sorted(cls._encoders))}.")
+        return found
+
+    @classmethod
+    def configure(cls, default: str) -> None:
+        cls.get(default)
+        cls.default = default
+
+    @classmethod
+    def names(cls) -> list[str]:
+        return sorted(cls._encoders)
+
+
+def _default(value: Any) -> Any:
+    # Mappings that are not dicts (RawBSONDocument) are decoded here; orjson also passes subclasses
+    # through so bson.Code, Int64 and friends keep their extended-JSON form
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return json_util.default(value)
+
+
+def _converter(json_options: JSONOptions) -> Callable[[Any], Any]:
+    canonical: bool = json_options.json_mode == JSONMode.CANONICAL
+
+    def convert(value: Any) -> Any:
+        value_type = type(value)
+        if value_type is str or value_type is bool or value is None:
+            return value
+        if value_type is dict:
+            return {key: convert(item) for key, item in value.items()}
+        if value_type is list:
+            return [convert(item) for item in value]
+        if value_type is int:
+            return json_util.default(value, json_options) if canonical else value
+        if value_type is float:
+            if canonical or not math.isfinite(value):
+                return json_util.default(value, json_options)
+            return value
+        if isinstance(value, Mapping):
+            return {key: convert(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [convert(item) for item in value]
+        return json_util.default(value, json_options)
+
+    return convert
+
+
+OutputEncoders.register(JsonUtilEncoder())
+OutputEncoders.register(CompactEncoder())
+OutputEncoders.register(ExtendedJsonEncoder("relaxed", RELAXED_JSON_OPTIONS))
+OutputEncoders.register(ExtendedJsonEncoder("canonical", CANONICAL_JSON_OPTIONS))
@@ -0,0 +1,347 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
+
+from pymongo import IndexModel
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+IndexKeys = str | Mapping[str, Any] | Sequence[str | tuple[str, Any]]
+
+_DIRECTIONS: frozenset[Any] = frozenset({1, -1, "text", "hashed", "2d", "2dsphere"})
+# Options collMod can change on an existing index; any other difference needs a drop and rebuild
+_MODIFIABLE: frozenset[str] = frozenset({"hidden", "expireAfterSeconds"})
+
+
+def _direction(value: Any) -> Any:
+    # listIndexes can report directions as doubles (1.0) depending on how the index was created
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def normalize_keys(keys: IndexKeys) -> tuple[tuple[str, Any], ...]:
+    """``"maker"``, ``["maker", ("price", -1)]`` or ``{"maker": 1, "price": -1}`` as ``(("maker", 1), ("price", -1))``."""
+    if isinstance(keys, str):
+        items: list[Any] = [keys]
+    elif isinstance(keys, Mapping):
+        items = list(keys.items())
+    else:
+        items = list(keys)
+    if not items:
+        raise ValueError("Index keys must not be empty.")
+
+    normalized: list[tuple[str, Any]] = []
+    for item in items:
+        field_name, direction = (item, 1) if isinstance(item, str) else item
+        direction = _direction(direction)
+        if not field_name:
+            raise ValueError("Index field names must not be empty.")
+        if direction not in _DIRECTIONS:
+            raise ValueError(f"Unsupported index direction {direction!r} for '{field_name}'; use 1, -1, 'text', 'hashed', '2d' or '2dsphere'.")
+        normalized.append((field_name, direction))
+    if len({name for name, _ in normalized}) != len(normalized):
+        raise ValueError("Index keys must not repeat a field.")
+    return tuple(normalized)
+
+
+def index_keys(index: Mapping[str, Any]) -> tuple[tuple[str, Any], ...]:
+    """The key pattern of a ``list_indexes`` document as it would be passed to ``create_index``.
+
+    Text indexes are listed as ``{"_fts": "text", "_ftsx": 1}`` between their prefix and suffix
+    fields; the text fields themselves are rebuilt from ``weights``.
+    """
+    keys: list[tuple[str, Any]] = []
+    for field_name, direction in index["key"].items():
+        if field_name == "_fts":
+            keys.extend((text_field, "text") for text_field in sorted(index.get("weights", {})))
+        elif field_name != "_ftsx":
+            keys.append((field_name, direction))
+    return normalize_keys(keys)
+
+
+def _comparable(keys: tuple[tuple[str, Any], ...]) -> tuple[tuple[str, Any], ...]:
+    # The text fields of a text index form one key whatever order they are given in
+    text_fields: list[str] = sorted(field_name for field_name, direction in keys if direction == "text")
+    if len(text_fields) < 2:
+        return keys
+    comparable: list[tuple[str, Any]] = []
+    for field_name, direction in keys:
+        if direction != "text":
+            comparable.append((field_name, direction))
+        elif text_fields:
+            comparable.extend((text_field, "text") for text_field in text_fields)
+            text_fields = []
+    return tuple(comparable)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One index: ordered keys plus the options ``listIndexes`` reports. Build with ``IndexSpec.of``.
+
+    Array fields (``owners.location``) are indexed as multikey indexes automatically.
+    """
+
+    keys: tuple[tuple[str, Any], ...]
+    name: Optional[str] = None
+    unique: bool = False
+    sparse: bool = False
+    partial_filter: Optional[dict[str, Any]] = None
+    expire_after_seconds: Optional[int] = None
+    collation: Optional[dict[str, Any]] = None
+    hidden: bool = False
+
+    def __post_init__(self) -> None:
+        if not self.keys:
+            raise ValueError("Index keys must not be empty.")
+        if self.sparse and self.partial_filter is not None:
+            raise ValueError("An index cannot be both sparse and partial; use a partial filter with $exists instead.")
+        if self.expire_after_seconds is not None:
+            if self.expire_after_seconds < 0:
+                raise ValueError("expire_after_seconds must not be negative.")
+            if len(self.keys) != 1 or self.keys[0][0] == "_id":
+                raise ValueError("TTL indexes must have a single field other than _id.")
+        if self.hidden and self.keys == (("_id", 1),):
+            raise ValueError("The _id index cannot be hidden.")
+
+    @classmethod
+    def of(cls, keys: IndexKeys, name: str | None = None, unique: bool = False, sparse: bool = False,
+           partial_filter: dict[str, Any] | None = None, expire_after_seconds: int | None = None,
+           collation: dict[str, Any] | None = None, hidden: bool = False) -> "IndexSpec":
+        return cls(normalize_keys(keys), name, unique, sparse, partial_filter, expire_after_seconds, collation, hidden)
+
+    @classmethod
+    def from_document(cls, index: Mapping[str, Any]) -> "IndexSpec":
+        """The spec of an index as returned by ``list_indexes``."""
+        return cls(index_keys(index), index.get("name"), bool(index.get("unique", False)),
+                   bool(index.get("sparse", False)), index.get("partialFilterExpression"), index.get("expireAfterSeconds"),
+                   index.get("collation"), bool(index.get("hidden", False)))
+
+    @classmethod
+    def coerce(cls, index: "IndexSpec | IndexModel | Mapping[str, Any]") -> "IndexSpec":
+        """Accept an IndexSpec, a PyMongo IndexModel or an index document (``{"key": ..., "unique": ...}``)."""
+        if isinstance(index, IndexSpec):
+            return index
+        if isinstance(index, IndexModel):
+            return cls.from_document(index.document)
+        if "key" not in index:
+            raise ValueError("Index documents must have a 'key' field.")
+        return cls.from_document(index)
+
+    @property
+    def index_name(self) -> str:
+        """The explicit name, or the one the server derives from the keys (``maker_1_price_-1``)."""
+        return self.name or "_".join(f"{field_name}_{direction}" for field_name, direction in self.keys)
+
+    def options(self) -> dict[str, Any]:
+        """Non-default options under their server names."""
+        options: dict[str, Any] = {}
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        if self.partial_filter is not None:
+            options["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        if self.collation is not None:
+            options["collation"] = self.collation
+        if self.hidden:
+            options["hidden"] = True
+        return options
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), name=self.index_name, **self.options())
+
+    def differences(self, index: Mapping[str, Any]) -> set[str]:
+        """Option names whose value differs from the existing index ``index`` (a ``list_indexes`` document)."""
+        wanted: dict[str, Any] = self.options()
+        different: set[str] = set()
+        for option in ("unique", "sparse", "hidden"):
+            if bool(wanted.get(option, False)) != bool(index.get(option, False)):
+                different.add(option)
+        for option in ("partialFilterExpression", "expireAfterSeconds"):
+            if wanted.get(option) != index.get(option):
+                different.add(option)
+        # The server fills in every collation default, so only the fields given here are compared
+        existing_collation: Optional[Mapping[str, Any]] = index.get("collation")
+        if (self.collation is None) != (existing_collation is None) or (
+                self.collation is not None and any(existing_collation.get(key) != value for key, value in self.collation.items())):
+            different.add("collation")
+        return different
+
+
+@dataclass
+class IndexPlan:
+    """What ``IndexManager.ensure`` will do: build, change in place with ``collMod``, leave alone or refuse."""
+
+    create: list[IndexSpec] = field(default_factory=list)
+    modify: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class IndexBuildProgress:
+    """One in-progress index build as reported by ``$currentOp``."""
+
+    namespace: str
+    indexes: tuple[str, ...]
+    message: str
+    done: Optional[int]
+    total: Optional[int]
+
+    @property
+    def percent(self) -> Optional[float]:
+        return 100 * self.done / self.total if self.done is not None and self.total else None
+
+
+@dataclass
+class IndexBuildResult:
+    created: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def _log_progress(progress: IndexBuildProgress) -> None:
+    percent: Optional[float] = progress.percent
+    detail: str = f"{progress.done}/{progress.total} ({percent:.0f}%)" if percent is not None else progress.message
+    logging.info(f"Building {', '.join(progress.indexes) or 'indexes'} on '{progress.namespace}': {detail}")
+
+
+class IndexManager:
+    """Idempotent index creation: compare the wanted specs with ``list_indexes`` and only build what is missing.
+
+    An index that already exists with the same keys and options is left alone; one that differs
+    only in ``hidden`` or ``expireAfterSeconds`` is changed in place with ``collMod``; any other
+    difference (or a name clash) is reported as a conflict instead of failing the whole batch.
+    """
+
+    @staticmethod
+    def plan(existing: Iterable[Mapping[str, Any]], specs: Iterable[IndexSpec]) -> IndexPlan:
+        indexes: list[Mapping[str, Any]] = list(existing)
+        plan = IndexPlan()
+        existing_keys: list[tuple[tuple[str, Any], ...]] = [_comparable(index_keys(index)) for index in indexes]
+        planned: set[tuple[tuple[str, Any], ...]] = set()
+        for spec in specs:
+            wanted: tuple[tuple[str, Any], ...] = _comparable(spec.keys)
+            if wanted in planned:
+                continue
+            planned.add(wanted)
+            same_keys: Optional[Mapping[str, Any]] = next((index for index, keys in zip(indexes, existing_keys) if keys == wanted), None)
+            same_name: Optional[Mapping[str, Any]] = next((index for index in indexes if index["name"] == spec.index_name), None)
+            if same_keys is None:
+                if same_name is not None:
+                    plan.conflicts.append(f"An index named '{spec.index_name}' already exists with keys {dict(same_name['key'])}.")
+                else:
+                    plan.create.append(spec)
+                continue
+
+            differences: set[str] = spec.differences(same_keys)
+            if spec.name is not None and same_keys["name"] != spec.name:
+                plan.conflicts.append(f"Keys {dict(spec.keys)} are already indexed as '{same_keys['name']}', not '{spec.name}'.")
+            elif not differences:
+                plan.unchanged.append(same_keys["name"])
+            elif differences <= _MODIFIABLE and ("expireAfterSeconds" not in differences or "expireAfterSeconds" in same_keys):
+                changes: dict[str, Any] = {"hidden": spec.hidden} if "hidden" in differences else {}
+                if "expireAfterSeconds" in differences:
+                    changes["expireAfterSeconds"] = spec.expire_after_seconds
+                plan.modify.append((same_keys["name"], changes))
+            else:
+                plan.conflicts.append(f"Index '{same_keys['name']}' already exists with different {', '.join(sorted(differences))}; "
+                                      f"drop it before rebuilding.")
+        return plan
+
+    @staticmethod
+    def ensure(collection: Collection, specs: Iterable[IndexSpec], progress_interval: float | None = 2.0,
+               on_progress: Callable[[IndexBuildProgress], None] = _log_progress) -> IndexBuildResult:
+        """Create the missing indexes in one ``createIndexes`` command, reporting build progress every ``progress_interval`` seconds."""
+        start: float = time.perf_counter()
+        plan: IndexPlan = IndexManager.plan(collection.list_indexes(), specs)
+        result = IndexBuildResult(unchanged=plan.unchanged, conflicts=plan.conflicts)
+
+        for name, changes in plan.modify:
+            collection.database.command({"collMod": collection.name, "index": {"name": name, **changes}})
+            result.modified.append(name)
+
+        if plan.create:
+            models: list[IndexModel] = [spec.model() for spec in plan.create]
+            if progress_interval is None:
+                result.created = collection.create_indexes(models)
+            else:
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-build") as executor:
+                    build = executor.submit(collection.create_indexes, models)
+                    reporting: bool = True
+                    while not wait({build}, timeout=progress_interval).done:
+                        if reporting:
+                            reporting = IndexManager.__report(collection, on_progress)
+                    result.created = build.result()
+        result.seconds = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    async def ensure_async(collection: Any, specs: Iterable[IndexSpec], progress_interval: float | None = 2.0,
+                           on_progress: Callable[[IndexBuildProgress], None] = _log_progress) -> IndexBuildResult:
+        """``ensure`` for an AsyncCollection."""
+        start: float = time.perf_counter()
+        plan: IndexPlan = IndexManager.plan([index async for index in await collection.list_indexes()], specs)
+        result = IndexBuildResult(unchanged=plan.unchanged, conflicts=plan.conflicts)
+
+        for name, changes in plan.modify:
+            await collection.database.command({"collMod": collection.name, "index": {"name": name, **changes}})
+            result.modified.append(name)
+
+        if plan.create:
+            build = asyncio.ensure_future(collection.create_indexes([spec.model() for spec in plan.create]))
+            reporting: bool = progress_interval is not None
+            while True:
+                done, _ = await asyncio.wait({build}, timeout=progress_interval)
+                if done:
+                    result.created = build.result()
+                    break
+                if reporting:
+                    try:
+                        progress = [IndexManager.__progress(operation) async for operation in await collection.database.client.admin.aggregate(
+                            IndexManager.__current_op(collection.full_name))]
+                    except OperationFailure as ex:
+                        logging.info(f"Index build progress is unavailable: {ex}")
+                        reporting = False
+                        continue
+                    for item in progress:
+                        on_progress(item)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    def build_progress(collection: Collection) -> list[IndexBuildProgress]:
+        """Index builds currently running on ``collection`` (needs the ``inprog`` privilege)."""
+        return [IndexManager.__progress(operation) for operation in collection.database.client.admin.aggregate(
+            IndexManager.__current_op(collection.full_name))]
+
+    @staticmethod
+    def __report(collection: Collection, on_progress: Callable[[IndexBuildProgress], None]) -> bool:
+        try:
+            progress: list[IndexBuildProgress] = IndexManager.build_progress(collection)
+        except OperationFailure as ex:
+            logging.info(f"Index build progress is unavailable: {ex}")
+            return False
+        for item in progress:
+            on_progress(item)
+        return True
+
+    @staticmethod
+    def __current_op(namespace: str) -> list[dict[str, Any]]:
+        # The build itself runs on an index builder thread; its op carries the createIndexes command and a progress counter
+        return [
+            {"$currentOp": {"allUsers": True, "idleConnections": False}},
+            {"$match": {"ns": namespace, "command.createIndexes": {"$exists": True}, "progress": {"$exists": True}}},
+        ]
+
+    @staticmethod
+    def __progress(operation: Mapping[str, Any]) -> IndexBuildProgress:
+        progress: Mapping[str, Any] = operation.get("progress") or {}
+        indexes: tuple[str, ...] = tuple(index.get("name", "") for index in operation.get("command", {}).get("indexes", []))
+        return IndexBuildProgress(operation.get("ns", ""), indexes, operation.get("msg", ""), progress.get("done"), progress.get("total"))
@@ -0,0 +1,217 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+from pymongo_aggregation import MISSING, AggregationError, LocalAggregation, freeze, get_path
+
+STRATEGIES: tuple[str, ...] = ("auto", "server", "client")
+# Server defaults (6.0+) under which an unindexed $lookup runs as an in-memory hash join instead of a nested loop
+SERVER_HASH_JOIN_MAX_DOCUMENTS: int = 10_000
+SERVER_HASH_JOIN_MAX_BYTES: int = 100 * 1024 * 1024
+# Stages that read or write other collections, so they cannot follow a client-side join in-process
+SERVER_STAGES: frozenset[str] = frozenset({"$lookup", "$graphLookup", "$unionWith", "$out", "$merge"})
+
+
+@dataclass(frozen=True)
+class JoinSpec:
+    """An equality ``$lookup``: documents of ``from_collection`` whose ``foreign_field`` equals ``local_field`` go into ``as_field``."""
+
+    from_collection: str
+    local_field: str
+    foreign_field: str
+    as_field: str
+
+    def __post_init__(self) -> None:
+        for name, value in (("from", self.from_collection), ("localField", self.local_field), ("foreignField", self.foreign_field),
+                            ("as", self.as_field)):
+            if not value or not isinstance(value, str):
+                raise ValueError(f"$lookup {name} must be a non-empty string.")
+
+    @classmethod
+    def from_lookup(cls, stage: Mapping[str, Any]) -> "JoinSpec":
+        lookup: Any = stage.get("$lookup", stage)
+        if not isinstance(lookup, Mapping) or "pipeline" in lookup or not isinstance(lookup.get("from"), str):
+            raise ValueError("Only equality $lookup stages (from, localField, foreignField, as) can be joined client-side.")
+        return cls(lookup["from"], lookup.get("localField"), lookup.get("foreignField"), lookup.get("as"))
+
+    def lookup(self) -> dict[str, Any]:
+        return {"$lookup": {"from": self.from_collection, "localField": self.local_field, "foreignField": self.foreign_field, "as": self.as_field}}
+
+
+@dataclass
+class JoinPlan:
+    strategy: str
+    reason: str
+    stats: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class JoinStats:
+    left_documents: int = 0
+    right_documents: int = 0
+    batches: int = 0
+    matched: int = 0
+
+
+def _keys(value: Any) -> list[Any]:
+    """The values a field matches on: a missing field matches null, an array matches each element and itself."""
+    if value is MISSING or value is None:
+        return [None]
+    if isinstance(value, list):
+        return [*value, value] if value else [value]
+    return [value]
+
+
+class HashJoin:
+    """Join a stream of left documents to a collection with one ``$in`` query per batch.
+
+    Matching follows ``$lookup``: array fields match on any element, and a missing or null local
+    field matches foreign documents where the field is null or missing. The right side is never
+    read in full, so the two sides may live on different clusters.
+    """
+
+    @staticmethod
+    def join(left: Iterable[Mapping[str, Any]], right: Collection, spec: JoinSpec, batch_size: int = 1000,
+             projection: dict[str, Any] | None = None, stats: Optional[JoinStats] = None) -> Iterator[dict[str, Any]]:
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        totals: JoinStats = stats if stats is not None else JoinStats()
+        batch: list[Mapping[str, Any]] = []
+        for document in left:
+            batch.append(document)
+            if len(batch) == batch_size:
+                yield from HashJoin.__join_batch(batch, right, spec, projection, totals)
+                batch = []
+        if batch:
+            yield from HashJoin.__join_batch(batch, right, spec, projection, totals)
+
+    @staticmethod
+    def __join_batch(batch: list[Mapping[str, Any]], right: Collection, spec: JoinSpec, projection: dict[str, Any] | None,
+                     totals: JoinStats) -> Iterator[dict[str, Any]]:
+        wanted: dict[Any, Any] = {}
+        for document in batch:
+            for key in _keys(get_path(document, spec.local_field)):
+                wanted.setdefault(freeze(key), key)
+
+        # Build side: the right documents for this batch, hashed by every value they can be matched on
+        table: dict[Any, list[tuple[int, dict[str, Any]]]] = {}
+        found: int = 0
+        for position, match in enumerate(right.find({spec.foreign_field: {"$in": list(wanted.values())}}, projection)):
+            found += 1
+            seen: set[Any] = set()
+            for key in _keys(get_path(match, spec.foreign_field)):
+                frozen: Any = freeze(key)
+                if frozen in wanted and frozen not in seen:
+                    seen.add(frozen)
+                    table.setdefault(frozen, []).append((position, match))
+
+        totals.batches += 1
+        totals.left_documents += len(batch)
+        totals.right_documents += found
+        for document in batch:
+            matches: dict[int, dict[str, Any]] = {}
+            for key in _keys(get_path(document, spec.local_field)):
+                for position, match in table.get(freeze(key), ()):
+                    matches.setdefault(position, match)
+            joined: dict[str, Any] = dict(document)
+            # Same order as the server: the foreign collection's order, each document once
+            joined[spec.as_field] = [matches[position] for position in sorted(matches)]
+            totals.matched += len(matches)
+            yield joined
+
+
+class JoinExecutor:
+    """Run an equality ``$lookup`` on the server or as a client-side ``HashJoin``, choosing from collection statistics."""
+
+    @staticmethod
+    def plan(left: Collection, right: Collection, spec: JoinSpec, batch_size: int = 1000, after: list[dict[str, Any]] | None = None) -> JoinPlan:
+        """Pick a strategy.
+
+        * Different clusters: only the client can join them.
+        * Stages in ``after`` that need the server, or that ``LocalAggregation`` cannot run: stay there.
+        * An index on ``foreignField``: the server's indexed nested loop reads only matching documents; stay there.
+        * No index, and the foreign side is small enough for the server's own hash join (6.0+): stay there.
+        * No index otherwise: every left document would scan the foreign collection, while the client
+          scans it once per ``batch_size`` left documents.
+        """
+        if left.database.client is not right.database.client:
+            return JoinPlan("client", "the collections are on different clients")
+        blocker: Optional[str] = JoinExecutor.client_blocker(after or [])
+        if blocker is not None:
+            return JoinPlan("server", blocker)
+
+        stats: dict[str, Any] = {"left_count": left.estimated_document_count(), "right_count": right.estimated_document_count()}
+        indexed: bool = any(next(iter(index["key"]), None) == spec.foreign_field for index in right.list_indexes())
+        stats["foreign_field_indexed"] = indexed
+        if indexed:
+            return JoinPlan("server", f"'{spec.foreign_field}' is indexed on '{right.name}'", stats)
+
+        try:
+            storage: Mapping[str, Any] = right.database.command({"collStats": right.name})
+            stats["right_bytes"] = storage.get("size", 0)
+            version: list[int] = list(right.database.client.server_info().get("versionArray", [0]))
+        except OperationFailure as ex:
+            logging.debug(f"Could not read statistics for '{right.name}': {ex}")
+            stats["right_bytes"], version = None, [0]
+        stats["server_version"] = ".".join(str(part) for part in version[:2])
+        if (version[0] >= 6 and stats["right_count"] <= SERVER_HASH_JOIN_MAX_DOCUMENTS and stats["right_bytes"] is not None
+                and stats["right_bytes"] <= SERVER_HASH_JOIN_MAX_BYTES):
+            return JoinPlan("server", f"'{right.name}' is small enough for the server's hash join", stats)
+
+        if stats["left_count"] <= 1:
+            return JoinPlan("server", f"'{left.name}' has at most one document", stats)
+        return JoinPlan("client", f"'{spec.foreign_field}' is not indexed: one scan of '{right.name}' per {batch_size} "
+                                  f"'{left.name}' documents instead of one per document", stats)
+
+    @staticmethod
+    def execute(left: Collection, right: Collection, spec: JoinSpec, strategy: str = "auto", before: list[dict[str, Any]] | None = None,
+                after: list[dict[str, Any]] | None = None, batch_size: int = 1000, stats: Optional[JoinStats] = None) -> Iterator[dict[str, Any]]:
+        """Yield ``before + $lookup + after`` run over ``left``; ``strategy`` is 'auto', 'server' or 'client'.
+
+        The client strategy runs ``before`` on the server, joins with ``HashJoin`` and evaluates
+        ``after`` in-process with ``LocalAggregation``, so it is refused up front when ``after`` reads
+        or writes other collections or uses stages or operators the local engine does not support.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Strategy must be one of {', '.join(STRATEGIES)}.")
+        if strategy == "auto":
+            chosen: JoinPlan = JoinExecutor.plan(left, right, spec, batch_size, after)
+            logging.info(f"Joining '{left.name}' to '{right.name}' with the {chosen.strategy} strategy: {chosen.reason}.")
+            strategy = chosen.strategy
+        if strategy == "client":
+            blocker: Optional[str] = JoinExecutor.client_blocker(after or [])
+            if blocker is not None:
+                raise ValueError(f"Cannot join client-side: {blocker}.")
+        if strategy == "server":
+            if left.database.client is not right.database.client or left.database.name != right.database.name:
+                raise ValueError("A server-side $lookup needs both collections in the same database.")
+            return left.aggregate([*(before or []), spec.lookup(), *(after or [])], batchSize=batch_size)
+
+        source: Iterable[Mapping[str, Any]] = left.aggregate(before, batchSize=batch_size) if before else left.find(batch_size=batch_size)
+        joined: Iterator[dict[str, Any]] = HashJoin.join(source, right, spec, batch_size, stats=stats)
+        return LocalAggregation.aggregate(joined, after) if after else joined
+
+    @staticmethod
+    def client_blocker(after: list[dict[str, Any]]) -> Optional[str]:
+        """Why ``after`` cannot run in-process after a client-side join, or None if it can."""
+        for stage in after:
+            name: Optional[str] = next(iter(stage), None) if isinstance(stage, Mapping) else None
+            if name in SERVER_STAGES:
+                return f"{name} after the join needs the server"
+        if after:
+            try:
+                LocalAggregation.compile(after)
+            except AggregationError as ex:
+                return f"the stages after the join cannot run in-process ({ex})"
+        return None
+
+    @staticmethod
+    def split(pipeline: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], JoinSpec, list[dict[str, Any]]]:
+        """``(stages before, the first $lookup, stages after)``."""
+        for position, stage in enumerate(pipeline):
+            if "$lookup" in stage:
+                return pipeline[:position], JoinSpec.from_lookup(stage), pipeline[position + 1:]
+        raise ValueError("Pipeline has no $lookup stage to join.")
@@ -0,0 +1,374 @@
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import bson
+from pymongo import monitoring
+
+from pymongo_client import MongoClientRegistry
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of microsecond latencies.
+
+    Each power of two is split into 64 sub-buckets, so any recorded value (and every reported
+    percentile) is within about 1.6% of the true value, with memory bounded by the largest value
+    rather than by the number of samples.
+    """
+
+    PRECISION_BITS: int = 7
+
+    __slots__ = ("counts", "count", "total", "minimum", "maximum", "_lock")
+
+    def __init__(self) -> None:
+        self.counts: list[int] = []
+        self.count: int = 0
+        self.total: int = 0
+        self.minimum: int = 0
+        self.maximum: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, value_us: int) -> None:
+        value_us = max(0, int(value_us))
+        shift: int = value_us.bit_length() - LatencyHistogram.PRECISION_BITS
+        index: int = value_us if shift <= 0 else (shift << (LatencyHistogram.PRECISION_BITS - 1)) + (value_us >> shift)
+        with self._lock:
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            self.counts[index] += 1
+            if not self.count or value_us < self.minimum:
+                self.minimum = value_us
+            if value_us > self.maximum:
+                self.maximum = value_us
+            self.count += 1
+            self.total += value_us
+
+    def percentile(self, quantile: float) -> int:
+        """Highest value equivalent to the sample at ``quantile`` (0..1), in microseconds."""
+        if not 0 <= quantile <= 1:
+            raise ValueError("quantile must be between 0 and 1.")
+        with self._lock:
+            if not self.count:
+                return 0
+            rank: int = max(1, -(-int(quantile * self.count * 1_000_000) // 1_000_000))
+            seen: int = 0
+            for index, bucket in enumerate(self.counts):
+                seen += bucket
+                if seen >= rank:
+                    return min(self.maximum, LatencyHistogram.__upper(index))
+            return self.maximum
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            count, total, minimum, maximum = self.count, self.total, self.minimum, self.maximum
+        return {
+            "count": count,
+            "mean_ms": total / count / 1000 if count else 0.0,
+            "min_ms": minimum / 1000,
+            "p50_ms": self.percentile(0.5) / 1000,
+            "p90_ms": self.percentile(0.9) / 1000,
+            "p99_ms": self.percentile(0.99) / 1000,
+            "p999_ms": self.percentile(0.999) / 1000,
+            "max_ms": maximum / 1000,
+            "total_ms": total / 1000,
+        }
+
+    @staticmethod
+    def __upper(index: int) -> int:
+        half: int = 1 << (LatencyHistogram.PRECISION_BITS - 1)
+        if index < 2 * half:
+            return index
+        shift: int = (index >> (LatencyHistogram.PRECISION_BITS - 1)) - 1
+        return ((index - (shift << (LatencyHistogram.PRECISION_BITS - 1)) + 1) << shift) - 1
+
+
+# (start time in ns, whether the first connection check-out was already seen) for the outermost instrumented call
+_OPERATION: contextvars.ContextVar[Optional[list[Any]]] = contextvars.ContextVar("pymongo_metrics_operation", default=None)
+
+_QUANTILES: tuple[float, ...] = (0.5, 0.9, 0.99, 0.999)
+
+
+class Metrics:
+    """Process-wide latency histograms and counters fed by PyMongo's command, pool and heartbeat listeners.
+
+    ``enable()`` registers the listeners globally, so it must run before the first client is created
+    (call ``MongoDbOperation.close_connections()`` first otherwise). While disabled, listeners and
+    instrumented methods return after one flag check. Byte counts re-encode every command and
+    reply, so they are only collected with ``track_bytes=True``.
+
+    Server selection time is measured from the start of an instrumented ``MongoDbOperation`` call to
+    its first connection check-out, so it also includes the little client-side work done before it.
+    """
+
+    enabled: bool = False
+    track_bytes: bool = False
+
+    _registered: bool = False
+    _lock: threading.Lock = threading.Lock()
+    _histograms: dict[tuple[str, str], LatencyHistogram] = {}
+    _counters: dict[tuple[str, str], int] = {}
+
+    @classmethod
+    def enable(cls, track_bytes: bool | None = None) -> None:
+        with cls._lock:
+            if not cls._registered:
+                for listener in (_CommandMetrics(), _PoolMetrics(), _HeartbeatMetrics()):
+                    monitoring.register(listener)
+                cls._registered = True
+                if MongoClientRegistry.active_clients():
+                    logging.warning("Metrics only cover clients created from now on; close the existing connections to include them.")
+        if track_bytes is not None:
+            cls.track_bytes = track_bytes
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+
+    @classmethod
+    def histogram(cls, family: str, label: str = "") -> LatencyHistogram:
+        key = (family, label)
+        found: Optional[LatencyHistogram] = cls._histograms.get(key)
+        if found is None:
+            with cls._lock:
+                found = cls._histograms.setdefault(key, LatencyHistogram())
+        return found
+
+    @classmethod
+    def increment(cls, family: str, label: str = "", amount: int = 1) -> None:
+        key = (family, label)
+        with cls._lock:
+            cls._counters[key] = cls._counters.get(key, 0) + amount
+
+    @classmethod
+    def instrument(cls, target: type) -> type:
+        """Class decorator timing every public static/class method of ``target`` (sync or async).
+
+        Methods returning generators are timed until the generator is returned, not until it is exhausted.
+        """
+        for name, attribute in list(vars(target).items()):
+            if name.startswith("_") or not isinstance(attribute, (staticmethod, classmethod)):
+                continue
+            wrapped = Metrics.__timed(f"{target.__name__}.{name}", attribute.__func__)
+            setattr(target, name, type(attribute)(wrapped))
+        return target
+
+    @classmethod
+    def snapshot(cls) -> dict[str, Any]:
+        """Nested dict: histogram families map labels to percentile summaries, counter families map labels to totals."""
+        with cls._lock:
+            histograms = list(cls._histograms.items())
+            counters = dict(cls._counters)
+        result: dict[str, Any] = {}
+        for (family, label), histogram in sorted(histograms):
+            result.setdefault(family, {})[label or "all"] = histogram.snapshot()
+        for (family, label), value in sorted(counters.items()):
+            result.setdefault(family, {})[label or "all"] = value
+        result["connections_open"] = counters.get(("connections_created", ""), 0) - sum(
+            value for (family, _), value in counters.items() if family == "connections_closed")
+        result["connections_in_use"] = counters.get(("connections_checked_out", ""), 0) - counters.get(("connections_checked_in", ""), 0)
+        return result
+
+    @classmethod
+    def prometheus(cls, prefix: str = "pymongo") -> str:
+        """Prometheus text exposition format: histograms as summaries (seconds), counters as ``_total``."""
+        with cls._lock:
+            histograms = sorted(cls._histograms.items())
+            counters = sorted(cls._counters.items())
+        lines: list[str] = []
+        for family in sorted({family for (family, _), _ in histograms}):
+            metric: str = f"{prefix}_{family}_seconds"
+            lines += [f"# HELP {metric} {_DESCRIPTIONS.get(family, family)}", f"# TYPE {metric} summary"]
+            for (name, label), histogram in histograms:
+                if name != family:
+                    continue
+                labels: str = Metrics.__labels(family, label)
+                for quantile in _QUANTILES:
+                    quantile_labels: str = f'{labels[:-1]},quantile="{quantile}"}}' if labels else f'{{quantile="{quantile}"}}'
+                    lines.append(f"{metric}{quantile_labels} {histogram.percentile(quantile) / 1e6:.6f}")
+                lines.append(f"{metric}_sum{labels} {histogram.total / 1e6:.6f}")
+                lines.append(f"{metric}_count{labels} {histogram.count}")
+        for family in sorted({family for (family, _), _ in counters}):
+            metric = f"{prefix}_{family}_total"
+            lines += [f"# HELP {metric} {_DESCRIPTIONS.get(family, family)}", f"# TYPE {metric} counter"]
+            lines += [f"{metric}{Metrics.__labels(family, label)} {value}" for (name, label), value in counters if name == family]
+        snapshot: dict[str, Any] = cls.snapshot()
+        for gauge in ("connections_open", "connections_in_use"):
+            lines += [f"# HELP {prefix}_{gauge} {_DESCRIPTIONS[gauge]}", f"# TYPE {prefix}_{gauge} gauge", f"{prefix}_{gauge} {snapshot[gauge]}"]
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._histograms.clear()
+            cls._counters.clear()
+
+    @staticmethod
+    def __timed(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        def begin() -> tuple[int, Optional[contextvars.Token[Any]]]:
+            started: int = time.perf_counter_ns()
+            return started, _OPERATION.set([started, False]) if _OPERATION.get() is None else None
+
+        def end(started: int, token: Optional[contextvars.Token[Any]], failed: bool) -> None:
+            Metrics.histogram("operation", name).record((time.perf_counter_ns() - started) // 1000)
+            if failed:
+                Metrics.increment("operation_errors", name)
+            if token is not None:
+                _OPERATION.reset(token)
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                if not Metrics.enabled:
+                    return await function(*args, **kwargs)
+                started, token = begin()
+                failed: bool = True
+                try:
+                    result = await function(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    end(started, token, failed)
+
+            return timed_async
+
+        @functools.wraps(function)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            if not Metrics.enabled:
+                return function(*args, **kwargs)
+            started, token = begin()
+            failed: bool = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                end(started, token, failed)
+
+        return timed
+
+    @staticmethod
+    def __labels(family: str, label: str) -> str:
+        if not label:
+            return ""
+        escaped: str = label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return f'{{{_LABEL_NAMES.get(family, "label")}="{escaped}"}}'
+
+
+_LABEL_NAMES: dict[str, str] = {
+    "operation": "operation",
+    "operation_errors": "operation",
+    "command": "command",
+    "command_failures": "command",
+    "command_bytes_sent": "command",
+    "command_bytes_received": "command",
+    "connections_closed": "reason",
+    "checkout_failures": "reason",
+}
+
+_DESCRIPTIONS: dict[str, str] = {
+    "operation": "Latency of MongoDbOperation methods.",
+    "operation_errors": "MongoDbOperation calls that raised.",
+    "command": "Server round-trip latency per command.",
+    "command_failures": "Commands that failed.",
+    "command_bytes_sent": "BSON bytes of commands sent (track_bytes only).",
+    "command_bytes_received": "BSON bytes of replies received (track_bytes only).",
+    "checkout_wait": "Time spent waiting to check a connection out of the pool.",
+    "checkout_failures": "Failed connection check-outs.",
+    "connection_setup": "Time to establish and authenticate a new connection.",
+    "connections_created": "Connections opened.",
+    "connections_closed": "Connections closed.",
+    "connections_checked_out": "Connection check-outs.",
+    "connections_checked_in": "Connection check-ins.",
+    "pool_cleared": "Times a connection pool was cleared.",
+    "server_selection": "Time from the start of an operation to its first connection check-out.",
+    "heartbeat": "Server monitoring round-trip time (polling heartbeats only).",
+    "heartbeat_failures": "Failed server heartbeats.",
+    "connections_open": "Connections currently open.",
+    "connections_in_use": "Connections currently checked out.",
+}
+
+
+class _CommandMetrics(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if Metrics.enabled and Metrics.track_bytes:
+            Metrics.increment("command_bytes_sent", event.command_name, len(bson.encode(event.command)))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        if not Metrics.enabled:
+            return
+        Metrics.histogram("command", event.command_name).record(event.duration_micros)
+        if Metrics.track_bytes:
+            Metrics.increment("command_bytes_received", event.command_name, len(bson.encode(event.reply)))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        if not Metrics.enabled:
+            return
+        Metrics.histogram("command", event.command_name).record(event.duration_micros)
+        Metrics.increment("command_failures", event.command_name)
+
+
+class _PoolMetrics(monitoring.ConnectionPoolListener):
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        if Metrics.enabled:
+            Metrics.increment("pool_cleared")
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        if Metrics.enabled:
+            Metrics.increment("connections_created")
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        if Metrics.enabled:
+            Metrics.histogram("connection_setup").record(event.duration * 1e6)
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        if Metrics.enabled:
+            Metrics.increment("connections_closed", event.reason)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        if not Metrics.enabled:
+            return
+        operation: Optional[list[Any]] = _OPERATION.get()
+        if operation is not None and not operation[1]:
+            operation[1] = True
+            Metrics.histogram("server_selection").record((time.perf_counter_ns() - operation[0]) // 1000)
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        if Metrics.enabled:
+            Metrics.increment("checkout_failures", event.reason)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        if Metrics.enabled:
+            Metrics.histogram("checkout_wait").record(event.duration * 1e6)
+            Metrics.increment("connections_checked_out")
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        if Metrics.enabled:
+            Metrics.increment("connections_checked_in")
+
+
+class _HeartbeatMetrics(monitoring.ServerHeartbeatListener):
+    def started(self, event: monitoring.ServerHeartbeatStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.ServerHeartbeatSucceededEvent) -> None:
+        # Awaited (streaming) heartbeats last as long as the server holds them, so they are not round-trip times
+        if Metrics.enabled and not event.awaited:
+            Metrics.histogram("heartbeat").record(event.duration * 1e6)
+
+    def failed(self, event: monitoring.ServerHeartbeatFailedEvent) -> None:
+        if Metrics.enabled:
+            Metrics.increment("heartbeat_failures")
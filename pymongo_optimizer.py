@@ -0,0 +1,566 @@
+import copy
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping, Optional
+
+# None stands for "every field": a stage whose inputs or outputs cannot be enumerated
+FieldSet = Optional[set[str]]
+
+# Stages a $match can be moved in front of, subject to the field checks in __can_precede
+_MATCH_MOVABLE: frozenset[str] = frozenset({"$sort", "$set", "$addFields", "$project", "$unset", "$lookup"})
+# String operators whose bare-word literal arguments are probably meant to be field paths
+_STRING_OPERATORS: frozenset[str] = frozenset({"$concat", "$toUpper", "$toLower", "$strLenCP", "$strLenBytes", "$substr",
+                                               "$substrCP", "$substrBytes", "$split", "$strcasecmp", "$trim", "$ltrim", "$rtrim"})
+# Expression operators whose arguments are all expressions, so every field they read is a "$path"; any other
+# operator ($getField, $top/$bottom sortBy, $function, ...) names fields in other ways and is treated as reading everything
+_EXPRESSION_OPERATORS: frozenset[str] = frozenset({
+    "$abs", "$add", "$ceil", "$divide", "$exp", "$floor", "$ln", "$log", "$log10", "$mod", "$multiply", "$pow", "$round", "$sqrt",
+    "$subtract", "$trunc", "$arrayElemAt", "$arrayToObject", "$concatArrays", "$filter", "$first", "$firstN", "$in", "$indexOfArray",
+    "$isArray", "$last", "$lastN", "$map", "$maxN", "$minN", "$objectToArray", "$range", "$reduce", "$reverseArray", "$size", "$slice",
+    "$zip", "$and", "$not", "$or", "$cmp", "$eq", "$gt", "$gte", "$lt", "$lte", "$ne", "$cond", "$ifNull", "$switch", "$dateAdd",
+    "$dateDiff", "$dateFromParts", "$dateFromString", "$dateSubtract", "$dateToParts", "$dateToString", "$dateTrunc", "$dayOfMonth",
+    "$dayOfWeek", "$dayOfYear", "$hour", "$isoDayOfWeek", "$isoWeek", "$isoWeekYear", "$millisecond", "$minute", "$month", "$second",
+    "$week", "$year", "$literal", "$mergeObjects", "$allElementsTrue", "$anyElementTrue", "$setDifference", "$setEquals",
+    "$setIntersection", "$setIsSubset", "$setUnion", "$concat", "$indexOfBytes", "$indexOfCP", "$ltrim", "$regexFind", "$regexFindAll",
+    "$regexMatch", "$replaceOne", "$replaceAll", "$rtrim", "$split", "$strLenBytes", "$strLenCP", "$strcasecmp", "$substr",
+    "$substrBytes", "$substrCP", "$toLower", "$toString", "$trim", "$toUpper", "$sin", "$cos", "$tan", "$asin", "$acos", "$atan",
+    "$atan2", "$asinh", "$acosh", "$atanh", "$sinh", "$cosh", "$tanh", "$degreesToRadians", "$radiansToDegrees", "$convert",
+    "$isNumber", "$toBool", "$toDate", "$toDecimal", "$toDouble", "$toInt", "$toLong", "$toObjectId", "$type", "$let", "$avg",
+    "$count", "$max", "$min", "$push", "$addToSet", "$stdDevPop", "$stdDevSamp", "$sum", "$binarySize", "$bsonSize",
+})
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*(\.[a-z0-9_]+)*$")
+_SEPARATOR = re.compile(r"^[\s\W]+$")
+
+
+@dataclass
+class OptimizationResult:
+    original: list[dict[str, Any]]
+    pipeline: list[dict[str, Any]]
+    rewrites: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return self.pipeline != self.original
+
+    def report(self) -> str:
+        lines: list[str] = [f"{len(self.original)} stage(s) -> {len(self.pipeline)} stage(s)"]
+        lines.extend(f"  rewrite: {rewrite}" for rewrite in self.rewrites)
+        lines.extend(f"  warning: {warning}" for warning in self.warnings)
+        return "\n".join(lines)
+
+
+def _stage(stage: Mapping[str, Any]) -> tuple[str, Any]:
+    return next(iter(stage.items()))
+
+
+def _conflicts(left: str, right: str) -> bool:
+    """True when one path is the other or contains it."""
+    return left == right or left.startswith(right + ".") or right.startswith(left + ".")
+
+
+def _touches(paths: Iterable[str], others: Iterable[str]) -> bool:
+    others = list(others)
+    return any(_conflicts(path, other) for path in paths for other in others)
+
+
+def _assigns(key: str, paths: Iterable[str]) -> bool:
+    """Whether assigning ``key`` is visible through ``paths``; assigning a sub-field also creates or reshapes its parents."""
+    parts = key.split(".")
+    return _touches([".".join(parts[:depth]) for depth in range(1, len(parts) + 1)], paths)
+
+
+def _expression_refs(expression: Any) -> FieldSet:
+    """Field paths an aggregation expression reads; None if it reads the whole document ($$ROOT / $$CURRENT)
+    or uses an operator that is not modelled."""
+    refs: set[str] = set()
+
+    def walk(value: Any) -> bool:
+        if isinstance(value, str):
+            if value.startswith("$$"):
+                name = value[2:].partition(".")[0]
+                if name in ("ROOT", "CURRENT"):
+                    return False
+            elif value.startswith("$"):
+                refs.add(value[1:])
+            return True
+        if isinstance(value, Mapping):
+            if len(value) == 1 and "$literal" in value:
+                return True
+            if any(key.startswith("$") and key not in _EXPRESSION_OPERATORS for key in value):
+                return False
+            return all(walk(item) for item in value.values())
+        if isinstance(value, list):
+            return all(walk(item) for item in value)
+        return True
+
+    return refs if walk(expression) else None
+
+
+def _query_refs(query: Any) -> FieldSet:
+    """Field paths a $match filter reads; None when it cannot be determined."""
+    if not isinstance(query, Mapping):
+        return None
+    refs: set[str] = set()
+    for key, condition in query.items():
+        if key in ("$and", "$or", "$nor"):
+            if not isinstance(condition, list):
+                return None
+            for sub in condition:
+                nested = _query_refs(sub)
+                if nested is None:
+                    return None
+                refs |= nested
+        elif key == "$expr":
+            nested = _expression_refs(condition)
+            if nested is None:
+                return None
+            refs |= nested
+        elif key.startswith("$"):
+            # $text, $where, $jsonSchema, ...: cannot be analysed (or moved)
+            return None
+        else:
+            refs.add(key)
+    return refs
+
+
+def _nested_projection(value: Any) -> bool:
+    """Whether a $project value is a nested spec (``{"engine": {"cc": 1}}``) rather than an expression."""
+    return isinstance(value, Mapping) and bool(value) and not any(str(key).startswith("$") for key in value)
+
+
+def _split_projection(spec: Mapping[str, Any]) -> tuple[bool, list[str], list[str], dict[str, Any]]:
+    """Return (inclusion mode, included paths, excluded paths, computed fields) for a $project spec.
+
+    Nested specs are flattened to dotted paths, so ``{"engine": {"cc": 1}}`` includes ``engine.cc``.
+    """
+    included: list[str] = []
+    excluded: list[str] = []
+    computed: dict[str, Any] = {}
+
+    def split(prefix: str, fields: Mapping[str, Any]) -> None:
+        for name, value in fields.items():
+            path = prefix + name
+            if isinstance(value, (bool, int, float)):
+                (included if value else excluded).append(path)
+            elif _nested_projection(value):
+                split(path + ".", value)
+            else:
+                computed[path] = value
+
+    split("", spec)
+    return bool(included or computed), included, excluded, computed
+
+
+def _passes_through(path: str, included: list[str], excluded: list[str], computed: Mapping[str, Any]) -> bool:
+    """Whether an inclusion $project leaves ``path`` exactly as it was."""
+    if _touches([path], computed):
+        return False
+    if path == "_id" or path.startswith("_id."):
+        return "_id" not in excluded
+    return any(path == name or path.startswith(name + ".") for name in included)
+
+
+def _as_projection_value(expression: Any) -> Any:
+    # Numbers and booleans in a $project mean include/exclude, so constant values must be wrapped
+    return {"$literal": expression} if isinstance(expression, (bool, int, float)) else expression
+
+
+def _minimal_paths(paths: Iterable[str]) -> list[str]:
+    """Sorted paths with any path dropped whose ancestor is also present."""
+    unique = sorted(set(paths))
+    return [path for path in unique if not any(path.startswith(other + ".") for other in unique)]
+
+
+def _substitute(expression: Any, replacements: Mapping[str, Any]) -> Any:
+    """Replace whole-field references ("$name") with the given expressions."""
+    if isinstance(expression, str) and expression.startswith("$") and not expression.startswith("$$") and expression[1:] in replacements:
+        return copy.deepcopy(replacements[expression[1:]])
+    if isinstance(expression, Mapping):
+        if len(expression) == 1 and "$literal" in expression:
+            return expression
+        return {key: _substitute(value, replacements) for key, value in expression.items()}
+    if isinstance(expression, list):
+        return [_substitute(item, replacements) for item in expression]
+    return expression
+
+
+class PipelineOptimizer:
+    """Semantics-preserving rewrites of aggregation pipelines before they are sent to the server.
+
+    Rewrites: adjacent ``$match`` stages are merged and moved ahead of stages that do not touch the
+    fields they filter on; adjacent ``$set``/``$addFields`` stages, and ``$set`` + ``$project`` pairs in
+    either order, are coalesced; computed fields nothing downstream reads are dropped; and an early
+    ``$project`` is injected so only referenced fields flow through the pipeline. Likely mistakes
+    (string literals that look like field names, references to fields an earlier ``$group`` or
+    ``$project`` no longer produces) are reported as warnings and never rewritten.
+
+    Coalescing ``$set`` into a following ``$project`` places the computed field after the included
+    fields, which is where ``$set`` puts a new field; only when ``$set`` overwrote an existing field
+    can the output's field order differ.
+    """
+
+    @staticmethod
+    def optimize(pipeline: list[dict[str, Any]], known_fields: Iterable[str] = ()) -> OptimizationResult:
+        if not isinstance(pipeline, list):
+            raise ValueError("Aggregation pipeline must be a list of stages.")
+
+        result = OptimizationResult(original=copy.deepcopy(pipeline), pipeline=copy.deepcopy(pipeline))
+        if not all(isinstance(stage, Mapping) and len(stage) == 1 for stage in pipeline):
+            # Leave malformed pipelines for the server to reject with its own error
+            return result
+
+        result.warnings.extend(PipelineOptimizer.lint(pipeline, known_fields))
+        stages: list[dict[str, Any]] = result.pipeline
+        passes = (PipelineOptimizer.__merge_matches, PipelineOptimizer.__push_matches, PipelineOptimizer.__coalesce_sets,
+                  PipelineOptimizer.__fold_set_into_project, PipelineOptimizer.__fold_project_into_set, PipelineOptimizer.__drop_dead_fields)
+        changed = True
+        while changed:
+            changed = False
+            for rewrite in passes:
+                if rewrite(stages, result.rewrites):
+                    changed = True
+        PipelineOptimizer.__inject_projection(stages, result.rewrites)
+        return result
+
+    @staticmethod
+    def apply(pipeline: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Optimize ``pipeline`` and log what was rewritten or looks wrong; returns the pipeline to send."""
+        result = PipelineOptimizer.optimize(pipeline)
+        for warning in result.warnings:
+            logging.warning(f"Pipeline check: {warning}")
+        if result.changed:
+            logging.info(f"Pipeline optimized: {result.report()}")
+        return result.pipeline
+
+    @staticmethod
+    def lint(pipeline: list[dict[str, Any]], known_fields: Iterable[str] = ()) -> list[str]:
+        """Likely bugs in ``pipeline``, as human-readable messages."""
+        warnings: list[str] = []
+        known: set[str] = set(known_fields)
+        for stage in pipeline:
+            name, spec = _stage(stage)
+            refs = _query_refs(spec) if name == "$match" else PipelineOptimizer.__stage_refs(name, spec)
+            known |= refs or set()
+
+        def check_literals(value: Any, position: int) -> None:
+            if isinstance(value, Mapping):
+                for operator, operand in value.items():
+                    if operator in _STRING_OPERATORS:
+                        arguments = operand if isinstance(operand, list) else [operand]
+                        joined = operator == "$concat" and any(isinstance(item, str) and _SEPARATOR.match(item) for item in arguments)
+                        for item in arguments:
+                            if isinstance(item, str) and _IDENTIFIER.match(item) and (item in known or joined):
+                                warnings.append(f"stage {position}: string literal '{item}' in {operator} looks like a field name; "
+                                                f"did you mean '${item}'?")
+                    if operator != "$literal":
+                        check_literals(operand, position)
+            elif isinstance(value, list):
+                for item in value:
+                    check_literals(item, position)
+
+        available: FieldSet = None
+        producer: str = ""
+        for position, stage in enumerate(pipeline):
+            name, spec = _stage(stage)
+            if name != "$match":
+                check_literals(spec, position)
+
+            refs = _query_refs(spec) if name == "$match" else PipelineOptimizer.__stage_refs(name, spec)
+            if available is not None and refs:
+                for path in sorted(refs):
+                    if not _touches([path], available):
+                        warnings.append(f"stage {position} ({name}): field '{path}' is not produced by the {producer}; it will always be missing")
+            available, producer = PipelineOptimizer.__produced(name, spec, available, producer, position)
+        return warnings
+
+    @staticmethod
+    def needed_fields(pipeline: list[dict[str, Any]]) -> FieldSet:
+        """Fields of the input documents that can affect the pipeline's result, or None if that is every field."""
+        return PipelineOptimizer.__needed_before(pipeline, 0)
+
+    @staticmethod
+    def __stage_refs(name: str, spec: Any) -> FieldSet:
+        if name in ("$set", "$addFields", "$group") and isinstance(spec, Mapping):
+            refs: set[str] = set()
+            for expression in spec.values():
+                nested = _expression_refs(expression)
+                if nested is None:
+                    return None
+                refs |= nested
+            return refs
+        if name == "$project" and isinstance(spec, Mapping):
+            inclusion, included, _, computed = _split_projection(spec)
+            refs = set(included) if inclusion else set()
+            for expression in computed.values():
+                nested = _expression_refs(expression)
+                if nested is None:
+                    return None
+                refs |= nested
+            return refs
+        if name == "$sort" and isinstance(spec, Mapping):
+            return set(spec)
+        if name == "$lookup" and isinstance(spec, Mapping) and "localField" in spec:
+            return {spec["localField"]}
+        if name in ("$limit", "$skip", "$out", "$unset"):
+            return set()
+        return None
+
+    @staticmethod
+    def __produced(name: str, spec: Any, available: FieldSet, producer: str, position: int) -> tuple[FieldSet, str]:
+        """Fields present after a stage, when they can be enumerated."""
+        if name == "$group" and isinstance(spec, Mapping):
+            return set(spec), f"$group at stage {position}"
+        if name == "$project" and isinstance(spec, Mapping):
+            inclusion, included, excluded, computed = _split_projection(spec)
+            if inclusion:
+                fields = set(included) | set(computed)
+                if "_id" not in excluded:
+                    fields.add("_id")
+                return fields, f"$project at stage {position}"
+            if available is None:
+                return None, producer
+            return {path for path in available if not _touches([path], excluded)}, producer
+        if available is None:
+            return None, producer
+        if name in ("$set", "$addFields") and isinstance(spec, Mapping):
+            return available | set(spec), producer
+        if name == "$lookup" and isinstance(spec, Mapping) and "as" in spec:
+            return available | {spec["as"]}, producer
+        if name in ("$match", "$sort", "$limit", "$skip", "$unset", "$out"):
+            return available, producer
+        return None, producer
+
+    @staticmethod
+    def __needed_before(stages: list[dict[str, Any]], position: int) -> FieldSet:
+        """Backward dependency analysis: fields stage ``position`` must receive for the rest of the pipeline."""
+        needed: FieldSet = None
+        for name, spec in (_stage(stage) for stage in reversed(stages[position:])):
+            needed = PipelineOptimizer.__needed_by(name, spec, needed)
+        return needed
+
+    @staticmethod
+    def __needed_by(name: str, spec: Any, needed: FieldSet) -> FieldSet:
+        if name == "$match":
+            refs = _query_refs(spec)
+            return None if refs is None or needed is None else needed | refs
+        if name == "$sort" and isinstance(spec, Mapping):
+            return None if needed is None else needed | set(spec)
+        if name in ("$limit", "$skip"):
+            return needed
+        if name == "$group" and isinstance(spec, Mapping):
+            return PipelineOptimizer.__stage_refs(name, spec)
+        if name == "$project" and isinstance(spec, Mapping):
+            inclusion, included, excluded, computed = _split_projection(spec)
+            if not inclusion:
+                return None if needed is None else PipelineOptimizer.__without(needed, excluded)
+            refs: set[str] = {path for path in included if needed is None or _touches([path], needed)}
+            if "_id" not in excluded and "_id" not in included and "_id" not in computed and (needed is None or _touches(["_id"], needed)):
+                refs.add("_id")
+            for key, expression in computed.items():
+                if needed is None or _touches([key], needed):
+                    nested = _expression_refs(expression)
+                    if nested is None:
+                        return None
+                    refs |= nested
+            return refs
+        if name in ("$set", "$addFields") and isinstance(spec, Mapping):
+            if needed is None:
+                return None
+            # Assigned fields stay needed: overwriting an existing field keeps its position in the document
+            refs = set(needed)
+            for key, expression in spec.items():
+                if _assigns(key, needed):
+                    nested = _expression_refs(expression)
+                    if nested is None:
+                        return None
+                    refs |= nested
+                    if "." in key:
+                        # Setting a sub-field keeps the rest of the parent document
+                        refs.add(key.partition(".")[0])
+            return refs
+        if name == "$unset":
+            return None if needed is None else PipelineOptimizer.__without(needed, spec if isinstance(spec, list) else [spec])
+        if name == "$lookup" and isinstance(spec, Mapping) and {"localField", "as"} <= set(spec) and "pipeline" not in spec:
+            if needed is None:
+                return None
+            return {path for path in needed if not _conflicts(path, spec["as"])} | {spec["localField"]}
+        return None
+
+    @staticmethod
+    def __without(needed: set[str], removed: Iterable[str]) -> set[str]:
+        """Needed fields before a stage that removes ``removed``: removed fields need nothing, except that
+        removing a sub-field still leaves its parent document behind for later stages to see."""
+        refs: set[str] = set()
+        for path in needed:
+            covering = [name for name in removed if path == name or path.startswith(name + ".")]
+            if not covering:
+                refs.add(path)
+            for name in covering:
+                if "." in name:
+                    refs.add(name.rpartition(".")[0])
+        return refs
+
+    @staticmethod
+    def __merge_matches(stages: list[dict[str, Any]], rewrites: list[str]) -> bool:
+        for position in range(len(stages) - 1):
+            (first_name, first), (second_name, second) = _stage(stages[position]), _stage(stages[position + 1])
+            if first_name == second_name == "$match" and isinstance(first, Mapping) and isinstance(second, Mapping):
+                merged = {**first, **second} if not set(first) & set(second) else {"$and": [first, second]}
+                stages[position:position + 2] = [{"$match": merged}]
+                rewrites.append(f"merged adjacent $match stages at {position} and {position + 1}")
+                return True
+        return False
+
+    @staticmethod
+    def __push_matches(stages: list[dict[str, Any]], rewrites: list[str]) -> bool:
+        for position in range(1, len(stages)):
+            name, spec = _stage(stages[position])
+            previous_name, previous = _stage(stages[position - 1])
+            if name != "$match" or previous_name not in _MATCH_MOVABLE:
+                continue
+            refs = _query_refs(spec)
+            if refs is not None and PipelineOptimizer.__can_precede(refs, previous_name, previous):
+                stages[position - 1], stages[position] = stages[position], stages[position - 1]
+                rewrites.append(f"moved $match ahead of {previous_name} (stage {position} -> {position - 1})")
+                return True
+        return False
+
+    @staticmethod
+    def __can_precede(refs: set[str], name: str, spec: Any) -> bool:
+        """Whether a $match reading ``refs`` gives the same result before the stage as after it."""
+        if name == "$sort":
+            return True
+        if not isinstance(spec, Mapping) and name != "$unset":
+            return False
+        if name in ("$set", "$addFields"):
+            return not any(_assigns(key, refs) for key in spec)
+        if name == "$unset":
+            return not _touches(refs, spec if isinstance(spec, list) else [spec])
+        if name == "$lookup":
+            return "as" in spec and not _touches(refs, [spec["as"]])
+        inclusion, included, excluded, computed = _split_projection(spec)
+        if not inclusion:
+            return not _touches(refs, excluded)
+        return all(_passes_through(path, included, excluded, computed) for path in refs)
+
+    @staticmethod
+    def __coalesce_sets(stages: list[dict[str, Any]], rewrites: list[str]) -> bool:
+        for position in range(len(stages) - 1):
+            (first_name, first), (second_name, second) = _stage(stages[position]), _stage(stages[position + 1])
+            if first_name not in ("$set", "$addFields") or second_name not in ("$set", "$addFields"):
+                continue
+            if not isinstance(first, Mapping) or not isinstance(second, Mapping):
+                continue
+            refs = PipelineOptimizer.__stage_refs(second_name, second)
+            if refs is None or any(_assigns(key, refs) or _assigns(key, second) for key in first):
+                continue
+            stages[position:position + 2] = [{first_name: {**first, **second}}]
+            rewrites.append(f"coalesced adjacent {first_name}/{second_name} stages at {position} and {position + 1}")
+            return True
+        return False
+
+    @staticmethod
+    def __fold_set_into_project(stages: list[dict[str, Any]], rewrites: list[str]) -> bool:
+        """$set followed by an inclusion $project: compute the fields in the $project instead."""
+        for position in range(len(stages) - 1):
+            (set_name, assigned), (project_name, spec) = _stage(stages[position]), _stage(stages[position + 1])
+            if set_name not in ("$set", "$addFields") or project_name != "$project":
+                continue
+            if not isinstance(assigned, Mapping) or not isinstance(spec, Mapping) or not assigned:
+                continue
+            inclusion, included, excluded, computed = _split_projection(spec)
+            if not inclusion or any("." in key or key == "_id" for key in assigned) or any(map(_nested_projection, spec.values())):
+                continue
+            # Included sub-paths of a computed field, or computed fields reading part of one, can't be folded
+            if any(path.startswith(key + ".") for path in list(included) + list(computed) for key in assigned):
+                continue
+            if any(key in computed for key in assigned):
+                continue
+            readable = True
+            for expression in computed.values():
+                refs = _expression_refs(expression)
+                if refs is None or any(ref.startswith(key + ".") for ref in refs for key in assigned):
+                    readable = False
+            if not readable:
+                continue
+
+            folded: dict[str, Any] = {name: value for name, value in spec.items() if name not in assigned and name not in computed}
+            kept = [key for key in assigned if key in included]
+            for key in kept:
+                folded[key] = _as_projection_value(copy.deepcopy(assigned[key]))
+            for name, expression in computed.items():
+                folded[name] = _as_projection_value(_substitute(expression, assigned))
+            stages[position:position + 2] = [{"$project": folded}]
+            dropped = [key for key in assigned if key not in kept]
+            message = f"folded {set_name} at stage {position} into the following $project"
+            if dropped:
+                message += f" (dropped unused field(s): {', '.join(dropped)})"
+            rewrites.append(message)
+            return True
+        return False
+
+    @staticmethod
+    def __fold_project_into_set(stages: list[dict[str, Any]], rewrites: list[str]) -> bool:
+        """Inclusion $project followed by $set/$addFields: compute the new fields in the $project."""
+        for position in range(len(stages) - 1):
+            (project_name, spec), (set_name, assigned) = _stage(stages[position]), _stage(stages[position + 1])
+            if project_name != "$project" or set_name not in ("$set", "$addFields"):
+                continue
+            if not isinstance(spec, Mapping) or not isinstance(assigned, Mapping) or not assigned:
+                continue
+            inclusion, included, excluded, computed = _split_projection(spec)
+            if not inclusion or any("." in key for key in assigned):
+                continue
+            # New fields only: overwriting a projected field would change its position
+            if _touches(assigned, list(included) + list(computed) + (["_id"] if "_id" not in excluded else [])):
+                continue
+            refs = PipelineOptimizer.__stage_refs(set_name, assigned)
+            if refs is None or not all(_passes_through(path, included, excluded, computed) for path in refs):
+                continue
+            stages[position:position + 2] = [{"$project": {**spec, **{key: _as_projection_value(copy.deepcopy(value)) for key, value in assigned.items()}}}]
+            rewrites.append(f"folded {set_name} at stage {position + 1} into the preceding $project")
+            return True
+        return False
+
+    @staticmethod
+    def __drop_dead_fields(stages: list[dict[str, Any]], rewrites: list[str]) -> bool:
+        for position, stage in enumerate(stages):
+            name, spec = _stage(stage)
+            if name not in ("$set", "$addFields") or not isinstance(spec, Mapping):
+                continue
+            needed = PipelineOptimizer.__needed_before(stages, position + 1)
+            if needed is None:
+                continue
+            dead = [key for key in spec if not _assigns(key, needed)]
+            if not dead:
+                continue
+            remaining = {key: value for key, value in spec.items() if key not in dead}
+            if remaining:
+                stages[position] = {name: remaining}
+            else:
+                del stages[position]
+            rewrites.append(f"dropped unused computed field(s) {', '.join(dead)} from {name} at stage {position}")
+            return True
+        return False
+
+    @staticmethod
+    def __inject_projection(stages: list[dict[str, Any]], rewrites: list[str]) -> None:
+        position = 0
+        while position < len(stages) and _stage(stages[position])[0] == "$match":
+            position += 1
+        if position >= len(stages):
+            return
+        name, spec = _stage(stages[position])
+        if name == "$project" and isinstance(spec, Mapping) and _split_projection(spec)[0]:
+            return
+
+        needed = PipelineOptimizer.__needed_before(stages, position)
+        if not needed:
+            return
+        projection: dict[str, Any] = {path: 1 for path in _minimal_paths(needed)}
+        if not _touches(["_id"], needed):
+            projection["_id"] = 0
+        stages.insert(position, {"$project": projection})
+        rewrites.append(f"injected $project at stage {position} so only {', '.join(_minimal_paths(needed))} are read")
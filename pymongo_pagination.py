@@ -0,0 +1,276 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+import bson
+from bson.errors import BSONError
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.collection import Collection
+
+from pymongo_aggregation import MISSING, get_path
+
+SortKeys = list[tuple[str, int]]
+_TOKEN_VERSION: int = 1
+MAX_PAGE_SIZE: int = 10_000
+
+
+@dataclass
+class Page:
+    """One page of documents and the opaque tokens that continue from either end of it (None at the ends)."""
+
+    documents: list[dict[str, Any]]
+    next_token: Optional[str] = None
+    previous_token: Optional[str] = None
+    sort: SortKeys = field(default_factory=list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_token is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_token is not None
+
+
+@dataclass(frozen=True)
+class _Query:
+    filter: dict[str, Any]
+    sort: SortKeys
+    projection: Optional[dict[str, Any]]
+    limit: int
+    backward: bool
+    fingerprint: str
+    strip: tuple[str, ...]
+    continued: bool
+
+
+def _covers(parent: str, path: str) -> bool:
+    """Whether projecting ``parent`` also returns ``path``."""
+    return path == parent or path.startswith(parent + ".")
+
+
+def _added_part(path: str, projected: list[str]) -> str:
+    """The shortest prefix of ``path`` that no projected field returns any of, i.e. what reading ``path`` adds."""
+    parts: list[str] = path.split(".")
+    for length in range(1, len(parts) + 1):
+        prefix: str = ".".join(parts[:length])
+        if not any(_covers(prefix, name) for name in projected):
+            return prefix
+    return path
+
+
+def _drop_path(document: Any, path: str) -> None:
+    head, _, rest = path.partition(".")
+    if isinstance(document, list):
+        for item in document:
+            _drop_path(item, path)
+    elif isinstance(document, dict) and head in document:
+        if rest:
+            _drop_path(document[head], rest)
+        else:
+            del document[head]
+
+
+class KeysetPaginator:
+    """Page through a collection by ``_id`` or any sort key without ``skip``.
+
+    Each page asks for the documents strictly after (or before) the last sort-key values seen,
+    so with an index on the sort keys every page costs the same however deep it is. ``_id`` is
+    appended as a tie-breaker so the order is total. Tokens carry those values and a fingerprint
+    of the filter and sort; set ``secret`` to also sign them for use by untrusted clients. Sort
+    keys should hold one BSON type per field (null and missing values are handled).
+    """
+
+    secret: Optional[bytes] = None
+
+    _lock: threading.Lock = threading.Lock()
+    _index_checked: set[tuple[str, str, tuple[tuple[str, int], ...]]] = set()
+
+    @classmethod
+    def configure(cls, secret: str | bytes | None = None) -> None:
+        cls.secret = secret.encode() if isinstance(secret, str) else secret
+
+    @staticmethod
+    def page(collection: Collection, page_size: int = 50, token: str | None = None, filter_: dict[str, Any] | None = None,
+             sort: SortKeys | None = None, projection: dict[str, Any] | None = None, from_end: bool = False) -> Page:
+        """The page after ``token`` (or before it, for a ``previous_token``); without a token the first page, or the last with ``from_end``."""
+        query: _Query = KeysetPaginator.query(page_size, token, filter_, sort, projection, from_end)
+        KeysetPaginator.__check_index(collection, KeysetPaginator.sort_keys(sort))
+        documents: list[dict[str, Any]] = list(collection.find(query.filter, query.projection, sort=query.sort, limit=query.limit))
+        return KeysetPaginator.page_of(documents, query)
+
+    @staticmethod
+    async def page_async(collection: AsyncCollection, page_size: int = 50, token: str | None = None, filter_: dict[str, Any] | None = None,
+                         sort: SortKeys | None = None, projection: dict[str, Any] | None = None, from_end: bool = False) -> Page:
+        query: _Query = KeysetPaginator.query(page_size, token, filter_, sort, projection, from_end)
+        await KeysetPaginator.__check_index_async(collection, KeysetPaginator.sort_keys(sort))
+        documents: list[dict[str, Any]] = await collection.find(query.filter, query.projection, sort=query.sort, limit=query.limit).to_list()
+        return KeysetPaginator.page_of(documents, query)
+
+    @staticmethod
+    def query(page_size: int, token: str | None, filter_: dict[str, Any] | None, sort: SortKeys | None, projection: dict[str, Any] | None,
+              from_end: bool = False) -> _Query:
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}.")
+        keys: SortKeys = KeysetPaginator.sort_keys(sort)
+        fingerprint: str = KeysetPaginator.__fingerprint(filter_ or {}, keys)
+        backward: bool = from_end
+        clauses: list[dict[str, Any]] = [filter_] if filter_ else []
+        if token is not None:
+            state: dict[str, Any] = KeysetPaginator.__decode(token)
+            if state.get("q") != fingerprint:
+                raise ValueError("Continuation token does not belong to this filter and sort.")
+            backward = state["d"] == "p"
+            clauses.append(KeysetPaginator.__after(keys, state["k"], backward))
+
+        # A page is read in its own direction; backward pages are read in reverse and flipped afterwards
+        read_sort: SortKeys = [(name, -direction) for name, direction in keys] if backward else keys
+        read_projection, strip = KeysetPaginator.__projection(projection, keys)
+        combined: dict[str, Any] = clauses[0] if len(clauses) == 1 else {"$and": clauses} if clauses else {}
+        return _Query(combined, read_sort, read_projection, page_size + 1, backward, fingerprint, strip, token is not None)
+
+    @staticmethod
+    def page_of(documents: list[dict[str, Any]], query: _Query) -> Page:
+        """Turn the ``limit`` documents read for ``query`` into a ``Page`` with its tokens."""
+        more: bool = len(documents) == query.limit
+        documents = documents[:query.limit - 1]
+        if query.backward:
+            documents.reverse()
+        keys: SortKeys = [(name, -direction) for name, direction in query.sort] if query.backward else query.sort
+        ahead, behind = (query.continued, more) if query.backward else (more, query.continued)
+        page = Page(documents, sort=keys)
+        if documents and ahead:
+            page.next_token = KeysetPaginator.__encode("n", KeysetPaginator.__values(documents[-1], keys), query.fingerprint)
+        if documents and behind:
+            page.previous_token = KeysetPaginator.__encode("p", KeysetPaginator.__values(documents[0], keys), query.fingerprint)
+        for document in documents:
+            for path in query.strip:
+                _drop_path(document, path)
+        return page
+
+    @staticmethod
+    def sort_keys(sort: SortKeys | None) -> SortKeys:
+        keys: SortKeys = list(sort or [])
+        for name, direction in keys:
+            if not name or direction not in (1, -1):
+                raise ValueError("Sort keys must be (field, 1) or (field, -1) pairs.")
+        if not any(name == "_id" for name, _ in keys):
+            keys.append(("_id", keys[-1][1] if keys else 1))
+        return keys
+
+    @staticmethod
+    def __after(keys: SortKeys, values: list[Any], backward: bool) -> dict[str, Any]:
+        """Documents strictly past ``values`` in sort order: (k1 past v1) or (k1 = v1 and k2 past v2) or ..."""
+        if len(values) != len(keys):
+            raise ValueError("Invalid continuation token.")
+        branches: list[dict[str, Any]] = []
+        for position, (name, direction) in enumerate(keys):
+            equal: dict[str, Any] = {keys[index][0]: values[index] for index in range(position)}
+            past: Optional[dict[str, Any]] = KeysetPaginator.__past(name, values[position], direction < 0 if not backward else direction > 0)
+            if past is not None:
+                branches.append({**equal, **past} if not (set(equal) & set(past)) else {"$and": [equal, past]})
+        return {"$or": branches} if branches else {"_id": {"$in": []}}
+
+    @staticmethod
+    def __past(name: str, value: Any, descending: bool) -> Optional[dict[str, Any]]:
+        # null (and missing) sort before every other value, and $gt/$lt never match across types
+        if value is None:
+            return None if descending else {name: {"$ne": None}}
+        if descending:
+            return {"$or": [{name: {"$lt": value}}, {name: None}]}
+        return {name: {"$gt": value}}
+
+    @staticmethod
+    def __projection(projection: dict[str, Any] | None, keys: SortKeys) -> tuple[Optional[dict[str, Any]], tuple[str, ...]]:
+        """Make sure the sort keys are read so tokens can be built; returns the paths to drop again.
+
+        A dotted sort key adds only what the projection did not already return: ``engine.cc`` next to
+        ``{"price": 1}`` is dropped again as the whole ``engine``, next to ``{"engine.type": 1}`` as ``engine.cc``.
+        """
+        if not projection:
+            return projection, ()
+        inclusive: bool = any(value not in (0, False) for name, value in projection.items() if name != "_id")
+        if inclusive:
+            names: list[str] = [name for name in projection if name != "_id"]
+            missing: list[str] = [name for name, _ in keys if name != "_id" and not any(_covers(projected, name) for projected in names)]
+            excluded_id: bool = projection.get("_id", 1) in (0, False)
+            extended: dict[str, Any] = {**projection, **{name: 1 for name in missing}}
+            if excluded_id:
+                extended.pop("_id")
+            strip: list[str] = [_added_part(name, names) for name in missing]
+            return extended, tuple(strip + (["_id"] if excluded_id else []))
+        # Excluding a sort key, one of its parents or part of it hides values the token needs
+        excluded: list[str] = [name for name in projection if any(_covers(name, key) or _covers(key, name) for key, _ in keys)]
+        return {name: value for name, value in projection.items() if name not in excluded} or None, tuple(excluded)
+
+    @staticmethod
+    def __values(document: Mapping[str, Any], keys: SortKeys) -> list[Any]:
+        values: list[Any] = []
+        for name, _ in keys:
+            value: Any = get_path(document, name)
+            values.append(None if value is MISSING else value)
+        return values
+
+    @staticmethod
+    def __fingerprint(filter_: Mapping[str, Any], keys: SortKeys) -> str:
+        return hashlib.sha1(bson.encode({"f": filter_, "s": [list(key) for key in keys]})).hexdigest()[:16]
+
+    @staticmethod
+    def __encode(direction: str, values: list[Any], fingerprint: str) -> str:
+        payload: bytes = bson.encode({"v": _TOKEN_VERSION, "d": direction, "k": values, "q": fingerprint})
+        token: str = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+        if KeysetPaginator.secret:
+            token += "." + KeysetPaginator.__signature(token)
+        return token
+
+    @staticmethod
+    def __decode(token: str) -> dict[str, Any]:
+        body, _, signature = token.partition(".")
+        if KeysetPaginator.secret and not hmac.compare_digest(signature, KeysetPaginator.__signature(body)):
+            raise ValueError("Invalid continuation token.")
+        try:
+            state: dict[str, Any] = bson.decode(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+        except (BSONError, binascii.Error, ValueError) as ex:
+            raise ValueError("Invalid continuation token.") from ex
+        if state.get("v") != _TOKEN_VERSION or state.get("d") not in ("n", "p") or not isinstance(state.get("k"), list):
+            raise ValueError("Invalid continuation token.")
+        return state
+
+    @staticmethod
+    def __signature(body: str) -> str:
+        return hmac.new(KeysetPaginator.secret or b"", body.encode(), hashlib.sha256).hexdigest()[:32]
+
+    @staticmethod
+    def __check_index(collection: Collection, keys: SortKeys) -> None:
+        """Warn once per namespace and sort when no index serves it, since pages then cost a collection scan."""
+        if KeysetPaginator.__first_check(collection.database.name, collection.name, keys):
+            KeysetPaginator.__warn_unindexed(collection.name, keys, list(collection.list_indexes()))
+
+    @staticmethod
+    async def __check_index_async(collection: AsyncCollection, keys: SortKeys) -> None:
+        if KeysetPaginator.__first_check(collection.database.name, collection.name, keys):
+            KeysetPaginator.__warn_unindexed(collection.name, keys, await (await collection.list_indexes()).to_list())
+
+    @staticmethod
+    def __first_check(database_name: str, collection_name: str, keys: SortKeys) -> bool:
+        check: tuple[str, str, tuple[tuple[str, int], ...]] = (database_name, collection_name, tuple(keys))
+        with KeysetPaginator._lock:
+            if check in KeysetPaginator._index_checked:
+                return False
+            KeysetPaginator._index_checked.add(check)
+            return True
+
+    @staticmethod
+    def __warn_unindexed(collection_name: str, keys: SortKeys, indexes: list[Mapping[str, Any]]) -> None:
+        wanted: list[tuple[str, int]] = [key for key in keys if key[0] != "_id"] or keys
+        reverse: list[tuple[str, int]] = [(name, -direction) for name, direction in wanted]
+        for index in indexes:
+            prefix: list[tuple[str, Any]] = list(index["key"].items())[:len(wanted)]
+            if prefix in (wanted, reverse):
+                return
+        logging.warning(f"No index on {dict(wanted)} in '{collection_name}'; every page will scan the collection.")
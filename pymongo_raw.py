@@ -0,0 +1,87 @@
+import struct
+from typing import Any, BinaryIO, Iterable, Iterator, Mapping
+
+import bson
+from bson.errors import InvalidBSON
+from bson.raw_bson import DEFAULT_RAW_BSON_OPTIONS, RawBSONDocument
+
+# Decode options that keep every document (including embedded ones) as undecoded bytes
+RAW_CODEC_OPTIONS = DEFAULT_RAW_BSON_OPTIONS
+
+_INT32 = struct.Struct("<i")
+
+
+class RawDocuments:
+    """Move documents as undecoded BSON: raw batches from the wire, ``.bson`` files and lazy field access.
+
+    ``.bson`` files are plain concatenated documents, the same layout ``mongodump`` writes, so they
+    can be restored with ``mongorestore`` as well as ``MongoDbOperation.import_bson``.
+    """
+
+    @staticmethod
+    def split(batch: bytes | memoryview) -> Iterator[memoryview]:
+        """Yield a zero-copy view over each document in a raw batch (as returned by ``find_raw_batches``)."""
+        view = memoryview(batch)
+        position: int = 0
+        end: int = len(view)
+        while position < end:
+            if end - position < 5:
+                raise InvalidBSON("Truncated document at the end of the batch.")
+            size: int = _INT32.unpack_from(view, position)[0]
+            if size < 5 or position + size > end or view[position + size - 1] != 0:
+                raise InvalidBSON(f"Invalid document length {size} at offset {position}.")
+            yield view[position:position + size]
+            position += size
+
+    @staticmethod
+    def count(batch: bytes | memoryview) -> int:
+        return sum(1 for _ in RawDocuments.split(batch))
+
+    @staticmethod
+    def documents(batches: Iterable[bytes]) -> Iterator[RawBSONDocument]:
+        """Wrap each document of each raw batch as a RawBSONDocument; nothing is decoded until a field is read."""
+        for batch in batches:
+            yield from bson.decode_all(batch, RAW_CODEC_OPTIONS)
+
+    @staticmethod
+    def write_bson(items: Iterable[bytes | memoryview | RawBSONDocument], sink: BinaryIO) -> tuple[int, int]:
+        """Append raw batches or RawBSONDocuments to a binary sink. Returns ``(documents, bytes)`` written."""
+        documents: int = 0
+        written: int = 0
+        for item in items:
+            data = item.raw if isinstance(item, RawBSONDocument) else item
+            documents += 1 if isinstance(item, RawBSONDocument) else RawDocuments.count(data)
+            sink.write(data)
+            written += len(data)
+        return documents, written
+
+    @staticmethod
+    def read_bson(source: BinaryIO) -> Iterator[RawBSONDocument]:
+        """Iterate the documents of a ``.bson`` file without decoding them."""
+        return bson.decode_file_iter(source, RAW_CODEC_OPTIONS)
+
+    @staticmethod
+    def get(document: RawBSONDocument, path: str, default: Any = None) -> Any:
+        """Read one dotted field, decoding only the levels on the path.
+
+        Each level is a RawBSONDocument, so reading ``engine.cc`` decodes the top-level fields and the
+        ``engine`` sub-document but leaves every other embedded document as bytes.
+        """
+        if not path:
+            raise ValueError("Field path must not be empty.")
+        value: Any = document
+        for part in path.split("."):
+            if isinstance(value, Mapping):
+                if part not in value:
+                    return default
+                value = value[part]
+            elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return default
+        return value
+
+    @staticmethod
+    def decode(document: RawBSONDocument | bytes | memoryview) -> dict[str, Any]:
+        """Fully decode a raw document into plain dicts and lists."""
+        return bson.decode(document.raw if isinstance(document, RawBSONDocument) else bytes(document))
@@ -0,0 +1,215 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Iterable, Iterator, Mapping, Optional
+
+import bson
+from bson.codec_options import CodecOptions, TypeRegistry
+from bson.raw_bson import RawBSONDocument
+
+_intern: Callable[[str], str] = sys.intern
+
+
+def _value(value: Any) -> Any:
+    return value
+
+
+def _string(value: Any) -> Any:
+    # Categorical values repeat across millions of documents; interned, each distinct value is stored once
+    return _intern(value) if type(value) is str else value
+
+
+def _strings(value: Any) -> Any:
+    return tuple(_string(item) for item in value) if type(value) is list else value
+
+
+def _records(record_type: type["Record"]) -> Callable[[Any], Any]:
+    def convert(value: Any) -> Any:
+        if type(value) is list:
+            return tuple(record_type.from_document(item) if isinstance(item, Mapping) else item for item in value)
+        return value
+    return convert
+
+
+def _record(record_type: type["Record"]) -> Callable[[Any], Any]:
+    return lambda value: record_type.from_document(value) if isinstance(value, Mapping) else value
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_document()
+    if type(value) is tuple:
+        return [_plain(item) for item in value]
+    return value
+
+
+class Record:
+    """Base for the slotted record types: fields map to document keys through ``SCHEMA``.
+
+    ``SCHEMA`` holds ``(attribute, key, converter)``; keys the schema does not know are kept in
+    ``extra`` so a document survives ``from_document``/``to_document`` unchanged, except that
+    arrays come back as lists and fields set to None are omitted.
+    """
+
+    __slots__ = ()
+    SCHEMA: ClassVar[tuple[tuple[str, str, Callable[[Any], Any]], ...]] = ()
+    _KEYS: ClassVar[frozenset[str]] = frozenset()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._KEYS = frozenset(key for _, key, _ in cls.SCHEMA)
+
+    @classmethod
+    def from_document(cls, document: Mapping[str, Any]) -> Any:
+        values: list[Any] = []
+        found: int = 0
+        for _, key, convert in cls.SCHEMA:
+            value: Any = document.get(key)
+            if value is not None:
+                found += 1
+                value = convert(value)
+            values.append(value)
+        # Only documents with keys outside the schema (or explicit nulls) pay for the scan
+        extra: Optional[dict[str, Any]] = None
+        if len(document) > found:
+            extra = {key: value for key, value in document.items() if key not in cls._KEYS} or None
+        return cls(*values, extra)
+
+    @classmethod
+    def from_bson(cls, data: bytes | memoryview) -> Any:
+        """Decode one BSON document straight into a record; the intermediate dicts are dropped at once."""
+        return cls.from_document(bson.decode(data))
+
+    def to_document(self) -> dict[str, Any]:
+        document: dict[str, Any] = {}
+        for attribute, key, _ in self.SCHEMA:
+            value: Any = getattr(self, attribute)
+            if value is not None:
+                document[key] = _plain(value)
+        extra: Optional[dict[str, Any]] = getattr(self, "extra")
+        if extra:
+            document.update(extra)
+        return document
+
+
+@dataclass(slots=True)
+class Owner(Record):
+    name: Optional[str] = None
+    purchase_date: Optional[str] = None
+    location: Optional[str] = None
+    extra: Optional[dict[str, Any]] = None
+
+    SCHEMA = (("name", "name", _string), ("purchase_date", "purchase_date", _string), ("location", "location", _string))
+
+
+@dataclass(slots=True)
+class ServiceEntry(Record):
+    date: Optional[str] = None
+    service_type: Optional[str] = None
+    cost: Optional[int] = None
+    extra: Optional[dict[str, Any]] = None
+
+    SCHEMA = (("date", "date", _string), ("service_type", "service_type", _string), ("cost", "cost", _value))
+
+
+@dataclass(slots=True)
+class Engine(Record):
+    type: Optional[str] = None
+    cc: Optional[int] = None
+    torque: Optional[str] = None
+    battery_capacity: Optional[str] = None
+    extra: Optional[dict[str, Any]] = None
+
+    SCHEMA = (("type", "type", _string), ("cc", "cc", _value), ("torque", "torque", _string),
+              ("battery_capacity", "battery_capacity", _string))
+
+
+@dataclass(slots=True)
+class Car(Record):
+    id: Any = None
+    maker: Optional[str] = None
+    model: Optional[str] = None
+    fuel_type: Optional[str] = None
+    transmission: Optional[str] = None
+    engine: Optional[Engine] = None
+    features: Optional[tuple[str, ...]] = None
+    sunroof: Optional[bool] = None
+    airbags: Optional[int] = None
+    price: Optional[int] = None
+    owners: Optional[tuple[Owner, ...]] = None
+    service_history: Optional[tuple[ServiceEntry, ...]] = None
+    extra: Optional[dict[str, Any]] = None
+
+    SCHEMA = (("id", "_id", _value), ("maker", "maker", _string), ("model", "model", _string),
+              ("fuel_type", "fuel_type", _string), ("transmission", "transmission", _string), ("engine", "engine", _record(Engine)),
+              ("features", "features", _strings), ("sunroof", "sunroof", _value), ("airbags", "airbags", _value),
+              ("price", "price", _value), ("owners", "owners", _records(Owner)),
+              ("service_history", "service_history", _records(ServiceEntry)))
+
+
+@dataclass(slots=True)
+class User(Record):
+    id: Any = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    extra: Optional[dict[str, Any]] = None
+
+    SCHEMA = (("id", "_id", _value), ("name", "name", _string), ("email", "email", _value),
+              ("phone", "phone", _value), ("address", "address", _value))
+
+
+@dataclass(slots=True)
+class Order(Record):
+    id: Any = None
+    user_id: Optional[str] = None
+    product: Optional[str] = None
+    amount: Optional[int] = None
+    order_date: Optional[str] = None
+    extra: Optional[dict[str, Any]] = None
+
+    SCHEMA = (("id", "_id", _value), ("user_id", "user_id", _string), ("product", "product", _string),
+              ("amount", "amount", _value), ("order_date", "order_date", _string))
+
+
+# Default record type per sample collection name
+RECORD_TYPES: dict[str, type[Record]] = {"cars": Car, "users": User, "orders": Order}
+
+
+def _encode_record(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_document()
+    return value
+
+
+# Cursors hand documents over as undecoded bytes (no dicts are built for the batch), and records
+# nested in filters or updates (e.g. {"$push": {"owners": Owner(...)}}) encode through the fallback
+RECORD_CODEC_OPTIONS: CodecOptions = CodecOptions(document_class=RawBSONDocument, type_registry=TypeRegistry(fallback_encoder=_encode_record))
+
+
+class Records:
+    """Decode cars/users/orders documents into compact ``__slots__`` records instead of dicts."""
+
+    @staticmethod
+    def record_type(collection_name: str, record_type: type[Record] | None = None) -> type[Record]:
+        if record_type is not None:
+            return record_type
+        if collection_name not in RECORD_TYPES:
+            raise ValueError(f"No record type for '{collection_name}'; pass one of {', '.join(cls.__name__ for cls in RECORD_TYPES.values())}.")
+        return RECORD_TYPES[collection_name]
+
+    @staticmethod
+    def decode(documents: Iterable[RawBSONDocument | bytes | Mapping[str, Any]], record_type: type[Record]) -> Iterator[Any]:
+        """Records from raw documents (as read with ``RECORD_CODEC_OPTIONS``), BSON bytes or already decoded mappings."""
+        for document in documents:
+            if isinstance(document, RawBSONDocument):
+                yield record_type.from_bson(document.raw)
+            elif isinstance(document, (bytes, memoryview)):
+                yield record_type.from_bson(document)
+            else:
+                yield record_type.from_document(document)
+
+    @staticmethod
+    def decode_all(data: bytes, record_type: type[Record]) -> list[Any]:
+        """Every record of a concatenated BSON batch (a raw-batch cursor batch or a ``.bson`` file's contents)."""
+        return [record_type.from_document(document) for document in bson.decode_iter(data)]
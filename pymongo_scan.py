@@ -0,0 +1,175 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from pymongo.collection import Collection
+from pymongo.cursor import Cursor
+
+from pymongo_raw import RAW_CODEC_OPTIONS
+
+# Seconds a blocked worker waits before re-checking whether the consumer has gone away
+_POLL_SECONDS: float = 0.1
+_ID_INDEX: list[tuple[str, int]] = [("_id", 1)]
+
+
+@dataclass(frozen=True)
+class ScanPartition:
+    """One ``_id`` range of a collection: ``lower`` inclusive, ``upper`` exclusive; None means unbounded."""
+
+    number: int
+    lower: Optional[dict[str, Any]] = None
+    upper: Optional[dict[str, Any]] = None
+
+
+class _Done:
+    __slots__ = ("partition",)
+
+    def __init__(self, partition: int) -> None:
+        self.partition: int = partition
+
+
+class _Failed:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error: BaseException = error
+
+
+class ParallelScan:
+    """Read a collection as concurrent ``_id`` range scans over the shared connection pool.
+
+    Partitions are bounded with the cursor's ``min``/``max`` index bounds on ``_id`` rather than
+    ``$gte``/``$lt`` filters. Index bounds follow BSON order across types, so collections with
+    mixed ``_id`` types are still covered exactly once. Every partition scans the ``_id`` index,
+    so this suits full or mostly-full reads; a selective filter is better served by one ``find``.
+    """
+
+    @staticmethod
+    def split_points(collection: Collection, partitions: int, min_partition_documents: int = 1000, oversample: int = 10) -> list[Any]:
+        """``_id`` values that cut the collection into about ``partitions`` equal ranges, from a ``$sample``."""
+        if partitions <= 0:
+            raise ValueError("partitions must be a positive integer.")
+        if min_partition_documents <= 0 or oversample <= 0:
+            raise ValueError("min_partition_documents and oversample must be positive integers.")
+
+        documents: int = collection.estimated_document_count()
+        partitions = min(partitions, documents // min_partition_documents)
+        if partitions <= 1:
+            return []
+
+        # The server sorts the sample by _id, so the split points follow the index's BSON order
+        sample: list[Any] = [document["_id"] for document in collection.aggregate(
+            [{"$sample": {"size": partitions * oversample}}, {"$project": {"_id": 1}}, {"$sort": {"_id": 1}}])]
+        points: list[Any] = []
+        for number in range(1, partitions):
+            point = sample[len(sample) * number // partitions]
+            if not points or point != points[-1]:
+                points.append(point)
+        return points
+
+    @staticmethod
+    def partitions(collection: Collection, partitions: int, min_partition_documents: int = 1000) -> list[ScanPartition]:
+        points: list[Any] = ParallelScan.split_points(collection, partitions, min_partition_documents)
+        bounds: list[Optional[dict[str, Any]]] = [None, *({"_id": point} for point in points), None]
+        return [ScanPartition(number, bounds[number], bounds[number + 1]) for number in range(len(bounds) - 1)]
+
+    @staticmethod
+    def cursor(collection: Collection, partition: ScanPartition, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+               batch_size: int = 1000, raw: bool = False) -> Cursor:
+        """The cursor for one partition, in ``_id`` order."""
+        if raw:
+            collection = collection.with_options(codec_options=RAW_CODEC_OPTIONS)
+        cursor: Cursor = collection.find(filter_ or {}, projection, batch_size=batch_size).hint(_ID_INDEX)
+        if partition.lower is not None:
+            cursor = cursor.min(list(partition.lower.items()))
+        if partition.upper is not None:
+            cursor = cursor.max(list(partition.upper.items()))
+        return cursor
+
+    @staticmethod
+    def partition_iterators(collection: Collection, partitions: list[ScanPartition], filter_: dict[str, Any] | None = None,
+                            projection: dict[str, Any] | None = None, batch_size: int = 1000, raw: bool = False) -> list[Iterator[Any]]:
+        """One lazily opened iterator per partition, for callers that distribute the partitions themselves."""
+        def iterate(partition: ScanPartition) -> Iterator[Any]:
+            with ParallelScan.cursor(collection, partition, filter_, projection, batch_size, raw) as cursor:
+                yield from cursor
+
+        return [iterate(partition) for partition in partitions]
+
+    @staticmethod
+    def scan(collection: Collection, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None, partitions: int | None = None,
+             max_workers: int = 4, batch_size: int = 1000, ordered: bool = True, raw: bool = False, prefetch: int = 4) -> Iterator[Any]:
+        """Yield every matching document, reading up to ``max_workers`` partitions concurrently.
+
+        ``ordered=True`` yields partitions one after another, so the output is in ``_id`` order.
+        ``ordered=False`` yields batches in whatever order they arrive. Each worker buffers at most
+        ``prefetch`` batches ahead of the consumer. Closing the iterator early stops the workers.
+        """
+        if max_workers <= 0:
+            raise ValueError("max_workers must be a positive integer.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        if prefetch <= 0:
+            raise ValueError("prefetch must be a positive integer.")
+
+        ranges: list[ScanPartition] = ParallelScan.partitions(collection, partitions or max_workers * 4, min_partition_documents=batch_size)
+        workers: int = min(max_workers, len(ranges))
+        logging.info(f"Scanning '{collection.full_name}' in {len(ranges)} partition(s) with {workers} worker(s).")
+        if workers == 1 and len(ranges) == 1:
+            return ParallelScan.partition_iterators(collection, ranges, filter_, projection, batch_size, raw)[0]
+        return ParallelScan.__merge(collection, ranges, filter_, projection, batch_size, raw, workers, ordered, prefetch)
+
+    @staticmethod
+    def __merge(collection: Collection, ranges: list[ScanPartition], filter_: dict[str, Any] | None, projection: dict[str, Any] | None,
+                batch_size: int, raw: bool, workers: int, ordered: bool, prefetch: int) -> Iterator[Any]:
+        stop = threading.Event()
+        shared: queue.Queue[Any] = queue.Queue(maxsize=prefetch * workers)
+        queues: list[queue.Queue[Any]] = [queue.Queue(maxsize=prefetch) for _ in ranges] if ordered else [shared] * len(ranges)
+
+        def put(target: queue.Queue[Any], item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(partition: ScanPartition) -> None:
+            target = queues[partition.number]
+            try:
+                with ParallelScan.cursor(collection, partition, filter_, projection, batch_size, raw) as cursor:
+                    batch: list[Any] = []
+                    for document in cursor:
+                        batch.append(document)
+                        if len(batch) >= batch_size:
+                            if not put(target, batch):
+                                return
+                            batch = []
+                    if batch and not put(target, batch):
+                        return
+                put(target, _Done(partition.number))
+            except Exception as ex:  # handed to the consumer, which re-raises it
+                put(target, _Failed(ex))
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parallel-scan")
+        try:
+            for partition in ranges:
+                executor.submit(read, partition)
+            pending: int = len(ranges)
+            position: int = 0
+            while pending:
+                item = queues[position].get()
+                if isinstance(item, _Failed):
+                    raise item.error
+                if isinstance(item, _Done):
+                    pending -= 1
+                    position += 1 if ordered else 0
+                    continue
+                yield from item
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,93 @@
+from typing import Any, Iterable, Iterator, Mapping, Optional, TextIO
+
+from pymongo_encoders import DocumentEncoder, OutputEncoders
+
+Encoder = str | DocumentEncoder | None
+
+
+class DocumentStream:
+    """Incremental JSON writers. Output format comes from the configured encoder and indent unless overridden per call."""
+
+    # Spaces per nesting level for JSON arrays; 0 writes each document on a single line
+    indent: int = 4
+
+    @staticmethod
+    def configure(encoder: str | None = None, indent: int | None = None) -> None:
+        if encoder is not None:
+            OutputEncoders.configure(encoder)
+        if indent is not None:
+            if indent < 0:
+                raise ValueError("indent must not be negative.")
+            DocumentStream.indent = indent
+
+    @staticmethod
+    def to_json_line(document: Mapping[str, Any], encoder: Encoder = None) -> str:
+        return OutputEncoders.get(encoder).encode(document)
+
+    @staticmethod
+    def to_json_lines(documents: Iterable[Mapping[str, Any]], encoder: Encoder = None) -> Iterator[str]:
+        """Yield one single-line JSON string per document."""
+        encode = OutputEncoders.get(encoder).encode
+        for document in documents:
+            yield encode(document)
+
+    @staticmethod
+    def array_element(document: Mapping[str, Any], position: int, indent: int | None = None, encoder: Encoder = None) -> str:
+        """Render one element of a JSON array, including the opening bracket or separating comma."""
+        spaces: int = DocumentStream.indent if indent is None else indent
+        prefix: str = " " * spaces
+        encoded: str = OutputEncoders.get(encoder).encode(document, spaces or None)
+        return ("[\n" if position == 0 else ",\n") + prefix + (encoded.replace("\n", "\n" + prefix) if spaces else encoded)
+
+    @staticmethod
+    def array_end(count: int) -> str:
+        return "\n]\n" if count else "[]\n"
+
+    @staticmethod
+    def write_json_array(documents: Iterable[Mapping[str, Any]], sink: TextIO, indent: int | None = None, encoder: Encoder = None) -> int:
+        """Write documents as a JSON array, one document at a time.
+
+        With the default json_util encoder the output is byte-for-byte what
+        ``json.dumps(list(documents), indent=indent)`` would produce, but only a single
+        document is held in memory at once. Returns the document count.
+        """
+        spaces: int = DocumentStream.indent if indent is None else indent
+        resolved: DocumentEncoder = OutputEncoders.get(encoder)
+        count: int = 0
+        for document in documents:
+            sink.write(DocumentStream.array_element(document, count, spaces, resolved))
+            count += 1
+        sink.write(DocumentStream.array_end(count))
+        return count
+
+    @staticmethod
+    def write_json_lines(documents: Iterable[Mapping[str, Any]], sink: TextIO, encoder: Encoder = None, flush_every: int = 1000) -> int:
+        """Write documents as newline-delimited JSON, ``flush_every`` lines per write. Returns the document count."""
+        if flush_every <= 0:
+            raise ValueError("flush_every must be a positive integer.")
+        encode = OutputEncoders.get(encoder).encode
+        lines: list[str] = []
+        count: int = 0
+        for document in documents:
+            lines.append(encode(document))
+            if len(lines) == flush_every:
+                count += DocumentStream.__write_lines(lines, sink)
+        return count + DocumentStream.__write_lines(lines, sink)
+
+    @staticmethod
+    def __write_lines(lines: list[str], sink: TextIO) -> int:
+        if not lines:
+            return 0
+        lines.append("")
+        sink.write("\n".join(lines))
+        written: int = len(lines) - 1
+        lines.clear()
+        return written
+
+    @staticmethod
+    def encoder_names() -> list[str]:
+        return OutputEncoders.names()
+
+    @staticmethod
+    def encoder(name: Optional[str] = None) -> DocumentEncoder:
+        return OutputEncoders.get(name)
@@ -0,0 +1,417 @@
+import argparse
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Iterable, Optional, TextIO
+
+import bson
+import pymongo
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from pymongo.errors import PyMongoError
+
+from pymongo_benchmark import Benchmarks
+from pymongo_cache import AggregationCache, NamespaceCache
+from pymongo_client import MongoClientRegistry
+from pymongo_datasets import Datasets
+from pymongo_pipelines import Pipelines
+from pymongo_synthetic import SyntheticData
+from pymongo_tutorial import MongoDbOperation
+
+# MongoDbOperation hard-codes these namespaces for its aggregation helpers, so the suite seeds them
+CARS: tuple[str, str] = ("Test", "cars")
+USERS: tuple[str, str] = ("store_db", "users")
+ORDERS: tuple[str, str] = ("store_db", "orders")
+SCRATCH_DATABASE: str = "benchmark_scratch"
+
+# Write benchmarks insert at most this many documents per run, whatever the scale
+_MAX_WRITE_DOCUMENTS: int = 100_000
+_DATASETS: tuple[str, str] = ("benchmark", "datasets")
+
+
+class LocalMongod:
+    """A throwaway ``mongod`` on a free localhost port with a temporary data directory.
+
+    The binary is ``binary``, ``$MONGOD_BINARY`` or the first ``mongod`` on the PATH. By default it
+    runs as a one-node replica set so change-stream features work too. Use it as a context manager;
+    the process is shut down and the data directory removed on exit.
+    """
+
+    def __init__(self, binary: str | None = None, replica_set: str | None = "rs0", startup_timeout: float = 30,
+                 extra_args: Iterable[str] = ()) -> None:
+        self.binary: Optional[str] = binary or os.environ.get("MONGOD_BINARY") or shutil.which("mongod")
+        self.replica_set: Optional[str] = replica_set
+        self.startup_timeout: float = startup_timeout
+        self.extra_args: list[str] = list(extra_args)
+        self.port: int = 0
+        self.uri: str = ""
+        self.__process: Optional[subprocess.Popen[bytes]] = None
+        self.__directory: Optional[str] = None
+
+    def start(self) -> str:
+        """Start mongod, wait until it accepts writes and return its connection URI."""
+        if self.binary is None:
+            raise FileNotFoundError("mongod was not found; install MongoDB Server or set MONGOD_BINARY.")
+        if self.__process is not None:
+            return self.uri
+
+        self.__directory = tempfile.mkdtemp(prefix="pymongo-bench-")
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        command: list[str] = [self.binary, "--dbpath", self.__directory, "--port", str(self.port), "--bind_ip", "127.0.0.1",
+                              "--logpath", os.path.join(self.__directory, "mongod.log"), *self.extra_args]
+        if self.replica_set:
+            command += ["--replSet", self.replica_set]
+        logging.info(f"Starting {' '.join(command)}")
+        self.__process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        self.uri = f"mongodb://127.0.0.1:{self.port}/?directConnection=true"
+
+        try:
+            self.__wait_until_ready()
+        except Exception:
+            self.stop()
+            raise
+        return self.uri
+
+    def stop(self) -> None:
+        if self.__process is not None:
+            # SIGTERM makes mongod shut down cleanly
+            self.__process.terminate()
+            try:
+                self.__process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.__process.kill()
+                self.__process.wait()
+            self.__process = None
+        if self.__directory is not None:
+            shutil.rmtree(self.__directory, ignore_errors=True)
+            self.__directory = None
+
+    def __enter__(self) -> "LocalMongod":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def __wait_until_ready(self) -> None:
+        deadline: float = time.monotonic() + self.startup_timeout
+        with MongoClient(self.uri, serverSelectionTimeoutMS=500) as client:
+            initiated: bool = False
+            while True:
+                if self.__process is not None and self.__process.poll() is not None:
+                    raise RuntimeError(f"mongod exited with code {self.__process.returncode}; see {self.__directory}/mongod.log.")
+                try:
+                    hello: dict[str, Any] = client.admin.command("hello")
+                    if not self.replica_set or hello.get("isWritablePrimary"):
+                        return
+                    if not initiated:
+                        client.admin.command("replSetInitiate", {"_id": self.replica_set, "members": [{"_id": 0, "host": f"127.0.0.1:{self.port}"}]})
+                        initiated = True
+                except PyMongoError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"mongod did not become ready within {self.startup_timeout}s.")
+                time.sleep(0.2)
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """One timed call. ``setup`` runs untimed before every repetition and its result is passed to ``run``."""
+
+    name: str
+    run: Callable[[Any], Any]
+    documents: int = 1
+    setup: Callable[[], Any] = field(default=lambda: None)
+
+
+class BenchmarkSuite:
+    """Seed scaled synthetic data, time every data-path ``MongoDbOperation`` method and pipeline, record the results.
+
+    Results are appended to a JSON Lines file, one record per case and scale, tagged with the git
+    commit, so two commits can be compared with ``compare``. Configuration-only methods
+    (``configure_*``, ``enable_metrics`` and friends) are not timed.
+    """
+
+    @staticmethod
+    def seed(client: MongoClient, scale: int, seed: int = 42, join_index: bool = True) -> dict[str, int]:
+        """Load ``SyntheticData`` for ``scale`` into the cars/users/orders namespaces, unless that exact dataset is already there."""
+        counts: dict[str, int] = SyntheticData.counts(scale)
+        marker: dict[str, Any] = {"_id": "cars_users_orders", "scale": scale, "seed": seed}
+        datasets = client[_DATASETS[0]][_DATASETS[1]]
+        if datasets.find_one(marker) is not None and client[CARS[0]][CARS[1]].estimated_document_count() == counts["cars"]:
+            logging.info(f"Reusing the seeded dataset for scale {scale} (seed {seed}).")
+        else:
+            datasets.delete_many({})
+            for name, (database_name, collection_name) in (("cars", CARS), ("users", USERS), ("orders", ORDERS)):
+                collection = client[database_name][collection_name]
+                collection.drop()
+                Datasets.load(collection, name, counts[name], seed, users=counts["users"])
+            datasets.insert_one(marker)
+
+        orders = client[ORDERS[0]][ORDERS[1]]
+        if join_index:
+            # Without it join_pipeline's $lookup scans every order per user, which is quadratic in the scale
+            orders.create_index([("user_id", ASCENDING)])
+        else:
+            with contextlib.suppress(PyMongoError):
+                orders.drop_index("user_id_1")
+        NamespaceCache.invalidate(client)
+        AggregationCache.invalidate(client)
+        return counts
+
+    @staticmethod
+    def cases(client: MongoClient, scale: int, seed: int = 42, sink: TextIO | None = None, binary_sink: BinaryIO | None = None) -> list[BenchmarkCase]:
+        """All cases for a seeded ``scale``; results that methods print or write go to ``sink``/``binary_sink``."""
+        counts: dict[str, int] = SyntheticData.counts(scale)
+        cars = client[CARS[0]][CARS[1]]
+        hyundai: int = cars.count_documents({"maker": "Hyundai"})
+        writes: int = min(scale, _MAX_WRITE_DOCUMENTS)
+        write_documents: list[dict[str, Any]] = list(SyntheticData.cars(writes, seed + 1))
+        write_bson: bytes = b"".join(bson.encode(document) for document in write_documents)
+        sample_ids: list[Any] = [document["_id"] for document in cars.find({}, {"_id": 1}).limit(1000)]
+        stamps = itertools.count()
+
+        def scratch(collection_name: str = "cars", create: bool = True, documents: Iterable[dict[str, Any]] = ()) -> None:
+            database = client[SCRATCH_DATABASE]
+            database.drop_collection(collection_name)
+            if create:
+                database.create_collection(collection_name)
+            batch: list[dict[str, Any]] = list(documents)
+            if batch:
+                database[collection_name].insert_many(batch)
+            NamespaceCache.invalidate(client, SCRATCH_DATABASE)
+
+        def drain(documents: Iterable[Any]) -> int:
+            return sum(1 for _ in documents)
+
+        def index(present: bool) -> None:
+            users = client[USERS[0]][USERS[1]]
+            if present:
+                users.create_index([("email", ASCENDING)], unique=True)
+            else:
+                with contextlib.suppress(PyMongoError):
+                    users.drop_index("email_1")
+
+        cases: list[BenchmarkCase] = [
+            BenchmarkCase("get_database_names", lambda _: MongoDbOperation.get_database_names()),
+            BenchmarkCase("get_collection_names", lambda _: MongoDbOperation.get_collection_names(CARS[0])),
+            BenchmarkCase("create_database", lambda _: MongoDbOperation.create_database(SCRATCH_DATABASE),
+                          setup=lambda: (client.drop_database(SCRATCH_DATABASE), NamespaceCache.invalidate(client))),
+            BenchmarkCase("drop_database", lambda _: MongoDbOperation.drop_database(SCRATCH_DATABASE), setup=scratch),
+            BenchmarkCase("create_collection", lambda _: MongoDbOperation.create_collection(SCRATCH_DATABASE, "cars"),
+                          setup=lambda: (scratch("placeholder"), scratch("cars", create=False))),
+            BenchmarkCase("drop_collection", lambda _: MongoDbOperation.drop_collection(SCRATCH_DATABASE, "cars"), setup=scratch),
+            BenchmarkCase("insert_document[one]", lambda document: MongoDbOperation.insert_document(SCRATCH_DATABASE, "cars", document),
+                          setup=lambda: (scratch(), dict(write_documents[0]))[1]),
+            BenchmarkCase("insert_document[many]", lambda documents: MongoDbOperation.insert_document(SCRATCH_DATABASE, "cars", documents),
+                          documents=min(writes, 1000), setup=lambda: (scratch(), [dict(document) for document in write_documents[:1000]])[1]),
+            BenchmarkCase("bulk_insert_documents", lambda documents: MongoDbOperation.bulk_insert_documents(SCRATCH_DATABASE, "cars", documents),
+                          documents=writes, setup=lambda: (scratch(), [dict(document) for document in write_documents])[1]),
+            BenchmarkCase("import_bson", lambda source: MongoDbOperation.import_bson(SCRATCH_DATABASE, "cars", source),
+                          documents=writes, setup=lambda: (scratch(), io.BytesIO(write_bson))[1]),
+            BenchmarkCase("copy_documents", lambda _: MongoDbOperation.copy_documents(CARS[0], CARS[1], SCRATCH_DATABASE, "cars"),
+                          documents=scale, setup=scratch),
+            BenchmarkCase("fetch_document", lambda _: MongoDbOperation.fetch_document(*CARS, sink=sink), documents=scale),
+            BenchmarkCase("fetch_document[filter]", lambda _: MongoDbOperation.fetch_document(*CARS, {"maker": "Hyundai"}, sink=sink), documents=hyundai),
+            BenchmarkCase("fetch_document[sort_limit]", lambda _: MongoDbOperation.fetch_document(*CARS, sort=[("price", -1)], limit=100, sink=sink),
+                          documents=min(scale, 100)),
+            BenchmarkCase("fetch_document[parallel]", lambda _: MongoDbOperation.fetch_document(*CARS, sink=sink, max_workers=4), documents=scale),
+            BenchmarkCase("stream_documents", lambda _: drain(MongoDbOperation.stream_documents(*CARS)), documents=scale),
+            BenchmarkCase("stream_documents[raw]", lambda _: drain(MongoDbOperation.stream_documents(*CARS, raw=True)), documents=scale),
+            BenchmarkCase("scan_documents", lambda _: drain(MongoDbOperation.scan_documents(*CARS, ordered=False)), documents=scale),
+            BenchmarkCase("scan_partitions", lambda _: sum(drain(part) for part in MongoDbOperation.scan_partitions(*CARS, partitions=8)), documents=scale),
+            BenchmarkCase("export_documents", lambda _: MongoDbOperation.export_documents(*CARS, sink or io.StringIO()), documents=scale),
+            BenchmarkCase("export_bson", lambda _: MongoDbOperation.export_bson(*CARS, binary_sink or io.BytesIO()), documents=scale),
+            BenchmarkCase("stream_aggregate", lambda _: drain(MongoDbOperation.stream_aggregate(*CARS, Pipelines.pipeline_1(), use_cache=False)),
+                          documents=scale),
+            BenchmarkCase("stream_columnar_aggregate", lambda _: drain(MongoDbOperation.stream_columnar_aggregate(*CARS, Pipelines.pipeline_1())),
+                          documents=scale),
+        ]
+        for number in range(1, 11):
+            pipeline_factory: Callable[[], list[dict[str, Any]]] = getattr(Pipelines, f"pipeline_{number}")
+            cases.append(BenchmarkCase(f"execute_aggregate_pipeline[pipeline_{number}]",
+                                       lambda _, factory=pipeline_factory: MongoDbOperation.execute_aggregate_pipeline(factory(), sink=sink, use_cache=False),
+                                       documents=hyundai if number in (4, 7, 10) else scale))
+        cases += [
+            BenchmarkCase("aggregate_join_collection[join_pipeline]",
+                          lambda _: MongoDbOperation.aggregate_join_collection(Pipelines.join_pipeline(), sink=sink, use_cache=False),
+                          documents=counts["users"] + counts["orders"]),
+            BenchmarkCase("update_document[one]", lambda _: MongoDbOperation.update_document(*CARS, {"model": "Creta"}, {"benchmark_run": next(stamps)})),
+            BenchmarkCase("update_document[many]",
+                          lambda _: MongoDbOperation.update_document(*CARS, {"maker": "Hyundai"}, {"benchmark_run": next(stamps)}, "many"),
+                          documents=hyundai),
+            BenchmarkCase("bulk_write_documents",
+                          lambda operations: MongoDbOperation.bulk_write_documents(*CARS, operations, ordered=False), documents=len(sample_ids),
+                          setup=lambda: [UpdateOne({"_id": car_id}, {"$set": {"benchmark_run": next(stamps)}}) for car_id in sample_ids]),
+            BenchmarkCase("delete_document[one]", lambda _: MongoDbOperation.delete_document(SCRATCH_DATABASE, "cars", {"maker": "Hyundai"}),
+                          setup=lambda: scratch(documents=[{"maker": "Hyundai"}])),
+            BenchmarkCase("delete_document[many]", lambda _: MongoDbOperation.delete_document(SCRATCH_DATABASE, "cars", {"batch": 1}, "many"),
+                          documents=1000, setup=lambda: scratch(documents=({"batch": 1, "position": position} for position in range(1000)))),
+            BenchmarkCase("modify_existing_collection_schema",
+                          lambda _: MongoDbOperation.modify_existing_collection_schema(SCRATCH_DATABASE, "cars", Pipelines.validator()), setup=scratch),
+            BenchmarkCase("create_index", lambda _: MongoDbOperation.create_index(*USERS, "email"), documents=counts["users"],
+                          setup=lambda: index(False)),
+            BenchmarkCase("show_indexes", lambda _: MongoDbOperation.show_indexes(*USERS)),
+            BenchmarkCase("drop_index", lambda _: MongoDbOperation.drop_index(*USERS, "email_1"), setup=lambda: index(True)),
+        ]
+        return cases
+
+    @staticmethod
+    def measure(case: BenchmarkCase, repeat: int = 5, warmup: int = 1) -> dict[str, float]:
+        """Time ``repeat`` runs of ``case`` after ``warmup`` untimed ones; printed output and INFO logs are discarded."""
+        if repeat <= 0:
+            raise ValueError("repeat must be a positive integer.")
+        samples_ms: list[float] = []
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            logging.disable(logging.INFO)
+            try:
+                for iteration in range(warmup + repeat):
+                    prepared: Any = case.setup()
+                    start: float = time.perf_counter()
+                    case.run(prepared)
+                    if iteration >= warmup:
+                        samples_ms.append((time.perf_counter() - start) * 1000)
+            finally:
+                logging.disable(logging.NOTSET)
+
+        stats: dict[str, float] = Benchmarks.summarize(samples_ms)
+        stats["ops_per_second"] = 1000 / stats["mean_ms"] if stats["mean_ms"] else 0.0
+        stats["documents"] = case.documents
+        stats["documents_per_second"] = case.documents * stats["ops_per_second"]
+        return stats
+
+    @staticmethod
+    def run(uri: str | None = None, scales: Iterable[int] = (1000, 10000), seed: int = 42, repeat: int = 5, warmup: int = 1,
+            results_path: str = "benchmark_results.jsonl", only: Iterable[str] | None = None, join_index: bool = True) -> list[dict[str, Any]]:
+        """Run the suite at every scale and append one record per case to ``results_path``.
+
+        Without ``uri`` a ``LocalMongod`` is started for the run. With one, note that the suite
+        replaces ``Test.cars``, ``store_db.users`` and ``store_db.orders`` on that server.
+        ``only`` limits the run to cases whose names start with one of the given prefixes.
+        """
+        scales = list(scales)
+        if not scales or any(scale <= 0 for scale in scales):
+            raise ValueError("scales must not be empty and must be positive integers.")
+
+        with contextlib.ExitStack() as stack:
+            if uri is None:
+                uri = stack.enter_context(LocalMongod()).uri
+            MongoDbOperation.configure_connection(uri)
+            stack.callback(MongoDbOperation.configure_connection, None)
+            client = MongoClientRegistry.get_client(uri)
+            if client is None:
+                raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+            environment: dict[str, Any] = BenchmarkSuite.environment(client)
+            records: list[dict[str, Any]] = []
+            devnull_text: TextIO = stack.enter_context(open(os.devnull, "w"))
+            devnull_binary: BinaryIO = stack.enter_context(open(os.devnull, "wb"))
+            for scale in scales:
+                BenchmarkSuite.seed(client, scale, seed, join_index)
+                for case in BenchmarkSuite.cases(client, scale, seed, devnull_text, devnull_binary):
+                    if only is not None and not any(case.name.startswith(prefix) for prefix in only):
+                        continue
+                    stats = BenchmarkSuite.measure(case, repeat, warmup)
+                    logging.info(f"scale={scale} {case.name}: p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, "
+                                 f"{stats['documents_per_second']:.0f} docs/s")
+                    records.append({**environment, "scale": scale, "seed": seed, "repeat": repeat, "case": case.name, **stats})
+                client.drop_database(SCRATCH_DATABASE)
+
+        with open(results_path, "a", encoding="utf-8") as results:
+            for record in records:
+                results.write(json.dumps(record, sort_keys=True) + "\n")
+        logging.info(f"Appended {len(records)} result(s) to '{results_path}'.")
+        return records
+
+    @staticmethod
+    def environment(client: MongoClient | None = None) -> dict[str, Any]:
+        """Commit, versions and host details stored with every result record."""
+        def git(*arguments: str) -> str:
+            try:
+                return subprocess.run(["git", *arguments], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                                      timeout=10).stdout.strip()
+            except (OSError, subprocess.SubprocessError):
+                return ""
+
+        return {
+            "commit": git("rev-parse", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pymongo": pymongo.version,
+            "server": client.server_info().get("version", "unknown") if client is not None else "unknown",
+            "host": platform.node(),
+            "cpus": os.cpu_count(),
+        }
+
+    @staticmethod
+    def load(results_path: str) -> list[dict[str, Any]]:
+        with open(results_path, encoding="utf-8") as results:
+            return [json.loads(line) for line in results if line.strip()]
+
+    @staticmethod
+    def compare(results_path: str, baseline: str, candidate: str | None = None, metric: str = "p50_ms",
+                threshold: float = 0.10) -> list[dict[str, Any]]:
+        """Cases whose ``metric`` got more than ``threshold`` (relative) worse from ``baseline`` to ``candidate``.
+
+        Commits may be given as any unique prefix; ``candidate`` defaults to the most recently
+        recorded commit. When a commit was run more than once, its latest records are used.
+        """
+        records: list[dict[str, Any]] = BenchmarkSuite.load(results_path)
+        if not records:
+            raise ValueError(f"No results found in '{results_path}'.")
+        candidate = candidate or records[-1]["commit"]
+
+        def latest(commit: str) -> dict[tuple[int, str], float]:
+            matching: dict[tuple[int, str], float] = {(record["scale"], record["case"]): record[metric]
+                                                      for record in records if record["commit"].startswith(commit)}
+            if not matching:
+                raise ValueError(f"No results recorded for commit '{commit}'.")
+            return matching
+
+        before, after = latest(baseline), latest(candidate)
+        regressions: list[dict[str, Any]] = []
+        for key in sorted(before.keys() & after.keys()):
+            change: float = (after[key] - before[key]) / before[key] if before[key] else 0.0
+            # Lower is better for latencies, higher for throughput
+            worse: float = -change if metric.endswith("per_second") else change
+            if worse > threshold:
+                regressions.append({"scale": key[0], "case": key[1], "baseline": before[key], "candidate": after[key], "change": change})
+        return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MongoDbOperation and the Pipelines library on synthetic data.")
+    parser.add_argument("--uri", help="Existing deployment to use instead of starting a local mongod (its Test/store_db data is replaced).")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000], help="Dataset sizes, e.g. 1000 100000 10000000.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--results", default="benchmark_results.jsonl")
+    parser.add_argument("--only", nargs="+", help="Run only cases whose names start with these prefixes.")
+    parser.add_argument("--compare", metavar="BASELINE_COMMIT", help="Report regressions of the latest results against this commit and exit.")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        found = BenchmarkSuite.compare(arguments.results, arguments.compare, threshold=arguments.threshold)
+        for regression in found:
+            print(f"❌ scale={regression['scale']} {regression['case']}: {regression['baseline']:.2f} -> {regression['candidate']:.2f} ms "
+                  f"({regression['change']:+.0%})")
+        if not found:
+            print("✅ No regressions.")
+        sys.exit(1 if found else 0)
+
+    BenchmarkSuite.run(arguments.uri, arguments.scales, arguments.seed, arguments.repeat, results_path=arguments.results, only=arguments.only)
@@ -0,0 +1,213 @@
+import datetime
+import itertools
+import math
+import random
+from typing import Any, Iterator
+
+# (maker, model, fuel types, engine cc options (empty for electric), base price in rupees)
+_MODELS: tuple[tuple[str, str, tuple[str, ...], tuple[int, ...], int], ...] = (
+    ("Maruti Suzuki", "Swift", ("Petrol", "CNG"), (1197,), 700000),
+    ("Maruti Suzuki", "Baleno", ("Petrol", "CNG"), (1197,), 800000),
+    ("Tata", "Nexon", ("Petrol", "Diesel"), (1199, 1497), 1100000),
+    ("Hyundai", "Creta", ("Petrol", "Diesel"), (1497, 1493), 1500000),
+    ("Maruti Suzuki", "WagonR", ("Petrol", "CNG"), (998, 1197), 600000),
+    ("Hyundai", "Venue", ("Petrol", "Diesel"), (998, 1197, 1493), 1200000),
+    ("Mahindra", "XUV500", ("Diesel",), (2179,), 1800000),
+    ("Honda", "City", ("Petrol", "Diesel"), (1498,), 1200000),
+    ("Tata", "Punch", ("Petrol", "CNG"), (1199,), 750000),
+    ("Hyundai", "i20", ("Petrol",), (1197, 998), 900000),
+    ("Maruti Suzuki", "Dzire", ("Petrol", "CNG"), (1197,), 750000),
+    ("Honda", "Amaze", ("Petrol", "Diesel", "CNG"), (1199, 1498), 800000),
+    ("Kia", "Seltos", ("Petrol", "Diesel"), (1497, 1493), 1400000),
+    ("Mahindra", "Scorpio", ("Diesel",), (2184,), 1700000),
+    ("Tata", "Harrier", ("Diesel",), (1956,), 2000000),
+    ("Toyota", "Innova", ("Petrol", "Diesel"), (1987, 2393), 2200000),
+    ("Kia", "Sonet", ("Petrol", "Diesel"), (998, 1197, 1493), 1000000),
+    ("Mahindra", "Thar", ("Petrol", "Diesel"), (1997, 2184), 1600000),
+    ("Toyota", "Fortuner", ("Petrol", "Diesel"), (2694, 2755), 3800000),
+    ("Tata", "Nexon EV", ("Electric",), (), 1400000),
+    ("Hyundai", "Kona Electric", ("Electric",), (), 2300000),
+    ("MG", "Hector", ("Petrol", "Diesel"), (1451, 1956), 1700000),
+    ("MG", "ZS EV", ("Electric",), (), 2400000),
+    ("Skoda", "Slavia", ("Petrol",), (999, 1498), 1300000),
+    ("Volkswagen", "Virtus", ("Petrol",), (999, 1498), 1350000),
+)
+
+_FEATURES: tuple[str, ...] = (
+    "ABS", "Bluetooth", "Keyless Entry", "Auto AC", "Rear Parking Camera", "Apple CarPlay", "Touchscreen Infotainment", "Cruise Control",
+    "Sunroof", "Wireless Charging", "Projector Headlamps", "Power Windows", "Rear Parking Sensors", "Leather Seats", "Ventilated Seats",
+    "Navigation System", "Connected Car Tech", "Manual AC", "Reverse Camera", "Multi-angle Rearview Camera", "Panoramic Sunroof",
+    "Leather Upholstery", "Auto-Dimming IRVM", "All-Wheel Drive", "Terrain Response System", "360 Camera", "Heads-up Display",
+    "Ambient Lighting", "Lane Keep Assist", "Adaptive Cruise Control",
+)
+
+_FIRST_NAMES: tuple[str, ...] = (
+    "Raju", "Shyam", "Baburao", "Amit", "Priya", "Rohit", "Vijay", "Deepak", "Anil", "Vikas", "Sneha", "Rahul", "Sanjay", "Anjali", "Vikram",
+    "Neha", "Arjun", "Kavya", "Suresh", "Pooja", "Manoj", "Divya", "Karan", "Meera", "Ravi", "Sunita", "Aditya", "Nisha", "Gaurav", "Ritu",
+    "Harish", "Lakshmi", "Nikhil", "Swati", "Prakash", "Aarti", "Varun", "Isha", "Mohan", "Geeta", "Ajay", "Rekha", "Sachin", "Kiran",
+    "Tarun", "Shweta", "Naveen", "Preeti", "Ashok", "Farah", "Imran", "Zoya", "Joseph", "Mary", "Gurpreet", "Harleen", "Abhishek", "Tanvi",
+)
+
+_LAST_NAMES: tuple[str, ...] = (
+    "Sharma", "Verma", "Singh", "Nair", "Desai", "Patel", "Gupta", "Iyer", "Reddy", "Khan", "Das", "Mehta", "Joshi", "Kulkarni", "Rao",
+    "Menon", "Chopra", "Bose", "Banerjee", "Pillai", "Agarwal", "Kapoor", "Malhotra", "Mishra", "Yadav", "Pandey", "Shetty", "Fernandes",
+)
+
+# (city, state), most populous first so the Zipf-weighted draws favour the big metros
+_CITIES: tuple[tuple[str, str], ...] = (
+    ("Mumbai", "Maharashtra"), ("Delhi", "Delhi"), ("Bangalore", "Karnataka"), ("Hyderabad", "Telangana"), ("Chennai", "Tamil Nadu"),
+    ("Kolkata", "West Bengal"), ("Pune", "Maharashtra"), ("Ahmedabad", "Gujarat"), ("Jaipur", "Rajasthan"), ("Lucknow", "Uttar Pradesh"),
+    ("Noida", "Uttar Pradesh"), ("Gurgaon", "Haryana"), ("Chandigarh", "Chandigarh"), ("Kochi", "Kerala"), ("Indore", "Madhya Pradesh"),
+    ("Bhopal", "Madhya Pradesh"), ("Nagpur", "Maharashtra"), ("Surat", "Gujarat"), ("Coimbatore", "Tamil Nadu"), ("Visakhapatnam", "Andhra Pradesh"),
+    ("Patna", "Bihar"), ("Bhubaneswar", "Odisha"), ("Guwahati", "Assam"), ("Mysore", "Karnataka"), ("Thiruvananthapuram", "Kerala"),
+    ("Dehradun", "Uttarakhand"), ("Ranchi", "Jharkhand"), ("Vadodara", "Gujarat"), ("Nashik", "Maharashtra"), ("Madurai", "Tamil Nadu"),
+)
+
+_STREETS: tuple[str, ...] = (
+    "MG Road", "Nehru Place", "Sector 18", "Marine Drive", "Park Street", "Linking Road", "Brigade Road", "Anna Salai", "Banjara Hills",
+    "FC Road", "Civil Lines", "Station Road", "Gandhi Nagar", "Lake View Road", "Ring Road",
+)
+
+# (service type, minimum cost, maximum cost)
+_SERVICES: tuple[tuple[str, int, int], ...] = (
+    ("Oil Change", 3000, 6000), ("Tire Rotation", 1500, 3000), ("Brake Replacement", 5000, 15000), ("Battery Replacement", 5000, 9000),
+    ("Tire Replacement", 8000, 20000), ("Wheel Alignment", 800, 2000), ("AC Service", 2000, 5000), ("Transmission Repair", 25000, 50000),
+    ("Clutch Replacement", 8000, 18000), ("Suspension Repair", 6000, 20000),
+)
+
+# (product, minimum amount, maximum amount)
+_PRODUCTS: tuple[tuple[str, int, int], ...] = (
+    ("Mobile Phone", 8000, 90000), ("Headphones", 800, 25000), ("Laptop", 35000, 150000), ("Smart Watch", 2000, 40000), ("Tablet", 12000, 80000),
+    ("Charger", 300, 3000), ("Phone Case", 200, 1500), ("Power Bank", 800, 4000), ("Bluetooth Speaker", 1500, 20000), ("Keyboard", 500, 8000),
+    ("Mouse", 300, 5000), ("Monitor", 8000, 60000), ("Television", 15000, 200000), ("Camera", 25000, 150000), ("Printer", 5000, 30000),
+    ("Router", 1200, 10000), ("Fitness Band", 1500, 8000), ("Microwave", 6000, 25000), ("Refrigerator", 15000, 90000), ("Washing Machine", 14000, 60000),
+    ("Air Purifier", 6000, 30000), ("Water Purifier", 8000, 25000), ("Mixer Grinder", 2000, 8000), ("Vacuum Cleaner", 4000, 40000),
+)
+
+_EMAIL_DOMAINS: tuple[str, ...] = ("example.com", "mail.example.com", "example.in", "example.org")
+_DAY: datetime.timedelta = datetime.timedelta(days=1)
+_FIRST_PURCHASE: datetime.date = datetime.date(2015, 1, 1)
+_FIRST_ORDER: datetime.date = datetime.date(2023, 1, 1)
+
+
+def _zipf_weights(size: int, exponent: float = 1.0) -> list[float]:
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+class SyntheticData:
+    """Deterministic, seedable generators that expand the cars/users/orders sample shapes to any size.
+
+    The same ``(count, seed)`` always yields the same documents (cars get their ``_id`` from the
+    server), so results are comparable across runs and machines. Categorical fields are drawn with
+    Zipf-like skew: a few makers, models, cities and heavy buyers dominate, the way real
+    catalogues do. Every generator is lazy and holds only one document at a time.
+    """
+
+    _model_weights: list[float] = _zipf_weights(len(_MODELS), 0.8)
+    _feature_weights: list[float] = _zipf_weights(len(_FEATURES), 0.7)
+    _city_weights: list[float] = _zipf_weights(len(_CITIES), 1.0)
+    _product_weights: list[float] = _zipf_weights(len(_PRODUCTS), 0.9)
+
+    @staticmethod
+    def counts(scale: int) -> dict[str, int]:
+        """Collection sizes for one benchmark scale: ``scale`` cars and orders, one user per ten orders."""
+        if scale <= 0:
+            raise ValueError("scale must be a positive integer.")
+        return {"cars": scale, "users": max(5, scale // 10), "orders": scale}
+
+    @staticmethod
+    def cars(count: int, seed: int = 0) -> Iterator[dict[str, Any]]:
+        if count < 0:
+            raise ValueError("count must not be negative.")
+        rng = random.Random(f"cars:{seed}")
+        for _ in range(count):
+            yield SyntheticData.__car(rng)
+
+    @staticmethod
+    def users(count: int, seed: int = 0) -> Iterator[dict[str, Any]]:
+        """Users ``user1`` .. ``user<count>`` with unique emails."""
+        if count < 0:
+            raise ValueError("count must not be negative.")
+        rng = random.Random(f"users:{seed}")
+        for number in range(1, count + 1):
+            first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+            city, state = rng.choices(_CITIES, cum_weights=SyntheticData._city_weights)[0]
+            yield {
+                "_id": f"user{number}",
+                "name": f"{first} {last}",
+                "email": f"{first}.{last}{number}@{rng.choice(_EMAIL_DOMAINS)}".lower(),
+                "phone": f"+91-{9000000000 + number}",
+                "address": f"{rng.choice(_STREETS)}, {city}, {state}",
+            }
+
+    @staticmethod
+    def orders(count: int, users: int, seed: int = 0) -> Iterator[dict[str, Any]]:
+        """Orders ``order1`` .. ``order<count>`` placed by ``user1`` .. ``user<users>``.
+
+        Buyers follow a Zipf (s=1) distribution drawn by inverse transform, so low user numbers
+        are the heavy buyers and many users have no orders, without a per-user weight table.
+        """
+        if count < 0:
+            raise ValueError("count must not be negative.")
+        if users <= 0:
+            raise ValueError("users must be a positive integer.")
+        rng = random.Random(f"orders:{seed}")
+        for number in range(1, count + 1):
+            product, low, high = rng.choices(_PRODUCTS, cum_weights=SyntheticData._product_weights)[0]
+            yield {
+                "_id": f"order{number}",
+                "user_id": f"user{min(users, int((users + 1) ** rng.random()))}",
+                "product": product,
+                "amount": round(math.exp(rng.uniform(math.log(low), math.log(high))) / 10) * 10,
+                "order_date": (_FIRST_ORDER + rng.randrange(730) * _DAY).isoformat(),
+            }
+
+    @staticmethod
+    def __car(rng: random.Random) -> dict[str, Any]:
+        maker, model, fuel_types, engines, base_price = rng.choices(_MODELS, cum_weights=SyntheticData._model_weights)[0]
+        fuel_type: str = rng.choice(fuel_types)
+        if fuel_type == "Electric":
+            engine: dict[str, Any] = {"type": "Electric Motor", "battery_capacity": f"{rng.uniform(25, 75):.1f} kWh",
+                                      "torque": f"{rng.randrange(200, 420, 5)} Nm"}
+        else:
+            cc: int = rng.choice(engines)
+            turbocharged: bool = fuel_type == "Diesel" or rng.random() < 0.3
+            engine = {"type": "Turbocharged" if turbocharged else "Naturally Aspirated", "cc": cc,
+                      "torque": f"{int(cc * (rng.uniform(0.15, 0.18) if turbocharged else rng.uniform(0.09, 0.12)))} Nm"}
+
+        features: list[str] = list(dict.fromkeys(rng.choices(_FEATURES, cum_weights=SyntheticData._feature_weights, k=rng.randint(3, 6))))
+        price: int = int(round(base_price * rng.lognormvariate(0, 0.12), -4))
+
+        owners: list[dict[str, Any]] = []
+        purchased: datetime.date = _FIRST_PURCHASE + rng.randrange(3000) * _DAY
+        for _ in range(rng.choices((1, 2, 3), (60, 30, 10))[0]):
+            owners.append({"name": rng.choice(_FIRST_NAMES), "purchase_date": purchased.isoformat(),
+                           "location": rng.choices(_CITIES, cum_weights=SyntheticData._city_weights)[0][0]})
+            purchased += rng.randrange(180, 1500) * _DAY
+
+        service_history: list[dict[str, Any]] = []
+        serviced: datetime.date = datetime.date.fromisoformat(owners[0]["purchase_date"])
+        for _ in range(min(8, int(rng.expovariate(1 / 2.5)))):
+            serviced += rng.randrange(90, 500) * _DAY
+            if fuel_type == "Electric" and rng.random() < 0.5:
+                service_type, cost = "Battery Check", 0
+            elif fuel_type == "CNG" and rng.random() < 0.3:
+                service_type, cost = "CNG Kit Checkup", rng.randrange(1500, 3000, 500)
+            else:
+                service_type, low, high = rng.choice(_SERVICES)
+                cost = rng.randrange(low, high + 1, 500)
+            service_history.append({"date": serviced.isoformat(), "service_type": service_type, "cost": cost})
+
+        return {
+            "maker": maker,
+            "model": model,
+            "fuel_type": fuel_type,
+            "transmission": "Automatic" if rng.random() < (0.7 if fuel_type == "Electric" else 0.45) else "Manual",
+            "engine": engine,
+            "features": features,
+            "sunroof": "Sunroof" in features or "Panoramic Sunroof" in features,
+            "airbags": 6 if price >= 1500000 else rng.choice((2, 4, 6) if price >= 900000 else (2, 2, 4)),
+            "price": price,
+            "owners": owners,
+            "service_history": service_history,
+        }
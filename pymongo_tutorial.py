@@ -1,17 +1,36 @@
 from urllib.parse import quote_plus
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, IndexModel
 
-from pymongo.results import DeleteResult, UpdateResult, InsertOneResult, InsertManyResult
+from pymongo.results import DeleteResult, UpdateResult, InsertOneResult
 from pymongo.synchronous.command_cursor import CommandCursor
-
+from pymongo.synchronous.cursor import Cursor
+
+from pymongo_advisor import Finding, IndexAdvisor, QueryLog, QueryShape
+from pymongo_aggregation import AggregationError
+from pymongo_arrow import ArrowExport, ArrowExportStats
+from pymongo_bulk import BulkInsertResult, BulkLoader, BulkWriteSummary, BulkWriter, MAX_BATCH_BYTES, WriteOperation
+from pymongo_cache import AggregationCache, ChangeStreamInvalidator, NamespaceCache
+from pymongo_client import MongoClientRegistry
+from pymongo_columnar import ColumnarAggregation
+from pymongo_datasets import Datasets
+from pymongo_indexes import IndexBuildResult, IndexKeys, IndexManager, IndexSpec
+from pymongo_join import JoinExecutor, JoinStats
+from pymongo_metrics import Metrics
+from pymongo_optimizer import PipelineOptimizer
+from pymongo_pagination import KeysetPaginator, Page
 from pymongo_pipelines import Pipelines
-from pymongo.errors import ConnectionFailure, ConfigurationError, CollectionInvalid, PyMongoError, WriteError, OperationFailure, DuplicateKeyError, BulkWriteError
+from pymongo_raw import RAW_CODEC_OPTIONS, RawDocuments
+from pymongo_records import RECORD_CODEC_OPTIONS, Record, Records
+from pymongo_scan import ParallelScan
+from pymongo_streaming import DocumentStream
+from pymongo_validation import CompiledValidator, DocumentValidator, RejectSink, SchemaCompiler, ValidationReport
+from pymongo_views import MaterializedView, ViewRefresh
+from pymongo.errors import ConfigurationError, CollectionInvalid, PyMongoError, WriteError, OperationFailure, DuplicateKeyError
 
 import logging
-from typing import Any, MutableMapping, Optional, Mapping
-import json
-from bson import json_util
+import sys
+from typing import Any, BinaryIO, Iterable, Iterator, MutableMapping, Optional, TextIO
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,79 +38,313 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+@Metrics.instrument
 class MongoDbOperation:
+    # Set by configure_connection to target another deployment (e.g. a local mongod) instead of the Atlas URI below
+    uri: Optional[str] = None
+
+    @staticmethod
+    def connection_uri() -> str:
+        if MongoDbOperation.uri:
+            return MongoDbOperation.uri
+        app_name: str = "YOUR_MONGODB_CLUSTER_NAME"
+        username: str = "YOUR_USERNAME"
+        password: str = "YOUR_PASSWORD"
+        cluster_url: str = "YOUR_CLUSTER_URL"
+        encoded_password: str = quote_plus(password)
+        return f"mongodb+srv://{username}:{encoded_password}@{cluster_url}/?retryWrites=true&w=majority&appName={app_name}"
+
     @classmethod
     def __connect(cls) -> Optional[MongoClient]:
+        # The registry hands back one long-lived, pooled client per URI instead of a new one per call
+        return MongoClientRegistry.get_client(MongoDbOperation.connection_uri())
+
+    @staticmethod
+    def configure_connection(uri: str | None) -> None:
+        """Use ``uri`` for every following operation (None restores the Atlas URI); closes the current shared client."""
+        if uri is not None and not uri:
+            raise ValueError("Connection URI must not be empty.")
+        MongoDbOperation.close_connections()
+        MongoDbOperation.uri = uri
+
+    @staticmethod
+    def configure_pool(max_pool_size: int | None = None, min_pool_size: int | None = None, max_idle_time_ms: int | None = None) -> None:
+        """Set connection pool sizing for the shared client (applies to clients created afterwards)."""
+        MongoClientRegistry.configure(max_pool_size=max_pool_size, min_pool_size=min_pool_size, max_idle_time_ms=max_idle_time_ms)
+
+    @staticmethod
+    def configure_namespace_cache(ttl_seconds: float | None = None, optimistic: bool | None = None) -> None:
+        """Tune the database/collection existence cache; optimistic mode skips the checks entirely."""
+        NamespaceCache.configure(ttl_seconds=ttl_seconds, optimistic=optimistic)
+
+    @staticmethod
+    def configure_output(encoder: str | None = None, indent: int | None = None) -> None:
+        """Choose the JSON encoder ('json_util', 'compact', 'relaxed', 'canonical') and array indent (0 for one line per document)."""
+        DocumentStream.configure(encoder=encoder, indent=indent)
+
+    @staticmethod
+    def configure_result_cache(enabled: bool | None = None, ttl_seconds: float | None = None, max_entries: int | None = None,
+                               max_bytes: int | None = None, max_entry_bytes: int | None = None) -> None:
+        """Turn on (or tune) caching of aggregation results; writes made through this class invalidate it."""
+        AggregationCache.configure(enabled=enabled, ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes,
+                                   max_entry_bytes=max_entry_bytes)
+
+    @staticmethod
+    def watch_result_cache(database_name: str | None = None) -> ChangeStreamInvalidator:
+        """Also invalidate cached results on writes made by other clients (needs a replica set)."""
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+        return ChangeStreamInvalidator(client, database_name).start()
+
+    @staticmethod
+    def enable_metrics(track_bytes: bool = False) -> None:
+        """Record latency histograms and pool metrics; call before the first operation so the shared client is monitored."""
+        Metrics.enable(track_bytes=track_bytes)
+
+    @staticmethod
+    def metrics_snapshot() -> dict[str, Any]:
+        return Metrics.snapshot()
+
+    @staticmethod
+    def metrics_prometheus() -> str:
+        """Current metrics in Prometheus text exposition format."""
+        return Metrics.prometheus()
+
+    @staticmethod
+    def configure_query_log(enabled: bool | None = None, max_shapes: int | None = None) -> None:
+        """Record the filter shapes passed to fetch/update/delete so ``advise_indexes`` can explain them."""
+        QueryLog.configure(enabled=enabled, max_shapes=max_shapes)
+
+    @staticmethod
+    def advise_indexes(include_library: bool = True, include_observed: bool = True, create: bool = False) -> list[Finding]:
+        """Explain the Pipelines library and logged queries, print what scans too much and the indexes that would help.
+
+        With ``create=True`` the recommended indexes are built through ``create_index`` and every
+        affected query is explained again, so the report shows the plan before and after.
+        """
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        shapes: list[QueryShape] = IndexAdvisor.library_shapes() if include_library else []
+        if include_observed:
+            shapes += [shape for shape, _ in QueryLog.shapes()]
         try:
-            app_name: str = "YOUR_MONGODB_CLUSTER_NAME"
-            username: str = "YOUR_USERNAME"
-            password: str = "YOUR_PASSWORD"
-            cluster_url: str = "YOUR_CLUSTER_URL"
-            encoded_password: str = quote_plus(password)
-            uri: str = f"mongodb+srv://{username}:{encoded_password}@{cluster_url}/?retryWrites=true&w=majority&appName={app_name}"
-            client: MongoClient[Mapping[str, Any]] = MongoClient(uri, serverSelectionTimeoutMS=5000)
-            client.admin.command('ping')
-            logging.info("Connected to MongoDB successfully!")
-            return client
-        except ConnectionFailure as cf:
-            logging.exception(f"Could not connect to MongoDB: {cf}")
-            return None
+            findings: list[Finding] = IndexAdvisor.analyze(client, shapes)
+            if create:
+                for namespace, specs in IndexAdvisor.recommendations(findings).items():
+                    database_name, collection_name = namespace.split(".", 1)
+                    for spec in specs:
+                        MongoDbOperation.create_index(database_name, collection_name, keys=list(spec.keys))
+                for finding in findings:
+                    if finding.recommendations:
+                        finding.remeasured = IndexAdvisor.explain(client, finding.shape)
+            print(IndexAdvisor.report(findings))
+            return findings
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while advising indexes: {ex}")
+            return []
+
+    @classmethod
+    def __namespace_exists(cls, client: MongoClient, database_name: str, collection_name: str) -> bool:
+        if not NamespaceCache.database_exists(client, database_name):
+            print(f"The database '{database_name}' does not exist.")
+            return False
+
+        if not NamespaceCache.collection_exists(client, database_name, collection_name):
+            print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
+            return False
+
+        return True
+
+    @classmethod
+    def __report_missing_namespace(cls, error: OperationFailure, database_name: str, collection_name: str) -> bool:
+        # Optimistic mode skips the existence check, so a missing namespace surfaces as a server error
+        if not NamespaceCache.is_namespace_not_found(error):
+            return False
+        print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
+        return True
 
     @staticmethod
-    def execute_aggregate_pipeline(pipeline_: list[dict[str, Any]]) -> None:
-        """Run aggregation pipeline on the 'cars' collection in 'Test' DB."""
+    def close_connections() -> None:
+        """Close the shared MongoDB client(s). Also runs automatically at interpreter exit."""
+        ChangeStreamInvalidator.stop_all()
+        MaterializedView.stop_all()
+        MongoClientRegistry.shutdown()
+        logging.info("MongoDB connection closed.")
+
+    @staticmethod
+    def create_materialized_view(database_name: str, source_collection: str, pipeline_: list[dict[str, Any]], name: str | None = None,
+                                 target: str | None = None, watch: bool = True) -> Optional[MaterializedView]:
+        """Register ``pipeline_`` as a materialized view of ``source_collection`` and build it with ``$merge``.
+
+        The target defaults to the pipeline's ``$out``/``$merge`` collection (``hyundai_cars`` for
+        ``pipeline_4``). With ``watch`` a background change stream keeps it current; otherwise call
+        ``refresh_materialized_view``. Re-registering an unchanged view only catches up.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not source_collection:
+            raise ValueError("Collection name must not be empty.")
         if not pipeline_:
-            raise ValueError("Aggregation pipeline must not be empty.")
+            raise ValueError("Pipeline must not be empty.")
 
         client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            if not MongoDbOperation.__namespace_exists(client, database_name, source_collection):
+                return None
+            view = MaterializedView(client, database_name, name or target or source_collection + "_view", source_collection, pipeline_, target)
+            result: ViewRefresh = view.register()
+            print(f"✅ Materialized view '{view.name}' is up to date in '{view.target}' "
+                  f"({'built' if result.rebuilt else f'{result.events} change(s) applied'} in {result.seconds:.2f}s).")
+            return view.start() if watch else view
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while creating the materialized view over '{source_collection}': {ex}")
+            return None
+
+    @staticmethod
+    def refresh_materialized_view(database_name: str, name: str, max_events: int | None = None) -> Optional[ViewRefresh]:
+        """Apply the source changes recorded since the view's persisted resume token."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not name:
+            raise ValueError("View name must not be empty.")
 
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
         if client is None:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            db = client.get_database('Test')
-            my_collection = db.get_collection('cars')
+            view: Optional[MaterializedView] = MaterializedView.load(client, database_name, name)
+            if view is None:
+                print(f"The materialized view '{name}' does not exist in database '{database_name}'.")
+                return None
+            result: ViewRefresh = view.refresh(max_events)
+            print(f"✅ Materialized view '{name}': {result.events} change(s), {result.keys} key(s) recomputed, "
+                  f"{result.upserted} upserted, {result.deleted} deleted.")
+            return result
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while refreshing the materialized view '{name}': {ex}")
+            return None
+
+    @staticmethod
+    def drop_materialized_view(database_name: str, name: str, drop_target: bool = False) -> None:
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not name:
+            raise ValueError("View name must not be empty.")
 
-            logging.info("Executing aggregation pipeline...")
-            documents = list(my_collection.aggregate(pipeline_))
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
-            # Convert ObjectId and other BSON types to JSON-serializable format
-            print(json.dumps(documents, indent=4, default=json_util.default))
+        try:
+            view: Optional[MaterializedView] = MaterializedView.load(client, database_name, name)
+            if view is None:
+                print(f"The materialized view '{name}' does not exist in database '{database_name}'.")
+                return
+            view.drop(drop_target)
+            print(f"The materialized view '{name}' was dropped successfully.")
 
         except PyMongoError as ex:
-            logging.exception(f"Aggregation failed: {ex}")
+            logging.exception(f"An error occurred while dropping the materialized view '{name}': {ex}")
 
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+    @staticmethod
+    def execute_aggregate_pipeline(pipeline_: list[dict[str, Any]], batch_size: int = 1000, sink: TextIO | None = None, optimize: bool = True,
+                                   use_cache: bool = True) -> None:
+        """Run aggregation pipeline on the 'cars' collection in 'Test' DB."""
+        MongoDbOperation.__aggregate_to_sink('Test', 'cars', pipeline_, batch_size, sink, "Executing aggregation pipeline...", optimize, use_cache)
 
     @staticmethod
-    def aggregate_join_collection(pipeline_: list[dict[str, Any]]) -> None:
-        """Run aggregation join pipeline on the 'users' collection in 'store_db'."""
+    def aggregate_join_collection(pipeline_: list[dict[str, Any]], batch_size: int = 1000, sink: TextIO | None = None, optimize: bool = True,
+                                  use_cache: bool = True, strategy: str = "server", foreign_uri: str | None = None) -> None:
+        """Run aggregation join pipeline on the 'users' collection in 'store_db'.
+
+        ``strategy='client'`` runs the pipeline's ``$lookup`` as a client-side hash join with one
+        ``$in`` query per ``batch_size`` users; ``'auto'`` picks from collection statistics.
+        ``foreign_uri`` reads the joined collection from another deployment (client join only).
+        ``'auto'`` stays on the server when stages after the ``$lookup`` need it (another ``$lookup``,
+        ``$out``, ``$merge``, ...) or cannot run in-process; ``'client'`` then raises ValueError.
+        """
+        if strategy == "server" and foreign_uri is None:
+            MongoDbOperation.__aggregate_to_sink('store_db', 'users', pipeline_, batch_size, sink, "Executing aggregation join pipeline...", optimize,
+                                                 use_cache)
+            return
+        MongoDbOperation.__hash_join_to_sink('store_db', 'users', pipeline_, batch_size, sink, optimize, strategy, foreign_uri)
+
+    @classmethod
+    def __hash_join_to_sink(cls, database_name: str, collection_name: str, pipeline_: list[dict[str, Any]], batch_size: int, sink: TextIO | None,
+                            optimize: bool, strategy: str, foreign_uri: str | None) -> None:
+        if not pipeline_:
+            raise ValueError("Aggregation pipeline must not be empty.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        foreign_client: Optional[MongoClient] = MongoClientRegistry.get_client(foreign_uri) if foreign_uri else client
+        if client is None or foreign_client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            if optimize:
+                pipeline_ = PipelineOptimizer.apply(pipeline_)
+            before, spec, after = JoinExecutor.split(pipeline_)
+            stats = JoinStats()
+            logging.info("Executing aggregation join pipeline...")
+            documents: Iterator[dict[str, Any]] = JoinExecutor.execute(client[database_name][collection_name], foreign_client[database_name][spec.from_collection],
+                                                                       spec, "client" if foreign_uri else strategy, before, after, batch_size, stats)
+            DocumentStream.write_json_array(documents, sink or sys.stdout)
+            if stats.batches:
+                logging.info(f"Hash join: {stats.left_documents} '{collection_name}' and {stats.right_documents} '{spec.from_collection}' "
+                             f"document(s) in {stats.batches} batch(es), {stats.matched} match(es).")
+
+        except (PyMongoError, AggregationError) as ex:
+            # AggregationError: the stages after a client-side join failed while being evaluated in-process
+            logging.exception(f"Aggregation failed: {ex}")
+
+    @classmethod
+    def __aggregate_to_sink(cls, database_name: str, collection_name: str, pipeline_: list[dict[str, Any]], batch_size: int,
+                            sink: TextIO | None, message: str, optimize: bool, use_cache: bool) -> None:
         if not pipeline_:
             raise ValueError("Aggregation pipeline must not be empty.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
 
         client: Optional[MongoClient] = MongoDbOperation.__connect()
 
         if client is None:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
+        output: Optional[tuple[str, str]] = AggregationCache.output_namespace(database_name, pipeline_)
         try:
-            db = client.get_database('store_db')
-            my_collection = db.get_collection('users')
+            # Looked up with the pipeline as given, so cache hits skip the optimizer as well
+            documents, recorder = AggregationCache.lookup(client, database_name, collection_name, pipeline_) if use_cache else (None, None)
+            if documents is not None:
+                logging.info("Serving aggregation results from the result cache.")
+                DocumentStream.write_json_array(documents, sink or sys.stdout)
+                return
 
-            logging.info("Executing aggregation join pipeline...")
-            documents = list(my_collection.aggregate(pipeline_))
+            if optimize:
+                pipeline_ = PipelineOptimizer.apply(pipeline_)
+
+            logging.info(message)
+            cursor = client[database_name][collection_name].aggregate(pipeline_, batchSize=batch_size)
 
-            # Convert ObjectId and other BSON types to JSON-serializable format
-            print(json.dumps(documents, indent=4, default=json_util.default))
+            # Stream the results; ObjectId and other BSON types are converted per document
+            DocumentStream.write_json_array(cursor if recorder is None else recorder.wrap(cursor), sink or sys.stdout)
 
         except PyMongoError as ex:
             logging.exception(f"Aggregation failed: {ex}")
-
         finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            if output is not None:
+                AggregationCache.invalidate(client, *output)
 
     @staticmethod
     def get_database_names() -> None:
@@ -111,9 +364,6 @@ class MongoDbOperation:
 
         except PyMongoError as ex:
             logging.exception(f"An error occurred while fetching database names: {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
     def get_collection_names(database_name: str) -> None:
@@ -141,9 +391,6 @@ class MongoDbOperation:
 
         except PyMongoError as ex:
             logging.exception(f"An error occurred while listing collections in '{database_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
     def create_collection(database_name: str, collection_name: str, validator: dict[str, Any] | None = None) -> None:
@@ -168,15 +415,13 @@ class MongoDbOperation:
             else:
                 db.create_collection(collection_name)
 
+            NamespaceCache.invalidate(client, database_name)
             print(f"The collection '{collection_name}' was created successfully.")
 
         except CollectionInvalid:
             logging.warning(f"The collection '{collection_name}' already exists")
         except PyMongoError as ex:
             logging.exception(f"An error occurred while creating the collection '{collection_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
     def drop_collection(database_name: str, collection_name: str) -> None:
@@ -201,16 +446,18 @@ class MongoDbOperation:
                 return
 
             db.drop_collection(collection_name)
+            NamespaceCache.invalidate(client, database_name)
+            AggregationCache.invalidate(client, database_name, collection_name)
             print(f"The collection '{collection_name}' was dropped successfully.")
 
         except PyMongoError as ex:
             logging.exception(f"An error occurred while dropping the collection '{collection_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
-    def fetch_document(database_name: str, collection_name: str) -> None:
+    def fetch_document(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                       sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 1000, sink: TextIO | None = None,
+                       max_workers: int = 1) -> None:
+        """Write matching documents to ``sink`` as a JSON array; ``max_workers > 1`` reads unsorted, unlimited queries in parallel."""
         if not database_name:
             raise ValueError("Database name must not be empty.")
         if not collection_name:
@@ -221,30 +468,326 @@ class MongoDbOperation:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
-            db = client[database_name]
-
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
-            collection = db.get_collection(collection_name)
-            documents = list(collection.find())
+            QueryLog.record("find", database_name, collection_name, filter_, sort)
+            if max_workers > 1 and not sort and not limit:
+                cursor: Iterable[Any] = ParallelScan.scan(client[database_name][collection_name], filter_, projection, max_workers=max_workers,
+                                                          batch_size=batch_size)
+            else:
+                cursor = MongoDbOperation.__find_cursor(client, database_name, collection_name, filter_, projection, sort, limit, batch_size)
 
-            # Convert ObjectId and other BSON types to JSON-serializable format
-            print(json.dumps(documents, indent=4, default=json_util.default))
+            # Stream the results; ObjectId and other BSON types are converted per document
+            count: int = DocumentStream.write_json_array(cursor, sink or sys.stdout)
 
-            if not documents:
+            if not count:
                 print(f"No documents found in collection '{collection_name}'.")
 
         except PyMongoError as ex:
             logging.exception(f"An error occurred while fetching documents from '{collection_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+
+    @staticmethod
+    def stream_documents(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                         sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 1000, as_json: bool = False,
+                         raw: bool = False, record_type: type[Record] | None = None) -> Iterator[Any]:
+        """Lazily yield documents (or extended-JSON lines) fetched from the server ``batch_size`` at a time.
+
+        With ``raw=True`` documents are yielded as undecoded RawBSONDocuments (see ``RawDocuments.get``);
+        with ``record_type`` (e.g. ``Car``) each is decoded straight into a compact ``__slots__`` record.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if record_type is not None and (as_json or raw):
+            raise ValueError("record_type cannot be combined with as_json or raw.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+            return iter(())
+
+        cursor = MongoDbOperation.__find_cursor(client, database_name, collection_name, filter_, projection, sort, limit, batch_size,
+                                                raw or record_type is not None)
+        if record_type is not None:
+            return Records.decode(cursor, record_type)
+        return DocumentStream.to_json_lines(cursor) if as_json else iter(cursor)
+
+    @staticmethod
+    def fetch_page(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                   sort: list[tuple[str, int]] | None = None, page_size: int = 50, token: str | None = None, from_end: bool = False) -> Optional[Page]:
+        """One page of matching documents ordered by ``sort`` (then ``_id``), continued from ``token``.
+
+        Pass ``page.next_token`` or ``page.previous_token`` back with the same filter and sort to move
+        either way; without a token the first page is returned, or the last with ``from_end=True``.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
+
+            QueryLog.record("find", database_name, collection_name, filter_, KeysetPaginator.sort_keys(sort))
+            return KeysetPaginator.page(client[database_name][collection_name], page_size, token, filter_, sort, projection, from_end)
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while fetching a page from '{collection_name}': {ex}")
+            return None
+
+    @staticmethod
+    def scan_documents(database_name: str, collection_name: str, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                       partitions: int | None = None, max_workers: int = 4, batch_size: int = 1000, ordered: bool = True,
+                       raw: bool = False) -> Iterator[Any]:
+        """Read a whole collection as ``_id`` range partitions in parallel and yield one merged stream.
+
+        ``ordered=True`` keeps ``_id`` order; ``ordered=False`` yields batches as soon as any partition delivers them.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+            return iter(())
+
+        return ParallelScan.scan(client[database_name][collection_name], filter_, projection, partitions=partitions, max_workers=max_workers,
+                                 batch_size=batch_size, ordered=ordered, raw=raw)
+
+    @staticmethod
+    def scan_partitions(database_name: str, collection_name: str, partitions: int, filter_: dict[str, Any] | None = None,
+                        projection: dict[str, Any] | None = None, batch_size: int = 1000, raw: bool = False) -> list[Iterator[Any]]:
+        """One independent iterator per ``_id`` range, for callers that spread the partitions over their own workers."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+            return []
+
+        collection = client[database_name][collection_name]
+        ranges = ParallelScan.partitions(collection, partitions, min_partition_documents=batch_size)
+        return ParallelScan.partition_iterators(collection, ranges, filter_, projection, batch_size, raw)
+
+    @staticmethod
+    def stream_aggregate(database_name: str, collection_name: str, pipeline_: list[dict[str, Any]], batch_size: int = 1000, as_json: bool = False,
+                         use_cache: bool = True, raw: bool = False, record_type: type[Record] | None = None) -> Iterator[Any]:
+        """Lazily yield aggregation results (or extended-JSON lines) ``batch_size`` at a time; ``raw=True`` skips decoding.
+
+        ``record_type`` decodes results that keep a record's shape (e.g. ``$match``/``$sort`` over cars) into records.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not pipeline_:
+            raise ValueError("Aggregation pipeline must not be empty.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        if record_type is not None and (as_json or raw):
+            raise ValueError("record_type cannot be combined with as_json or raw.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        collection = client[database_name][collection_name]
+        if raw or record_type is not None:
+            # Cached results are decoded documents, so raw reads always go to the server
+            codec_options = RECORD_CODEC_OPTIONS if record_type is not None else RAW_CODEC_OPTIONS
+            documents: Iterator[Any] = iter(collection.with_options(codec_options=codec_options).aggregate(pipeline_, batchSize=batch_size))
+            if record_type is not None:
+                documents = Records.decode(documents, record_type)
+        elif use_cache:
+            documents = AggregationCache.fetch(client, database_name, collection_name, pipeline_,
+                                               lambda: collection.aggregate(pipeline_, batchSize=batch_size))
+        else:
+            documents = iter(collection.aggregate(pipeline_, batchSize=batch_size))
+
+        output: Optional[tuple[str, str]] = AggregationCache.output_namespace(database_name, pipeline_)
+        if output is not None:
+            AggregationCache.invalidate(client, *output)
+        return DocumentStream.to_json_lines(documents) if as_json else documents
+
+    @staticmethod
+    def stream_columnar_aggregate(database_name: str, collection_name: str, pipeline_: list[dict[str, Any]], batch_size: int = 10000,
+                                  as_json: bool = False) -> Iterator[Any]:
+        """Run ``pipeline_`` client-side with the columnar engine for offline analytics over large collections.
+
+        Leading ``$match`` stages are still filtered by the server, and for group-and-aggregate pipelines
+        only the fields the ``$group`` needs are fetched. Results are identical to ``stream_aggregate``.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if not pipeline_:
+            raise ValueError("Aggregation pipeline must not be empty.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        if any("$lookup" in stage or "$out" in stage for stage in pipeline_):
+            raise ValueError("$lookup and $out need the server; use stream_aggregate for this pipeline.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+            return iter(())
+
+        filter_, projection, remaining = ColumnarAggregation.source_query(pipeline_)
+        cursor = MongoDbOperation.__find_cursor(client, database_name, collection_name, filter_, projection, None, 0, batch_size)
+        if not remaining:
+            results: Iterator[dict[str, Any]] = iter(cursor)
+        else:
+            if ColumnarAggregation.plan(remaining) is None:
+                logging.info("Pipeline has no vectorizable stages; evaluating it row by row.")
+            results = ColumnarAggregation.aggregate(cursor, remaining, batch_size=batch_size)
+        return DocumentStream.to_json_lines(results) if as_json else results
+
+    @staticmethod
+    def export_documents(database_name: str, collection_name: str, sink: TextIO, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                         sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 1000, encoder: str | None = None) -> int:
+        """Write matching documents to ``sink`` as newline-delimited JSON and return how many were written."""
+        documents = MongoDbOperation.stream_documents(database_name, collection_name, filter_, projection, sort, limit, batch_size)
+        try:
+            count: int = DocumentStream.write_json_lines(documents, sink, encoder)
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while exporting documents from '{collection_name}': {ex}")
+            return 0
+
+        logging.info(f"Exported {count} document(s) from '{database_name}.{collection_name}'.")
+        return count
+
+    @staticmethod
+    def export_bson(database_name: str, collection_name: str, sink: BinaryIO, filter_: dict[str, Any] | None = None, projection: dict[str, Any] | None = None,
+                    sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 1000) -> int:
+        """Write matching documents to ``sink`` as a mongodump-style ``.bson`` stream, without decoding them."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if limit < 0:
+            raise ValueError("Limit must not be negative.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return 0
+
+            # Each raw batch is the server's reply buffer: documents go from the socket to the sink untouched
+            batches = client[database_name][collection_name].find_raw_batches(filter_ or {}, projection, limit=limit, batch_size=batch_size)
+            if sort:
+                batches = batches.sort(sort)
+            count, written = RawDocuments.write_bson(batches, sink)
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while exporting documents from '{collection_name}': {ex}")
+            return 0
+
+        logging.info(f"Exported {count} document(s) ({written} bytes) from '{database_name}.{collection_name}'.")
+        return count
+
+    @staticmethod
+    def import_bson(database_name: str, collection_name: str, source: BinaryIO, ordered: bool = False, chunk_size: int = 1000,
+                    max_workers: int = 4) -> Optional[BulkInsertResult]:
+        """Insert the documents of a ``.bson`` stream as-is; they are never decoded or re-encoded."""
+        result: Optional[BulkInsertResult] = MongoDbOperation.bulk_insert_documents(database_name, collection_name, RawDocuments.read_bson(source),
+                                                                                    ordered=ordered, chunk_size=chunk_size, max_workers=max_workers)
+        if result is not None:
+            MongoDbOperation.__report_bulk_insert(result)
+        return result
+
+    @staticmethod
+    def export_arrow(database_name: str, collection_name: str, sink: str | BinaryIO, file_format: str = "parquet", filter_: dict[str, Any] | None = None,
+                     projection: dict[str, Any] | None = None, sort: list[tuple[str, int]] | None = None, limit: int = 0, batch_size: int = 10000,
+                     pipeline_: list[dict[str, Any]] | None = None, schema: Any = None, compression: str | None = "zstd") -> int:
+        """Write matching documents (or the results of ``pipeline_``) to a Parquet or Arrow IPC file for pandas/Polars/DuckDB.
+
+        Documents stream into the file one record batch at a time; without ``schema`` one is inferred
+        from the first thousand documents. Requires ``pyarrow``.
+        """
+        if not ArrowExport.available():
+            raise ImportError("pyarrow is required for Arrow/Parquet export; install it with 'pip install pyarrow'.")
+        if pipeline_ is not None and (filter_ or projection or sort or limit):
+            raise ValueError("filter_, projection, sort and limit cannot be combined with pipeline_.")
+
+        if pipeline_ is not None:
+            documents: Iterator[Any] = MongoDbOperation.stream_aggregate(database_name, collection_name, pipeline_, batch_size, use_cache=False)
+        else:
+            documents = MongoDbOperation.stream_documents(database_name, collection_name, filter_, projection, sort, limit, batch_size)
+        try:
+            stats: ArrowExportStats = ArrowExport.write(documents, sink, file_format, schema=schema, batch_size=batch_size, compression=compression)
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while exporting documents from '{collection_name}': {ex}")
+            return 0
+
+        logging.info(f"Exported {stats.documents} document(s) in {stats.batches} batch(es) from '{database_name}.{collection_name}' as {file_format}.")
+        return stats.documents
+
+    @staticmethod
+    def import_arrow(database_name: str, collection_name: str, source: str | BinaryIO, file_format: str = "parquet", ordered: bool = False,
+                     chunk_size: int = 1000, max_workers: int = 4) -> Optional[BulkInsertResult]:
+        """Bulk-load the rows of a Parquet or Arrow IPC file (e.g. one written by ``export_arrow``) as documents."""
+        if not ArrowExport.available():
+            raise ImportError("pyarrow is required for Arrow/Parquet import; install it with 'pip install pyarrow'.")
+
+        documents: Iterator[dict[str, Any]] = ArrowExport.read(source, file_format, batch_size=max(chunk_size, 1))
+        result: Optional[BulkInsertResult] = MongoDbOperation.bulk_insert_documents(database_name, collection_name, documents, ordered=ordered,
+                                                                                    chunk_size=chunk_size, max_workers=max_workers)
+        if result is not None:
+            MongoDbOperation.__report_bulk_insert(result)
+        return result
+
+    @staticmethod
+    def copy_documents(source_database: str, source_collection: str, target_database: str, target_collection: str,
+                       filter_: dict[str, Any] | None = None, batch_size: int = 1000, ordered: bool = False, max_workers: int = 4) -> Optional[BulkInsertResult]:
+        """Pipe matching documents from one collection into another as raw BSON."""
+        documents = MongoDbOperation.stream_documents(source_database, source_collection, filter_, batch_size=batch_size, raw=True)
+        # Errors reading the source surface while the documents are loaded, and are reported by bulk_insert_documents
+        result: Optional[BulkInsertResult] = MongoDbOperation.bulk_insert_documents(target_database, target_collection, documents, ordered=ordered,
+                                                                                    chunk_size=batch_size, max_workers=max_workers)
+        if result is not None:
+            MongoDbOperation.__report_bulk_insert(result)
+        return result
+
+    @classmethod
+    def __find_cursor(cls, client: MongoClient, database_name: str, collection_name: str, filter_: dict[str, Any] | None, projection: dict[str, Any] | None,
+                      sort: list[tuple[str, int]] | None, limit: int, batch_size: int, raw: bool = False) -> Cursor:
+        if limit < 0:
+            raise ValueError("Limit must not be negative.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+
+        collection = client[database_name][collection_name]
+        if raw:
+            collection = collection.with_options(codec_options=RAW_CODEC_OPTIONS)
+        cursor: Cursor = collection.find(filter_ or {}, projection, limit=limit, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        return cursor
 
     @staticmethod
     def create_database(database_name: str) -> None:
@@ -262,6 +805,7 @@ class MongoDbOperation:
             db = client[database_name]
             # Trigger actual creation by inserting a dummy doc
             db['__temp_collection__'].insert_one({'created': True})
+            NamespaceCache.invalidate(client, database_name)
 
             if database_name in client.list_database_names():
                 print(f"The database '{database_name}' was created successfully.")
@@ -269,9 +813,6 @@ class MongoDbOperation:
                 print(f"Failed to verify creation of the database '{database_name}'.")
         except PyMongoError as ex:
             logging.exception(f"An error occurred while creating the database: {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
     def drop_database(database_name: str) -> None:
@@ -289,15 +830,22 @@ class MongoDbOperation:
 
             logging.info(f"Trying to drop the database: {database_name}")
             client.drop_database(database_name)
+            NamespaceCache.invalidate(client, database_name)
+            AggregationCache.invalidate(client, database_name)
             print(f"The database '{database_name}' was dropped successfully.")
         except PyMongoError as ex:
             logging.exception(f"An error occurred while dropping the database '{database_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
-    def insert_document(database_name: str, collection_name: str, document: dict[str, Any] | list[dict[str, Any]]) -> None:
+    def insert_document(database_name: str, collection_name: str, document: dict[str, Any] | Iterable[dict[str, Any]], ordered: bool = False,
+                        chunk_size: int = 1000, max_workers: int = 4, validate: bool | dict[str, Any] = False,
+                        rejects: RejectSink | None = None, validation_processes: int = 0) -> None:
+        """Insert one document or an iterable of them.
+
+        ``validate=True`` checks documents against the collection's validator before sending them
+        (a validator document may be passed instead); rejects go to ``rejects`` or are printed as the
+        server's validation errors would be.
+        """
         if not database_name:
             raise ValueError("Database name must not be empty.")
         if not collection_name:
@@ -305,60 +853,154 @@ class MongoDbOperation:
         if not document:
             raise ValueError("Document must be a dictionary or a list of dictionaries and must not be empty.")
 
+        if not isinstance(document, dict):
+            if isinstance(document, (str, bytes)) or not isinstance(document, Iterable):
+                raise ValueError("Document must be a dictionary or a list of dictionaries.")
+            result: Optional[BulkInsertResult] = MongoDbOperation.bulk_insert_documents(database_name, collection_name, document, ordered=ordered,
+                                                                                          chunk_size=chunk_size, max_workers=max_workers, validate=validate,
+                                                                                          rejects=rejects, validation_processes=validation_processes)
+            if result is not None:
+                MongoDbOperation.__report_bulk_insert(result)
+            return
+
         client: Optional[MongoClient] = MongoDbOperation.__connect()
         if client is None:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
             db = client[database_name]
 
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
             collection = db[collection_name]
 
-            if isinstance(document, dict):
-                result_1: InsertOneResult = collection.insert_one(document)
-                print(f"✅ Document inserted with _id: {result_1.inserted_id}")
-            elif isinstance(document, list):
-                result_2: InsertManyResult = collection.insert_many(document)
-                for inserted_id in result_2.inserted_ids:
-                    print(f"✅ Document inserted with _id: {inserted_id}")
-            else:
-                raise ValueError("Document must be a dictionary or a list of dictionaries.")
+            validator: Optional[CompiledValidator] = MongoDbOperation.__validator(collection, validate)
+            error: Optional[dict[str, Any]] = validator.write_error(document) if validator is not None else None
+            if error is not None:
+                if rejects is not None:
+                    DocumentValidator.reporter(rejects)(error)
+                else:
+                    del error["op"]
+                    MongoDbOperation.handle_write_error_details(WriteError(error["errmsg"], error["code"], error))
+                return
+
+            result_1: InsertOneResult = collection.insert_one(document)
+            print(f"✅ Document inserted with _id: {result_1.inserted_id}")
 
         except DuplicateKeyError as dke:
             logging.error(f"Duplicate key error: {dke}")
             print("❌ Duplicate key error! A document with the same _id already exists.")
             print(f"Details: {dke.details}")
 
-        except BulkWriteError as bwe:
-            logging.error(f"Bulk write error: {bwe}")
-            print("❌ Bulk write error occurred.")
-            for error in bwe.details.get("writeErrors", []):
-                print(f"  - Index: {error['index']}")
-                print(f"  - Code: {error['code']}")
-                print(f"  - Message: {error['errmsg']}")
-
         except WriteError as we:
-            MongoDbOperation.__handle_write_error_details(we)
+            MongoDbOperation.handle_write_error_details(we)
 
         except PyMongoError as ex:
             logging.exception(f"General PyMongo error: {ex}")
             print(f"❌ Failed to insert document(s): {ex}")
+        finally:
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+    @staticmethod
+    def bulk_insert_documents(database_name: str, collection_name: str, documents: Iterable[dict[str, Any]], ordered: bool = False, chunk_size: int = 1000,
+                              max_chunk_bytes: int = MAX_BATCH_BYTES, max_workers: int = 4, max_retries: int = 3, validate: bool | dict[str, Any] = False,
+                              rejects: RejectSink | None = None, validation_processes: int = 0) -> Optional[BulkInsertResult]:
+        """Load any iterable (including generators) in concurrent chunks; returns None if the namespace does not exist or the load fails.
+
+        With ``validate``, documents failing the collection's validator (or the given one) are held
+        back so they cannot fail a whole chunk. They go to ``rejects`` or, without one, into the
+        result's ``write_errors`` with the server's error structure; ``validation_processes > 0``
+        validates in a process pool.
+        """
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
 
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
+
+            collection = client[database_name][collection_name]
+            validator: Optional[CompiledValidator] = MongoDbOperation.__validator(collection, validate)
+            if validator is None:
+                return BulkLoader.load(collection, documents, chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes, ordered=ordered,
+                                       max_workers=max_workers, max_retries=max_retries)
+
+            report = ValidationReport()
+            accepted: Iterator[Any] = DocumentValidator.filter(documents, validator, rejects if rejects is not None else report.keep,
+                                                               chunk_size=chunk_size, processes=validation_processes, report=report)
+            result: BulkInsertResult = BulkLoader.load(collection, accepted, chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes, ordered=ordered,
+                                                       max_workers=max_workers, max_retries=max_retries)
+            return report.apply(result)
+        except PyMongoError as ex:
+            logging.exception(f"General PyMongo error: {ex}")
+            print(f"❌ Failed to insert document(s): {ex}")
+            return None
         finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+    @staticmethod
+    def seed_dataset(database_name: str, collection_name: str, dataset: str, count: int | None = None, seed: int = 0, users: int | None = None,
+                     chunk_size: int = 1000, max_workers: int = 4, report_every: int = 100_000) -> Optional[BulkInsertResult]:
+        """Load ``count`` seeded synthetic cars/users/orders (the canonical sample if None), creating the collection if needed."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+        if count is not None and count < 0:
+            raise ValueError("Count must not be negative.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            result: BulkInsertResult = Datasets.load(client[database_name][collection_name], dataset, count, seed, users, chunk_size=chunk_size,
+                                                     max_workers=max_workers, report_every=report_every)
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred while seeding '{collection_name}' with {dataset}: {ex}")
+            return None
+        finally:
+            NamespaceCache.invalidate(client, database_name)
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+        MongoDbOperation.__report_bulk_insert(result)
+        return result
+
+    @classmethod
+    def __validator(cls, collection: Any, validate: bool | dict[str, Any]) -> Optional[CompiledValidator]:
+        if isinstance(validate, dict):
+            return SchemaCompiler.validator(validate)
+        return DocumentValidator.for_collection(collection) if validate else None
+
+    @classmethod
+    def __report_bulk_insert(cls, result: BulkInsertResult, max_errors: int = 20) -> None:
+        print(f"✅ Inserted {result.inserted_count} document(s) in {result.chunks} chunk(s) "
+              f"({result.documents_per_second:.0f} docs/s, {result.retried_chunks} chunk(s) retried).")
+        if result.succeeded:
+            return
+
+        if result.rejected_count:
+            print(f"❌ {result.rejected_count} document(s) failed client-side validation and were not sent.")
+        if not result.write_errors and not result.failed_chunks:
+            return
+        print(f"❌ Bulk write error occurred: {len(result.write_errors)} error(s), {result.failed_chunks} failed chunk(s).")
+        for error in result.write_errors[:max_errors]:
+            print(f"  - Index: {error['index']}")
+            print(f"  - Code: {error['code']}")
+            print(f"  - Message: {error['errmsg']}")
+        if len(result.write_errors) > max_errors:
+            print(f"  ... and {len(result.write_errors) - max_errors} more.")
 
-    # Helper method for detailed schema write errors
     @classmethod
-    def __handle_write_error_details(cls, we: WriteError) -> None:
+    def handle_write_error_details(cls, we: WriteError) -> None:
+        """Print a write error, with the rules a document broke when it failed schema validation."""
         print("❌ WriteError: Document failed validation!")
         if we.details:
             for key, value in we.details.items():
@@ -404,18 +1046,14 @@ class MongoDbOperation:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
             db = client[database_name]
 
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
             collection = db[collection_name]
             update_operation = {"$set": update_values}
+            QueryLog.record("update", database_name, collection_name, filter_condition, many=update_type.strip().lower() == "many")
 
             if update_type.strip().lower() == "one":
                 result_1: UpdateResult = collection.update_one(filter_condition, update_operation)
@@ -427,8 +1065,7 @@ class MongoDbOperation:
         except PyMongoError as ex:
             logging.exception(f"An error occurred while updating documents in collection '{collection_name}': {ex}")
         finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            AggregationCache.invalidate(client, database_name, collection_name)
 
     @staticmethod
     def delete_document(database_name: str, collection_name: str, filter_query: dict[str, Any], delete_type: str = "one") -> None:
@@ -446,17 +1083,13 @@ class MongoDbOperation:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
             db = client[database_name]
 
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
             collection = db[collection_name]
+            QueryLog.record("delete", database_name, collection_name, filter_query, many=delete_type.strip().lower() == "many")
 
             if delete_type.strip().lower() == "one":
                 result_1: DeleteResult = collection.delete_one(filter_query)
@@ -468,8 +1101,37 @@ class MongoDbOperation:
         except PyMongoError as ex:
             logging.exception(f"An error occurred during deletion from '{collection_name}': {ex}")
         finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            AggregationCache.invalidate(client, database_name, collection_name)
+
+    @staticmethod
+    def bulk_write_documents(database_name: str, collection_name: str, operations: Iterable[WriteOperation], ordered: bool = True,
+                             batch_size: int = 1000) -> Optional[BulkWriteSummary]:
+        """Apply many UpdateOne/UpdateMany/ReplaceOne/DeleteOne/DeleteMany/InsertOne operations in batched round trips."""
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not collection_name:
+            raise ValueError("Collection name must not be empty.")
+
+        client: Optional[MongoClient] = MongoDbOperation.__connect()
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+
+        try:
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
+
+            summary: BulkWriteSummary = BulkWriter.write(client[database_name][collection_name], operations, ordered=ordered, batch_size=batch_size)
+            print(f"Matched {summary.matched_count}, Modified {summary.modified_count}, Upserted {summary.upserted_count}, "
+                  f"Deleted {summary.deleted_count}, Inserted {summary.inserted_count} ({summary.operations} operations, {summary.batches} batches).")
+            for position, error in list(summary.errors.items())[:20]:
+                print(f"❌ Operation {position} failed with code {error.get('code')}: {error.get('errmsg')}")
+            return summary
+
+        except PyMongoError as ex:
+            logging.exception(f"An error occurred during bulk write on collection '{collection_name}': {ex}")
+            return None
+        finally:
+            AggregationCache.invalidate(client, database_name, collection_name)
 
     @staticmethod
     def modify_existing_collection_schema(database_name: str, collection_name: str, validator: dict[str, Any]) -> None:
@@ -485,16 +1147,11 @@ class MongoDbOperation:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
             db = client[database_name]
 
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
             db.command({
                 "collMod": collection_name,
                 "validator": validator,
@@ -503,45 +1160,78 @@ class MongoDbOperation:
             })
             print(f"Schema modified successfully for collection '{collection_name}'.")
 
+        except OperationFailure as of:
+            if not MongoDbOperation.__report_missing_namespace(of, database_name, collection_name):
+                logging.exception(f"An error occurred during schema modification in collection '{collection_name}': {of}")
         except PyMongoError as ex:
             logging.exception(f"An error occurred during schema modification in collection '{collection_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
 
     @staticmethod
-    def create_index(database_name: str, collection_name: str, index_name: str) -> None:
+    def create_index(database_name: str, collection_name: str, index_name: str | None = None, keys: IndexKeys | None = None,
+                     unique: bool | None = None, sparse: bool = False, partial_filter: dict[str, Any] | None = None,
+                     expire_after_seconds: int | None = None, collation: dict[str, Any] | None = None, hidden: bool = False,
+                     name: str | None = None, progress_interval: float | None = 2.0) -> Optional[str]:
+        """Create one index unless an identical one exists; returns its name.
+
+        ``index_name`` alone builds a single-field, ascending, unique index on that field. ``keys`` takes
+        compound/multikey keys with directions (``[("maker", 1), ("price", -1)]``, ``"owners.location"``)
+        and is not unique unless ``unique=True``.
+        """
+        if not index_name and keys is None:
+            raise ValueError("Index name must not be empty.")
+
+        spec: IndexSpec = IndexSpec.of(keys if keys is not None else index_name, name, keys is None if unique is None else unique, sparse,
+                                       partial_filter, expire_after_seconds, collation, hidden)
+        result: Optional[IndexBuildResult] = MongoDbOperation.create_indexes(database_name, collection_name, [spec], progress_interval)
+        if result is None or result.conflicts:
+            return None
+        return (result.created or result.modified or result.unchanged or [None])[0]
+
+    @staticmethod
+    def create_indexes(database_name: str, collection_name: str, indexes: Iterable[IndexSpec | IndexModel | dict[str, Any]],
+                       progress_interval: float | None = 2.0) -> Optional[IndexBuildResult]:
+        """Build every missing index in one ``createIndexes`` command, logging build progress from ``$currentOp``.
+
+        Indexes that already exist with the same keys and options are skipped; ``hidden`` and TTL
+        changes are applied in place; other differences are reported and left for you to drop.
+        """
         if not database_name:
             raise ValueError("Database name must not be empty.")
         if not collection_name:
             raise ValueError("Collection name must not be empty.")
-        if not index_name:
-            raise ValueError("Index name must not be empty.")
+        specs: list[IndexSpec] = [IndexSpec.coerce(index) for index in indexes]
+        if not specs:
+            raise ValueError("Indexes must not be empty.")
 
         client: Optional[MongoClient] = MongoDbOperation.__connect()
         if client is None:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
-                return
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
+                return None
 
-            db = client[database_name]
-
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
-            my_collection = db.get_collection(collection_name)
-            index_result: str = my_collection.create_index([(index_name, ASCENDING)], unique=True)
-            print(f"The index '{index_result}' was created successfully in collection '{collection_name}'.")
+            result: IndexBuildResult = IndexManager.ensure(client[database_name][collection_name], specs, progress_interval)
+            MongoDbOperation.__report_index_build(result, collection_name)
+            return result
 
         except OperationFailure as ex:
-            logging.exception(f"Index creation failed for collection '{collection_name}' with index '{index_name}': {ex}")
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            if not MongoDbOperation.__report_missing_namespace(ex, database_name, collection_name):
+                logging.exception(f"Index creation failed for collection '{collection_name}': {ex}")
+            return None
+
+    @classmethod
+    def __report_index_build(cls, result: IndexBuildResult, collection_name: str) -> None:
+        for name in result.created:
+            print(f"The index '{name}' was created successfully in collection '{collection_name}'.")
+        for name in result.modified:
+            print(f"The index '{name}' was modified in collection '{collection_name}'.")
+        for name in result.unchanged:
+            print(f"The index '{name}' already exists in collection '{collection_name}'.")
+        for conflict in result.conflicts:
+            print(f"❌ {conflict}")
+        if result.created:
+            logging.info(f"Built {len(result.created)} index(es) on '{collection_name}' in {result.seconds:.2f}s.")
 
     @staticmethod
     def show_indexes(database_name: str, collection_name: str) -> None:
@@ -556,16 +1246,11 @@ class MongoDbOperation:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
             db = client[database_name]
 
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
             my_collection = db.get_collection(collection_name)
             index_cursor: CommandCursor[MutableMapping[str, Any]] = my_collection.list_indexes()
 
@@ -576,11 +1261,8 @@ class MongoDbOperation:
                     print(f"  {key}: {value}")
 
         except OperationFailure as of:
-            logging.exception(f"Failed to retrieve the indexes from the collection `{collection_name}`: {of}")
-
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            if not MongoDbOperation.__report_missing_namespace(of, database_name, collection_name):
+                logging.exception(f"Failed to retrieve the indexes from the collection `{collection_name}`: {of}")
 
     @staticmethod
     def drop_index(database_name: str, collection_name: str, index_name: str) -> None:
@@ -596,16 +1278,11 @@ class MongoDbOperation:
             raise ConnectionError("MongoDB client is None. Could not establish connection.")
 
         try:
-            if database_name not in client.list_database_names():
-                print(f"The database '{database_name}' does not exist.")
+            if not MongoDbOperation.__namespace_exists(client, database_name, collection_name):
                 return
 
             db = client[database_name]
 
-            if collection_name not in db.list_collection_names():
-                print(f"The collection '{collection_name}' does not exist in database '{database_name}'.")
-                return
-
             my_collection = db.get_collection(collection_name)
 
             existing_indexes = [index['name'] for index in my_collection.list_indexes()]
@@ -617,11 +1294,8 @@ class MongoDbOperation:
             print(f"The index '{index_name}' was dropped successfully from collection '{collection_name}'.")
 
         except OperationFailure as ex:
-            logging.exception(f"Failed to delete index '{index_name}' from the collection '{collection_name}': {ex}")
-
-        finally:
-            client.close()
-            logging.info("MongoDB connection closed.")
+            if not MongoDbOperation.__report_missing_namespace(ex, database_name, collection_name):
+                logging.exception(f"Failed to delete index '{index_name}' from the collection '{collection_name}': {ex}")
 
 if __name__ == "__main__":
     try:
@@ -637,4 +1311,6 @@ if __name__ == "__main__":
         logging.error("Could not configure MongoDB client. Check your internet connection.")
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+    finally:
+        MongoDbOperation.close_connections()
 
@@ -0,0 +1,728 @@
+import datetime
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, TextIO
+
+import bson
+from bson import Binary, Code, Decimal128, Int64, MaxKey, MinKey, ObjectId, Regex, Timestamp
+from bson.errors import InvalidDocument
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.collection import Collection
+
+from pymongo_aggregation import LocalAggregation, compare_values
+from pymongo_bulk import BulkInsertResult
+from pymongo_streaming import DocumentStream
+
+# What the server answers for a document that fails its collection validator
+VALIDATION_ERROR_CODE: int = 121
+VALIDATION_ERROR_MESSAGE: str = "Document failed validation"
+
+RejectSink = Callable[[dict[str, Any]], Any] | TextIO
+# A compiled rule: the failed-rule details for a value, empty when it satisfies the rule
+Check = Callable[[Any], list[dict[str, Any]]]
+
+_NUMBER_TYPES: frozenset[str] = frozenset({"int", "long", "double", "decimal"})
+_BSON_TYPES: frozenset[str] = frozenset({"double", "string", "object", "array", "binData", "undefined", "objectId", "bool", "date", "null",
+                                         "regex", "dbPointer", "javascript", "symbol", "javascriptWithScope", "int", "timestamp", "long",
+                                         "decimal", "minKey", "maxKey", "number"})
+# JSON Schema ``type`` names and the BSON types they accept (the server has no "integer")
+_JSON_TYPES: dict[str, frozenset[str]] = {
+    "object": frozenset({"object"}), "array": frozenset({"array"}), "number": _NUMBER_TYPES, "boolean": frozenset({"bool"}),
+    "string": frozenset({"string"}), "null": frozenset({"null"}),
+}
+# Keywords that only annotate a schema
+_ANNOTATIONS: frozenset[str] = frozenset({"title", "description"})
+_NO_ERRORS: list[dict[str, Any]] = []
+
+
+def bson_type(value: Any) -> str:
+    """The ``$type`` alias the server would report for a Python value."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, Int64):
+        return "long"
+    if isinstance(value, int):
+        return "int" if -2 ** 31 <= value < 2 ** 31 else "long"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, Mapping):
+        return "object"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, datetime.datetime):
+        return "date"
+    if value is None:
+        return "null"
+    if isinstance(value, (bytes, Binary)):
+        return "binData"
+    if isinstance(value, Decimal128):
+        return "decimal"
+    if isinstance(value, (Regex, re.Pattern)):
+        return "regex"
+    if isinstance(value, Timestamp):
+        return "timestamp"
+    if isinstance(value, Code):
+        return "javascriptWithScope" if value.scope else "javascript"
+    if isinstance(value, MinKey):
+        return "minKey"
+    if isinstance(value, MaxKey):
+        return "maxKey"
+    return "object"
+
+
+def _number(value: Any) -> Any:
+    return value.to_decimal() if isinstance(value, Decimal128) else value
+
+
+def _as_set(value: Any) -> frozenset[str]:
+    return frozenset([value] if isinstance(value, str) else value)
+
+
+def _rule(operator: str, specified: Any, reason: str, value: Any, **extra: Any) -> dict[str, Any]:
+    return {"operatorName": operator, "specifiedAs": {operator: specified}, "reason": reason, "consideredValue": value, **extra}
+
+
+def _sequence(checks: list[Check]) -> Check:
+    if not checks:
+        return lambda value: _NO_ERRORS
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value: Any) -> list[dict[str, Any]]:
+        errors: list[dict[str, Any]] = _NO_ERRORS
+        for rule in checks:
+            failed = rule(value)
+            if failed:
+                errors = failed if errors is _NO_ERRORS else errors + failed
+        return errors
+    return check
+
+
+class CompiledValidator:
+    """A collection validator turned into Python closures; regexes are compiled once, here.
+
+    ``errors`` returns the same ``errInfo.details`` document the server attaches to a
+    ``Document failed validation`` write error, or None when the document passes.
+    """
+
+    def __init__(self, validator: Mapping[str, Any]) -> None:
+        if not isinstance(validator, Mapping) or not validator:
+            raise ValueError("Validator must be a non-empty dictionary.")
+        self.validator: dict[str, Any] = dict(validator)
+        self.__clauses: list[tuple[str, Any, Callable[[Mapping[str, Any]], Optional[dict[str, Any]]]]] = []
+        for key, condition in validator.items():
+            if key == "$jsonSchema":
+                self.__clauses.append((key, condition, self.__schema_clause(SchemaCompiler.compile(condition))))
+            else:
+                self.__clauses.append((key, condition, self.__query_clause(key, condition)))
+
+    def errors(self, document: Mapping[str, Any]) -> Optional[dict[str, Any]]:
+        if len(self.__clauses) == 1:
+            return self.__clauses[0][2](document)
+        failed: list[dict[str, Any]] = []
+        for index, (_, _, clause) in enumerate(self.__clauses):
+            details = clause(document)
+            if details is not None:
+                failed.append({"index": index, "details": details})
+        return {"operatorName": "$and", "clausesNotSatisfied": failed} if failed else None
+
+    def write_error(self, document: Mapping[str, Any], index: int = 0) -> Optional[dict[str, Any]]:
+        """The write error the server would return for ``document`` at position ``index`` of a batch, or None."""
+        details: Optional[dict[str, Any]] = self.errors(document)
+        if details is None:
+            return None
+        info: dict[str, Any] = {"failingDocumentId": document["_id"]} if "_id" in document else {}
+        info["details"] = details
+        return {"index": index, "code": VALIDATION_ERROR_CODE, "errmsg": VALIDATION_ERROR_MESSAGE, "errInfo": info, "op": document}
+
+    @staticmethod
+    def __schema_clause(check: Check) -> Callable[[Mapping[str, Any]], Optional[dict[str, Any]]]:
+        def clause(document: Mapping[str, Any]) -> Optional[dict[str, Any]]:
+            failed = check(document)
+            return {"operatorName": "$jsonSchema", "schemaRulesNotSatisfied": failed} if failed else None
+        return clause
+
+    @staticmethod
+    def __query_clause(key: str, condition: Any) -> Callable[[Mapping[str, Any]], Optional[dict[str, Any]]]:
+        # Query-operator validators (e.g. {"age": {"$gte": 18}}) are evaluated with the in-process matcher
+        query: dict[str, Any] = {key: condition}
+        operator: str = key if key.startswith("$") else next(iter(condition), "$eq") if isinstance(condition, Mapping) else "$eq"
+
+        def clause(document: Mapping[str, Any]) -> Optional[dict[str, Any]]:
+            if LocalAggregation.matches(query, document):
+                return None
+            return {"operatorName": operator, "specifiedAs": query, "reason": "expression did not match"}
+        return clause
+
+
+class SchemaCompiler:
+    """Compile ``$jsonSchema`` documents (the keywords the server supports) into ``Check`` closures."""
+
+    cache_size: int = 64
+    _lock: threading.Lock = threading.Lock()
+    _compiled: "OrderedDict[str, CompiledValidator]" = OrderedDict()
+
+    @staticmethod
+    def validator(validator: Mapping[str, Any]) -> CompiledValidator:
+        """Compile a collection validator, reusing the compiled form of an identical one."""
+        key: str = SchemaCompiler.__key(validator)
+        with SchemaCompiler._lock:
+            compiled: Optional[CompiledValidator] = SchemaCompiler._compiled.get(key)
+            if compiled is not None:
+                SchemaCompiler._compiled.move_to_end(key)
+                return compiled
+        compiled = CompiledValidator(validator)
+        with SchemaCompiler._lock:
+            SchemaCompiler._compiled[key] = compiled
+            while len(SchemaCompiler._compiled) > SchemaCompiler.cache_size:
+                SchemaCompiler._compiled.popitem(last=False)
+        return compiled
+
+    @staticmethod
+    def compile(schema: Mapping[str, Any]) -> Check:
+        if not isinstance(schema, Mapping):
+            raise ValueError("$jsonSchema must be a document.")
+        unknown: set[str] = set(schema) - set(SchemaCompiler.KEYWORDS) - _ANNOTATIONS - {"exclusiveMinimum", "exclusiveMaximum", "additionalProperties",
+                                                                                        "patternProperties", "additionalItems"}
+        if unknown:
+            raise ValueError(f"Unsupported $jsonSchema keyword(s): {', '.join(sorted(unknown))}")
+        if "bsonType" in schema and "type" in schema:
+            raise ValueError("$jsonSchema must not specify both bsonType and type.")
+        checks: list[Check] = [SchemaCompiler.KEYWORDS[keyword](schema) for keyword in SchemaCompiler.KEYWORDS if keyword in schema]
+        if "properties" not in schema and ("patternProperties" in schema or "additionalProperties" in schema):
+            checks.append(SchemaCompiler._properties(schema))
+        return _sequence(checks)
+
+    @staticmethod
+    def __key(validator: Mapping[str, Any]) -> str:
+        try:
+            return hashlib.sha1(bson.encode(validator)).hexdigest()
+        except (InvalidDocument, TypeError):
+            return repr(validator)
+
+    # Each builder receives the whole schema so related keywords (exclusiveMinimum, additionalItems, ...) are read together
+    @staticmethod
+    def _bson_type(schema: Mapping[str, Any]) -> Check:
+        specified: Any = schema["bsonType"]
+        allowed: frozenset[str] = _as_set(specified)
+        if not allowed <= _BSON_TYPES:
+            raise ValueError(f"Unknown bsonType: {', '.join(sorted(allowed - _BSON_TYPES))}")
+        if "number" in allowed:
+            allowed = allowed | _NUMBER_TYPES
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            considered: str = bson_type(value)
+            if considered in allowed:
+                return _NO_ERRORS
+            return [_rule("bsonType", specified, "type did not match", value, consideredType=considered)]
+        return check
+
+    @staticmethod
+    def _type(schema: Mapping[str, Any]) -> Check:
+        specified: Any = schema["type"]
+        names: frozenset[str] = _as_set(specified)
+        if not names <= _JSON_TYPES.keys():
+            raise ValueError(f"Unsupported type: {', '.join(sorted(names - _JSON_TYPES.keys()))}")
+        allowed: frozenset[str] = frozenset().union(*(_JSON_TYPES[name] for name in names))
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            considered: str = bson_type(value)
+            if considered in allowed:
+                return _NO_ERRORS
+            return [_rule("type", specified, "type did not match", value, consideredType=considered)]
+        return check
+
+    @staticmethod
+    def _enum(schema: Mapping[str, Any]) -> Check:
+        values: list[Any] = list(schema["enum"])
+        if not values:
+            raise ValueError("enum must not be empty.")
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if any(bson_type(value) == bson_type(item) or {bson_type(value), bson_type(item)} <= _NUMBER_TYPES
+                   for item in values if compare_values(value, item) == 0):
+                return _NO_ERRORS
+            return [_rule("enum", values, "value was not found in enum", value)]
+        return check
+
+    @staticmethod
+    def _bound(operator: str, exclusive_keyword: str, passes: Callable[[Any, Any, bool], bool]) -> Callable[[Mapping[str, Any]], Check]:
+        def build(schema: Mapping[str, Any]) -> Check:
+            limit: Any = _number(schema[operator])
+            exclusive: bool = bool(schema.get(exclusive_keyword, False))
+            specified: dict[str, Any] = {operator: schema[operator], **({exclusive_keyword: True} if exclusive else {})}
+
+            def check(value: Any) -> list[dict[str, Any]]:
+                if bson_type(value) not in _NUMBER_TYPES:
+                    return _NO_ERRORS
+                number = _number(value)
+                if isinstance(number, Decimal) or isinstance(limit, Decimal):
+                    number, bound = Decimal(str(number)), Decimal(str(limit))
+                else:
+                    bound = limit
+                if passes(number, bound, exclusive):
+                    return _NO_ERRORS
+                return [{"operatorName": operator, "specifiedAs": specified, "reason": "comparison failed", "consideredValue": value}]
+            return check
+        return build
+
+    @staticmethod
+    def _multiple_of(schema: Mapping[str, Any]) -> Check:
+        divisor: Any = _number(schema["multipleOf"])
+        if not divisor > 0:
+            raise ValueError("multipleOf must be a positive number.")
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if bson_type(value) not in _NUMBER_TYPES:
+                return _NO_ERRORS
+            number = _number(value)
+            if isinstance(number, Decimal) or isinstance(divisor, Decimal):
+                remainder: Any = Decimal(str(number)) % Decimal(str(divisor))
+            else:
+                remainder = math.fmod(number, divisor)
+            if remainder == 0:
+                return _NO_ERRORS
+            return [_rule("multipleOf", schema["multipleOf"], "considered value is not a multiple of the specified value", value)]
+        return check
+
+    @staticmethod
+    def _length(operator: str, passes: Callable[[int, int], bool]) -> Callable[[Mapping[str, Any]], Check]:
+        def build(schema: Mapping[str, Any]) -> Check:
+            limit: int = schema[operator]
+
+            def check(value: Any) -> list[dict[str, Any]]:
+                # Lengths count code points, as the server does
+                if not isinstance(value, str) or passes(len(value), limit):
+                    return _NO_ERRORS
+                return [_rule(operator, limit, "specified string length was not satisfied", value)]
+            return check
+        return build
+
+    @staticmethod
+    def _pattern(schema: Mapping[str, Any]) -> Check:
+        specified: Any = schema["pattern"]
+        pattern: re.Pattern = LocalAggregation.regex(specified)
+        search: Callable[[str], Any] = pattern.search
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if not isinstance(value, str) or search(value) is not None:
+                return _NO_ERRORS
+            return [_rule("pattern", specified, "regular expression did not match", value)]
+        return check
+
+    @staticmethod
+    def _required(schema: Mapping[str, Any]) -> Check:
+        required: list[str] = list(schema["required"])
+        if not required or len(set(required)) != len(required):
+            raise ValueError("required must be a non-empty list of distinct field names.")
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if not isinstance(value, Mapping):
+                return _NO_ERRORS
+            missing: list[str] = [name for name in required if name not in value]
+            if not missing:
+                return _NO_ERRORS
+            return [{"operatorName": "required", "specifiedAs": {"required": required}, "missingProperties": missing}]
+        return check
+
+    @staticmethod
+    def _properties(schema: Mapping[str, Any]) -> Check:
+        """``properties``, ``patternProperties`` and ``additionalProperties`` together, since the last depends on the first two."""
+        properties: list[tuple[str, Optional[str], Check]] = [
+            (name, subschema.get("description"), SchemaCompiler.compile(subschema)) for name, subschema in schema.get("properties", {}).items()]
+        patterns: list[tuple[str, Callable[[str], Any], Optional[str], Check]] = [
+            (expression, LocalAggregation.regex(expression).search, subschema.get("description"), SchemaCompiler.compile(subschema))
+            for expression, subschema in schema.get("patternProperties", {}).items()]
+        additional: Any = schema.get("additionalProperties", True)
+        additional_check: Optional[Check] = SchemaCompiler.compile(additional) if isinstance(additional, Mapping) else None
+        known: frozenset[str] = frozenset(name for name, _, _ in properties)
+
+        def property_error(name: str, description: Optional[str], details: list[dict[str, Any]]) -> dict[str, Any]:
+            entry: dict[str, Any] = {"propertyName": name}
+            if description is not None:
+                entry["description"] = description
+            entry["details"] = details
+            return entry
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if not isinstance(value, Mapping):
+                return _NO_ERRORS
+            errors: list[dict[str, Any]] = []
+            failed: list[dict[str, Any]] = []
+            for name, description, rule in properties:
+                if name in value:
+                    details = rule(value[name])
+                    if details:
+                        failed.append(property_error(name, description, details))
+            if failed:
+                errors.append({"operatorName": "properties", "propertiesNotSatisfied": failed})
+
+            if patterns or additional is not True:
+                failed_patterns: list[dict[str, Any]] = []
+                extra: list[str] = []
+                for name, item in value.items():
+                    matched: bool = name in known
+                    for expression, search, description, rule in patterns:
+                        if search(name) is not None:
+                            matched = True
+                            details = rule(item)
+                            if details:
+                                failed_patterns.append({"operatorName": "regular expression", "specifiedAs": {"regex": expression},
+                                                        "propertyName": name, "details": details})
+                    if not matched:
+                        extra.append(name)
+                if failed_patterns:
+                    errors.append({"operatorName": "patternProperties", "details": failed_patterns})
+                if extra and additional is False:
+                    errors.append({"operatorName": "additionalProperties", "specifiedAs": {"additionalProperties": False},
+                                   "additionalProperties": extra})
+                elif extra and additional_check is not None:
+                    for name in extra:
+                        details = additional_check(value[name])
+                        if details:
+                            errors.append({"operatorName": "additionalProperties", "reason": "at least one additional property did not match the subschema",
+                                           "failingProperty": name, "details": details})
+                            break
+            return errors or _NO_ERRORS
+        return check
+
+    @staticmethod
+    def _property_count(operator: str, passes: Callable[[int, int], bool]) -> Callable[[Mapping[str, Any]], Check]:
+        def build(schema: Mapping[str, Any]) -> Check:
+            limit: int = schema[operator]
+
+            def check(value: Any) -> list[dict[str, Any]]:
+                if not isinstance(value, Mapping) or passes(len(value), limit):
+                    return _NO_ERRORS
+                return [{"operatorName": operator, "specifiedAs": {operator: limit}, "reason": "specified number of properties was not satisfied",
+                         "numberOfProperties": len(value)}]
+            return check
+        return build
+
+    @staticmethod
+    def _items(schema: Mapping[str, Any]) -> Check:
+        items: Any = schema["items"]
+        if isinstance(items, Mapping):
+            every: Check = SchemaCompiler.compile(items)
+
+            def check(value: Any) -> list[dict[str, Any]]:
+                if not isinstance(value, (list, tuple)):
+                    return _NO_ERRORS
+                for index, item in enumerate(value):
+                    details = every(item)
+                    if details:
+                        return [{"operatorName": "items", "reason": "At least one item did not match the sub-schema", "itemIndex": index,
+                                 "details": details}]
+                return _NO_ERRORS
+            return check
+
+        positional: list[Check] = [SchemaCompiler.compile(subschema) for subschema in items]
+        additional: Any = schema.get("additionalItems", True)
+        additional_check: Optional[Check] = SchemaCompiler.compile(additional) if isinstance(additional, Mapping) else None
+
+        def check_tuple(value: Any) -> list[dict[str, Any]]:
+            if not isinstance(value, (list, tuple)):
+                return _NO_ERRORS
+            for index, (item, rule) in enumerate(zip(value, positional)):
+                details = rule(item)
+                if details:
+                    return [{"operatorName": "items", "reason": "At least one item did not match the sub-schema", "itemIndex": index,
+                             "details": details}]
+            rest: Any = value[len(positional):]
+            if rest and additional is False:
+                return [{"operatorName": "additionalItems", "specifiedAs": {"additionalItems": False},
+                         "reason": "found additional items", "additionalItems": list(rest)}]
+            if rest and additional_check is not None:
+                for index, item in enumerate(rest, len(positional)):
+                    details = additional_check(item)
+                    if details:
+                        return [{"operatorName": "additionalItems", "reason": "At least one additional item did not match the sub-schema",
+                                 "itemIndex": index, "details": details}]
+            return _NO_ERRORS
+        return check_tuple
+
+    @staticmethod
+    def _item_count(operator: str, passes: Callable[[int, int], bool]) -> Callable[[Mapping[str, Any]], Check]:
+        def build(schema: Mapping[str, Any]) -> Check:
+            limit: int = schema[operator]
+
+            def check(value: Any) -> list[dict[str, Any]]:
+                if not isinstance(value, (list, tuple)) or passes(len(value), limit):
+                    return _NO_ERRORS
+                return [_rule(operator, limit, "array did not match specified length", value)]
+            return check
+        return build
+
+    @staticmethod
+    def _unique_items(schema: Mapping[str, Any]) -> Check:
+        if not schema["uniqueItems"]:
+            return lambda value: _NO_ERRORS
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if not isinstance(value, (list, tuple)):
+                return _NO_ERRORS
+            for index, item in enumerate(value):
+                if any(compare_values(item, other) == 0 for other in value[:index]):
+                    return [_rule("uniqueItems", True, "found a duplicate item", value, duplicatedValue=item)]
+            return _NO_ERRORS
+        return check
+
+    @staticmethod
+    def _combinator(operator: str) -> Callable[[Mapping[str, Any]], Check]:
+        def build(schema: Mapping[str, Any]) -> Check:
+            subschemas: list[Check] = [SchemaCompiler.compile(subschema) for subschema in schema[operator]]
+            if not subschemas:
+                raise ValueError(f"{operator} must not be empty.")
+
+            def check(value: Any) -> list[dict[str, Any]]:
+                failed: list[dict[str, Any]] = []
+                for index, rule in enumerate(subschemas):
+                    details = rule(value)
+                    if details:
+                        failed.append({"index": index, "details": details})
+                satisfied: int = len(subschemas) - len(failed)
+                if operator == "allOf" and failed:
+                    return [{"operatorName": operator, "schemasNotSatisfied": failed}]
+                if operator == "anyOf" and not satisfied:
+                    return [{"operatorName": operator, "schemasNotSatisfied": failed}]
+                if operator == "oneOf" and satisfied != 1:
+                    if satisfied:
+                        matched: list[int] = [index for index in range(len(subschemas)) if index not in {entry["index"] for entry in failed}]
+                        return [{"operatorName": operator, "reason": "more than one subschema matched", "matchingSchemaIndexes": matched}]
+                    return [{"operatorName": operator, "schemasNotSatisfied": failed}]
+                return _NO_ERRORS
+            return check
+        return build
+
+    @staticmethod
+    def _not(schema: Mapping[str, Any]) -> Check:
+        negated: Check = SchemaCompiler.compile(schema["not"])
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if negated(value):
+                return _NO_ERRORS
+            return [{"operatorName": "not", "reason": "child expression matched"}]
+        return check
+
+    @staticmethod
+    def _dependencies(schema: Mapping[str, Any]) -> Check:
+        rules: list[tuple[str, Any]] = []
+        for name, dependency in schema["dependencies"].items():
+            rules.append((name, SchemaCompiler.compile(dependency) if isinstance(dependency, Mapping) else list(dependency)))
+
+        def check(value: Any) -> list[dict[str, Any]]:
+            if not isinstance(value, Mapping):
+                return _NO_ERRORS
+            errors: list[dict[str, Any]] = []
+            for name, dependency in rules:
+                if name not in value:
+                    continue
+                if isinstance(dependency, list):
+                    missing: list[str] = [field for field in dependency if field not in value]
+                    if missing:
+                        errors.append({"operatorName": "dependencies", "failingDependencies": [
+                            {"conditionalProperty": name, "missingProperties": missing}]})
+                else:
+                    details = dependency(value)
+                    if details:
+                        errors.append({"operatorName": "dependencies", "failingDependencies": [
+                            {"conditionalProperty": name, "details": details}]})
+            return errors or _NO_ERRORS
+        return check
+
+    KEYWORDS: dict[str, Callable[[Mapping[str, Any]], Check]] = {}
+
+
+SchemaCompiler.KEYWORDS.update({
+    "bsonType": SchemaCompiler._bson_type,
+    "type": SchemaCompiler._type,
+    "enum": SchemaCompiler._enum,
+    "minimum": SchemaCompiler._bound("minimum", "exclusiveMinimum", lambda value, limit, exclusive: value > limit if exclusive else value >= limit),
+    "maximum": SchemaCompiler._bound("maximum", "exclusiveMaximum", lambda value, limit, exclusive: value < limit if exclusive else value <= limit),
+    "multipleOf": SchemaCompiler._multiple_of,
+    "minLength": SchemaCompiler._length("minLength", lambda length, limit: length >= limit),
+    "maxLength": SchemaCompiler._length("maxLength", lambda length, limit: length <= limit),
+    "pattern": SchemaCompiler._pattern,
+    "required": SchemaCompiler._required,
+    "properties": SchemaCompiler._properties,
+    "minProperties": SchemaCompiler._property_count("minProperties", lambda count, limit: count >= limit),
+    "maxProperties": SchemaCompiler._property_count("maxProperties", lambda count, limit: count <= limit),
+    "items": SchemaCompiler._items,
+    "minItems": SchemaCompiler._item_count("minItems", lambda count, limit: count >= limit),
+    "maxItems": SchemaCompiler._item_count("maxItems", lambda count, limit: count <= limit),
+    "uniqueItems": SchemaCompiler._unique_items,
+    "allOf": SchemaCompiler._combinator("allOf"),
+    "anyOf": SchemaCompiler._combinator("anyOf"),
+    "oneOf": SchemaCompiler._combinator("oneOf"),
+    "not": SchemaCompiler._not,
+    "dependencies": SchemaCompiler._dependencies,
+})
+
+
+def _validate_chunk(validator: dict[str, Any], documents: list[dict[str, Any]], offset: int) -> list[dict[str, Any]]:
+    # Runs in pool workers; each worker compiles the validator once through the cache
+    compiled: CompiledValidator = SchemaCompiler.validator(validator)
+    errors: list[dict[str, Any]] = []
+    for index, document in enumerate(documents, offset):
+        error: Optional[dict[str, Any]] = compiled.write_error(document, index)
+        if error is not None:
+            # The parent still holds the chunk; do not pickle the document back
+            del error["op"]
+            errors.append(error)
+    return errors
+
+
+@dataclass
+class ValidationReport:
+    """Totals from ``DocumentValidator.filter``; rejects land in ``errors`` when no other sink is given."""
+
+    accepted: int = 0
+    rejected: int = 0
+    rejected_indexes: list[int] = field(default_factory=list)
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    def keep(self, error: dict[str, Any]) -> None:
+        self.errors.append(error)
+
+    def input_index(self, index: int) -> int:
+        """Map a position among the accepted documents back to the position in the original input."""
+        for rejected in self.rejected_indexes:
+            if rejected > index:
+                break
+            index += 1
+        return index
+
+    def apply(self, result: BulkInsertResult) -> BulkInsertResult:
+        """Fold the rejects into a bulk load's result as if the server had returned them."""
+        for error in result.write_errors:
+            error["index"] = self.input_index(error["index"])
+        result.write_errors = sorted(result.write_errors + self.errors, key=lambda error: error["index"])
+        result.rejected_count += self.rejected
+        return result
+
+
+class DocumentValidator:
+    """Validate documents locally before they are sent, splitting a stream into accepted documents and rejects."""
+
+    @staticmethod
+    def for_collection(collection: Collection) -> Optional[CompiledValidator]:
+        """Compile the validator the server enforces on ``collection``; None if it has none or does not reject with it.
+
+        With ``validationLevel: "off"`` or ``validationAction: "warn"`` the server accepts invalid
+        documents, so nothing is held back. ``"moderate"`` only relaxes updates to documents that were
+        already invalid; inserts are validated as under ``"strict"``, so the validator is enforced.
+        """
+        for info in collection.database.list_collections(filter={"name": collection.name}):
+            return DocumentValidator.__from_options(collection.name, info.get("options", {}))
+        return None
+
+    @staticmethod
+    async def for_collection_async(collection: AsyncCollection) -> Optional[CompiledValidator]:
+        cursor = await collection.database.list_collections(filter={"name": collection.name})
+        async for info in cursor:
+            return DocumentValidator.__from_options(collection.name, info.get("options", {}))
+        return None
+
+    @staticmethod
+    def __from_options(collection_name: str, options: Mapping[str, Any]) -> Optional[CompiledValidator]:
+        validator: Optional[Mapping[str, Any]] = options.get("validator")
+        if not validator:
+            return None
+        level: str = options.get("validationLevel", "strict")
+        action: str = options.get("validationAction", "error")
+        if level == "off" or action == "warn":
+            logging.info(f"Not validating documents for '{collection_name}' client-side: the server accepts invalid documents "
+                         f"(validationLevel '{level}', validationAction '{action}').")
+            return None
+        return SchemaCompiler.validator(validator)
+
+    @staticmethod
+    def filter(documents: Iterable[Mapping[str, Any]], validator: Mapping[str, Any] | CompiledValidator,
+               rejects: RejectSink | None = None, chunk_size: int = 1000, processes: int = 0,
+               report: Optional[ValidationReport] = None) -> Iterator[Mapping[str, Any]]:
+        """Yield the documents that pass ``validator`` and send every other one to ``rejects``.
+
+        Each reject is the write error the server would have returned (code 121, ``errInfo.details``
+        with ``schemaRulesNotSatisfied``) plus the document under ``op``, like ``BulkWriteError`` entries;
+        ``index`` is the document's position in ``documents``. ``rejects`` is a callable or a text sink
+        that receives one extended-JSON line per reject. ``processes > 0`` validates chunks of
+        ``chunk_size`` in a process pool, keeping at most ``2 * processes`` chunks in flight.
+        ``report``, if given, is updated with the totals and rejected positions as documents are consumed.
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be a positive integer.")
+        if processes < 0:
+            raise ValueError("processes must not be negative.")
+        compiled: CompiledValidator = validator if isinstance(validator, CompiledValidator) else SchemaCompiler.validator(validator)
+        reject: Callable[[dict[str, Any]], Any] = DocumentValidator.reporter(rejects)
+        totals: ValidationReport = report if report is not None else ValidationReport()
+
+        if not processes:
+            for index, document in enumerate(documents):
+                error: Optional[dict[str, Any]] = compiled.write_error(document, index)
+                if error is None:
+                    totals.accepted += 1
+                    yield document
+                else:
+                    totals.rejected += 1
+                    totals.rejected_indexes.append(index)
+                    reject(error)
+            return
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            pending: deque[tuple[list[Mapping[str, Any]], int, Future[list[dict[str, Any]]]]] = deque()
+            for offset, chunk in DocumentValidator.__chunks(documents, chunk_size):
+                pending.append((chunk, offset, executor.submit(_validate_chunk, compiled.validator, chunk, offset)))
+                if len(pending) >= 2 * processes:
+                    yield from DocumentValidator.__collect(*pending.popleft(), reject, totals)
+            while pending:
+                yield from DocumentValidator.__collect(*pending.popleft(), reject, totals)
+
+    @staticmethod
+    def __chunks(documents: Iterable[Mapping[str, Any]], chunk_size: int) -> Iterator[tuple[int, list[Mapping[str, Any]]]]:
+        chunk: list[Mapping[str, Any]] = []
+        offset: int = 0
+        for document in documents:
+            chunk.append(document)
+            if len(chunk) == chunk_size:
+                yield offset, chunk
+                offset += len(chunk)
+                chunk = []
+        if chunk:
+            yield offset, chunk
+
+    @staticmethod
+    def __collect(chunk: list[Mapping[str, Any]], offset: int, future: Future, reject: Callable[[dict[str, Any]], Any],
+                  totals: ValidationReport) -> Iterator[Mapping[str, Any]]:
+        # Chunks are collected in submission order so accepted documents keep their input order
+        errors: list[dict[str, Any]] = future.result()
+        rejected: set[int] = {error["index"] for error in errors}
+        for error in errors:
+            error["op"] = chunk[error["index"] - offset]
+            reject(error)
+        totals.rejected += len(errors)
+        totals.accepted += len(chunk) - len(errors)
+        totals.rejected_indexes.extend(error["index"] for error in errors)
+        for index, document in enumerate(chunk, offset):
+            if index not in rejected:
+                yield document
+
+    @staticmethod
+    def reporter(rejects: RejectSink | None) -> Callable[[dict[str, Any]], Any]:
+        """A callable that hands one reject to ``rejects`` (a callable, or a text sink written as JSON lines)."""
+        if rejects is None:
+            return lambda error: None
+        if callable(rejects):
+            return rejects
+        return lambda error: rejects.write(DocumentStream.to_json_line(error) + "\n")
@@ -0,0 +1,449 @@
+import copy
+import datetime
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping, Optional
+
+from pymongo import DeleteMany, MongoClient, ReplaceOne
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from pymongo_aggregation import LocalAggregation, freeze
+
+# Where view definitions and their resume tokens are kept, one collection per database
+STATE_COLLECTION: str = "materialized_views"
+# Stages that keep a one-to-one (or filtering) relationship between source and view documents and read nothing
+# but the source document; $lookup/$graphLookup/$unionWith read collections whose changes the view never sees
+_PER_DOCUMENT_STAGES: frozenset[str] = frozenset({"$match", "$project", "$addFields", "$set", "$unset"})
+_FOREIGN_STAGES: frozenset[str] = frozenset({"$lookup", "$graphLookup", "$unionWith"})
+_OUTPUT_STAGES: frozenset[str] = frozenset({"$out", "$merge"})
+_DOCUMENT_EVENTS: frozenset[str] = frozenset({"insert", "update", "replace", "delete"})
+# Events after which the change stream is closed and the view must be rebuilt
+_REBUILD_EVENTS: frozenset[str] = frozenset({"drop", "rename", "dropDatabase", "invalidate"})
+
+
+@dataclass(frozen=True)
+class ViewPlan:
+    """How a pipeline is maintained: per source document, or per ``$group`` key.
+
+    ``before`` runs ahead of the ``$group`` (all of the pipeline for per-document views) and
+    ``after`` behind it. View documents are keyed by ``_id``: the source document's ``_id`` or the
+    group key, so ``_id: 0`` projections are dropped from the stored pipeline.
+    """
+
+    before: list[dict[str, Any]]
+    group: Optional[dict[str, Any]]
+    after: list[dict[str, Any]]
+    rewrites: tuple[str, ...] = ()
+
+    @property
+    def grouped(self) -> bool:
+        return self.group is not None
+
+    @property
+    def pipeline(self) -> list[dict[str, Any]]:
+        return [*self.before, *([{"$group": self.group}] if self.group is not None else []), *self.after]
+
+    @staticmethod
+    def of(pipeline: list[dict[str, Any]]) -> "ViewPlan":
+        if not isinstance(pipeline, list) or not all(isinstance(stage, Mapping) and len(stage) == 1 for stage in pipeline):
+            raise ValueError("Pipeline must be a list of single-field stage documents.")
+        stages: list[tuple[str, Any]] = [next(iter(stage.items())) for stage in pipeline]
+        if stages and stages[-1][0] in _OUTPUT_STAGES:
+            stages = stages[:-1]
+        rewrites: list[str] = []
+        before: list[dict[str, Any]] = []
+        group: Optional[dict[str, Any]] = None
+        after: list[dict[str, Any]] = []
+        for position, (name, spec) in enumerate(stages):
+            if name == "$group":
+                if group is not None:
+                    raise ValueError("Materialized views support at most one $group stage.")
+                group = copy.deepcopy(spec)
+                continue
+            if name == "$unwind" and group is None:
+                before.append({name: copy.deepcopy(spec)})
+                continue
+            if name == "$sort" and (group is not None or position == len(stages) - 1):
+                rewrites.append(f"Dropped $sort at stage {position}: a collection has no order.")
+                continue
+            if name in _FOREIGN_STAGES:
+                raise ValueError(f"Stage {name} cannot be maintained incrementally: only the source collection is watched, "
+                                 f"so changes to the collection it reads would never refresh the view.")
+            if name not in _PER_DOCUMENT_STAGES:
+                raise ValueError(f"Stage {name} cannot be maintained incrementally.")
+            stage: Optional[dict[str, Any]] = ViewPlan.__keep_id(name, spec)
+            if stage is None:
+                rewrites.append(f"Dropped stage {position} ({name}), which only removed _id.")
+            else:
+                if stage != {name: spec}:
+                    rewrites.append(f"Kept _id in stage {position} ({name}): view documents are keyed by it.")
+                (after if group is not None else before).append(stage)
+        if group is None and any("$unwind" in stage for stage in before):
+            raise ValueError("$unwind without a $group would give view documents duplicate _id values.")
+        return ViewPlan(before, group, after, tuple(rewrites))
+
+    @property
+    def key_fields(self) -> Optional[dict[str, str]]:
+        """Group-key part -> source field when the key is plain field paths no earlier stage rewrites; None otherwise."""
+        if self.group is None:
+            return None
+        key: Any = self.group["_id"]
+        paths: dict[str, Any] = {"": key} if not isinstance(key, Mapping) else dict(key)
+        if not all(isinstance(path, str) and path.startswith("$") and not path.startswith("$$") for path in paths.values()):
+            return None
+        fields: dict[str, str] = {part: path[1:] for part, path in paths.items()}
+        touched: set[str] = set().union(*(ViewPlan.__assigned(stage) for stage in self.before)) if self.before else set()
+        if any(path.split(".")[0] in touched for path in fields.values()):
+            return None
+        return fields
+
+    @staticmethod
+    def __keep_id(name: str, spec: Any) -> Optional[dict[str, Any]]:
+        if name == "$project" and isinstance(spec, Mapping) and spec.get("_id") in (0, False):
+            remaining: dict[str, Any] = {key: value for key, value in spec.items() if key != "_id"}
+            return {name: remaining} if remaining else None
+        if name == "$unset" and "_id" in ([spec] if isinstance(spec, str) else spec):
+            remaining_names: list[str] = [item for item in spec if item != "_id"] if not isinstance(spec, str) else []
+            return {name: remaining_names} if remaining_names else None
+        return {name: spec}
+
+    @staticmethod
+    def __assigned(stage: Mapping[str, Any]) -> set[str]:
+        # Top-level fields a stage may change; anything touched by $project counts, inclusions are cheap to over-report
+        name, spec = next(iter(stage.items()))
+        if name in ("$project", "$addFields", "$set"):
+            return {key.split(".")[0] for key in spec}
+        if name == "$unset":
+            return {item.split(".")[0] for item in ([spec] if isinstance(spec, str) else spec)}
+        if name == "$unwind":
+            path: str = spec if isinstance(spec, str) else spec.get("path", "")
+            extra: set[str] = {spec["includeArrayIndex"]} if isinstance(spec, Mapping) and spec.get("includeArrayIndex") else set()
+            return {path.lstrip("$").split(".")[0], *extra}
+        return set()
+
+
+@dataclass
+class ViewRefresh:
+    events: int = 0
+    source_documents: int = 0
+    keys: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    rebuilt: bool = False
+    seconds: float = 0.0
+
+    def merge(self, other: "ViewRefresh") -> None:
+        self.events += other.events
+        self.source_documents += other.source_documents
+        self.keys += other.keys
+        self.upserted += other.upserted
+        self.deleted += other.deleted
+        self.rebuilt = self.rebuilt or other.rebuilt
+        self.seconds += other.seconds
+
+
+@dataclass
+class _Batch:
+    events: int = 0
+    ids: dict[Any, Any] = field(default_factory=dict)
+    rebuild: bool = False
+
+
+class MaterializedView:
+    """A view collection kept up to date with ``$merge`` instead of rewriting it with ``$out``.
+
+    ``register`` stores the definition (in the ``materialized_views`` collection of the same
+    database) and builds the view once. Afterwards a change stream on the source drives
+    ``refresh``: only the changed source documents are re-read, and only the view documents for
+    their old and new keys are recomputed. For ``$group`` pipelines the source-``_id`` -> group key
+    mapping is kept in ``<target>__keys`` so deletes and key changes find the groups to fix. The
+    resume token is persisted after every applied batch, so a restarted process continues where
+    the last one stopped. Change streams need a replica set or sharded cluster.
+    """
+
+    _running: "weakref.WeakSet[MaterializedView]" = weakref.WeakSet()
+
+    def __init__(self, client: MongoClient, database_name: str, name: str, source: str, pipeline: list[dict[str, Any]],
+                 target: str | None = None, batch_size: int = 1000, max_await_time_ms: int = 1000, retry_seconds: float = 5.0) -> None:
+        if client is None:
+            raise ConnectionError("MongoDB client is None. Could not establish connection.")
+        if not database_name:
+            raise ValueError("Database name must not be empty.")
+        if not name:
+            raise ValueError("View name must not be empty.")
+        if not source:
+            raise ValueError("Source collection name must not be empty.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        self.client: MongoClient = client
+        self.database_name: str = database_name
+        self.name: str = name
+        self.source: str = source
+        self.pipeline: list[dict[str, Any]] = copy.deepcopy(pipeline)
+        self.target: str = target or MaterializedView.__output_of(pipeline) or name
+        if self.target == source:
+            raise ValueError("A materialized view must not write into its own source collection.")
+        self.plan: ViewPlan = ViewPlan.of(pipeline)
+        self.batch_size: int = batch_size
+        self.max_await_time_ms: int = max_await_time_ms
+        self.retry_seconds: float = retry_seconds
+        self.last_refresh: ViewRefresh = ViewRefresh()
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def keys_collection(self) -> str:
+        return f"{self.target}__keys"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @classmethod
+    def load(cls, client: MongoClient, database_name: str, name: str) -> Optional["MaterializedView"]:
+        state: Optional[Mapping[str, Any]] = client[database_name][STATE_COLLECTION].find_one({"_id": name})
+        if state is None:
+            return None
+        return cls(client, database_name, name, state["source"], state["pipeline"], state["target"])
+
+    @classmethod
+    def names(cls, client: MongoClient, database_name: str) -> list[str]:
+        return [state["_id"] for state in client[database_name][STATE_COLLECTION].find({}, {"_id": 1})]
+
+    def register(self) -> ViewRefresh:
+        """Save the definition and build the view unless it was already built from the same pipeline."""
+        state: Optional[Mapping[str, Any]] = self.status()
+        if state is not None and state.get("pipeline_key") == self.__pipeline_key() and state.get("resume_token") is not None:
+            logging.info(f"Materialized view '{self.name}' is already built; catching up from its resume token.")
+            return self.refresh()
+        for rewrite in self.plan.rewrites:
+            logging.info(f"Materialized view '{self.name}': {rewrite}")
+        self.__state().replace_one({"_id": self.name}, {
+            "_id": self.name, "source": self.source, "target": self.target, "pipeline": self.pipeline, "pipeline_key": self.__pipeline_key(),
+            "grouped": self.plan.grouped, "resume_token": None, "built_at": None, "refreshed_at": None,
+        }, upsert=True)
+        return self.build()
+
+    def build(self) -> ViewRefresh:
+        """Rebuild the view from scratch with ``$merge``; changes made meanwhile are replayed by the next refresh."""
+        start: float = time.perf_counter()
+        with self._lock:
+            # The token is taken before the build, so nothing written during it is missed
+            with self.__source().watch(self.__stream_pipeline()) as stream:
+                token: Any = stream.resume_token
+            database = self.client[self.database_name]
+            database.drop_collection(self.target)
+            database.drop_collection(self.keys_collection)
+            self.__source().aggregate([*self.plan.pipeline, self.__merge_stage(self.target)])
+            if self.plan.grouped:
+                self.__source().aggregate([*self.__key_pipeline(), self.__merge_stage(self.keys_collection)])
+            now = datetime.datetime.now(datetime.timezone.utc)
+            self.__state().update_one({"_id": self.name}, {"$set": {"resume_token": token, "built_at": now, "refreshed_at": now}})
+        result = ViewRefresh(rebuilt=True, seconds=time.perf_counter() - start)
+        logging.info(f"Materialized view '{self.name}' built into '{self.target}' in {result.seconds:.2f}s.")
+        return result
+
+    def refresh(self, max_events: int | None = None) -> ViewRefresh:
+        """Apply every change recorded since the persisted resume token (at most ``max_events``), then return."""
+        total = ViewRefresh()
+        token: Any = (self.status() or {}).get("resume_token")
+        if token is None:
+            return self.register() if self.status() is None else self.build()
+        with self.__source().watch(self.__stream_pipeline(), resume_after=token, max_await_time_ms=self.max_await_time_ms) as stream:
+            while max_events is None or total.events < max_events:
+                limit: int = self.batch_size if max_events is None else min(self.batch_size, max_events - total.events)
+                applied: ViewRefresh = self.__apply(self.__collect(stream, limit), stream.resume_token)
+                total.merge(applied)
+                if applied.rebuilt or not applied.events:
+                    break
+        self.last_refresh = total
+        return total
+
+    def start(self) -> "MaterializedView":
+        """Keep the view current from a background thread until ``stop``."""
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.__run, name=f"materialized-view-{self.name}", daemon=True)
+        self._thread.start()
+        MaterializedView._running.add(self)
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout if timeout is not None else self.max_await_time_ms / 1000 + 1)
+        MaterializedView._running.discard(self)
+
+    @classmethod
+    def stop_all(cls) -> None:
+        for view in list(cls._running):
+            view.stop()
+
+    def drop(self, drop_target: bool = False) -> None:
+        """Stop maintaining the view (in this process) and forget its definition; the target is kept unless ``drop_target``."""
+        for view in [self, *MaterializedView._running]:
+            if view.database_name == self.database_name and view.name == self.name:
+                view.stop()
+        database = self.client[self.database_name]
+        database.drop_collection(self.keys_collection)
+        if drop_target:
+            database.drop_collection(self.target)
+        self.__state().delete_one({"_id": self.name})
+
+    def status(self) -> Optional[dict[str, Any]]:
+        return self.__state().find_one({"_id": self.name})
+
+    def __run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                token: Any = (self.status() or {}).get("resume_token")
+                if token is None:
+                    self.build()
+                    continue
+                with self.__source().watch(self.__stream_pipeline(), resume_after=token, max_await_time_ms=self.max_await_time_ms) as stream:
+                    logging.info(f"Maintaining materialized view '{self.name}' from '{self.database_name}.{self.source}'.")
+                    while not self._stop.is_set() and stream.alive:
+                        applied: ViewRefresh = self.__apply(self.__collect(stream, self.batch_size), stream.resume_token)
+                        if applied.events:
+                            self.last_refresh = applied
+                        if applied.rebuilt:
+                            break
+            except PyMongoError as ex:
+                logging.warning(f"Materialized view '{self.name}' change stream failed: {ex}")
+                self._stop.wait(self.retry_seconds)
+
+    def __collect(self, stream: Any, limit: int) -> _Batch:
+        """Read up to ``limit`` events, stopping early when the stream has nothing more right now."""
+        batch = _Batch()
+        while batch.events < limit and stream.alive:
+            change: Optional[Mapping[str, Any]] = stream.try_next()
+            if change is None:
+                break
+            batch.events += 1
+            operation: Optional[str] = change.get("operationType")
+            if operation in _REBUILD_EVENTS:
+                batch.rebuild = True
+                break
+            if operation in _DOCUMENT_EVENTS:
+                document_id: Any = change["documentKey"]["_id"]
+                batch.ids.setdefault(freeze(document_id), document_id)
+        return batch
+
+    def __apply(self, batch: _Batch, token: Any) -> ViewRefresh:
+        if batch.rebuild:
+            logging.info(f"Source of materialized view '{self.name}' was dropped or renamed; rebuilding.")
+            result: ViewRefresh = self.build()
+            result.events = batch.events
+            return result
+        start: float = time.perf_counter()
+        result = ViewRefresh(events=batch.events, source_documents=len(batch.ids))
+        with self._lock:
+            if batch.ids:
+                ids: list[Any] = list(batch.ids.values())
+                if self.plan.grouped:
+                    self.__refresh_groups(ids, result)
+                else:
+                    self.__refresh_documents(ids, result)
+            if batch.events:
+                self.__state().update_one({"_id": self.name}, {"$set": {
+                    "resume_token": token, "refreshed_at": datetime.datetime.now(datetime.timezone.utc)}})
+        result.seconds = time.perf_counter() - start
+        if batch.ids:
+            logging.info(f"Materialized view '{self.name}': {result.events} change(s), {result.keys} key(s) recomputed, "
+                         f"{result.upserted} upserted, {result.deleted} deleted in {result.seconds * 1000:.1f} ms.")
+        return result
+
+    def __refresh_documents(self, ids: list[Any], result: ViewRefresh) -> None:
+        # A view document's key is its source document's _id
+        result.keys += len(ids)
+        self.__write(ids, [{"$match": {"_id": {"$in": ids}}}, *self.plan.pipeline], result)
+
+    def __refresh_groups(self, ids: list[Any], result: ViewRefresh) -> None:
+        keys_collection: Collection = self.client[self.database_name][self.keys_collection]
+        affected: dict[Any, Any] = {}
+        for mapping in keys_collection.find({"_id": {"$in": ids}}):
+            for key in mapping["keys"]:
+                affected.setdefault(freeze(key), key)
+        current: list[dict[str, Any]] = list(self.__source().aggregate([{"$match": {"_id": {"$in": ids}}}, *self.__key_pipeline()]))
+        for mapping in current:
+            for key in mapping["keys"]:
+                affected.setdefault(freeze(key), key)
+
+        keys: list[Any] = list(affected.values())
+        result.keys += len(keys)
+        for offset in range(0, len(keys), self.batch_size):
+            chunk: list[Any] = keys[offset:offset + self.batch_size]
+            self.__write(chunk, self.__group_pipeline(chunk), result)
+
+        mapped: set[Any] = {freeze(mapping["_id"]) for mapping in current}
+        operations: list[Any] = [ReplaceOne({"_id": mapping["_id"]}, mapping, upsert=True) for mapping in current]
+        gone: list[Any] = [document_id for document_id in ids if freeze(document_id) not in mapped]
+        if gone:
+            operations.append(DeleteMany({"_id": {"$in": gone}}))
+        if operations:
+            keys_collection.bulk_write(operations, ordered=False)
+
+    def __write(self, keys: list[Any], pipeline: list[dict[str, Any]], result: ViewRefresh) -> None:
+        """Recompute the view documents for ``keys``: upsert what the pipeline produces, delete the keys it no longer does."""
+        documents: list[dict[str, Any]] = list(self.__source().aggregate(pipeline))
+        produced: set[Any] = {freeze(document["_id"]) for document in documents}
+        vanished: list[Any] = [key for key in keys if freeze(key) not in produced]
+        operations: list[Any] = [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents]
+        if vanished:
+            operations.append(DeleteMany({"_id": {"$in": vanished}}))
+        if operations:
+            self.client[self.database_name][self.target].bulk_write(operations, ordered=False)
+        result.upserted += len(documents)
+        result.deleted += len(vanished)
+
+    def __group_pipeline(self, keys: list[Any]) -> list[dict[str, Any]]:
+        """The view pipeline restricted to the groups in ``keys``, filtering on the source fields when possible."""
+        fields: Optional[dict[str, str]] = self.plan.key_fields
+        if fields is not None:
+            if "" in fields:
+                restriction: dict[str, Any] = {fields[""]: {"$in": keys}}
+            else:
+                restriction = {"$or": [{path: key.get(part) for part, path in fields.items()} for key in keys]}
+            return [{"$match": restriction}, *self.plan.pipeline]
+        return [*self.plan.before, {"$match": {"$expr": {"$in": [self.plan.group["_id"], {"$literal": keys}]}}},
+                {"$group": self.plan.group}, *self.plan.after]
+
+    def __key_pipeline(self) -> list[dict[str, Any]]:
+        return [*self.plan.before, {"$group": {"_id": "$_id", "keys": {"$addToSet": self.plan.group["_id"]}}}]
+
+    @staticmethod
+    def __merge_stage(target: str) -> dict[str, Any]:
+        return {"$merge": {"into": target, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+
+    @staticmethod
+    def __stream_pipeline() -> list[dict[str, Any]]:
+        # Views are recomputed from the source, so only the changed _id has to travel
+        return [{"$project": {"operationType": 1, "documentKey": 1}}]
+
+    @staticmethod
+    def __output_of(pipeline: Iterable[Mapping[str, Any]]) -> Optional[str]:
+        for stage in pipeline:
+            target: Any = stage.get("$out", stage.get("$merge"))
+            if isinstance(target, Mapping):
+                # {"$out": {"db": ..., "coll": ...}} or {"$merge": {"into": "name" | {"db": ..., "coll": ...}}}
+                target = target.get("into", target)
+                target = target.get("coll") if isinstance(target, Mapping) else target
+            if isinstance(target, str):
+                return target
+        return None
+
+    def __pipeline_key(self) -> str:
+        return LocalAggregation.pipeline_key([*self.plan.pipeline, {"$merge": self.target}])
+
+    def __source(self) -> Collection:
+        return self.client[self.database_name][self.source]
+
+    def __state(self) -> Collection:
+        return self.client[self.database_name][STATE_COLLECTION]
+
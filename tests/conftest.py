@@ -0,0 +1,15 @@
+import os
+import sys
+from typing import Any
+
+import pytest
+
+# The modules live at the repository root rather than in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database() -> Any:
+    """An in-memory database standing in for a server; tests using it are skipped without mongomock."""
+    mongomock = pytest.importorskip("mongomock")
+    return mongomock.MongoClient()["test"]
@@ -0,0 +1,127 @@
+from typing import Any
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from pymongo_advisor import IndexAdvisor, QueryLog, QueryShape
+from pymongo_indexes import IndexSpec
+
+ID_INDEX = {"v": 2, "key": {"_id": 1}, "name": "_id_"}
+
+
+def find_explain(plan: dict[str, Any], examined: int, returned: int) -> dict[str, Any]:
+    return {"queryPlanner": {"winningPlan": plan},
+            "executionStats": {"nReturned": returned, "totalDocsExamined": examined, "totalKeysExamined": 0, "executionTimeMillis": 3}}
+
+
+SCAN_AND_SORT = find_explain({"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}, 1000, 4)
+INDEXED = find_explain({"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "maker_1_year_-1_price_1"}}, 4, 4)
+LOOKUP_SCAN = {"stages": [{"$cursor": SCAN_AND_SORT | {"executionStats": {**SCAN_AND_SORT["executionStats"], "nReturned": 50}}},
+                          {"$lookup": {"from": "orders", "as": "orders"}, "collectionScans": 50, "indexesUsed": [], "nReturned": 50}]}
+
+
+class Database:
+    def __init__(self, client: "Client", name: str) -> None:
+        self.client = client
+        self.name = name
+
+    def command(self, command: dict[str, Any]) -> dict[str, Any]:
+        self.client.commands.append(command)
+        if isinstance(self.client.explain, Exception):
+            raise self.client.explain
+        return self.client.explain
+
+    def __getitem__(self, name: str) -> "Collection":
+        return Collection(self.client.indexes.get(f"{self.name}.{name}", [ID_INDEX]))
+
+
+class Collection:
+    def __init__(self, indexes: list[dict[str, Any]]) -> None:
+        self.indexes = indexes
+
+    def list_indexes(self) -> list[dict[str, Any]]:
+        return self.indexes
+
+
+class Client:
+    """Answers every explain with the same canned executionStats document."""
+
+    def __init__(self, explain: Any, indexes: dict[str, list[dict[str, Any]]] | None = None) -> None:
+        self.explain = explain
+        self.indexes = indexes or {}
+        self.commands: list[dict[str, Any]] = []
+
+    def __getitem__(self, name: str) -> Database:
+        return Database(self, name)
+
+
+CARS_QUERY = QueryShape("fetch_document", "find", "Test", "cars", {"price": {"$gte": 500000}, "maker": "Tata"}, (("year", -1),))
+
+
+def test_scanning_query_gets_an_equality_sort_range_index() -> None:
+    [finding] = IndexAdvisor.analyze(Client(SCAN_AND_SORT), [CARS_QUERY])
+
+    assert finding.stats is not None and finding.stats.collection_scan and finding.stats.in_memory_sort
+    assert finding.issues == ["COLLSCAN: 1000 document(s) examined for 4 returned", "in-memory SORT",
+                              "examined/returned ratio 250.0 exceeds 10"]
+    assert finding.recommendations == [("Test.cars", IndexSpec.of([("maker", 1), ("year", -1), ("price", 1)]))]
+
+
+def test_existing_index_with_the_same_leading_keys_is_not_recommended_again() -> None:
+    existing = {"Test.cars": [ID_INDEX, {"v": 2, "key": {"maker": 1, "year": -1, "price": 1, "model": 1}, "name": "covering"}]}
+
+    [finding] = IndexAdvisor.analyze(Client(SCAN_AND_SORT, existing), [CARS_QUERY])
+
+    assert finding.issues and not finding.recommendations
+
+
+def test_indexed_query_has_no_issues() -> None:
+    [finding] = IndexAdvisor.analyze(Client(INDEXED), [CARS_QUERY])
+
+    assert finding.stats is not None and finding.stats.indexes == ("maker_1_year_-1_price_1",)
+    assert not finding.issues and not finding.recommendations
+    assert "✅ no issues" in IndexAdvisor.report([finding])
+
+
+def test_lookup_scanning_the_foreign_collection_gets_a_foreign_field_index() -> None:
+    pipeline = [{"$match": {"status": "active"}}, {"$lookup": {"from": "orders", "localField": "_id", "foreignField": "user_id", "as": "orders"}},
+                {"$out": "joined"}]
+    client = Client(LOOKUP_SCAN)
+
+    [finding] = IndexAdvisor.analyze(client, [QueryShape("join", "aggregate", "store_db", "users", pipeline=pipeline)])
+
+    assert client.commands[0]["explain"]["pipeline"] == pipeline[:2]
+    assert "$lookup into 'orders' ran 50 collection scan(s)" in finding.issues
+    assert finding.recommendations == [("store_db.users", IndexSpec.of("status")), ("store_db.orders", IndexSpec.of("user_id"))]
+
+
+def test_failed_explain_is_reported() -> None:
+    [finding] = IndexAdvisor.analyze(Client(OperationFailure("ns does not exist")), [CARS_QUERY])
+
+    assert finding.stats is None and finding.error == "ns does not exist"
+    assert "❌ explain failed: ns does not exist" in IndexAdvisor.report([finding])
+
+
+def test_recommendations_drop_indexes_covered_by_a_longer_one() -> None:
+    [first] = IndexAdvisor.analyze(Client(SCAN_AND_SORT), [QueryShape("fetch_document", "find", "Test", "cars", {"maker": "Tata"})])
+    [second] = IndexAdvisor.analyze(Client(SCAN_AND_SORT), [CARS_QUERY])
+
+    assert IndexAdvisor.recommendations([first, second, second]) == {"Test.cars": [IndexSpec.of([("maker", 1), ("year", -1), ("price", 1)])]}
+
+
+def test_query_log_groups_filters_by_shape(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(QueryLog, "enabled", True)
+    monkeypatch.setattr(QueryLog, "max_shapes", 3)
+    QueryLog.clear()
+
+    QueryLog.record("find", "Test", "cars", {"maker": "Tata"})
+    QueryLog.record("delete", "Test", "cars", {"price": {"$lt": 5}}, many=False)
+    QueryLog.record("find", "Test", "cars", {"maker": "Hyundai"})
+    QueryLog.record("update", "Test", "cars", {"maker": 7})
+    QueryLog.record("find", "Test", "cars", {"model": "Nexon"})
+
+    shapes = QueryLog.shapes()
+    QueryLog.clear()
+    assert [(shape.source, shape.filter, count) for shape, count in shapes] == [("fetch_document", {"maker": "Hyundai"}, 2),
+                                                                                ("update_document", {"maker": 7}, 1),
+                                                                                ("fetch_document", {"model": "Nexon"}, 1)]
@@ -0,0 +1,213 @@
+from typing import Any
+
+import pytest
+
+from pymongo_aggregation import AggregationError, LocalAggregation
+from pymongo_pipelines import Pipelines
+
+MODELS: list[str] = ["Creta", "Baleno", "XUV500", "City", "Nexon", "Venue", "i20", "Swift", "Harrier", "Amaze", "Nexon EV", "Kona Electric",
+                     "WagonR", "Amaze"]
+MAKERS: list[str] = ["Hyundai", "Maruti Suzuki", "Mahindra", "Honda", "Tata", "Hyundai", "Hyundai", "Maruti Suzuki", "Tata", "Honda", "Tata",
+                     "Hyundai", "Maruti Suzuki", "Honda"]
+PRICES: list[int] = [1500000, 800000, 1800000, 1200000, 1100000, 1200000, 900000, 750000, 2000000, 1000000, 1400000, 2300000, 600000, 800000]
+
+# Expected results over Pipelines.get_cars_data(), worked out by hand from the sample documents
+GOLDEN: dict[str, list[dict[str, Any]]] = {
+    "pipeline_1": [
+        {"fuel_type": "CNG", "total_cars": 2, "engine_over_1000_cc": 1},
+        {"fuel_type": "DIESEL", "total_cars": 4, "engine_over_1000_cc": 4},
+        # Electric cars have no engine.cc, and a missing field is never greater than a number
+        {"fuel_type": "ELECTRIC", "total_cars": 2, "engine_over_1000_cc": 0},
+        {"fuel_type": "PETROL", "total_cars": 6, "engine_over_1000_cc": 5},
+    ],
+    "pipeline_2": [{"model": model, "is_diesel": diesel}
+                   for model, diesel in zip(MODELS, [True, False, True, False, False, False, False, False, True, True, False, False, False, False])],
+    # Strings sort by code point, so the lowercase "i20" comes last; $avg always returns a double
+    "pipeline_3": [{"model": model, "average_price": price} for model, price in [
+        ("Amaze", 900000.0), ("Baleno", 800000.0), ("City", 1200000.0), ("Creta", 1500000.0), ("Harrier", 2000000.0),
+        ("Kona Electric", 2300000.0), ("Nexon", 1100000.0), ("Nexon EV", 1400000.0), ("Swift", 750000.0), ("Venue", 1200000.0),
+        ("WagonR", 600000.0), ("XUV500", 1800000.0), ("i20", 900000.0)]],
+    # $out returns no documents
+    "pipeline_4": [],
+    "pipeline_5": [{"model": model, "new_price": price + 55000} for model, price in zip(MODELS, PRICES)],
+    "pipeline_6": [{"model": model, "price": price, "price_in_lakhs": lakhs} for model, price, lakhs in zip(MODELS, PRICES, [
+        "15 lakhs", "8 lakhs", "18 lakhs", "12 lakhs", "11 lakhs", "12 lakhs", "9 lakhs", "7.5 lakhs", "20 lakhs", "10 lakhs", "14 lakhs",
+        "23 lakhs", "6 lakhs", "8 lakhs"])],
+    "pipeline_7": [{"model": "Creta", "total_service_cost": 17000}, {"model": "Venue", "total_service_cost": 12000},
+                   {"model": "i20", "total_service_cost": 9500}, {"model": "Kona Electric", "total_service_cost": 8000}],
+    "pipeline_8": [{"maker": maker, "model": model, "fuel_cat": "Petrol_car" if petrol else "Non_petrol_car"}
+                   for maker, model, petrol in zip(MAKERS, MODELS, [False, True, False, True, True, True, True, True, False, False, False, False,
+                                                                   False, False])],
+    "pipeline_9": [{"maker": maker, "model": model, "budget_cat": "Premium" if price >= 1000000 else "Mid_range"}
+                   for maker, model, price in zip(MAKERS, MODELS, PRICES)],
+    "pipeline_10": [{"maker": "Hyundai", "model": "Creta", "total_service_cost": 17000, "cost_status": "High"},
+                    {"maker": "Hyundai", "model": "Venue", "total_service_cost": 12000, "cost_status": "High"},
+                    {"maker": "Hyundai", "model": "i20", "total_service_cost": 9500, "cost_status": "Low"},
+                    {"maker": "Hyundai", "model": "Kona Electric", "total_service_cost": 8000, "cost_status": "Low"}],
+}
+
+# Stages and operators outside the library pipelines, so compiled and interpreted runs are compared on more than the golden cases
+EXTRA_PIPELINES: list[list[dict[str, Any]]] = [
+    [{"$project": {"_id": 0, "engine": {"cc": 1}, "maker": 1}}],
+    [{"$project": {"engine": {"torque": 0, "type": 0}, "owners": 0, "service_history": 0, "features": 0}}],
+    [{"$project": {"_id": 0, "owners.name": 1, "engine": {"big": {"$gt": ["$engine.cc", 1200]}}}}],
+    [{"$unset": ["features", "owners"]}, {"$sort": {"price": -1, "model": 1}}, {"$skip": 2}, {"$limit": 5}],
+    [{"$match": {"price": {"$gte": 800000, "$lt": 1500000}, "fuel_type": {"$in": ["Petrol", "CNG"]}}},
+     {"$addFields": {"discounted": {"$multiply": ["$price", 0.9]}, "engine.size": {"$ifNull": ["$engine.cc", "n/a"]}}}],
+    [{"$group": {"_id": {"maker": "$maker", "transmission": "$transmission"}, "models": {"$push": "$model"},
+                 "fuels": {"$addToSet": "$fuel_type"}, "cheapest": {"$min": "$price"}, "dearest": {"$max": "$price"}, "count": {"$count": {}}}},
+     {"$sort": {"_id.maker": 1, "_id.transmission": 1}}],
+    [{"$match": {"$or": [{"sunroof": True}, {"airbags": {"$gt": 4}}], "features": "Sunroof"}},
+     {"$project": {"_id": 0, "model": 1, "label": {"$concat": [{"$toLower": "$maker"}, "-", {"$toString": "$airbags"}]},
+                   "services": {"$size": "$service_history"}}}],
+]
+
+
+def run(pipeline: list[dict[str, Any]], compiled: bool, store: dict[str, list[dict[str, Any]]] | None = None) -> list[dict[str, Any]]:
+    return list(LocalAggregation.aggregate(Pipelines.get_cars_data(), pipeline, store, compiled=compiled))
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("name", sorted(GOLDEN))
+def test_library_pipelines_match_golden_results(name: str, compiled: bool) -> None:
+    assert run(getattr(Pipelines, name)(), compiled) == GOLDEN[name]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_out_replaces_target_collection(compiled: bool) -> None:
+    store: dict[str, list[dict[str, Any]]] = {"hyundai_cars": [{"stale": True}]}
+
+    run(Pipelines.pipeline_4(), compiled, store)
+
+    # The pipeline concatenates the literal strings "maker" and "model", not the fields
+    assert store["hyundai_cars"] == [{"car_name": "MAKER MODEL"}] * 4
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_join_pipeline_matches_golden_results(compiled: bool) -> None:
+    orders = Pipelines.get_orders_data()
+    by_id = {order["_id"]: order for order in orders}
+    expected = [{**user, "orders": [by_id[order_id] for order_id in order_ids]} for user, order_ids in zip(
+        Pipelines.get_users_data(), [["order1", "order3"], ["order2"], ["order4"], ["order5"], []])]
+
+    assert list(LocalAggregation.aggregate(Pipelines.get_users_data(), Pipelines.join_pipeline(), {"orders": orders}, compiled=compiled)) == expected
+
+
+@pytest.mark.parametrize("pipeline", [getattr(Pipelines, name)() for name in sorted(GOLDEN)] + EXTRA_PIPELINES)
+def test_compiled_matches_interpreted(pipeline: list[dict[str, Any]]) -> None:
+    compiled_store: dict[str, list[dict[str, Any]]] = {}
+    interpreted_store: dict[str, list[dict[str, Any]]] = {}
+
+    compiled = run(pipeline, True, compiled_store)
+    interpreted = run(pipeline, False, interpreted_store)
+
+    assert compiled == interpreted
+    # Field order is part of the result too
+    assert [list(document) for document in compiled] == [list(document) for document in interpreted]
+    assert compiled_store == interpreted_store
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_nested_projection_is_read_as_paths(compiled: bool) -> None:
+    documents = [{"_id": 1, "engine": {"cc": 1197, "torque": "113 Nm"}, "price": 800000}]
+
+    included = LocalAggregation.aggregate(documents, [{"$project": {"_id": 0, "engine": {"cc": 1}}}], compiled=compiled)
+    excluded = LocalAggregation.aggregate(documents, [{"$project": {"engine": {"torque": 0}}}], compiled=compiled)
+    computed = LocalAggregation.aggregate(documents, [{"$project": {"_id": 0, "engine": {"big": {"$gt": ["$engine.cc", 1000]}}}}],
+                                          compiled=compiled)
+
+    assert list(included) == [{"engine": {"cc": 1197}}]
+    assert list(excluded) == [{"_id": 1, "engine": {"cc": 1197}, "price": 800000}]
+    assert list(computed) == [{"engine": {"big": True}}]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_empty_sub_projection_is_rejected(compiled: bool) -> None:
+    with pytest.raises(AggregationError):
+        list(LocalAggregation.aggregate([{"engine": {}}], [{"$project": {"engine": {}}}], compiled=compiled))
+
+
+class DriftingCollection:
+    """A collection whose server results disagree with its documents: every price comes back 1 higher."""
+
+    def __init__(self, collection: Any) -> None:
+        self.collection = collection
+        self.database = collection.database
+
+    def find(self, *args: Any, **kwargs: Any) -> Any:
+        return self.collection.find(*args, **kwargs)
+
+    def aggregate(self, pipeline: list[dict[str, Any]]) -> Any:
+        return ({**document, "price": document["price"] + 1} if "price" in document else document
+                for document in self.collection.aggregate(pipeline))
+
+
+@pytest.fixture
+def cars(database: Any) -> Any:
+    database["orders"].insert_many(Pipelines.get_orders_data())
+    database["users"].insert_many(Pipelines.get_users_data())
+    database["cars"].insert_many([{"_id": number, **car} for number, car in enumerate(Pipelines.get_cars_data())])
+    return database["cars"]
+
+
+@pytest.mark.parametrize("name", ["pipeline_1", "pipeline_3", "pipeline_4", "pipeline_7", "pipeline_9", "pipeline_10"])
+def test_differential_check_finds_no_differences_when_engines_agree(cars: Any, name: str) -> None:
+    assert LocalAggregation.differential_check(cars, getattr(Pipelines, name)()) == []
+    # $out is compared without writing
+    assert "hyundai_cars" not in cars.database.list_collection_names()
+
+
+def test_differential_check_reads_lookup_sources_from_the_database(cars: Any) -> None:
+    assert LocalAggregation.differential_check(cars.database["users"], Pipelines.join_pipeline()) == []
+
+
+def test_differential_check_reports_each_differing_document(cars: Any) -> None:
+    pipeline = [{"$match": {"maker": "Hyundai"}}, {"$project": {"_id": 0, "model": 1, "price": 1}}, {"$sort": {"price": 1}}]
+
+    differences = LocalAggregation.differential_check(DriftingCollection(cars), pipeline)
+
+    assert len(differences) == 4
+    assert differences[0].startswith("document 0: server") and "900001" in differences[0] and "900000" in differences[0]
+
+
+@pytest.fixture
+def compile_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(LocalAggregation, "compiled_cache_size", 2)
+    LocalAggregation.clear_compiled()
+    yield
+    LocalAggregation.clear_compiled()
+
+
+def test_structurally_equal_pipelines_share_one_compiled_pipeline(compile_cache: None) -> None:
+    compiled = LocalAggregation.compile([{"$match": {"maker": "Tata"}}])
+
+    assert LocalAggregation.compile([{"$match": {"maker": "Tata"}}]) is compiled
+    assert LocalAggregation.compile([{"$match": {"maker": "Honda"}}]) is not compiled
+    # Field order is part of the structure: it decides the order of output fields
+    assert LocalAggregation.pipeline_key([{"$project": {"a": 1, "b": 1}}]) != LocalAggregation.pipeline_key([{"$project": {"b": 1, "a": 1}}])
+    assert LocalAggregation.compile_stats() == {"hits": 1, "misses": 2, "cached": 2}
+
+
+def test_least_recently_used_pipeline_is_evicted(compile_cache: None) -> None:
+    first = LocalAggregation.compile([{"$limit": 1}])
+    LocalAggregation.compile([{"$limit": 2}])
+    LocalAggregation.compile([{"$limit": 1}])
+    LocalAggregation.compile([{"$limit": 3}])
+
+    assert LocalAggregation.compile([{"$limit": 1}]) is first
+    assert LocalAggregation.compile_stats() == {"hits": 2, "misses": 3, "cached": 2}
+    LocalAggregation.compile([{"$limit": 2}])
+    assert LocalAggregation.compile_stats()["misses"] == 4
+
+
+def test_compiled_pipelines_do_not_share_state_between_runs(compile_cache: None) -> None:
+    pipeline = [{"$set": {"tags": ["new"], "engine.checked": True}}]
+    documents = [{"engine": {"cc": 998}}]
+
+    first = list(LocalAggregation.aggregate(documents, pipeline))
+    first[0]["tags"].append("changed")
+    pipeline[0]["$set"]["tags"].append("edited after compiling")
+
+    assert list(LocalAggregation.aggregate(documents, [{"$set": {"tags": ["new"], "engine.checked": True}}])) == [
+        {"engine": {"cc": 998, "checked": True}, "tags": ["new"]}]
+    assert documents == [{"engine": {"cc": 998}}]
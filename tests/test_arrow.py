@@ -0,0 +1,48 @@
+import datetime
+import io
+from typing import Any
+
+import pytest
+from bson import Decimal128, ObjectId
+
+from pymongo_arrow import ArrowExport
+
+pytest.importorskip("pyarrow")
+
+
+def round_trip(documents: list[dict[str, Any]], file_format: str, **options: Any) -> list[dict[str, Any]]:
+    sink = io.BytesIO()
+    ArrowExport.write(documents, sink, file_format, **options)
+    sink.seek(0)
+    return list(ArrowExport.read(sink, file_format))
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_bson_values_survive_a_round_trip(file_format: str) -> None:
+    documents: list[dict[str, Any]] = [
+        {"_id": ObjectId(), "price": Decimal128("1999.99"), "updated": datetime.datetime(2024, 1, 1, 12, 30),
+         "engine": {"type": "Petrol", "cc": 1197}, "owners": [{"name": "Ravi"}], "rating": 4},
+        {"_id": ObjectId(), "price": Decimal128("850000"), "engine": {"type": "Electric", "cc": 0}, "owners": [], "rating": 4.5,
+         "tag": "city"},
+        {"_id": ObjectId(), "tag": 7},
+    ]
+
+    assert round_trip(documents, file_format) == documents
+
+
+def test_fields_outside_the_inferred_schema_are_counted_at_any_depth() -> None:
+    documents: list[dict[str, Any]] = [{"engine": {"type": "Petrol"}, "owners": [{"name": "Ravi"}]},
+                                       {"engine": {"type": "Electric", "battery_capacity": "40kWh"}, "owners": [{"name": "Asha", "city": "Pune"}],
+                                        "sunroof": True}]
+
+    stats = ArrowExport.write(documents, io.BytesIO(), "arrow", infer_rows=1)
+
+    assert stats.documents == 2
+    assert stats.dropped_fields == 3
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_empty_embedded_documents_survive_a_round_trip(file_format: str) -> None:
+    documents: list[dict[str, Any]] = [{"a": 1, "m": {}, "n": {"inner": {}}, "items": [{}]}, {"a": 2, "m": {}, "n": {"inner": {}}, "items": []}]
+
+    assert round_trip(documents, file_format) == documents
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from typing import Any, Iterator
+
+import pytest
+
+from pymongo_async import AsyncMongoDbOperation
+from pymongo_cache import NamespaceCache
+
+
+class Collection:
+    """Stands in for AsyncCollection: records inserts, and with ``block`` never finishes one until cancelled."""
+
+    def __init__(self, block: bool = False) -> None:
+        self.block = block
+        self.inserted: list[Any] = []
+        self.started = 0
+        self.cancelled = 0
+
+    async def insert_many(self, documents: list[Any], ordered: bool = True) -> None:
+        self.started += 1
+        try:
+            if self.block:
+                await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.inserted.extend(documents)
+
+
+class Client:
+    def __init__(self, collection: Collection) -> None:
+        self.databases = {"Test": {"cars": collection}}
+
+    def __getitem__(self, name: str) -> dict[str, Collection]:
+        return self.databases[name]
+
+
+@pytest.fixture
+def collection(monkeypatch: pytest.MonkeyPatch) -> Collection:
+    collection = Collection()
+
+    async def client(cls: Any) -> Client:
+        return Client(collection)
+
+    monkeypatch.setattr(AsyncMongoDbOperation, "_AsyncMongoDbOperation__client", classmethod(client))
+    monkeypatch.setattr(NamespaceCache, "optimistic", True)
+    return collection
+
+
+def test_documents_are_chunked_off_the_event_loop(collection: Collection) -> None:
+    threads: set[int] = set()
+
+    def documents() -> Iterator[dict[str, Any]]:
+        for number in range(10):
+            threads.add(threading.get_ident())
+            yield {"_id": number}
+
+    result = asyncio.run(AsyncMongoDbOperation.bulk_insert_documents("Test", "cars", documents(), chunk_size=3))
+
+    assert result is not None and result.inserted_count == 10 and len(collection.inserted) == 10
+    assert threading.get_ident() not in threads
+
+
+def test_failing_documents_cancel_chunks_in_flight(collection: Collection) -> None:
+    collection.block = True
+
+    def documents() -> Iterator[dict[str, Any]]:
+        for number in range(5):
+            yield {"_id": number}
+        raise RuntimeError("source failed")
+
+    async def load() -> None:
+        with pytest.raises(RuntimeError, match="source failed"):
+            await AsyncMongoDbOperation.bulk_insert_documents("Test", "cars", documents(), chunk_size=2, max_concurrency=8)
+        # Checked before asyncio.run cancels whatever is left at shutdown
+        assert collection.started == 2
+        assert collection.cancelled == collection.started
+
+    asyncio.run(load())
@@ -0,0 +1,77 @@
+from typing import Any
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import AutoReconnect, BulkWriteError, OperationFailure
+
+from pymongo_bulk import BulkLoader, ChunkInsert
+from pymongo_client import MongoClientRegistry
+from pymongo_tutorial import MongoDbOperation
+
+
+class FlakyCollection:
+    """Collects inserted documents; each call first raises the next scripted error, if any."""
+
+    def __init__(self, errors: list[Exception]) -> None:
+        self.errors = errors
+        self.inserted: list[Any] = []
+
+    def insert_many(self, documents: list[Any], ordered: bool = True) -> None:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.inserted.extend(documents)
+
+
+def transient(index: int, inserted: int) -> BulkWriteError:
+    return BulkWriteError({"nInserted": inserted, "writeErrors": [{"index": index, "code": 11600, "errmsg": "interrupted"}]})
+
+
+def test_connection_failure_is_retried() -> None:
+    attempts = ChunkInsert(["a", "b"], 0, False, max_retries=2, retry_backoff=0.1)
+
+    assert attempts.failed(AutoReconnect("reset")) == 0.1
+    assert attempts.pending == ["a", "b"]
+    attempts.succeeded()
+    assert (attempts.result.inserted_count, attempts.result.retried_chunks, attempts.pending) == (2, 1, [])
+
+
+def test_unexpected_error_fails_the_chunk() -> None:
+    attempts = ChunkInsert(["a", "b"], 10, False, max_retries=3, retry_backoff=0.1)
+
+    assert attempts.failed(OperationFailure("not authorized", code=13)) is None
+    assert attempts.pending == []
+    assert attempts.result.failed_chunks == 1
+    assert attempts.result.write_errors[0]["index"] == 10 and attempts.result.write_errors[0]["code"] == 13
+
+
+def test_ordered_transient_error_resends_the_rest() -> None:
+    attempts = ChunkInsert(["a", "b", "c"], 0, True, max_retries=1, retry_backoff=0.0)
+
+    attempts.failed(transient(1, inserted=1))
+    assert attempts.pending == ["b", "c"]
+    attempts.succeeded()
+    assert attempts.result.inserted_count == 3 and attempts.result.succeeded
+
+
+def test_retries_are_bounded() -> None:
+    attempts = ChunkInsert(["a"], 0, False, max_retries=1, retry_backoff=0.0)
+
+    attempts.failed(AutoReconnect("reset"))
+    assert attempts.failed(AutoReconnect("reset")) is None
+    assert attempts.result.failed_chunks == 1
+
+
+def test_load_records_failed_chunks_and_continues() -> None:
+    collection = FlakyCollection([OperationFailure("not authorized", code=13)])
+    result = BulkLoader.load(collection, ({"_id": number} for number in range(10)), chunk_size=5, max_workers=1)  # type: ignore[arg-type]
+
+    assert result.chunks == 2 and result.failed_chunks == 1
+    assert result.inserted_count == 5 and len(collection.inserted) == 5
+
+
+def test_unreachable_server_is_reported_not_raised(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
+    unreachable = MongoClient("mongodb://127.0.0.1:1", serverSelectionTimeoutMS=100, connect=False)
+    monkeypatch.setattr(MongoClientRegistry, "get_client", staticmethod(lambda uri: unreachable))
+
+    assert MongoDbOperation.bulk_insert_documents("Test", "cars", [{"_id": 1}]) is None
+    assert "Failed to insert document(s)" in capsys.readouterr().out
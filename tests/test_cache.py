@@ -0,0 +1,102 @@
+from typing import Any, Iterator
+
+import pytest
+
+from pymongo_cache import AggregationCache
+from pymongo_pipelines import Pipelines
+
+PIPELINE: list[dict[str, Any]] = [{"$group": {"_id": "$maker", "count": {"$sum": 1}}}, {"$sort": {"_id": 1}}]
+JOIN: list[dict[str, Any]] = [{"$lookup": {"from": "orders", "localField": "_id", "foreignField": "user_id", "as": "orders"}},
+                              {"$project": {"name": 1, "orders": {"$size": "$orders"}}}, {"$sort": {"_id": 1}}]
+
+
+@pytest.fixture
+def cache(database: Any, monkeypatch: pytest.MonkeyPatch) -> Any:
+    monkeypatch.setattr(AggregationCache, "enabled", True)
+    monkeypatch.setattr(AggregationCache, "ttl_seconds", 60.0)
+    AggregationCache.invalidate()
+    AggregationCache.reset_stats()
+    database["cars"].insert_many(Pipelines.get_cars_data())
+    database["users"].insert_many(Pipelines.get_users_data())
+    database["orders"].insert_many(Pipelines.get_orders_data())
+    yield database
+    AggregationCache.invalidate()
+
+
+class Runs:
+    """Counts how often the pipeline actually ran against the collection."""
+
+    def __init__(self, collection: Any, pipeline: list[dict[str, Any]]) -> None:
+        self.collection = collection
+        self.pipeline = pipeline
+        self.count = 0
+
+    def __call__(self) -> Iterator[Any]:
+        self.count += 1
+        return iter(self.collection.aggregate(self.pipeline))
+
+
+def fetch(database: Any, collection_name: str, pipeline: list[dict[str, Any]], runs: Runs, **options: Any) -> list[Any]:
+    return list(AggregationCache.fetch(database.client, database.name, collection_name, pipeline, runs, **options))
+
+
+def test_repeated_pipeline_is_served_from_the_cache(cache: Any) -> None:
+    runs = Runs(cache["cars"], PIPELINE)
+
+    first = fetch(cache, "cars", PIPELINE, runs)
+    second = fetch(cache, "cars", PIPELINE, runs)
+    second[0]["count"] = -1
+
+    assert runs.count == 1
+    assert first == list(cache["cars"].aggregate(PIPELINE))
+    assert fetch(cache, "cars", PIPELINE, runs) == first
+    assert AggregationCache.stats()["hits"] == 2
+
+
+def test_write_to_a_looked_up_collection_invalidates_the_join(cache: Any) -> None:
+    runs = Runs(cache["users"], JOIN)
+    fetch(cache, "users", JOIN, runs)
+
+    AggregationCache.invalidate(cache.client, cache.name, "cars")
+    fetch(cache, "users", JOIN, runs)
+    assert runs.count == 1
+
+    cache["orders"].delete_many({})
+    AggregationCache.invalidate(cache.client, cache.name, "orders")
+    results = fetch(cache, "users", JOIN, runs)
+
+    assert runs.count == 2
+    assert all(user["orders"] == 0 for user in results)
+
+
+def test_write_while_reading_is_not_stored(cache: Any) -> None:
+    runs = Runs(cache["cars"], PIPELINE)
+    documents = AggregationCache.fetch(cache.client, cache.name, "cars", PIPELINE, runs)
+    next(documents)
+    AggregationCache.invalidate(cache.client, cache.name, "cars")
+    list(documents)
+
+    fetch(cache, "cars", PIPELINE, runs)
+
+    assert runs.count == 2
+    assert AggregationCache.stats()["stale"] == 1
+
+
+def test_expired_and_volatile_results_run_again(cache: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    runs = Runs(cache["cars"], PIPELINE)
+    fetch(cache, "cars", PIPELINE, runs, ttl_seconds=0)
+    fetch(cache, "cars", PIPELINE, runs, ttl_seconds=0)
+    assert runs.count == 2
+
+    volatile: list[dict[str, Any]] = [{"$project": {"model": 1, "seen": "$$NOW"}}]
+    runs = Runs(cache["cars"], volatile)
+    fetch(cache, "cars", volatile, runs)
+    fetch(cache, "cars", volatile, runs)
+    assert runs.count == 2
+    assert AggregationCache.stats()["uncacheable"] == 2
+
+    monkeypatch.setattr(AggregationCache, "enabled", False)
+    runs = Runs(cache["cars"], PIPELINE)
+    fetch(cache, "cars", PIPELINE, runs)
+    fetch(cache, "cars", PIPELINE, runs)
+    assert runs.count == 2
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+import pymongo_client
+from pymongo_client import AsyncMongoClientRegistry
+
+
+class Client:
+    """Stands in for AsyncMongoClient: answers ping without a server."""
+
+    def __init__(self, uri: str, **options: Any) -> None:
+        self.admin = self
+        self.closed = False
+
+    async def command(self, command: str) -> dict[str, Any]:
+        return {"ok": 1}
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pymongo_client, "AsyncMongoClient", Client)
+    AsyncMongoClientRegistry._reset_after_fork()
+
+
+def get_client(loop: asyncio.AbstractEventLoop) -> Any:
+    return loop.run_until_complete(AsyncMongoClientRegistry.get_client("mongodb://localhost:27017"))
+
+
+def test_clients_are_reused_per_loop_and_not_across_loops() -> None:
+    first = asyncio.new_event_loop()
+    client = get_client(first)
+    assert get_client(first) is client
+    first.close()
+
+    second = asyncio.new_event_loop()
+    try:
+        assert get_client(second) is not client
+        assert len(AsyncMongoClientRegistry._clients) == 1
+        second.run_until_complete(AsyncMongoClientRegistry.shutdown())
+        assert not AsyncMongoClientRegistry._clients
+    finally:
+        second.close()
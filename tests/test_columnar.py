@@ -0,0 +1,56 @@
+from typing import Any
+
+import pytest
+
+from pymongo_aggregation import LocalAggregation
+from pymongo_columnar import ColumnarAggregation
+from pymongo_pipelines import Pipelines
+
+pytest.importorskip("numpy")
+
+GROUP: dict[str, Any] = {"$group": {"_id": "$k", "sum": {"$sum": "$v"}, "avg": {"$avg": "$v"}, "min": {"$min": "$v"}, "max": {"$max": "$v"},
+                                    "count": {"$count": {}}}}
+# Ints, doubles, strings, nulls, missing fields, arrays and an integer no double can hold exactly
+MIXED: list[dict[str, Any]] = [{"k": "a", "v": 1}, {"k": "a", "v": 2.5}, {"k": "b", "v": "x"}, {"k": "b", "v": None}, {"k": "c", "v": 2 ** 60},
+                               {"k": "c", "v": 1}, {"k": "d"}, {"k": "a", "v": [1, 2]}, {"k": None, "v": -3}]
+
+
+@pytest.mark.parametrize("name", [f"pipeline_{number}" for number in range(1, 11)])
+def test_library_pipelines_match_row_execution(name: str) -> None:
+    pipeline = getattr(Pipelines, name)()
+
+    # A batch size that does not divide the 14 cars exercises the partial last batch
+    assert list(ColumnarAggregation.aggregate(Pipelines.get_cars_data(), pipeline, {}, batch_size=4)) == list(
+        LocalAggregation.aggregate(Pipelines.get_cars_data(), pipeline, {}))
+
+
+@pytest.mark.parametrize("pipeline", [
+    [GROUP, {"$sort": {"_id": 1}}],
+    [{"$match": {"v": {"$gte": 1}}}, GROUP, {"$sort": {"_id": 1}}],
+    [{"$match": {"v": {"$ne": None}, "k": {"$in": ["a", "c"]}}}, GROUP, {"$sort": {"_id": 1}}],
+    [{"$match": {"v": {"$lt": 2 ** 60}}}],
+])
+def test_mixed_types_match_row_execution(pipeline: list[dict[str, Any]]) -> None:
+    assert list(ColumnarAggregation.aggregate(MIXED, pipeline, batch_size=2)) == list(LocalAggregation.aggregate(MIXED, pipeline))
+
+
+def test_large_integer_sums_stay_exact() -> None:
+    result = list(ColumnarAggregation.aggregate(MIXED, [{"$match": {"k": "c"}}, GROUP]))
+
+    assert result[0]["sum"] == 2 ** 60 + 1 and isinstance(result[0]["sum"], int)
+
+
+def test_plan_vectorizes_the_match_and_group_prefix() -> None:
+    grouped = ColumnarAggregation.plan(Pipelines.pipeline_1())
+    matched = ColumnarAggregation.plan(Pipelines.pipeline_7())
+
+    assert grouped is not None and grouped.group is not None and grouped.remaining == Pipelines.pipeline_1()[1:]
+    assert matched is not None and matched.group is None and matched.predicates == [("maker", "Hyundai")]
+    assert ColumnarAggregation.plan(Pipelines.pipeline_2()) is None
+
+
+def test_source_query_fetches_only_the_grouped_fields() -> None:
+    filter_, projection, remaining = ColumnarAggregation.source_query(Pipelines.pipeline_3())
+
+    assert (filter_, projection, remaining) == ({}, {"model": 1, "price": 1, "_id": 0}, Pipelines.pipeline_3())
+    assert ColumnarAggregation.source_query(Pipelines.pipeline_7())[:2] == ({"maker": "Hyundai"}, None)
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from typing import Any, Mapping
+
+import bson
+import pytest
+
+from pymongo_datasets import Datasets
+from pymongo_pipelines import Pipelines
+
+
+def thawed(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: thawed(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thawed(item) for item in value]
+    return value
+
+
+def test_pipelines_import_without_pymongo() -> None:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    imported = subprocess.run([sys.executable, "-c", "import sys, pymongo_pipelines; print('pymongo' in sys.modules)"], cwd=root,
+                              capture_output=True, text=True, check=True)
+
+    assert imported.stdout.strip() == "False"
+
+
+@pytest.mark.parametrize("name, count", [("cars", 14), ("users", 5), ("orders", 5)])
+def test_samples_are_shared_read_only_and_copied_on_request(name: str, count: int) -> None:
+    sample = Datasets.sample(name)
+    documents = Datasets.documents(name)
+
+    assert len(sample) == count and sample is Datasets.sample(name)
+    assert [thawed(document) for document in sample] == documents == getattr(Pipelines, f"get_{name}_data")()
+    with pytest.raises(TypeError):
+        sample[0]["seen"] = True  # type: ignore[index]
+
+    documents[0]["seen"] = True
+    assert "seen" not in Datasets.documents(name)[0] and "seen" not in sample[0]
+
+
+@pytest.mark.parametrize("name", ["cars", "users", "orders"])
+def test_generated_datasets_depend_only_on_the_seed(name: str) -> None:
+    first = list(Datasets.generate(name, 200, seed=7, users=20))
+
+    assert len(first) == 200
+    assert first == list(Datasets.generate(name, 200, seed=7, users=20))
+    assert first != list(Datasets.generate(name, 200, seed=8, users=20))
+    assert list(Datasets.generate(name, 50, seed=7, users=20)) == first[:50]
+    assert set(first[0]) == set(Datasets.documents(name)[0])
+
+
+def test_orders_are_placed_by_generated_users() -> None:
+    users = {user["_id"] for user in Datasets.generate("users", 20)}
+
+    assert {order["user_id"] for order in Datasets.generate("orders", 500, users=20)} <= users
+    with pytest.raises(ValueError, match="Dataset must be one of"):
+        Datasets.generate("trucks", 1)
+
+
+class Collection:
+    """Collects what BulkLoader inserts (mongomock rejects the RawBSONDocuments it sends)."""
+
+    full_name = "Test.data"
+
+    def __init__(self) -> None:
+        self.inserted: list[Any] = []
+
+    def insert_many(self, documents: list[Any], ordered: bool = True) -> None:
+        self.inserted.extend(bson.decode(document.raw) for document in documents)
+
+
+def test_load_inserts_the_sample_or_a_generated_dataset() -> None:
+    cars, orders = Collection(), Collection()
+
+    assert Datasets.load(cars, "cars").inserted_count == 14
+    assert Datasets.load(orders, "orders", count=250, chunk_size=40, max_workers=2, report_every=100).inserted_count == 250
+
+    assert len({car.pop("_id") for car in cars.inserted}) == 14
+    assert cars.inserted == Datasets.documents("cars")
+    assert sorted(orders.inserted, key=lambda order: int(order["_id"][5:])) == list(Datasets.generate("orders", 250))
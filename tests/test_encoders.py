@@ -0,0 +1,64 @@
+import datetime
+import io
+import json
+from typing import Any
+
+import pytest
+from bson import Binary, Decimal128, Int64, ObjectId, json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS, RELAXED_JSON_OPTIONS
+
+import pymongo_encoders
+from pymongo_encoders import OutputEncoders
+from pymongo_pipelines import Pipelines
+from pymongo_streaming import DocumentStream
+
+UPDATED = datetime.datetime(2024, 1, 1, 12, 30, tzinfo=datetime.timezone.utc)
+DOCUMENTS: list[dict[str, Any]] = [
+    *({"_id": ObjectId(), "updated": UPDATED, **car} for car in Pipelines.get_cars_data()),
+    {"_id": ObjectId(), "price": Decimal128("1999.99"), "mileage": Int64(42), "ratio": 0.5, "serial": Binary(b"\x00\x01"),
+     "nested": {"tags": ("a", "b"), "empty": []}},
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(pymongo_encoders, "orjson", None)
+    return request.param
+
+
+def test_default_array_output_is_unchanged() -> None:
+    sink = io.StringIO()
+
+    DocumentStream.write_json_array(DOCUMENTS, sink, indent=4)
+
+    assert sink.getvalue() == json.dumps(DOCUMENTS, indent=4, default=json_util.default) + "\n"
+
+
+@pytest.mark.parametrize("name, json_options", [("relaxed", RELAXED_JSON_OPTIONS), ("canonical", CANONICAL_JSON_OPTIONS)])
+def test_extended_json_matches_json_util(backend: str, name: str, json_options: Any) -> None:
+    encoder = OutputEncoders.get(name)
+
+    for document in DOCUMENTS + [{"nan": float("nan"), "inf": float("-inf")}]:
+        assert encoder.encode(document) == json_util.dumps(document, json_options=json_options, separators=(",", ":"))
+        assert json.loads(encoder.encode(document, indent=2)) == json.loads(json_util.dumps(document, json_options=json_options))
+
+
+def test_compact_lines_decode_to_the_same_values(backend: str) -> None:
+    sink = io.StringIO()
+
+    count = DocumentStream.write_json_lines(DOCUMENTS, sink, encoder="compact", flush_every=3)
+
+    lines = sink.getvalue().splitlines()
+    assert count == len(lines) == len(DOCUMENTS)
+    assert [json_util.loads(line) for line in lines] == json_util.loads(json_util.dumps(DOCUMENTS))
+
+
+def test_unknown_encoder_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown output encoder 'yaml'"):
+        DocumentStream.to_json_line({}, "yaml")
+    with pytest.raises(ValueError, match="Unknown output encoder"):
+        DocumentStream.configure(encoder="yaml")
+    assert OutputEncoders.default == "json_util"
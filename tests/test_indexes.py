@@ -0,0 +1,42 @@
+from pymongo_indexes import IndexManager, IndexSpec, index_keys
+
+ID_INDEX = {"v": 2, "key": {"_id": 1}, "name": "_id_"}
+
+
+def text_index(key: dict, weights: dict, name: str) -> dict:
+    return {"v": 2, "key": key, "name": name, "weights": weights, "default_language": "english", "language_override": "language",
+            "textIndexVersion": 3}
+
+
+def test_text_index_keys_are_rebuilt_from_weights() -> None:
+    index = text_index({"category": 1, "_fts": "text", "_ftsx": 1, "year": -1}, {"title": 1, "body": 1}, "compound_text")
+
+    assert index_keys(index) == (("category", 1), ("body", "text"), ("title", "text"), ("year", -1))
+
+
+def test_existing_text_index_is_unchanged() -> None:
+    existing = [ID_INDEX, text_index({"_fts": "text", "_ftsx": 1}, {"content": 1}, "content_text")]
+    plan = IndexManager.plan(existing, [IndexSpec.of([("content", "text")])])
+
+    assert plan.unchanged == ["content_text"]
+    assert not plan.create and not plan.conflicts
+
+
+def test_text_field_order_does_not_matter() -> None:
+    existing = [ID_INDEX, text_index({"maker": 1, "_fts": "text", "_ftsx": 1}, {"model": 1, "features": 1}, "search")]
+    plan = IndexManager.plan(existing, [IndexSpec.of([("maker", 1), ("model", "text"), ("features", "text")], name="search")])
+
+    assert plan.unchanged == ["search"]
+
+
+def test_different_text_fields_are_a_conflict() -> None:
+    existing = [ID_INDEX, text_index({"_fts": "text", "_ftsx": 1}, {"content": 1}, "content_text")]
+    plan = IndexManager.plan(existing, [IndexSpec.of([("content", "text"), ("title", "text")], name="content_text")])
+
+    assert plan.conflicts and not plan.create
+
+
+def test_regular_index_is_unchanged() -> None:
+    existing = [ID_INDEX, {"v": 2, "key": {"maker": 1, "price": -1.0}, "name": "maker_1_price_-1"}]
+
+    assert IndexManager.plan(existing, [IndexSpec.of(["maker", ("price", -1)])]).unchanged == ["maker_1_price_-1"]
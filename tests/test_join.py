@@ -0,0 +1,28 @@
+from typing import Any
+
+import pytest
+
+from pymongo_join import JoinExecutor, JoinSpec
+from pymongo_pipelines import Pipelines
+
+SPEC = JoinSpec("orders", "_id", "user_id", "orders")
+
+
+@pytest.mark.parametrize("after", [
+    [{"$unwind": "$orders"}],
+    [{"$lookup": {"from": "products", "localField": "orders.product", "foreignField": "_id", "as": "product"}}],
+    [{"$out": "joined"}],
+    [{"$merge": {"into": "joined"}}],
+    [{"$project": {"top": {"$top": {"output": "$orders", "sortBy": {"amount": -1}}}}}],
+])
+def test_stages_needing_the_server_block_the_client_join(after: list[dict[str, Any]]) -> None:
+    assert JoinExecutor.client_blocker(after) is not None
+    with pytest.raises(ValueError, match="Cannot join client-side"):
+        JoinExecutor.execute(None, None, SPEC, "client", after=after)  # type: ignore[arg-type]
+
+
+def test_library_join_runs_client_side() -> None:
+    _, _, after = JoinExecutor.split(Pipelines.join_pipeline())
+
+    assert JoinExecutor.client_blocker(after) is None
+    assert JoinExecutor.client_blocker([]) is None
@@ -0,0 +1,52 @@
+from typing import Any
+
+import pytest
+
+from pymongo_aggregation import LocalAggregation
+from pymongo_optimizer import PipelineOptimizer
+from pymongo_pipelines import Pipelines
+
+
+def collections() -> dict[str, list[dict[str, Any]]]:
+    return {"cars": Pipelines.get_cars_data(), "users": Pipelines.get_users_data(), "orders": Pipelines.get_orders_data()}
+
+
+@pytest.mark.parametrize("name", [f"pipeline_{number}" for number in range(1, 11)] + ["join_pipeline"])
+def test_library_results_unchanged(name: str) -> None:
+    pipeline = getattr(Pipelines, name)()
+    source = Pipelines.get_users_data() if name == "join_pipeline" else Pipelines.get_cars_data()
+    optimized = PipelineOptimizer.optimize(pipeline).pipeline
+
+    assert list(LocalAggregation.aggregate(source, optimized, collections())) == list(LocalAggregation.aggregate(source, pipeline, collections()))
+
+
+def test_nested_inclusion_is_read_as_paths() -> None:
+    pipeline = [{"$sort": {"price": 1}}, {"$project": {"engine": {"cc": 1}, "price": 1}}]
+
+    assert PipelineOptimizer.needed_fields(pipeline) == {"_id", "engine.cc", "price"}
+    injected = PipelineOptimizer.optimize(pipeline).pipeline[0]["$project"]
+    assert "engine.cc" in injected and "price" in injected
+
+
+def test_nested_computed_field_is_not_an_inclusion() -> None:
+    pipeline = [{"$sort": {"price": 1}}, {"$project": {"engine": {"size": "$engine.cc"}}}]
+
+    assert PipelineOptimizer.needed_fields(pipeline) == {"_id", "engine.cc", "price"}
+
+
+def test_top_sort_by_keeps_its_fields() -> None:
+    pipeline = [{"$group": {"_id": "$maker", "top": {"$top": {"output": "$model", "sortBy": {"price": -1}}}}}]
+
+    assert PipelineOptimizer.needed_fields(pipeline) is None
+    assert PipelineOptimizer.optimize(pipeline).pipeline == pipeline
+
+
+def test_get_field_shorthand_keeps_its_field() -> None:
+    pipeline = [{"$sort": {"maker": 1}}, {"$project": {"maker": 1, "p": {"$getField": "price"}}}]
+
+    assert PipelineOptimizer.needed_fields(pipeline) is None
+    assert PipelineOptimizer.optimize(pipeline).pipeline[0] == {"$sort": {"maker": 1}}
+
+
+def test_unknown_operator_reads_everything() -> None:
+    assert PipelineOptimizer.needed_fields([{"$set": {"x": {"$someFutureOperator": "price"}}}, {"$project": {"x": 1}}]) is None
@@ -0,0 +1,95 @@
+from typing import Any
+
+import pytest
+
+from pymongo_pagination import KeysetPaginator, Page
+from pymongo_pipelines import Pipelines
+
+
+@pytest.fixture
+def cars(database: Any) -> Any:
+    collection = database["cars"]
+    collection.insert_many([{"_id": number, **car} for number, car in enumerate(Pipelines.get_cars_data())])
+    return collection
+
+
+def forward(collection: Any, **options: Any) -> list[Page]:
+    pages = [KeysetPaginator.page(collection, **options)]
+    while pages[-1].has_next:
+        pages.append(KeysetPaginator.page(collection, token=pages[-1].next_token, **options))
+    return pages
+
+
+def ids(pages: list[Page]) -> list[Any]:
+    return [document["_id"] for page in pages for document in page.documents]
+
+
+def sorted_ids(collection: Any, sort: list[tuple[str, int]]) -> list[Any]:
+    return [document["_id"] for document in collection.find({}, {"_id": 1}, sort=KeysetPaginator.sort_keys(sort))]
+
+
+@pytest.mark.parametrize("sort", [None, [("price", 1)], [("price", -1)], [("maker", 1), ("price", -1)], [("engine.cc", 1)]])
+def test_forward_pages_return_every_document_once_in_order(cars: Any, sort: list[tuple[str, int]] | None) -> None:
+    # Page size 1 puts every tie on the sort key (two cars at 800000, two at 1200000) across a page boundary
+    for page_size in (1, 3, 100):
+        pages = forward(cars, page_size=page_size, sort=sort)
+
+        assert ids(pages) == sorted_ids(cars, sort)
+        assert not pages[0].has_previous and not pages[-1].has_next
+
+
+def test_backward_pages_from_the_end(cars: Any) -> None:
+    pages = [KeysetPaginator.page(cars, page_size=4, sort=[("price", 1)], from_end=True)]
+    while pages[-1].has_previous:
+        pages.append(KeysetPaginator.page(cars, page_size=4, token=pages[-1].previous_token, sort=[("price", 1)]))
+
+    assert ids(list(reversed(pages))) == sorted_ids(cars, [("price", 1)])
+    assert [len(page.documents) for page in pages] == [4, 4, 4, 2]
+
+
+def test_previous_token_returns_the_page_before(cars: Any) -> None:
+    first = KeysetPaginator.page(cars, page_size=5, sort=[("price", -1)])
+    second = KeysetPaginator.page(cars, page_size=5, token=first.next_token, sort=[("price", -1)])
+    back = KeysetPaginator.page(cars, page_size=5, token=second.previous_token, sort=[("price", -1)])
+
+    assert back.documents == first.documents
+    assert back.has_next and not back.has_previous
+
+
+def test_signed_tokens_round_trip_and_reject_tampering(cars: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(KeysetPaginator, "secret", b"secret")
+    first = KeysetPaginator.page(cars, page_size=5)
+    body, _, signature = first.next_token.partition(".")
+
+    assert ids([KeysetPaginator.page(cars, page_size=5, token=first.next_token)]) == sorted_ids(cars, None)[5:10]
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        KeysetPaginator.page(cars, page_size=5, token=body + "." + "0" * len(signature))
+
+
+def test_token_from_another_query_is_rejected(cars: Any) -> None:
+    token = KeysetPaginator.page(cars, page_size=2, filter_={"maker": "Hyundai"}, sort=[("price", 1)]).next_token
+
+    assert token is not None
+
+    with pytest.raises(ValueError, match="does not belong"):
+        KeysetPaginator.page(cars, page_size=5, token=token, filter_={"maker": "Tata"}, sort=[("price", 1)])
+    with pytest.raises(ValueError, match="does not belong"):
+        KeysetPaginator.page(cars, page_size=5, token=token, filter_={"maker": "Hyundai"}, sort=[("price", -1)])
+
+
+@pytest.mark.parametrize("projection, fields", [
+    ({"model": 1}, {"_id", "model"}),
+    ({"_id": 0, "model": 1}, {"model"}),
+    ({"engine.type": 1}, {"_id", "engine"}),
+    ({"engine": 0, "owners": 0, "service_history": 0, "features": 0}, {"_id", "maker", "model", "fuel_type", "transmission", "price",
+                                                                       "sunroof", "airbags"}),
+])
+def test_sort_keys_outside_the_projection_are_stripped(cars: Any, projection: dict[str, Any], fields: set[str]) -> None:
+    pages = forward(cars, page_size=4, sort=[("engine.cc", 1)], projection=projection)
+
+    assert sum(len(page.documents) for page in pages) == cars.count_documents({})
+    for page in pages:
+        for document in page.documents:
+            assert set(document) == fields
+            if "engine" in document:
+                assert set(document["engine"]) == {"type"}
@@ -0,0 +1,66 @@
+import io
+import json
+from typing import Any
+
+import bson
+import pytest
+from bson import json_util
+from bson.errors import InvalidBSON
+from bson.raw_bson import RawBSONDocument
+
+from pymongo_pipelines import Pipelines
+from pymongo_raw import RawDocuments
+from pymongo_streaming import DocumentStream
+
+CARS: list[dict[str, Any]] = [{"_id": number, **car} for number, car in enumerate(Pipelines.get_cars_data())]
+BATCH: bytes = b"".join(bson.encode(car) for car in CARS)
+
+
+def test_batches_split_into_the_original_documents() -> None:
+    views = list(RawDocuments.split(BATCH))
+
+    assert RawDocuments.count(BATCH) == len(CARS)
+    assert [RawDocuments.decode(view) for view in views] == CARS
+    assert [RawDocuments.decode(document) for document in RawDocuments.documents([BATCH[:len(views[0])], BATCH[len(views[0]):]])] == CARS
+
+
+@pytest.mark.parametrize("batch", [BATCH[:-1], BATCH + b"\x01\x00", b"\x04\x00\x00\x00" + BATCH[4:]])
+def test_damaged_batches_are_rejected(batch: bytes) -> None:
+    with pytest.raises(InvalidBSON):
+        list(RawDocuments.split(batch))
+
+
+def test_bson_files_round_trip_without_decoding() -> None:
+    sink = io.BytesIO()
+    documents = list(RawDocuments.documents([BATCH]))
+
+    assert RawDocuments.write_bson([BATCH[:0], BATCH], sink) == (len(CARS), len(BATCH))
+    assert RawDocuments.write_bson(documents[:2], sink) == (2, len(documents[0].raw) + len(documents[1].raw))
+
+    sink.seek(0)
+    restored = list(RawDocuments.read_bson(sink))
+    assert all(isinstance(document, RawBSONDocument) for document in restored)
+    assert [RawDocuments.decode(document) for document in restored] == CARS + CARS[:2]
+
+
+def test_dotted_fields_are_read_from_raw_documents() -> None:
+    car = next(RawDocuments.documents([BATCH]))
+
+    assert RawDocuments.get(car, "engine.cc") == CARS[0]["engine"]["cc"]
+    assert isinstance(RawDocuments.get(car, "engine"), RawBSONDocument)
+    assert RawDocuments.get(car, "owners.1.name") == CARS[0]["owners"][1]["name"]
+    assert RawDocuments.get(car, "owners.9.name", "none") == "none"
+    assert RawDocuments.get(car, "maker.name") is None
+    with pytest.raises(ValueError, match="must not be empty"):
+        RawDocuments.get(car, "")
+
+
+@pytest.mark.parametrize("encoder", ["json_util", "compact", "relaxed"])
+def test_raw_documents_are_written_like_decoded_ones(encoder: str) -> None:
+    documents = list(RawDocuments.documents([BATCH]))
+
+    lines = list(DocumentStream.to_json_lines(documents, encoder))
+
+    assert [json_util.loads(line) for line in lines] == CARS
+    assert lines == list(DocumentStream.to_json_lines(CARS, encoder))
+    assert json.loads(lines[0])["engine"] == CARS[0]["engine"]
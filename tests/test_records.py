@@ -0,0 +1,63 @@
+from typing import Any
+
+import bson
+import pytest
+from bson.raw_bson import RawBSONDocument
+
+from pymongo_datasets import Datasets
+from pymongo_records import RECORD_CODEC_OPTIONS, Car, Engine, Order, Owner, Records, User
+
+
+@pytest.mark.parametrize("name, record_type", [("cars", Car), ("users", User), ("orders", Order)])
+def test_records_round_trip_the_samples_and_generated_data(name: str, record_type: type) -> None:
+    documents = Datasets.documents(name) + list(Datasets.generate(name, 100, seed=3))
+
+    records = [record_type.from_document(document) for document in documents]
+
+    assert [record.to_document() for record in records] == documents
+    assert not hasattr(records[0], "__dict__")
+
+
+def test_nested_documents_become_records_and_strings_are_shared() -> None:
+    car = Car.from_document(Datasets.documents("cars")[0])
+    # Equal strings built separately, so only interning can make them the same object
+    first, second = (Order.from_document({"product": "".join(["Lap", "top"]), "user_id": f"user{number}"}) for number in (1, 1))
+
+    assert isinstance(car.engine, Engine) and isinstance(car.owners, tuple) and isinstance(car.owners[0], Owner)
+    assert isinstance(car.features, tuple)
+    assert first.product is second.product and first.user_id is second.user_id
+
+
+def test_unknown_fields_are_kept_and_nulls_dropped() -> None:
+    document = {"_id": 1, "maker": "Tata", "color": "red", "engine": {"cc": 1199, "valves": 12}, "price": None, "owners": [{"name": "Ravi"}, "gift"]}
+
+    car = Car.from_document(document)
+
+    assert car.extra == {"color": "red"} and car.engine.extra == {"valves": 12}
+    assert car.to_document() == {"_id": 1, "maker": "Tata", "engine": {"cc": 1199, "valves": 12}, "owners": [{"name": "Ravi"}, "gift"],
+                                 "color": "red"}
+
+
+def test_every_input_form_decodes_to_the_same_records() -> None:
+    orders = Datasets.documents("orders")
+    encoded = [bson.encode(order) for order in orders]
+    expected = [Order.from_document(order) for order in orders]
+
+    assert list(Records.decode([RawBSONDocument(data) for data in encoded], Order)) == expected
+    assert list(Records.decode([memoryview(data) for data in encoded], Order)) == expected
+    assert list(Records.decode(orders, Order)) == expected
+    assert Records.decode_all(b"".join(encoded), Order) == expected
+
+
+def test_records_in_queries_encode_as_documents() -> None:
+    update: dict[str, Any] = {"$push": {"owners": Owner("Asha", "2024-01-01", "Pune")}}
+
+    assert bson.decode(bson.encode(update, codec_options=RECORD_CODEC_OPTIONS)) == {
+        "$push": {"owners": {"name": "Asha", "purchase_date": "2024-01-01", "location": "Pune"}}}
+
+
+def test_record_type_follows_the_collection() -> None:
+    assert Records.record_type("users") is User
+    assert Records.record_type("trucks", Car) is Car
+    with pytest.raises(ValueError, match="No record type for 'trucks'"):
+        Records.record_type("trucks")
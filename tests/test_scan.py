@@ -0,0 +1,105 @@
+import threading
+from typing import Any, Iterator
+
+import pytest
+
+from pymongo_scan import ParallelScan, ScanPartition
+
+
+class Cursor:
+    """mongomock cursors have no ``min``/``max``; this applies the ``_id`` index bounds itself."""
+
+    def __init__(self, documents: list[dict[str, Any]], fail_from: Any = None) -> None:
+        self.documents = documents
+        self.fail_from = fail_from
+
+    def hint(self, index: list[tuple[str, int]]) -> "Cursor":
+        assert index == [("_id", 1)]
+        return self
+
+    def min(self, bounds: list[tuple[str, Any]]) -> "Cursor":
+        return Cursor([document for document in self.documents if document["_id"] >= dict(bounds)["_id"]], self.fail_from)
+
+    def max(self, bounds: list[tuple[str, Any]]) -> "Cursor":
+        return Cursor([document for document in self.documents if document["_id"] < dict(bounds)["_id"]], self.fail_from)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for document in self.documents:
+            if self.fail_from is not None and document["_id"] >= self.fail_from:
+                raise RuntimeError("connection lost")
+            yield document
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class Collection:
+    def __init__(self, collection: Any, fail_from: Any = None) -> None:
+        self.collection = collection
+        self.full_name = collection.full_name
+        self.fail_from = fail_from
+
+    def estimated_document_count(self) -> int:
+        return self.collection.estimated_document_count()
+
+    def aggregate(self, pipeline: list[dict[str, Any]]) -> Any:
+        return self.collection.aggregate(pipeline)
+
+    def find(self, filter_: dict[str, Any], projection: dict[str, Any] | None = None, batch_size: int = 0) -> Cursor:
+        return Cursor(list(self.collection.find(filter_, projection, sort=[("_id", 1)])), self.fail_from)
+
+
+@pytest.fixture
+def numbers(database: Any) -> Collection:
+    database["numbers"].insert_many([{"_id": number, "even": number % 2 == 0} for number in range(100)])
+    return Collection(database["numbers"])
+
+
+def scan_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("parallel-scan")]
+
+
+def test_partitions_cover_the_id_range_in_order(numbers: Any) -> None:
+    ranges = ParallelScan.partitions(numbers, 4, min_partition_documents=10)
+    points = [partition.upper["_id"] for partition in ranges[:-1]]
+
+    assert ranges[0].lower is None and ranges[-1].upper is None
+    assert points == sorted(set(points)) and 2 <= len(ranges) <= 4
+    assert [partition.lower for partition in ranges[1:]] == [partition.upper for partition in ranges[:-1]]
+    assert ParallelScan.partitions(numbers, 4, min_partition_documents=60) == [ScanPartition(0)]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_scan_yields_every_matching_document_once(numbers: Any, ordered: bool) -> None:
+    documents = list(ParallelScan.scan(numbers, {"even": True}, {"even": 0}, partitions=5, max_workers=3, batch_size=7,
+                                       ordered=ordered, prefetch=1))
+
+    expected = [{"_id": number} for number in range(0, 100, 2)]
+    assert (documents if ordered else sorted(documents, key=lambda document: document["_id"])) == expected
+    assert not scan_threads()
+
+
+def test_worker_errors_reach_the_consumer(numbers: Any) -> None:
+    numbers.fail_from = 50
+
+    with pytest.raises(RuntimeError, match="connection lost"):
+        list(ParallelScan.scan(numbers, partitions=5, max_workers=3, batch_size=5))
+    assert not scan_threads()
+
+
+def test_closing_the_scan_early_stops_the_workers(numbers: Any) -> None:
+    documents = ParallelScan.scan(numbers, partitions=5, max_workers=3, batch_size=5, prefetch=1)
+
+    assert next(documents) == {"_id": 0, "even": True}
+    documents.close()
+
+    assert not scan_threads()
+
+
+def test_invalid_scan_options_are_rejected(numbers: Any) -> None:
+    for options in ({"max_workers": 0}, {"batch_size": 0}, {"prefetch": 0}, {"partitions": -1}):
+        with pytest.raises(ValueError, match="must be a positive integer"):
+            ParallelScan.scan(numbers, **options)
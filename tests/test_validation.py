@@ -0,0 +1,42 @@
+from typing import Any, Optional
+
+import pytest
+
+from pymongo_validation import DocumentValidator
+
+SCHEMA: dict[str, Any] = {"$jsonSchema": {"bsonType": "object", "required": ["name"]}}
+
+
+class Database:
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.options = options
+
+    def list_collections(self, filter: dict[str, Any]) -> list[dict[str, Any]]:
+        return [{"name": filter["name"], "type": "collection", "options": self.options}]
+
+
+class Collection:
+    name = "users"
+
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.database = Database(options)
+
+
+@pytest.mark.parametrize("options", [{"validator": SCHEMA, "validationLevel": "off"},
+                                     {"validator": SCHEMA, "validationAction": "warn"},
+                                     {}])
+def test_nothing_is_held_back_when_the_server_accepts_invalid_documents(options: dict[str, Any]) -> None:
+    assert DocumentValidator.for_collection(Collection(options)) is None  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("level", [None, "strict", "moderate"])
+def test_inserts_are_validated_under_strict_and_moderate(level: Optional[str]) -> None:
+    options: dict[str, Any] = {"validator": SCHEMA, "validationAction": "error"}
+    if level is not None:
+        options["validationLevel"] = level
+    validator = DocumentValidator.for_collection(Collection(options))  # type: ignore[arg-type]
+
+    assert validator is not None
+    rejects: list[dict[str, Any]] = []
+    accepted = list(DocumentValidator.filter([{"name": "Ravi"}, {"email": "x@example.com"}], validator, rejects.append))
+    assert accepted == [{"name": "Ravi"}] and rejects[0]["code"] == 121
@@ -0,0 +1,65 @@
+from typing import Any
+
+import pytest
+
+from pymongo_aggregation import LocalAggregation
+from pymongo_pipelines import Pipelines
+from pymongo_views import ViewPlan
+
+
+@pytest.mark.parametrize("stage", [
+    {"$lookup": {"from": "orders", "localField": "_id", "foreignField": "user_id", "as": "orders"}},
+    {"$graphLookup": {"from": "users", "startWith": "$_id", "connectFromField": "_id", "connectToField": "referrer", "as": "referrals"}},
+    {"$unionWith": "archived_users"},
+])
+def test_stages_reading_other_collections_are_rejected(stage: dict) -> None:
+    with pytest.raises(ValueError, match="only the source collection is watched"):
+        ViewPlan.of([{"$match": {"name": {"$exists": True}}}, stage])
+
+
+def test_join_pipeline_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        ViewPlan.of(Pipelines.join_pipeline())
+
+
+def cars() -> list[dict[str, Any]]:
+    return [{"_id": number, **car} for number, car in enumerate(Pipelines.get_cars_data())]
+
+
+def results(pipeline: list[dict[str, Any]], keep_id: bool) -> list[dict[str, Any]]:
+    documents = LocalAggregation.aggregate(cars(), [stage for stage in pipeline if "$out" not in stage])
+    # A view has no order, and keeps the _id the pipeline may have projected away
+    return sorted((document if keep_id else {key: value for key, value in document.items() if key != "_id"} for document in documents), key=repr)
+
+
+@pytest.mark.parametrize("number", range(1, 11))
+def test_library_pipelines_are_maintained_with_the_same_results(number: int) -> None:
+    pipeline = getattr(Pipelines, f"pipeline_{number}")()
+    plan = ViewPlan.of(pipeline)
+    keep_id = all("_id" in document for document in results(pipeline, True))
+
+    assert results(plan.pipeline, keep_id) == results(pipeline, keep_id)
+    assert all("_id" in document for document in LocalAggregation.aggregate(cars(), plan.pipeline))
+
+
+def test_grouped_pipeline_is_keyed_by_the_group() -> None:
+    plan = ViewPlan.of(Pipelines.pipeline_1())
+
+    assert plan.grouped and plan.key_fields == {"": "fuel_type"}
+    assert plan.before == [] and plan.group == Pipelines.pipeline_1()[0]["$group"]
+    assert plan.after == [{"$project": {"fuel_type": {"$toUpper": "$_id"}, "total_cars": 1, "engine_over_1000_cc": 1}}]
+    assert plan.rewrites == ("Dropped $sort at stage 1: a collection has no order.", "Kept _id in stage 2 ($project): view documents are keyed by it.")
+
+
+def test_per_document_pipeline_drops_its_output_stage_and_keeps_id() -> None:
+    plan = ViewPlan.of(Pipelines.pipeline_4())
+
+    assert not plan.grouped and plan.key_fields is None
+    assert plan.pipeline == [{"$match": {"maker": "Hyundai"}}, {"$project": {"car_name": {"$toUpper": {"$concat": ["maker", " ", "model"]}}}}]
+
+
+def test_projection_that_only_removes_id_is_dropped() -> None:
+    plan = ViewPlan.of([{"$match": {"maker": "Tata"}}, {"$project": {"_id": 0}}, {"$unset": "_id"}])
+
+    assert plan.pipeline == [{"$match": {"maker": "Tata"}}]
+    assert len(plan.rewrites) == 2